@@ -0,0 +1,66 @@
+"""
+Cache des réponses rendues (listes et détails) des référentiels.
+
+Le corps JSON rendu est conservé dans le cache `default` (mémoire locale,
+fichiers ou Redis selon CACHE_URL, voir settings.py), sous une clé calculée
+à partir :
+- de l'endpoint (classe de vue et action) et de la permission requise ;
+- de l'URL absolue (paramètres compris ; les liens de pagination en
+  dépendent) et du type de média ;
+- des versions des collections rendues par le serializer (versions.py).
+Une écriture sur un modèle rendu incrémente sa version : les entrées qui en
+dépendent ne sont plus lues et expirent après REPONSES_CACHE_DUREE secondes.
+Les permissions sont vérifiées avant toute lecture du cache (initial() de la
+vue). Succès et échecs sont comptés par endpoint (metriques.py). Sans cache
+partagé par les workers (CACHE_PARTAGE), les réponses ne sont pas mises en cache.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+from .metriques import registre
+from .versions import cache_partage, empreinte, etat_vue
+
+PREFIXE_CLE = "reponses:"
+
+
+class CacheReponsesMixin:
+    """
+    Mixin de ViewSet : actions list et retrieve rendues en JSON servies par
+    le cache des réponses. Désactivé par REPONSES_CACHE = False ou sans cache
+    partagé. Les modèles rendus doivent avoir leur version suivie (signaux de
+    stock/signals.py).
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.reponse_en_cache(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.reponse_en_cache(super().retrieve, request, *args, **kwargs)
+
+    def reponse_en_cache(self, vue, request, *args, **kwargs):
+        if not getattr(settings, 'REPONSES_CACHE', True) or not cache_partage() \
+                or not isinstance(request.accepted_renderer, JSONRenderer):
+            return vue(request, *args, **kwargs)
+        endpoint = f"{type(self).__name__}.{self.action}"
+        versions, _ = etat_vue(self)
+        cle = PREFIXE_CLE + empreinte(
+            endpoint, getattr(self, 'required_permission', None), request.build_absolute_uri(),
+            request.accepted_media_type, versions,
+        )
+
+        en_cache = cache.get(cle)
+        if en_cache is not None:
+            registre.compter_cache(endpoint, 'succes')
+            contenu, type_contenu = en_cache
+            return HttpResponse(contenu, content_type=type_contenu)
+
+        registre.compter_cache(endpoint, 'echec')
+        reponse = vue(request, *args, **kwargs)
+        if reponse.status_code == 200:
+            duree = getattr(settings, 'REPONSES_CACHE_DUREE', 3600)
+            reponse.add_post_render_callback(
+                lambda rendue: cache.set(cle, (rendue.content, rendue['Content-Type']), duree)
+            )
+        return reponse
@@ -0,0 +1,103 @@
+"""
+Champs choisis par la requête (sparse fieldsets) pour les serializers de lecture.
+
+- `?fields=id,total,lignes.quantite` : champs rendus, par chemin pointé ; un
+  niveau sans chemin demandé garde tous ses champs.
+- Dans les listes, les relations vers d'autres entités (ForeignKey,
+  ManyToMany) sont rendues sous forme compacte : identifiant et libellés
+  (reference, nom, username, codename selon le modèle). Les relations
+  possédées (FK inverse : lignes d'un document) restent imbriquées.
+- `?expand=produit,lignes.produit,created_by` : relations rendues comme dans
+  le détail, avec tout leur sous-arbre (`lignes.produit` développe le
+  produit des lignes, les autres relations des lignes restent compactes).
+
+Le serializer est élagué en place (appliquer_selection) ; le plan de
+chargement anticipé est calculé sur le serializer élagué (voir
+eager_loading.py) : une relation non demandée n'est ni jointe ni préchargée.
+"""
+from collections import namedtuple
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+Selection = namedtuple('Selection', ['champs', 'expand', 'compact'])
+
+# Champs de libellé repris dans la forme compacte, s'ils existent sur le modèle
+LIBELLES = ('reference', 'nom', 'username', 'codename')
+
+
+def _chemins(valeur):
+    return frozenset(chemin.strip() for chemin in (valeur or '').split(',') if chemin.strip())
+
+
+def lire_selection(query_params, compact=False):
+    """Sélection décrite par `fields` et `expand` ; None si la représentation complète est demandée."""
+    champs, expand = _chemins(query_params.get('fields')), _chemins(query_params.get('expand'))
+    if not (champs or expand or compact):
+        return None
+    return Selection(champs, expand, compact)
+
+
+@lru_cache(maxsize=None)
+def serializer_compact(model):
+    """Serializer de la forme compacte d'un modèle (clé primaire et libellés)."""
+    noms = {champ.name for champ in model._meta.get_fields()}
+    meta = type('Meta', (), {
+        'model': model,
+        'fields': [model._meta.pk.name] + [nom for nom in LIBELLES if nom in noms],
+    })
+    return type(f'{model.__name__}ResumeSerializer', (serializers.ModelSerializer,), {'Meta': meta})
+
+
+def _reference(model, source):
+    """Modèle cible si `source` est une relation vers une autre entité (FK, OneToOne, ManyToMany), None sinon."""
+    if model is None or '.' in source:
+        return None
+    try:
+        relation = model._meta.get_field(source)
+    except FieldDoesNotExist:
+        return None
+    if relation.is_relation and not relation.one_to_many:
+        return relation.related_model
+    return None
+
+
+def _niveau(chemins, prefixe):
+    return {chemin[len(prefixe):].split('.', 1)[0] for chemin in chemins if chemin.startswith(prefixe)}
+
+
+def appliquer_selection(serializer, selection, prefixe=''):
+    """
+    Élague en place les champs de `serializer` selon la sélection (récursivement
+    dans les serializers imbriqués). Lève ValidationError (400) pour un champ
+    inconnu ou une expansion qui ne vise pas une relation.
+    """
+    champs, expand = _niveau(selection.champs, prefixe), _niveau(selection.expand, prefixe)
+    for parametre, noms in (('fields', champs), ('expand', expand)):
+        inconnus = sorted(noms - serializer.fields.keys())
+        if inconnus:
+            raise ValidationError({parametre: f"Champ(s) inconnu(s) : {', '.join(prefixe + nom for nom in inconnus)}."})
+    if champs:
+        for nom in list(serializer.fields):
+            if nom not in champs:
+                del serializer.fields[nom]
+
+    model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+    for nom, champ in list(serializer.fields.items()):
+        multiple = isinstance(champ, serializers.ListSerializer)
+        imbrique = champ.child if multiple else champ
+        if not isinstance(imbrique, serializers.BaseSerializer):
+            if nom in expand:
+                raise ValidationError({'expand': f"{prefixe}{nom} n'est pas une relation."})
+            continue
+
+        cible = _reference(model, champ.source)
+        if selection.compact and nom not in expand and cible is not None:
+            options = {} if champ.source == nom else {'source': champ.source}
+            champ = serializer.fields[nom] = serializer_compact(cible)(many=multiple, read_only=True, **options)
+            imbrique = champ.child if multiple else champ
+        # Fin d'un chemin d'expansion : tout le sous-arbre en représentation complète
+        sous_selection = selection._replace(compact=False) if prefixe + nom in selection.expand else selection
+        appliquer_selection(imbrique, sous_selection, f'{prefixe}{nom}.')
@@ -0,0 +1,152 @@
+"""
+Chargement anticipé des relations déduit des serializers.
+
+Le plan de chargement (select_related / prefetch_related) est calculé en
+parcourant l'arbre des champs du serializer :
+- relation simple (ForeignKey, OneToOne) -> select_related, parcours récursif ;
+- relation multiple (FK inverse, ManyToMany) -> Prefetch avec un queryset
+  lui-même optimisé selon le serializer imbriqué.
+
+Un serializer imbriqué peut définir `preparer_queryset(queryset)` (méthode de
+classe) pour ajouter ses propres annotations au queryset de préchargement.
+
+Le nombre de requêtes d'une liste ne dépend ainsi plus du nombre de lignes.
+
+Les champs choisis par la requête (`?fields=`, `?expand=`, forme compacte des
+listes : voir champs.py) élaguent le serializer avant le calcul du plan.
+"""
+from collections import namedtuple
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+from .champs import appliquer_selection, lire_selection
+
+Plan = namedtuple('Plan', ['select', 'prefetch'])
+Prechargement = namedtuple('Prechargement', ['chemin', 'model', 'plan', 'serializer_class'])
+
+PLAN_VIDE = Plan(select=(), prefetch=())
+
+
+def _serializer_imbrique(champ):
+    """Retourne le serializer (ou None) porté par un champ, et s'il est multiple."""
+    if isinstance(champ, serializers.ListSerializer):
+        return champ.child, True
+    if isinstance(champ, serializers.BaseSerializer):
+        return champ, False
+    if isinstance(champ, serializers.ManyRelatedField):
+        return None, True
+    return None, False
+
+
+def _relation(model, nom):
+    try:
+        field = model._meta.get_field(nom)
+    except FieldDoesNotExist:
+        return None
+    return field if field.is_relation else None
+
+
+def construire_plan(serializer, model):
+    """Construit le plan de chargement d'un serializer (instance) pour un modèle."""
+    select, prefetch = [], []
+    _parcourir(serializer, model, '', select, prefetch)
+    return Plan(select=tuple(select), prefetch=tuple(prefetch))
+
+
+def _parcourir(serializer, model, prefixe, select, prefetch):
+    for champ in serializer.fields.values():
+        if champ.source == '*' or champ.write_only:
+            continue
+
+        imbrique, multiple = _serializer_imbrique(champ)
+        segments = champ.source.split('.')
+        courant, chemin = model, prefixe
+
+        for position, nom in enumerate(segments):
+            relation = _relation(courant, nom)
+            if relation is None:
+                break
+            dernier = position == len(segments) - 1
+
+            if relation.many_to_many or relation.one_to_many:
+                if dernier and (multiple or imbrique is not None):
+                    sous_plan = (
+                        construire_plan(imbrique, relation.related_model)
+                        if imbrique is not None else PLAN_VIDE
+                    )
+                    prefetch.append(Prechargement(
+                        chemin=chemin + nom,
+                        model=relation.related_model,
+                        plan=sous_plan,
+                        serializer_class=type(imbrique) if imbrique is not None else None,
+                    ))
+                break
+
+            # ForeignKey / OneToOne : une simple clé primaire se lit sans jointure
+            if dernier and imbrique is None:
+                break
+            select.append(chemin + nom)
+            courant, chemin = relation.related_model, chemin + nom + '__'
+            if dernier:
+                _parcourir(imbrique, courant, chemin, select, prefetch)
+
+
+def appliquer_plan(queryset, plan):
+    """Applique un plan de chargement à un queryset."""
+    if plan.select:
+        queryset = queryset.select_related(*plan.select)
+    for prechargement in plan.prefetch:
+        sous_queryset = appliquer_plan(prechargement.model._default_manager.all(), prechargement.plan)
+        preparer = getattr(prechargement.serializer_class, 'preparer_queryset', None)
+        if preparer is not None:
+            sous_queryset = preparer(sous_queryset)
+        queryset = queryset.prefetch_related(Prefetch(prechargement.chemin, queryset=sous_queryset))
+    return queryset
+
+
+# Borné : la sélection de champs vient des paramètres de requête
+@lru_cache(maxsize=1024)
+def plan_pour_serializer(serializer_class, model, selection=None):
+    """Plan de chargement mis en cache par classe de serializer (et sélection de champs)."""
+    serializer = serializer_class()
+    if selection is not None:
+        appliquer_selection(serializer, selection)
+    return construire_plan(serializer, model)
+
+
+class EagerLoadingMixin:
+    """
+    Mixin de ViewSet : optimise `get_queryset()` selon le serializer de l'action
+    courante (select_related / prefetch_related automatiques), élagué selon
+    les champs demandés : les listes sont compactes par défaut.
+    """
+    def get_selection(self):
+        """Sélection de champs de la requête, pour les lectures (None : représentation complète)."""
+        if getattr(self, 'swagger_fake_view', False) or self.request is None \
+                or self.request.method not in SAFE_METHODS:
+            return None
+        return lire_selection(self.request.query_params, compact=self.action == 'list')
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        selection = self.get_selection()
+        if selection is not None:
+            appliquer_selection(
+                serializer.child if isinstance(serializer, serializers.ListSerializer) else serializer, selection,
+            )
+        return serializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        serializer_class = self.get_serializer_class()
+        queryset = appliquer_plan(
+            queryset, plan_pour_serializer(serializer_class, queryset.model, self.get_selection()),
+        )
+        preparer = getattr(serializer_class, 'preparer_queryset', None)
+        if preparer is not None:
+            queryset = preparer(queryset)
+        return queryset
@@ -0,0 +1,230 @@
+"""
+Lecture rapide des listes : lignes lues par values() et représentations
+assemblées en dictionnaires, sans instance de modèle ni serializer par ligne.
+
+La spec de lecture est compilée depuis le serializer de lecture (élagué par
+la sélection de champs, voir champs.py), une fois par classe et sélection :
+- champ de modèle -> colonne, convertie par le champ DRF (décimaux, dates)
+  ou reprise telle quelle (entiers, chaînes, booléens) ;
+- `get_<champ>_display` -> colonne et libellés des choix ;
+- serializer imbriqué sur une ForeignKey -> colonnes jointes (produit__nom) ;
+- serializer imbriqué multiple (FK inverse, ManyToMany) -> une requête par
+  relation pour toute la page, groupée par parent (comme prefetch_related) ;
+- colonnes SQL des propriétés déclarées par le serializer
+  (`colonnes_lecture`, ex. sous_total -> sous_total_sql de preparer_queryset).
+La sortie est identique à celle du serializer. Un champ hors de ces cas
+(SerializerMethodField, source pointée, ...) fait retomber la vue sur le
+chemin standard.
+"""
+from collections import defaultdict, namedtuple
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.utils.encoding import force_str
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .champs import appliquer_selection
+from .metriques import serialisation
+from .renderers import JSONRapideRenderer
+
+# Champ simple : colonne de values(), conversion (None : valeur reprise telle quelle)
+Simple = namedtuple('Simple', ['nom', 'colonne', 'convertir'])
+# Serializer imbriqué sur une ForeignKey : colonne de la clé étrangère (None -> null)
+Objet = namedtuple('Objet', ['nom', 'colonne', 'spec'])
+# Serializer imbriqué multiple : colonne de la clé du parent, requête des lignes filles
+Liste = namedtuple('Liste', ['nom', 'colonne', 'requete'])
+# Requête des lignes filles : filtrées et groupées par `lien` (clé du parent)
+Requete = namedtuple('Requete', ['queryset', 'lien', 'spec'])
+Spec = namedtuple('Spec', ['colonnes', 'champs'])
+
+# Champs DRF dont to_representation rend la valeur lue en base inchangée
+SANS_CONVERSION = (serializers.IntegerField, serializers.CharField, serializers.BooleanField, serializers.ReadOnlyField)
+
+
+class NonSupporte(Exception):
+    """Champ de serializer hors du périmètre de la lecture rapide."""
+
+
+def _champ_modele(model, nom):
+    try:
+        return model._meta.get_field(nom)
+    except FieldDoesNotExist:
+        return None
+
+
+def _convertisseur(champ):
+    return None if type(champ) in SANS_CONVERSION else champ.to_representation
+
+
+def _compiler(serializer, model, annotations, prefixe, colonnes):
+    """Champs de la spec d'un serializer ; `annotations` : noms annotés par la requête (None si jointure)."""
+    speciales = getattr(serializer, 'colonnes_lecture', {}) if annotations is not None else {}
+    annotations = annotations or ()
+    champs = []
+    for nom, champ in serializer.fields.items():
+        if champ.write_only:
+            continue
+        source = champ.source
+
+        if isinstance(champ, serializers.ListSerializer):
+            relation = _champ_modele(model, source)
+            if relation is None or not (relation.one_to_many or relation.many_to_many) \
+                    or not isinstance(champ.child, serializers.ModelSerializer):
+                raise NonSupporte(nom)
+            if relation.one_to_many or relation.auto_created:
+                lien = relation.field.name
+            else:
+                lien = relation.related_query_name()
+            sous_queryset = relation.related_model._default_manager.all()
+            preparer = getattr(type(champ.child), 'preparer_queryset', None)
+            if preparer is not None:
+                sous_queryset = preparer(sous_queryset)
+            sous_colonnes = [lien]
+            spec = Spec(None, tuple(_compiler(
+                champ.child, relation.related_model, set(sous_queryset.query.annotations), '', sous_colonnes,
+            )))
+            spec = spec._replace(colonnes=tuple(dict.fromkeys(sous_colonnes)))
+            colonne = prefixe + model._meta.pk.name
+            colonnes.append(colonne)
+            champs.append(Liste(nom, colonne, Requete(sous_queryset, lien, spec)))
+
+        elif isinstance(champ, serializers.ModelSerializer):
+            relation = _champ_modele(model, source)
+            if relation is None or not (relation.many_to_one or relation.one_to_one) or not relation.concrete:
+                raise NonSupporte(nom)
+            colonne = prefixe + source
+            colonnes.append(colonne)
+            spec = Spec(None, tuple(_compiler(champ, relation.related_model, None, colonne + '__', colonnes)))
+            champs.append(Objet(nom, colonne, spec))
+
+        elif isinstance(champ, serializers.PrimaryKeyRelatedField):
+            relation = _champ_modele(model, source)
+            if relation is None or not relation.many_to_one or champ.pk_field is not None:
+                raise NonSupporte(nom)
+            colonnes.append(prefixe + source)
+            champs.append(Simple(nom, prefixe + source, None))
+
+        elif source in speciales or source in annotations:
+            colonne = speciales.get(source, source)
+            colonnes.append(colonne)
+            champs.append(Simple(nom, colonne, _convertisseur(champ)))
+
+        elif source.startswith('get_') and source.endswith('_display'):
+            champ_choix = _champ_modele(model, source[4:-8])
+            if champ_choix is None or not champ_choix.choices or champ_choix.is_relation:
+                raise NonSupporte(nom)
+            libelles = {valeur: force_str(libelle) for valeur, libelle in champ_choix.flatchoices}
+            convertir = _convertisseur(champ)
+            colonnes.append(prefixe + champ_choix.name)
+            champs.append(Simple(
+                nom, prefixe + champ_choix.name,
+                lambda valeur, libelles=libelles, convertir=convertir: (
+                    libelles.get(valeur, valeur) if convertir is None else convertir(libelles.get(valeur, valeur))
+                ),
+            ))
+
+        else:
+            champ_modele = _champ_modele(model, source)
+            if champ_modele is None or champ_modele.is_relation or not champ_modele.concrete:
+                raise NonSupporte(nom)
+            colonnes.append(prefixe + source)
+            champs.append(Simple(nom, prefixe + source, _convertisseur(champ)))
+    return champs
+
+
+def compiler(serializer, model, annotations=()):
+    """
+    Spec de lecture d'un serializer pour un modèle (`annotations` : noms
+    annotés par le queryset), None si un champ n'est pas pris en charge.
+    """
+    colonnes = []
+    try:
+        champs = _compiler(serializer, model, set(annotations), '', colonnes)
+    except NonSupporte:
+        return None
+    return Spec(tuple(dict.fromkeys(colonnes)), tuple(champs))
+
+
+# Borné : la sélection de champs vient des paramètres de requête
+@lru_cache(maxsize=1024)
+def spec_pour(serializer_class, model, annotations=(), selection=None):
+    """Spec mise en cache par classe de serializer, modèle, annotations et sélection de champs."""
+    serializer = serializer_class()
+    if selection is not None:
+        appliquer_selection(serializer, selection)
+    return compiler(serializer, model, annotations)
+
+
+def _listes(spec):
+    for champ in spec.champs:
+        if type(champ) is Liste:
+            yield champ
+        elif type(champ) is Objet:
+            yield from _listes(champ.spec)
+
+
+def _objet(spec, ligne, groupes):
+    objet = {}
+    for champ in spec.champs:
+        valeur = ligne[champ.colonne]
+        if type(champ) is Simple:
+            objet[champ.nom] = valeur if valeur is None or champ.convertir is None else champ.convertir(valeur)
+        elif type(champ) is Objet:
+            objet[champ.nom] = None if valeur is None else _objet(champ.spec, ligne, groupes)
+        else:
+            objet[champ.nom] = groupes[id(champ)].get(valeur, [])
+    return objet
+
+
+def lire(spec, lignes):
+    """Représentations (dicts) des lignes de values() selon la spec ; une requête par relation multiple."""
+    groupes = {}
+    for liste in _listes(spec):
+        par_parent = defaultdict(list)
+        cles = {ligne[liste.colonne] for ligne in lignes} - {None}
+        if cles:
+            requete = liste.requete
+            sous_lignes = list(
+                requete.queryset.filter(**{f'{requete.lien}__in': cles}).values(*requete.spec.colonnes)
+            )
+            for sous_ligne, objet in zip(sous_lignes, lire(requete.spec, sous_lignes)):
+                par_parent[sous_ligne[requete.lien]].append(objet)
+        groupes[id(liste)] = par_parent
+    return [_objet(spec, ligne, groupes) for ligne in lignes]
+
+
+class ListeRapideMixin:
+    """
+    Mixin de ViewSet (avec EagerLoadingMixin) : action `list` servie par la
+    lecture rapide et rendue par orjson. Désactivée par LECTURE_RAPIDE = False ;
+    repli sur le chemin standard si le serializer n'est pas pris en charge.
+    """
+    renderer_classes = [JSONRapideRenderer] + [
+        renderer for renderer in api_settings.DEFAULT_RENDERER_CLASSES if renderer is not JSONRenderer
+    ]
+
+    def list(self, request, *args, **kwargs):
+        if not getattr(settings, 'LECTURE_RAPIDE', True):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        spec = spec_pour(
+            self.get_serializer_class(), queryset.model, tuple(queryset.query.annotations), self.get_selection(),
+        )
+        if spec is None:
+            return super().list(request, *args, **kwargs)
+
+        # Clé primaire (et date) lues en plus pour la pagination par curseur
+        colonnes = spec.colonnes + ('pk',) + tuple(
+            champ for champ in [getattr(self.paginator, 'champ_date', None)] if champ and champ not in spec.colonnes
+        )
+        lignes = queryset.prefetch_related(None).values(*colonnes)
+        page = self.paginate_queryset(lignes)
+        with serialisation():
+            donnees = lire(spec, page if page is not None else list(lignes))
+        if page is not None:
+            return self.get_paginated_response(donnees)
+        return Response(donnees)
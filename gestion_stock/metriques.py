@@ -0,0 +1,292 @@
+"""
+Instrumentation des requêtes HTTP : durée, requêtes SQL, sérialisation et
+taille de réponse, par endpoint (viewset.action).
+
+- MetriquesMiddleware (activé par METRIQUES_ACTIVES) mesure chaque requête :
+  les requêtes SQL passent par `connection.execute_wrapper` (nombre, durée,
+  texte). Le temps de sérialisation est cumulé par les vues DRF :
+  SerialisationMesureeMixin chronomètre `to_representation` des serializers
+  de la vue, la lecture rapide des listes (lecture_rapide.py) son bloc de
+  lecture, tous deux par `serialisation()`.
+- Les mesures sont agrégées en histogrammes dans le processus (un jeu par
+  worker) et exposées au format texte Prometheus par la vue `metriques`,
+  avec les succès et échecs du cache des réponses (cache_reponses.py),
+  comptés même si le middleware est inactif.
+- Une requête plus longue que METRIQUES_SEUIL_LENTE (secondes) est journalisée
+  (logger gestion_stock.metriques) avec les requêtes SQL les plus répétées :
+  un N+1 dans les serializers imbriqués y apparaît comme la même requête
+  exécutée des dizaines de fois.
+"""
+import bisect
+import hmac
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import Http404, HttpResponse
+
+logger = logging.getLogger(__name__)
+
+DUREES = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+NOMBRES = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+TAILLES = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+# Nombre de requêtes SQL répétées détaillées dans le journal des requêtes lentes
+DOUBLONS_JOURNALISES = 5
+
+# Noms des étiquettes, dans l'ordre des tuples d'étiquettes
+ETIQUETTES = ('endpoint', 'methode', 'statut')
+
+_mesure = ContextVar('mesure_requete', default=None)
+
+
+class Histogramme:
+    """Histogramme Prometheus (compteurs cumulés par borne), par jeu d'étiquettes."""
+
+    def __init__(self, nom, aide, bornes):
+        self.nom = nom
+        self.aide = aide
+        self.bornes = bornes
+        self.series = defaultdict(lambda: [[0] * (len(bornes) + 1), 0.0])
+
+    def observer(self, etiquettes, valeur):
+        compteurs, _ = serie = self.series[etiquettes]
+        compteurs[bisect.bisect_left(self.bornes, valeur)] += 1
+        serie[1] += valeur
+
+    def exposer(self):
+        lignes = [f"# HELP {self.nom} {self.aide}", f"# TYPE {self.nom} histogram"]
+        for etiquettes, (compteurs, somme) in sorted(self.series.items()):
+            cumul = 0
+            for borne, compteur in zip(self.bornes + ('+Inf',), compteurs):
+                cumul += compteur
+                lignes.append(f'{self.nom}_bucket{{{_etiquettes(etiquettes, le=borne)}}} {cumul}')
+            lignes.append(f'{self.nom}_sum{{{_etiquettes(etiquettes)}}} {somme:.6f}')
+            lignes.append(f'{self.nom}_count{{{_etiquettes(etiquettes)}}} {cumul}')
+        return lignes
+
+
+class Compteur:
+    """Compteur Prometheus, par jeu d'étiquettes (`noms` : noms des étiquettes)."""
+
+    def __init__(self, nom, aide, noms=ETIQUETTES):
+        self.nom = nom
+        self.aide = aide
+        self.noms = noms
+        self.series = defaultdict(int)
+
+    def incrementer(self, etiquettes):
+        self.series[etiquettes] += 1
+
+    def exposer(self):
+        lignes = [f"# HELP {self.nom} {self.aide}", f"# TYPE {self.nom} counter"]
+        lignes += [
+            f'{self.nom}{{{_etiquettes(etiquettes, self.noms)}}} {valeur}'
+            for etiquettes, valeur in sorted(self.series.items())
+        ]
+        return lignes
+
+
+def _etiquettes(etiquettes, noms=ETIQUETTES, **autres):
+    paires = list(zip(noms, etiquettes)) + [(cle, valeur) for cle, valeur in autres.items()]
+    return ','.join(f'{cle}="{_echapper(valeur)}"' for cle, valeur in paires)
+
+
+def _echapper(valeur):
+    return str(valeur).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Registre:
+    """Métriques agrégées du processus (protégées par un verrou)."""
+
+    def __init__(self):
+        self.verrou = threading.Lock()
+        self.reinitialiser()
+
+    def reinitialiser(self):
+        self.duree = Histogramme('gestock_requete_duree_secondes', "Durée de traitement de la requête.", DUREES)
+        self.sql_nombre = Histogramme('gestock_requete_sql_nombre', "Nombre de requêtes SQL par requête.", NOMBRES)
+        self.sql_duree = Histogramme('gestock_requete_sql_duree_secondes', "Durée cumulée des requêtes SQL.", DUREES)
+        self.serialisation = Histogramme(
+            'gestock_requete_serialisation_secondes', "Durée cumulée de sérialisation (to_representation).", DUREES,
+        )
+        self.taille = Histogramme('gestock_reponse_taille_octets', "Taille du corps de la réponse.", TAILLES)
+        self.requetes = Compteur('gestock_requetes_total', "Requêtes traitées, par statut HTTP.")
+        self.lentes = Compteur('gestock_requetes_lentes_total', "Requêtes dépassant METRIQUES_SEUIL_LENTE.")
+        self.cache_reponses = Compteur(
+            'gestock_cache_reponses_total', "Réponses lues dans le cache (succes) ou calculées (echec).",
+            ('endpoint', 'resultat'),
+        )
+
+    def enregistrer(self, mesure, statut, lente):
+        etiquettes = (mesure.endpoint, mesure.methode)
+        with self.verrou:
+            self.duree.observer(etiquettes, mesure.duree)
+            self.sql_nombre.observer(etiquettes, mesure.sql_nombre)
+            self.sql_duree.observer(etiquettes, mesure.sql_duree)
+            self.serialisation.observer(etiquettes, mesure.serialisation)
+            if mesure.taille is not None:
+                self.taille.observer(etiquettes, mesure.taille)
+            self.requetes.incrementer(etiquettes + (statut,))
+            if lente:
+                self.lentes.incrementer(etiquettes)
+
+    def compter_cache(self, endpoint, resultat):
+        """Lecture du cache des réponses (cache_reponses.py) : resultat 'succes' ou 'echec'."""
+        with self.verrou:
+            self.cache_reponses.incrementer((endpoint, resultat))
+
+    def exposer(self):
+        with self.verrou:
+            lignes = []
+            for metrique in (self.duree, self.sql_nombre, self.sql_duree, self.serialisation, self.taille,
+                             self.requetes, self.lentes, self.cache_reponses):
+                lignes += metrique.exposer()
+        return '\n'.join(lignes) + '\n'
+
+
+registre = Registre()
+
+
+class Mesure:
+    """Mesures d'une requête HTTP en cours."""
+
+    def __init__(self, request):
+        self.methode = request.method
+        self.endpoint = 'inconnu'
+        self.debut = time.perf_counter()
+        self.duree = 0.0
+        self.sql_nombre = 0
+        self.sql_duree = 0.0
+        self.sql = Counter()
+        self.serialisation = 0.0
+        self.profondeur = 0
+        self.taille = None
+
+    def __call__(self, execute, sql, params, many, context):
+        """Enveloppe d'exécution SQL (connection.execute_wrapper)."""
+        debut = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_duree += time.perf_counter() - debut
+            self.sql_nombre += 1
+            self.sql[sql] += 1
+
+
+def nom_endpoint(view_func, methode):
+    """`Classe.action` pour une vue DRF (action du viewset ou méthode HTTP), nom de la fonction sinon."""
+    classe = getattr(view_func, 'cls', None)
+    if classe is None:
+        return getattr(view_func, '__name__', 'inconnu')
+    actions = getattr(view_func, 'actions', None) or {}
+    return f"{classe.__name__}.{actions.get(methode.lower(), methode.lower())}"
+
+
+@contextmanager
+def serialisation():
+    """Chronomètre un bloc comme temps de sérialisation de la requête en cours (sans effet hors mesure)."""
+    mesure = _mesure.get()
+    if mesure is None or mesure.profondeur:
+        yield
+        return
+    mesure.profondeur += 1
+    debut = time.perf_counter()
+    try:
+        yield
+    finally:
+        mesure.profondeur -= 1
+        mesure.serialisation += time.perf_counter() - debut
+
+
+@lru_cache(maxsize=None)
+def _serializer_mesure(serializer_class):
+    """Sous-classe de `serializer_class` dont la représentation est chronométrée par `serialisation()`."""
+    def to_representation(self, instance):
+        with serialisation():
+            return super(classe, self).to_representation(instance)
+
+    classe = type(serializer_class.__name__, (serializer_class,), {
+        '__module__': serializer_class.__module__, '__qualname__': serializer_class.__qualname__,
+        'to_representation': to_representation,
+    })
+    return classe
+
+
+class SerialisationMesureeMixin:
+    """
+    Mixin de vue DRF (à placer juste avant la classe de base) : pendant une
+    requête mesurée, les serializers de la vue sont construits à partir d'une
+    sous-classe chronométrée ; sans effet sinon (et pour la génération du schéma).
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        if _mesure.get() is None or getattr(self, 'swagger_fake_view', False):
+            return super().get_serializer(*args, **kwargs)
+        kwargs.setdefault('context', self.get_serializer_context())
+        return _serializer_mesure(self.get_serializer_class())(*args, **kwargs)
+
+
+class MetriquesMiddleware:
+    """Mesure chaque requête et alimente le registre ; désactivé si METRIQUES_ACTIVES est faux."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRIQUES_ACTIVES', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.seuil_lente = getattr(settings, 'METRIQUES_SEUIL_LENTE', 1.0)
+
+    def __call__(self, request):
+        mesure = Mesure(request)
+        jeton = _mesure.set(mesure)
+        try:
+            with connections['default'].execute_wrapper(mesure):
+                response = self.get_response(request)
+        finally:
+            _mesure.reset(jeton)
+
+        mesure.duree = time.perf_counter() - mesure.debut
+        if not response.streaming:
+            mesure.taille = len(response.content)
+        lente = mesure.duree >= self.seuil_lente
+        registre.enregistrer(mesure, response.status_code, lente)
+        if lente:
+            journaliser_requete_lente(request, mesure)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        mesure = _mesure.get()
+        if mesure is not None:
+            mesure.endpoint = nom_endpoint(view_func, request.method)
+
+
+def journaliser_requete_lente(request, mesure):
+    doublons = [(nombre, sql) for sql, nombre in mesure.sql.most_common(DOUBLONS_JOURNALISES) if nombre > 1]
+    logger.warning(
+        "Requête lente %s %s (%s) : %.0f ms, %d requête(s) SQL (%.0f ms), sérialisation %.0f ms%s",
+        request.method, request.path, mesure.endpoint, mesure.duree * 1000, mesure.sql_nombre,
+        mesure.sql_duree * 1000, mesure.serialisation * 1000,
+        ''.join(f"\n  {nombre} x {sql[:300]}" for nombre, sql in doublons),
+    )
+
+
+def metriques(request):
+    """
+    Métriques au format texte Prometheus. Accès : en-tête
+    `Authorization: Bearer <METRIQUES_JETON>` ou utilisateur staff (session).
+    """
+    if not getattr(settings, 'METRIQUES_ACTIVES', False):
+        raise Http404
+    jeton = getattr(settings, 'METRIQUES_JETON', '')
+    autorisation = request.headers.get('Authorization', '')
+    if not (jeton and hmac.compare_digest(autorisation.encode(), f'Bearer {jeton}'.encode())) \
+            and not request.user.is_staff:
+        return HttpResponse(status=403)
+    return HttpResponse(registre.exposer(), content_type='text/plain; version=0.0.4; charset=utf-8')
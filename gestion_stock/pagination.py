@@ -0,0 +1,163 @@
+"""
+Classes de pagination de l'API.
+
+- ReferencePagination : pagination par numéro de page, utilisée par défaut pour
+  les petites tables de référence (catégories, unités, rôles, ...).
+- DateCursorPagination : pagination par curseur (keyset) sur le couple
+  (date, id), pour les tables d'historique (ventes, réceptions, mouvements,
+  lignes de documents : date du document, `champ_date = 'vente__date'`).
+  Le coût d'une page ne dépend pas de la profondeur dans l'historique.
+"""
+import base64
+import json
+from datetime import datetime
+from functools import reduce
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class ReferencePagination(PageNumberPagination):
+    """Pagination simple par numéro de page, avec taille de page plafonnée."""
+    page_size_query_param = 'page_size'
+    max_page_size = getattr(settings, 'PAGINATION_MAX_PAGE_SIZE', 500)
+
+
+class DateCursorPagination(BasePagination):
+    """
+    Pagination keyset ordonnée par (date décroissante, id décroissant).
+
+    Le curseur est opaque (position encodée en base64) et stable : une page
+    ne saute ni ne répète de ligne lorsque de nouvelles lignes sont insérées.
+    """
+    cursor_query_param = 'cursor'
+    cursor_query_description = _('Valeur du curseur de pagination.')
+    page_size_query_param = 'page_size'
+    page_size_query_description = _('Nombre de résultats par page.')
+    invalid_cursor_message = _('Curseur invalide.')
+    champ_date = 'date'
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = getattr(settings, 'PAGINATION_MAX_PAGE_SIZE', 500)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        position = self.decode_cursor(request)
+
+        if position is None:
+            self.reverse = False
+        else:
+            date, pk, self.reverse = position
+            if self.reverse:
+                queryset = queryset.filter(
+                    Q(**{f'{self.champ_date}__gte': date}),
+                    Q(**{f'{self.champ_date}__gt': date}) | Q(pk__gt=pk),
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(**{f'{self.champ_date}__lte': date}),
+                    Q(**{f'{self.champ_date}__lt': date}) | Q(pk__lt=pk),
+                )
+
+        if self.reverse:
+            queryset = queryset.order_by(self.champ_date, 'pk')
+        else:
+            queryset = queryset.order_by(f'-{self.champ_date}', '-pk')
+
+        results = list(queryset[:self.page_size + 1])
+        has_following = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if self.reverse:
+            self.page.reverse()
+            self.has_previous = has_following
+            self.has_next = True
+        else:
+            self.has_previous = position is not None
+            self.has_next = has_following
+
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+            if page_size > 0:
+                return min(page_size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            date, pk, reverse = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            return datetime.fromisoformat(date), int(pk), bool(reverse)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, instance, reverse):
+        # Instance de modèle, ou ligne values() (lecture rapide : voir lecture_rapide.py)
+        if isinstance(instance, dict):
+            date, pk = instance[self.champ_date], instance['pk']
+        else:
+            date, pk = reduce(getattr, self.champ_date.split('__'), instance), instance.pk
+        position = [date.isoformat(), pk, int(reverse)]
+        encoded = base64.urlsafe_b64encode(json.dumps(position).encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': str(self.cursor_query_description),
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': str(self.page_size_query_description),
+                'schema': {'type': 'integer'},
+            },
+        ]
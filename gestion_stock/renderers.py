@@ -0,0 +1,34 @@
+"""
+Rendu JSON par orjson, s'il est installé, avec repli sur le module json.
+
+JSONRapideRenderer produit les mêmes octets que JSONRenderer avec les
+réglages par défaut (UNICODE_JSON, COMPACT_JSON, sans indentation) : dates,
+décimaux, UUID et autres types non natifs passent par le même encodeur DRF,
+U+2028 / U+2029 sont échappés. Seuls les flottants diffèrent : notation
+exponentielle (1e16 au lieu de 1e+16) et valeurs non finies (null au lieu
+d'une erreur), absents des réponses de l'API. Toute autre
+configuration (indentation demandée, ASCII, séparateurs longs) ou donnée
+refusée par orjson est rendue par JSONRenderer.
+"""
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # dépendance optionnelle
+    orjson = None
+
+if orjson is not None:
+    OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+
+class JSONRapideRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.ensure_ascii or not self.compact \
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            rendu = orjson.dumps(data, default=self.encoder_class().default, option=OPTIONS)
+        except (orjson.JSONEncodeError, TypeError, ValueError):
+            return super().render(data, accepted_media_type, renderer_context)
+        return rendu.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
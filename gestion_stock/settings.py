@@ -51,6 +51,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Mesures par requête (inactif si METRIQUES_ACTIVES est faux)
+    'gestion_stock.metriques.MetriquesMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -135,8 +137,64 @@ REST_FRAMEWORK = {
     ),
 
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+
+    #Pagination par défaut (tables de référence) ; les historiques utilisent un curseur
+    'DEFAULT_PAGINATION_CLASS': 'gestion_stock.pagination.ReferencePagination',
+    'PAGE_SIZE': int(os.environ.get('API_PAGE_SIZE', 50)),
 }
 
+# Taille maximale d'une page demandée via ?page_size=
+PAGINATION_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 500))
+
+
+# Listes servies sans instances de modèles ni serializers par ligne (gestion_stock/lecture_rapide.py)
+LECTURE_RAPIDE = os.environ.get("LECTURE_RAPIDE", "True").lower() == "true"
+
+
+# ------------------------------------------------------------
+# CACHE (versions des collections, réponses des référentiels, permissions)
+# ------------------------------------------------------------
+# CACHE_URL : locmem:// (défaut, propre à chaque processus), file:///chemin/du/dossier,
+# ou redis://hote:6379/0 (paquet redis requis).
+CACHE_URL = os.environ.get("CACHE_URL", "locmem://")
+
+if CACHE_URL.startswith(("redis://", "rediss://")):
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': CACHE_URL}}
+elif CACHE_URL.startswith("file://"):
+    CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': CACHE_URL[len("file://"):],
+    }}
+else:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+# Cache vu de tous les processus de l'application ? Les invalidations (versions des
+# collections, des permissions, des ventes) ne valent qu'à cette condition : sinon,
+# GET conditionnel (ETag / 304), cache des réponses et cache des permissions sont
+# désactivés, chaque worker gunicorn (WEB_CONCURRENCY) ayant son propre cache mémoire.
+# Vrai par défaut pour Redis et les fichiers ; CACHE_PARTAGE=True avec locmem:// n'est
+# sûr qu'avec un seul processus.
+CACHE_PARTAGE = os.environ.get(
+    "CACHE_PARTAGE", str(CACHES['default']['BACKEND'] != 'django.core.cache.backends.locmem.LocMemCache'),
+).lower() == "true"
+
+# Réponses rendues des référentiels (gestion_stock/cache_reponses.py) et leur durée de conservation (secondes)
+REPONSES_CACHE = os.environ.get("REPONSES_CACHE", "True").lower() == "true"
+REPONSES_CACHE_DUREE = int(os.environ.get("REPONSES_CACHE_DUREE", 3600))
+
+
+# ------------------------------------------------------------
+# MÉTRIQUES (gestion_stock/metriques.py)
+# ------------------------------------------------------------
+# Durée, requêtes SQL, sérialisation et taille de réponse par endpoint, exposées sur /metrics
+METRIQUES_ACTIVES = os.environ.get("METRIQUES_ACTIVES", "False").lower() == "true"
+
+# Au-delà de cette durée (secondes), la requête est journalisée avec ses requêtes SQL répétées
+METRIQUES_SEUIL_LENTE = float(os.environ.get("METRIQUES_SEUIL_LENTE", 1.0))
+
+# Jeton attendu du collecteur Prometheus (Authorization: Bearer <jeton>) ; sinon accès staff uniquement
+METRIQUES_JETON = os.environ.get("METRIQUES_JETON", "")
+
 
 # ------------------------------------------------------------
 # CONFIGURATION SIMPLEJWT
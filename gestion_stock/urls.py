@@ -19,6 +19,8 @@ from django.urls import path, include
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
+from gestion_stock.metriques import metriques
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/v1/', include(("stock.urls", "stock"), namespace="stock")),
@@ -32,4 +34,7 @@ urlpatterns = [
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
     path('api/docs/swagger/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
     path('api/docs/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
+
+    # --- Métriques (format Prometheus) ---
+    path('metrics', metriques, name='metriques'),
 ]
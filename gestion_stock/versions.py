@@ -0,0 +1,169 @@
+"""
+Versions des collections (une par modèle) et GET conditionnel (ETag, Last-Modified).
+
+Un compteur de version (`version()`, `incrementer()`) est une clé du cache,
+horodatée à sa création : les permissions (users/cache.py), le catalogue
+(stock/services/recherche.py) et l'historique des ventes
+(stock/services/rapports.py) ont le leur, chaque collection aussi. La
+version d'une collection est incrémentée à la validation de toute transaction qui modifie le modèle :
+signaux post_save / post_delete (stock/signals.py) et écritures en masse
+des services (update, bulk_create, bulk_update). L'incrément est différé par
+transaction.on_commit : une version ne peut pas être associée à des données
+non encore validées.
+
+GetConditionnelMixin calcule l'ETag (fort) d'une liste ou d'un détail avant
+toute lecture des données, à partir des versions des modèles rendus par le
+serializer (serializers imbriqués compris), de l'URL absolue et du type de
+média : un If-None-Match correspondant reçoit un 304 sans requête sur les
+données. Last-Modified (à la seconde) est la date du dernier incrément ;
+If-None-Match prévaut sur If-Modified-Since.
+
+Ces versions ne valent que si le cache est partagé par tous les processus
+(CACHE_PARTAGE, voir settings.py) : avec un cache mémoire propre à chaque
+worker, une écriture n'incrémente que la version de son processus. Le GET
+conditionnel, le cache des réponses et celui des permissions sont alors
+désactivés (`cache_partage()`).
+"""
+import hashlib
+import time
+from functools import lru_cache, partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+PREFIXE_CLE = "versions:"
+
+
+def _cles(modele):
+    """Clés de la version et de la date de modification d'une collection."""
+    cle = f"{PREFIXE_CLE}{modele._meta.label_lower}"
+    return cle, f"{cle}:date"
+
+
+def _version_initiale():
+    # Horodatée : une clé évincée du cache ne retombe pas sur une version déjà vue
+    return int(time.time() * 1000)
+
+
+def cache_partage():
+    """Le cache `default` est-il vu de tous les processus de l'application (CACHE_PARTAGE) ?"""
+    return getattr(settings, 'CACHE_PARTAGE', False)
+
+
+def version(cle):
+    """Valeur courante du compteur de version `cle`, créé s'il est absent du cache."""
+    valeur = cache.get(cle)
+    if valeur is None:
+        cache.add(cle, _version_initiale(), timeout=None)
+        valeur = cache.get(cle)
+    return valeur
+
+
+def incrementer(cle):
+    """Incrémente le compteur de version `cle` (recréé s'il a été évincé du cache)."""
+    try:
+        cache.incr(cle)
+    except ValueError:
+        cache.set(cle, _version_initiale(), timeout=None)
+
+
+def etat_collections(modeles):
+    """
+    Versions des collections (tuple dans l'ordre de `modeles`) et date de
+    leur dernière modification (timestamp), lues en un aller-retour au cache.
+    """
+    cles = [cle for modele in modeles for cle in _cles(modele)]
+    valeurs = cache.get_many(cles)
+    manquantes = [cle for cle in cles if cle not in valeurs]
+    if manquantes:
+        initiales = {cle: time.time() if cle.endswith(':date') else _version_initiale() for cle in manquantes}
+        for cle, valeur in initiales.items():
+            cache.add(cle, valeur, timeout=None)
+        valeurs.update(initiales, **cache.get_many(manquantes))
+    versions = tuple(valeurs[version] for version, _ in map(_cles, modeles))
+    return versions, max((valeurs[date] for _, date in map(_cles, modeles)), default=0)
+
+
+def _incrementer(modeles):
+    for modele in modeles:
+        incrementer(_cles(modele)[0])
+    maintenant = time.time()
+    cache.set_many({_cles(modele)[1]: maintenant for modele in modeles}, timeout=None)
+
+
+def invalider_collections(*modeles):
+    """
+    Incrémente les versions des collections à la validation de la transaction
+    en cours (immédiatement hors transaction). À appeler après toute écriture
+    qui n'envoie pas post_save / post_delete.
+    """
+    transaction.on_commit(partial(_incrementer, modeles))
+
+
+@lru_cache(maxsize=None)
+def modeles_rendus(serializer_class):
+    """Modèles dont les données apparaissent dans la représentation (serializers imbriqués compris)."""
+    modeles = []
+
+    def parcourir(serializer):
+        if isinstance(serializer, serializers.ListSerializer):
+            serializer = serializer.child
+        modele = getattr(getattr(serializer, 'Meta', None), 'model', None)
+        if modele is not None and modele not in modeles:
+            modeles.append(modele)
+        for champ in serializer.fields.values():
+            if isinstance(champ, serializers.BaseSerializer):
+                parcourir(champ)
+
+    parcourir(serializer_class())
+    return tuple(modeles)
+
+
+def etat_vue(vue):
+    """État des collections rendues par le serializer d'une vue, lu une fois par requête."""
+    if not hasattr(vue, '_etat_collections'):
+        vue._etat_collections = etat_collections(modeles_rendus(vue.get_serializer_class()))
+    return vue._etat_collections
+
+
+def empreinte(*elements):
+    """Empreinte courte (hexadécimale) d'éléments de clé ou d'ETag."""
+    return hashlib.sha256(repr(elements).encode()).hexdigest()[:32]
+
+
+class GetConditionnelMixin:
+    """
+    Mixin de ViewSet : GET conditionnel (ETag, Last-Modified, 304) sur les
+    actions list et retrieve rendues en JSON, si le cache est partagé. Les
+    modèles rendus doivent avoir leur version suivie (signaux de stock/signals.py).
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.reponse_conditionnelle(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.reponse_conditionnelle(super().retrieve, request, *args, **kwargs)
+
+    def reponse_conditionnelle(self, vue, request, *args, **kwargs):
+        # Versions lues avant les données : au pire, des données plus récentes que l'ETag
+        if not cache_partage() or not isinstance(request.accepted_renderer, JSONRenderer):
+            return vue(request, *args, **kwargs)
+        versions, modification = etat_vue(self)
+        # URL absolue : les liens de pagination du corps en dépendent
+        etag = f'"{empreinte(versions, request.build_absolute_uri(), request.accepted_media_type)}"'
+        modification = int(modification)
+
+        reponse = get_conditional_response(request, etag=etag, last_modified=modification)
+        if reponse is None:
+            reponse = vue(request, *args, **kwargs)
+        if reponse.status_code in (200, 304):
+            reponse['ETag'] = etag
+            reponse['Last-Modified'] = http_date(modification)
+            # Revalidation à chaque usage, pas de stockage par un cache partagé
+            patch_cache_control(reponse, private=True, no_cache=True)
+        return reponse
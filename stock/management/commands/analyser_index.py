@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from stock.services.jeu_essai import ECHELLES, generer_jeu_essai
+from stock.services.plans import analyser
+
+
+class Command(BaseCommand):
+    help = (
+        "Affiche le plan d'exécution (EXPLAIN / EXPLAIN ANALYZE) des requêtes critiques : "
+        "listes paginées, recalcul des totaux, annulation. Peut d'abord générer le jeu "
+        "d'essai (generer_jeu_essai) à l'échelle voulue."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--jeu-essai', choices=sorted(ECHELLES), metavar='ECHELLE',
+            help=f"Générer le jeu d'essai de cette échelle ({', '.join(ECHELLES)}) avant l'analyse.",
+        )
+        parser.add_argument('--plans', action='store_true', help="Afficher les plans complets.")
+        parser.add_argument(
+            '--strict', action='store_true',
+            help="Échouer si une requête critique n'utilise aucun index.",
+        )
+
+    def handle(self, *args, **options):
+        if options['jeu_essai']:
+            resume = generer_jeu_essai(options['jeu_essai'])
+            if connection.vendor == 'postgresql':
+                # Statistiques à jour pour le planificateur
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+            self.stdout.write(', '.join(f"{valeur} {champ}" for champ, valeur in resume._asdict().items()))
+
+        sans_index = []
+        for mesure in analyser():
+            etat = self.style.SUCCESS("index") if mesure.index else self.style.WARNING("sans index")
+            self.stdout.write(f"{mesure.nom:<26} {etat:<12} {mesure.duree_ms:>10.2f} ms")
+            if options['plans']:
+                self.stdout.write(mesure.plan + "\n")
+            if not mesure.index:
+                sans_index.append(mesure.nom)
+
+        if options['strict'] and sans_index:
+            raise CommandError(f"Requête(s) sans index : {', '.join(sans_index)}")
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from stock.services.jeu_essai import ECHELLES, generer_jeu_essai
+
+
+class Command(BaseCommand):
+    help = (
+        "Génère un jeu de données d'essai reproductible (catalogue, utilisateurs et rôles, "
+        "ventes, réceptions et mouvements sur plusieurs années) pour les bancs de performance."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--echelle', choices=sorted(ECHELLES), default='petite', help="Échelle (défaut : petite).")
+        parser.add_argument('--graine', type=int, default=0, help="Graine du générateur aléatoire (défaut : 0).")
+        for champ in ECHELLES['test']._fields:
+            parser.add_argument(
+                f"--{champ.replace('_', '-')}", type=int, dest=champ, help=f"Remplace {champ} de l'échelle.",
+            )
+
+    def handle(self, *args, **options):
+        echelle = ECHELLES[options['echelle']]
+        echelle = echelle._replace(**{
+            champ: options[champ] for champ in echelle._fields if options[champ] is not None
+        })
+        self.stdout.write(f"Génération : {', '.join(f'{c}={v}' for c, v in echelle._asdict().items())}")
+
+        resume = generer_jeu_essai(echelle, graine=options['graine'])
+        if connection.vendor == 'postgresql':
+            # Statistiques à jour pour le planificateur
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        self.stdout.write(self.style.SUCCESS(
+            ', '.join(f"{valeur} {champ}" for champ, valeur in resume._asdict().items())
+        ))
@@ -0,0 +1,47 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from stock.services.catalogue import FormatInvalide, importer_catalogue, lire_fichier
+
+
+class Command(BaseCommand):
+    help = (
+        "Importe le catalogue produits depuis un fichier CSV ou JSONL : les produits sont "
+        "créés ou mis à jour par référence (bulk upsert), les lignes invalides sont signalées."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('fichier', help="Chemin du fichier (.csv ou .jsonl).")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help="Format, déduit de l'extension par défaut.")
+        parser.add_argument('--simuler', action='store_true', help="Valider sans rien écrire.")
+        parser.add_argument(
+            '--afficher', type=int, default=20,
+            help="Nombre d'erreurs détaillées dans la sortie (défaut : 20).",
+        )
+
+    def handle(self, *args, **options):
+        chemin = Path(options['fichier'])
+        format = options['format'] or chemin.suffix.lstrip('.').lower()
+        try:
+            lignes = lire_fichier(chemin.read_bytes(), format)
+        except OSError as erreur:
+            raise CommandError(f"Lecture impossible : {erreur}")
+        except FormatInvalide as erreur:
+            raise CommandError(str(erreur))
+
+        rapport = importer_catalogue(lignes, simuler=options['simuler'])
+
+        for erreur in rapport.erreurs[:options['afficher']]:
+            details = " ; ".join(f"{champ} : {message}" for champ, message in erreur.erreurs.items())
+            self.stdout.write(f"Ligne {erreur.ligne} ({erreur.reference or '?'}) : {details}")
+        if len(rapport.erreurs) > options['afficher']:
+            self.stdout.write(f"... {len(rapport.erreurs) - options['afficher']} autre(s) erreur(s)")
+
+        prefixe = "Simulation : " if options['simuler'] else ""
+        message = (
+            f"{prefixe}{rapport.lignes} ligne(s), {rapport.crees} produit(s) créé(s), "
+            f"{rapport.mis_a_jour} mis à jour, {len(rapport.erreurs)} erreur(s)"
+        )
+        style = self.style.WARNING if rapport.erreurs else self.style.SUCCESS
+        self.stdout.write(style(message))
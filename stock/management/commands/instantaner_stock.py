@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from stock.services.journal import creer_instantanes
+
+
+class Command(BaseCommand):
+    help = (
+        "Fige le stock de tous les produits dans un instantané (tâche périodique, "
+        "par exemple quotidienne). Les calculs de stock à une date partent de "
+        "l'instantané le plus proche."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date',
+            help="Date-heure ISO 8601 de l'instantané (défaut : maintenant moins 5 minutes).",
+        )
+
+    def handle(self, *args, **options):
+        date = None
+        if options['date']:
+            date = parse_datetime(options['date'])
+            if date is None:
+                raise CommandError(f"Date invalide : {options['date']}")
+            if timezone.is_naive(date):
+                date = timezone.make_aware(date)
+
+        nombre = creer_instantanes(date)
+        self.stdout.write(self.style.SUCCESS(f"{nombre} instantané(s) de stock créé(s)"))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min
+
+from stock.models import Vente, Reception
+from stock.services.totaux import recalculer_totaux
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcule en SQL le total et les reliquats des ventes et réceptions "
+        "(tâche de réparation nocturne). Chaque lot est une seule requête UPDATE."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ventes', action='store_true', help="Ne traiter que les ventes.")
+        parser.add_argument('--receptions', action='store_true', help="Ne traiter que les réceptions.")
+        parser.add_argument(
+            '--taille-lot', type=int, default=50_000,
+            help="Nombre d'identifiants traités par transaction (défaut : 50000).",
+        )
+
+    def handle(self, *args, **options):
+        models = []
+        if options['ventes'] or not options['receptions']:
+            models.append(Vente)
+        if options['receptions'] or not options['ventes']:
+            models.append(Reception)
+
+        for model in models:
+            nombre = self._recalculer(model, options['taille_lot'])
+            self.stdout.write(self.style.SUCCESS(f"{model._meta.verbose_name_plural} : {nombre} recalculé(s)"))
+
+    def _recalculer(self, model, taille_lot):
+        bornes = model.objects.aggregate(debut=Min('pk'), fin=Max('pk'))
+        if bornes['debut'] is None:
+            return 0
+
+        nombre = 0
+        for debut in range(bornes['debut'], bornes['fin'] + 1, taille_lot):
+            with transaction.atomic():
+                nombre += recalculer_totaux(model.objects.filter(pk__gte=debut, pk__lt=debut + taille_lot))
+        return nombre
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from stock.services.reconciliation import reconcilier
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcule le stock attendu de chaque produit à partir des mouvements actifs "
+        "(requêtes agrégées groupées), signale les écarts avec stock_actuel et les "
+        "corrige si demandé."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--corriger', action='store_true', help="Corriger les écarts (bulk update).")
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help="Ne vérifier que les produits modifiés depuis le dernier point de réconciliation sans écart.",
+        )
+        parser.add_argument(
+            '--afficher', type=int, default=20,
+            help="Nombre d'écarts détaillés dans la sortie (défaut : 20).",
+        )
+
+    def handle(self, *args, **options):
+        point, ecarts = reconcilier(corriger=options['corriger'], incremental=options['incremental'])
+
+        for ecart in ecarts[:options['afficher']]:
+            self.stdout.write(
+                f"{ecart.nom} (#{ecart.produit_id}) : stock_actuel={ecart.stock_actuel} "
+                f"attendu={ecart.attendu} écart={ecart.attendu - ecart.stock_actuel:+d}"
+            )
+        if len(ecarts) > options['afficher']:
+            self.stdout.write(f"... {len(ecarts) - options['afficher']} autre(s) écart(s)")
+
+        mode = "incrémentale" if point.incremental else "complète"
+        message = f"Réconciliation {mode} : {point.produits_verifies} produit(s) vérifié(s), {point.ecarts} écart(s)"
+        if point.corrige and point.ecarts:
+            self.stdout.write(self.style.SUCCESS(message + " corrigé(s)"))
+        elif point.ecarts:
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from stock.services.rapports import reconstruire
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcule les faits de vente journaliers (rapports) depuis les lignes de vente "
+        "actives, sur une période ou sur tout l'historique."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--debut', help="Premier jour (AAAA-MM-JJ, inclus).")
+        parser.add_argument('--fin', help="Dernier jour (AAAA-MM-JJ, inclus).")
+
+    def handle(self, *args, **options):
+        bornes = {}
+        for nom in ('debut', 'fin'):
+            if options[nom]:
+                try:
+                    bornes[nom] = parse_date(options[nom])
+                except ValueError:
+                    bornes[nom] = None
+                if bornes[nom] is None:
+                    raise CommandError(f"Date invalide : {options[nom]}")
+
+        nombre = reconstruire(**bornes)
+        self.stdout.write(self.style.SUCCESS(f"{nombre} fait(s) de vente journalier(s) reconstruit(s)"))
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:18
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+PREFIXE = "Sortie automatique liée à la vente n°"
+
+
+def rattacher_sorties_aux_ventes(apps, schema_editor):
+    """Relie les sorties automatiques existantes à leur vente (via la description)."""
+    SortieStock = apps.get_model('stock', 'SortieStock')
+    Vente = apps.get_model('stock', 'Vente')
+    ventes_existantes = set(Vente.objects.values_list('id', flat=True))
+
+    par_vente = {}
+    sorties = SortieStock.objects.filter(description__startswith=PREFIXE).values_list('id', 'description')
+    for sortie_id, description in sorties.iterator():
+        correspondance = re.match(re.escape(PREFIXE) + r"(\d+)", description)
+        if correspondance and int(correspondance.group(1)) in ventes_existantes:
+            par_vente.setdefault(int(correspondance.group(1)), []).append(sortie_id)
+
+    for vente_id, sortie_ids in par_vente.items():
+        SortieStock.objects.filter(id__in=sortie_ids).update(vente_id=vente_id, type_sortie='vente')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0005_reception_remarque'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sortiestock',
+            name='vente',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='sorties', to='stock.vente'),
+        ),
+        migrations.AlterField(
+            model_name='sortiestock',
+            name='type_sortie',
+            field=models.CharField(choices=[('don', 'Don'), ('perte', 'Perte'), ('usage_interne', 'Usage interne'), ('vente', 'Vente'), ('autre', 'Autre')], default='autre', max_length=20),
+        ),
+        migrations.RunPython(rattacher_sorties_aux_ventes, migrations.RunPython.noop),
+    ]
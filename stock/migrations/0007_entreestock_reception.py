@@ -0,0 +1,41 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:19
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+PREFIXE = "Entrée automatique liée à la réception n°"
+
+
+def rattacher_entrees_aux_receptions(apps, schema_editor):
+    """Relie les entrées automatiques existantes à leur réception (via la description)."""
+    EntreeStock = apps.get_model('stock', 'EntreeStock')
+    Reception = apps.get_model('stock', 'Reception')
+    receptions_existantes = set(Reception.objects.values_list('id', flat=True))
+
+    par_reception = {}
+    entrees = EntreeStock.objects.filter(description__startswith=PREFIXE).values_list('id', 'description')
+    for entree_id, description in entrees.iterator():
+        correspondance = re.match(re.escape(PREFIXE) + r"(\d+)", description)
+        if correspondance and int(correspondance.group(1)) in receptions_existantes:
+            par_reception.setdefault(int(correspondance.group(1)), []).append(entree_id)
+
+    for reception_id, entree_ids in par_reception.items():
+        EntreeStock.objects.filter(id__in=entree_ids).update(reception_id=reception_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0006_sortiestock_vente'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='entreestock',
+            name='reception',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='entrees', to='stock.reception'),
+        ),
+        migrations.RunPython(rattacher_entrees_aux_receptions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:26
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def ouvrir_journal(apps, schema_editor):
+    """
+    Écriture de reprise par produit (stock_actuel au moment de la migration) et
+    instantané correspondant : l'historique antérieur n'est pas rejoué. Le stock
+    repris est déjà issu des mouvements : la réconciliation (0009) ne compte pas
+    ces écritures, distinctes des écritures d'ouverture des nouveaux produits.
+    """
+    Produit = apps.get_model('stock', 'Produit')
+    JournalStock = apps.get_model('stock', 'JournalStock')
+    InstantaneStock = apps.get_model('stock', 'InstantaneStock')
+    maintenant = timezone.now()
+
+    produits = list(Produit.objects.exclude(stock_actuel=0).values_list('id', 'stock_actuel'))
+    JournalStock.objects.bulk_create([
+        JournalStock(produit_id=produit_id, delta=stock, date=maintenant, source_type='reprise')
+        for produit_id, stock in produits
+    ], batch_size=1000)
+    InstantaneStock.objects.bulk_create([
+        InstantaneStock(produit_id=produit_id, date=maintenant, stock=stock)
+        for produit_id, stock in produits
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0007_entreestock_reception'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InstantaneStock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateTimeField()),
+                ('stock', models.IntegerField()),
+                ('produit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='instantanes', to='stock.produit')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('produit', 'date'), name='instantane_produit_date_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='JournalStock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('delta', models.IntegerField()),
+                ('date', models.DateTimeField(default=django.utils.timezone.now)),
+                ('source_type', models.CharField(choices=[('ouverture', "Stock d'ouverture"), ('ajustement', 'Ajustement'), ('entree', 'Entrée de stock'), ('sortie', 'Sortie de stock'), ('ligne_vente', 'Ligne de vente'), ('ligne_reception', 'Ligne de réception')], max_length=20)),
+                ('source_id', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('produit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='journal', to='stock.produit')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['produit', 'date'], name='journal_produit_date_idx'), models.Index(fields=['source_type', 'source_id'], name='journal_source_idx')],
+            },
+        ),
+        migrations.RunPython(ouvrir_journal, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0008_journalstock_instantanestock'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PointReconciliation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateTimeField(auto_now_add=True)),
+                ('dernier_journal_id', models.PositiveBigIntegerField(default=0)),
+                ('incremental', models.BooleanField(default=False)),
+                ('produits_verifies', models.PositiveIntegerField(default=0)),
+                ('ecarts', models.PositiveIntegerField(default=0)),
+                ('corrige', models.BooleanField(default=False)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='journalstock',
+            name='source_type',
+            field=models.CharField(choices=[('ouverture', "Stock d'ouverture"), ('reprise', 'Reprise du stock existant'), ('reconciliation', 'Correction de réconciliation'), ('ajustement', 'Ajustement'), ('entree', 'Entrée de stock'), ('sortie', 'Sortie de stock'), ('ligne_vente', 'Ligne de vente'), ('ligne_reception', 'Ligne de réception')], max_length=20),
+        ),
+    ]
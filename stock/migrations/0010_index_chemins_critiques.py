@@ -0,0 +1,71 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0009_pointreconciliation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='entreestock',
+            index=models.Index(fields=['date', 'id'], name='entreestock_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='entreestock',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['date'], name='entreestock_active_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='entreestock',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['produit'], name='entreestock_prod_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lignereception',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['reception'], name='lignerecep_recep_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lignereception',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['produit'], name='lignerecep_prod_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lignevente',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['vente'], name='lignevente_vente_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lignevente',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['produit'], name='lignevente_prod_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reception',
+            index=models.Index(fields=['date', 'id'], name='reception_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reception',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['date'], name='reception_active_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sortiestock',
+            index=models.Index(fields=['date', 'id'], name='sortiestock_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sortiestock',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['date'], name='sortiestock_active_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sortiestock',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['produit'], name='sortiestock_prod_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vente',
+            index=models.Index(fields=['date', 'id'], name='vente_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vente',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['date'], name='vente_active_date_idx'),
+        ),
+    ]
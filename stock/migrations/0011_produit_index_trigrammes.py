@@ -0,0 +1,62 @@
+"""
+Index GIN trigrammes pour la recherche de produits (sous-chaîne, préfixe et floue).
+
+PostgreSQL uniquement : les autres bases utilisent la recherche de repli
+(stock/services/recherche.py) et ignorent ces opérations.
+
+Prérequis : l'extension pg_trgm est créée par TrigramExtension seulement si
+elle est absente, ce qui demande un superutilisateur (ou, à partir de
+PostgreSQL 13, le droit CREATE sur la base, pg_trgm étant une extension de
+confiance). Si le rôle de l'application n'a pas ces droits, un administrateur
+l'installe avant le déploiement :
+
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+Les index sont construits avec CREATE INDEX CONCURRENTLY, sans bloquer les
+écritures sur stock_produit ; la migration n'est donc pas atomique. Ils ne
+sont pas déclarés dans Produit.Meta (index propres à PostgreSQL), l'état des
+modèles n'est pas modifié.
+"""
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+from django.db import migrations
+from django.db.models.functions import Upper
+
+INDEX = {
+    'produit_nom_trgm_idx': 'nom',
+    'produit_reference_trgm_idx': 'reference',
+}
+
+
+class AjouterIndexPostgres(AddIndexConcurrently):
+    """AddIndexConcurrently sans effet hors PostgreSQL."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('stock', '0010_index_chemins_critiques'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                AjouterIndexPostgres(
+                    model_name='produit',
+                    index=GinIndex(OpClass(Upper(colonne), name='gin_trgm_ops'), name=nom),
+                )
+                for nom, colonne in INDEX.items()
+            ],
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:42
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, Count, F, IntegerField, Sum, Value, When
+from django.db.models.functions import TruncDate
+
+
+def agreger_ventes(apps, schema_editor):
+    """Faits journaliers de l'historique existant (lignes de vente actives)."""
+    LigneVente = apps.get_model('stock', 'LigneVente')
+    VenteJournaliere = apps.get_model('stock', 'VenteJournaliere')
+
+    quantite_base = Case(
+        When(unite_utilisee_id=F('produit__unite_id'), then=F('quantite')),
+        When(unite_utilisee_id=F('produit__unite_conversion_id'),
+             then=F('quantite') * F('produit__facteur_conversion')),
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    agregats = (
+        LigneVente.objects.filter(is_active=True).order_by()
+        .values_list(TruncDate('vente__date'), 'produit_id', 'vente__mode_paiement_id', 'vente__created_by_id')
+        .annotate(
+            quantite_base=Sum(quantite_base),
+            montant=Sum(F('quantite') * F('prix_unitaire'), output_field=models.DecimalField(max_digits=14, decimal_places=2)),
+            nombre=Count('id'),
+        )
+    )
+    VenteJournaliere.objects.bulk_create([
+        VenteJournaliere(
+            jour=jour, produit_id=produit_id, mode_paiement_id=mode_id, vendeur_id=vendeur_id,
+            quantite=quantite or 0, chiffre_affaires=montant or Decimal('0.00'), lignes=nombre,
+        )
+        for jour, produit_id, mode_id, vendeur_id, quantite, montant, nombre in agregats.iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0011_produit_index_trigrammes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VenteJournaliere',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jour', models.DateField()),
+                ('quantite', models.BigIntegerField(default=0)),
+                ('chiffre_affaires', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('lignes', models.IntegerField(default=0)),
+                ('mode_paiement', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='stock.modepaiement')),
+                ('produit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ventes_journalieres', to='stock.produit')),
+                ('vendeur', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ventes_journalieres', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['jour', 'produit'], name='ventejour_jour_produit_idx')],
+            },
+        ),
+        migrations.RunPython(agreger_ventes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:48
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def ouvrir_alertes(apps, schema_editor):
+    """Alerte ouverte pour chaque produit déjà sous son seuil."""
+    Produit = apps.get_model('stock', 'Produit')
+    AlerteStock = apps.get_model('stock', 'AlerteStock')
+    AlerteStock.objects.bulk_create([
+        AlerteStock(produit_id=produit_id, stock=stock, seuil=seuil)
+        for produit_id, stock, seuil in Produit.objects.filter(stock_actuel__lte=F('seuil_alerte'))
+        .values_list('id', 'stock_actuel', 'seuil_alerte').iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0012_ventes_journalieres'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlerteStock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('debut', models.DateTimeField(default=django.utils.timezone.now)),
+                ('fin', models.DateTimeField(blank=True, null=True)),
+                ('stock', models.IntegerField()),
+                ('seuil', models.IntegerField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='produit',
+            index=models.Index(condition=models.Q(('stock_actuel__lte', models.F('seuil_alerte'))), fields=['id'], name='produit_sous_seuil_idx'),
+        ),
+        migrations.AddField(
+            model_name='alertestock',
+            name='produit',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alertes', to='stock.produit'),
+        ),
+        migrations.AddIndex(
+            model_name='alertestock',
+            index=models.Index(fields=['debut', 'id'], name='alerte_debut_id_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='alertestock',
+            constraint=models.UniqueConstraint(condition=models.Q(('fin__isnull', True)), fields=('produit',), name='alerte_ouverte_unique'),
+        ),
+        migrations.RunPython(ouvrir_alertes, migrations.RunPython.noop),
+    ]
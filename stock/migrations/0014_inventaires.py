@@ -0,0 +1,63 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0013_alertes_stock'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='journalstock',
+            name='source_type',
+            field=models.CharField(choices=[('ouverture', "Stock d'ouverture"), ('reprise', 'Reprise du stock existant'), ('reconciliation', 'Correction de réconciliation'), ('ajustement', 'Ajustement'), ('entree', 'Entrée de stock'), ('sortie', 'Sortie de stock'), ('ligne_vente', 'Ligne de vente'), ('ligne_reception', 'Ligne de réception'), ('inventaire', "Écart d'inventaire")], max_length=20),
+        ),
+        migrations.CreateModel(
+            name='Inventaire',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('description', models.CharField(blank=True, max_length=255)),
+                ('statut', models.CharField(choices=[('ouvert', 'Ouvert'), ('cloture', 'Clôturé'), ('annule', 'Annulé')], default='ouvert', max_length=10)),
+                ('date_ouverture', models.DateTimeField(auto_now_add=True)),
+                ('date_cloture', models.DateTimeField(blank=True, null=True)),
+                ('ajustements', models.PositiveIntegerField(default=0)),
+                ('categorie', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='stock.categorie')),
+                ('cloture_par', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='inventaires_clotures', to=settings.AUTH_USER_MODEL)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='inventaires_crees', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='LigneInventaire',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stock_gele', models.IntegerField()),
+                ('inventaire', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lignes', to='stock.inventaire')),
+                ('produit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lignes_inventaire', to='stock.produit')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ComptageInventaire',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('zone', models.CharField(default='', max_length=50)),
+                ('quantite', models.PositiveIntegerField()),
+                ('date', models.DateTimeField(auto_now=True)),
+                ('compte_par', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('ligne', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comptages', to='stock.ligneinventaire')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='ligneinventaire',
+            constraint=models.UniqueConstraint(fields=('inventaire', 'produit'), name='inventaire_produit_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='comptageinventaire',
+            constraint=models.UniqueConstraint(fields=('ligne', 'zone'), name='comptage_ligne_zone_unique'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:55
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def fusionner_doublons(apps, schema_editor):
+    """Regroupe les faits créés en double par des ventes simultanées, avant la contrainte d'unicité."""
+    VenteJournaliere = apps.get_model('stock', 'VenteJournaliere')
+
+    cle = ['jour', 'produit_id', 'mode_paiement_id', 'vendeur_id']
+    doublons = (
+        VenteJournaliere.objects.filter(mode_paiement__isnull=False, vendeur__isnull=False)
+        .order_by().values(*cle)
+        .annotate(nombre=Count('id'), garde=Min('id'),
+                  total_quantite=Sum('quantite'), total_ca=Sum('chiffre_affaires'), total_lignes=Sum('lignes'))
+        .filter(nombre__gt=1)
+    )
+    for doublon in doublons:
+        faits = VenteJournaliere.objects.filter(**{champ: doublon[champ] for champ in cle})
+        faits.filter(pk=doublon['garde']).update(
+            quantite=doublon['total_quantite'], chiffre_affaires=doublon['total_ca'], lignes=doublon['total_lignes'],
+        )
+        faits.exclude(pk=doublon['garde']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0014_inventaires'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(fusionner_doublons, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='ventejournaliere',
+            constraint=models.UniqueConstraint(fields=('jour', 'produit', 'mode_paiement', 'vendeur'), name='ventejour_cle_unique'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:16
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min, Q, Sum
+
+
+def fusionner_doublons(apps, schema_editor):
+    """Regroupe les faits en double dont la clé n'a pas de mode de paiement ou pas de vendeur."""
+    VenteJournaliere = apps.get_model('stock', 'VenteJournaliere')
+
+    cle = ['jour', 'produit_id', 'mode_paiement_id', 'vendeur_id']
+    doublons = (
+        VenteJournaliere.objects.filter(Q(mode_paiement__isnull=True) | Q(vendeur__isnull=True))
+        .order_by().values(*cle)
+        .annotate(nombre=Count('id'), garde=Min('id'),
+                  total_quantite=Sum('quantite'), total_ca=Sum('chiffre_affaires'), total_lignes=Sum('lignes'))
+        .filter(nombre__gt=1)
+    )
+    for doublon in doublons:
+        # filter(champ=None) se traduit en IS NULL
+        faits = VenteJournaliere.objects.filter(**{champ: doublon[champ] for champ in cle})
+        faits.filter(pk=doublon['garde']).update(
+            quantite=doublon['total_quantite'], chiffre_affaires=doublon['total_ca'], lignes=doublon['total_lignes'],
+        )
+        faits.exclude(pk=doublon['garde']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0015_ventejournaliere_cle_unique'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(fusionner_doublons, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='ventejournaliere',
+            constraint=models.UniqueConstraint(condition=models.Q(('mode_paiement__isnull', True), ('vendeur__isnull', False)), fields=('jour', 'produit', 'vendeur'), name='ventejour_cle_sans_mode_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='ventejournaliere',
+            constraint=models.UniqueConstraint(condition=models.Q(('mode_paiement__isnull', False), ('vendeur__isnull', True)), fields=('jour', 'produit', 'mode_paiement'), name='ventejour_cle_sans_vendeur_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='ventejournaliere',
+            constraint=models.UniqueConstraint(condition=models.Q(('mode_paiement__isnull', True), ('vendeur__isnull', True)), fields=('jour', 'produit'), name='ventejour_cle_anonyme_unique'),
+        ),
+    ]
@@ -1,4 +1,6 @@
 from .produit import Produit, Categorie
+from .journal import JournalStock, InstantaneStock, PointReconciliation
+from .alerte import AlerteStock
 from .client import Client
 from .fournisseur import Fournisseur
 from .vente import Vente, LigneVente
@@ -6,3 +8,5 @@ from .stock import EntreeStock, SortieStock, MouvementStock
 from .reception import Reception, LigneReception
 from .unite import UniteDeMesure
 from .paiement import ModePaiement
+from .rapport import VenteJournaliere
+from .inventaire import Inventaire, LigneInventaire, ComptageInventaire
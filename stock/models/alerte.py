@@ -0,0 +1,30 @@
+from django.db import models
+from django.utils import timezone
+
+
+class AlerteStock(models.Model):
+    """
+    Passage d'un produit sous son seuil d'alerte : `debut` quand le stock
+    atteint ou franchit le seuil, `fin` quand il repasse au-dessus. Au plus
+    une alerte ouverte (fin nulle) par produit, garanti par la base.
+    """
+    produit = models.ForeignKey('Produit', on_delete=models.CASCADE, related_name='alertes')
+    debut = models.DateTimeField(default=timezone.now)
+    fin = models.DateTimeField(null=True, blank=True)
+    # Stock et seuil au déclenchement
+    stock = models.IntegerField()
+    seuil = models.IntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['produit'], condition=models.Q(fin__isnull=True), name='alerte_ouverte_unique',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['debut', 'id'], name='alerte_debut_id_idx'),
+        ]
+
+    def __str__(self):
+        etat = f"levée le {self.fin:%Y-%m-%d %H:%M}" if self.fin else "en cours"
+        return f"Alerte {self.produit_id} depuis le {self.debut:%Y-%m-%d %H:%M} ({etat})"
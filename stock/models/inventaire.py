@@ -0,0 +1,83 @@
+from django.conf import settings
+from django.db import models
+
+
+class Inventaire(models.Model):
+    """
+    Session d'inventaire physique. À l'ouverture, le stock_actuel des
+    produits du périmètre est figé (LigneInventaire.stock_gele) ; les
+    comptages sont saisis par zone pendant la session et la clôture applique
+    les écarts comptage - stock figé (stock/services/inventaires.py).
+    """
+    OUVERT = 'ouvert'
+    CLOTURE = 'cloture'
+    ANNULE = 'annule'
+
+    STATUT_CHOICES = [
+        (OUVERT, 'Ouvert'),
+        (CLOTURE, 'Clôturé'),
+        (ANNULE, 'Annulé'),
+    ]
+
+    description = models.CharField(max_length=255, blank=True)
+    # Périmètre : une catégorie, ou tout le catalogue
+    categorie = models.ForeignKey('Categorie', on_delete=models.SET_NULL, null=True, blank=True)
+    statut = models.CharField(max_length=10, choices=STATUT_CHOICES, default=OUVERT)
+    date_ouverture = models.DateTimeField(auto_now_add=True)
+    date_cloture = models.DateTimeField(null=True, blank=True)
+    # Nombre de produits dont le stock a été ajusté à la clôture
+    ajustements = models.PositiveIntegerField(default=0)
+
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='inventaires_crees'
+    )
+    cloture_par = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='inventaires_clotures'
+    )
+
+    def __str__(self):
+        return f"Inventaire #{self.pk} du {self.date_ouverture:%Y-%m-%d} ({self.get_statut_display()})"
+
+
+class LigneInventaire(models.Model):
+    """Produit du périmètre d'un inventaire, avec son stock figé à l'ouverture (unité de base)."""
+    inventaire = models.ForeignKey(Inventaire, on_delete=models.CASCADE, related_name='lignes')
+    produit = models.ForeignKey('Produit', on_delete=models.CASCADE, related_name='lignes_inventaire')
+    stock_gele = models.IntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['inventaire', 'produit'], name='inventaire_produit_unique'),
+        ]
+
+    def __str__(self):
+        return f"Inventaire #{self.inventaire_id} - {self.produit_id} : {self.stock_gele}"
+
+
+class ComptageInventaire(models.Model):
+    """
+    Quantité comptée (unité de base) d'un produit dans une zone. Un nouveau
+    comptage de la même zone remplace le précédent ; la quantité comptée
+    d'un produit est la somme de ses zones.
+    """
+    ligne = models.ForeignKey(LigneInventaire, on_delete=models.CASCADE, related_name='comptages')
+    zone = models.CharField(max_length=50, default='')
+    quantite = models.PositiveIntegerField()
+    date = models.DateTimeField(auto_now=True)
+    compte_par = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['ligne', 'zone'], name='comptage_ligne_zone_unique'),
+        ]
+
+    def __str__(self):
+        return f"Comptage {self.ligne_id} [{self.zone or '-'}] : {self.quantite}"
@@ -0,0 +1,91 @@
+from django.db import models
+from django.utils import timezone
+
+
+class JournalStock(models.Model):
+    """
+    Journal du stock, en ajout seul : une écriture par variation de
+    Produit.stock_actuel, avec la variation signée en unité de base.
+    Une annulation est une nouvelle écriture de signe opposé.
+    """
+    OUVERTURE = 'ouverture'
+    REPRISE = 'reprise'
+    RECONCILIATION = 'reconciliation'
+    AJUSTEMENT = 'ajustement'
+    ENTREE = 'entree'
+    SORTIE = 'sortie'
+    LIGNE_VENTE = 'ligne_vente'
+    LIGNE_RECEPTION = 'ligne_reception'
+    INVENTAIRE = 'inventaire'
+
+    SOURCE_CHOICES = [
+        (OUVERTURE, "Stock d'ouverture"),
+        (REPRISE, 'Reprise du stock existant'),
+        (RECONCILIATION, 'Correction de réconciliation'),
+        (AJUSTEMENT, 'Ajustement'),
+        (ENTREE, 'Entrée de stock'),
+        (SORTIE, 'Sortie de stock'),
+        (LIGNE_VENTE, 'Ligne de vente'),
+        (LIGNE_RECEPTION, 'Ligne de réception'),
+        (INVENTAIRE, "Écart d'inventaire"),
+    ]
+
+    produit = models.ForeignKey('Produit', on_delete=models.CASCADE, related_name='journal')
+    delta = models.IntegerField()
+    date = models.DateTimeField(default=timezone.now)
+    source_type = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    # Identifiant de la ligne (de vente, réception ou inventaire) / du mouvement / du produit (ouverture)
+    # à l'origine de l'écriture
+    source_id = models.PositiveBigIntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Parcours borné des écritures d'un produit entre deux dates
+            models.Index(fields=['produit', 'date'], name='journal_produit_date_idx'),
+            models.Index(fields=['source_type', 'source_id'], name='journal_source_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_source_type_display()} #{self.source_id} : {self.delta:+d} ({self.produit_id})"
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None and not self._state.adding:
+            raise ValueError("Le journal de stock est en ajout seul : une écriture ne peut pas être modifiée.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Le journal de stock est en ajout seul : une écriture ne peut pas être supprimée.")
+
+
+class InstantaneStock(models.Model):
+    """
+    Stock d'un produit arrêté à une date : somme des écritures du journal
+    jusqu'à `date` incluse. Sert de point de départ aux calculs de stock à une date.
+    """
+    produit = models.ForeignKey('Produit', on_delete=models.CASCADE, related_name='instantanes')
+    date = models.DateTimeField()
+    stock = models.IntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['produit', 'date'], name='instantane_produit_date_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.produit_id} @ {self.date:%Y-%m-%d %H:%M} : {self.stock}"
+
+
+class PointReconciliation(models.Model):
+    """
+    Exécution de la réconciliation du stock (stock/services/reconciliation.py).
+    `dernier_journal_id` sert de point de reprise aux exécutions incrémentales.
+    """
+    date = models.DateTimeField(auto_now_add=True)
+    dernier_journal_id = models.PositiveBigIntegerField(default=0)
+    incremental = models.BooleanField(default=False)
+    produits_verifies = models.PositiveIntegerField(default=0)
+    ecarts = models.PositiveIntegerField(default=0)
+    corrige = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f"Réconciliation du {self.date:%Y-%m-%d %H:%M} : {self.ecarts} écart(s)"
@@ -1,5 +1,8 @@
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
+
+from .journal import JournalStock
+from .querysets import ProduitQuerySet
 
 
 class Categorie(models.Model):
@@ -23,15 +26,25 @@ class Produit(models.Model):
     date_ajout = models.DateTimeField(auto_now_add=True)
     stock_actuel = models.IntegerField(default=0)
 
+    objects = ProduitQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Produits en alerte (sous_seuil) : l'index ne contient que ces produits
+            models.Index(fields=['id'], condition=models.Q(stock_actuel__lte=models.F('seuil_alerte')),
+                         name='produit_sous_seuil_idx'),
+        ]
+
     def __str__(self):
         return f"{self.nom} ({self.reference})"
 
     def convertir_en_unite_base(self, quantite, unite_utilisee):
-        from .unite import UniteDeMesure
-        
-        if unite_utilisee == self.unite:
+        # Comparaison sur les identifiants : évite de charger les unités du produit
+        unite_id = getattr(unite_utilisee, 'pk', unite_utilisee)
+
+        if unite_id is not None and unite_id == self.unite_id:
             return quantite
-        elif unite_utilisee == self.unite_conversion and self.facteur_conversion:
+        elif unite_id is not None and unite_id == self.unite_conversion_id and self.facteur_conversion:
             return quantite * self.facteur_conversion
         return None
 
@@ -40,4 +53,31 @@ class Produit(models.Model):
         if self.facteur_conversion <= 0:
             raise ValidationError("Le facteur de conversion doit être strictement positif.")
         if self.stock_actuel < 0:
-            raise ValidationError("Le stock actuel ne peut pas être négatif.")
\ No newline at end of file
+            raise ValidationError("Le stock actuel ne peut pas être négatif.")
+
+    def save(self, *args, **kwargs):
+        from stock.services.alertes import synchroniser_alertes
+
+        # stock_actuel n'est modifié que par stock.services.stock (UPDATE atomique) :
+        # une instance périmée ne doit pas écraser le compteur en base
+        if not self._state.adding:
+            if kwargs.get('update_fields') is None:
+                kwargs['update_fields'] = [
+                    field.name for field in self._meta.concrete_fields
+                    if not field.primary_key and field.name != 'stock_actuel'
+                ]
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+                # Un changement de seuil peut ouvrir ou fermer une alerte
+                if 'seuil_alerte' in kwargs['update_fields']:
+                    synchroniser_alertes([self.pk])
+            return
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # Stock initial d'un nouveau produit : première écriture du journal
+            if self.stock_actuel:
+                JournalStock.objects.create(
+                    produit=self, delta=self.stock_actuel, source_type=JournalStock.OUVERTURE, source_id=self.pk,
+                )
+            synchroniser_alertes([self.pk])
@@ -0,0 +1,20 @@
+from django.db import models
+from django.db.models import ExpressionWrapper, F
+
+
+class LigneQuerySet(models.QuerySet):
+    """QuerySet commun aux lignes de vente et de réception."""
+
+    def avec_sous_total(self):
+        """Calcule `quantite * prix_unitaire` en SQL (lu par la propriété `sous_total`)."""
+        return self.annotate(sous_total_sql=ExpressionWrapper(
+            F('quantite') * F('prix_unitaire'),
+            output_field=models.DecimalField(max_digits=14, decimal_places=2),
+        ))
+
+
+class ProduitQuerySet(models.QuerySet):
+
+    def sous_seuil(self):
+        """Produits dont le stock est au niveau ou sous le seuil d'alerte (index partiel produit_sous_seuil_idx)."""
+        return self.filter(stock_actuel__lte=F('seuil_alerte'))
@@ -0,0 +1,46 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import models
+
+
+class VenteJournaliere(models.Model):
+    """
+    Fait de vente agrégé : quantités et chiffre d'affaires des lignes de vente
+    actives d'un jour, par produit, mode de paiement et vendeur (created_by).
+    Tenu à jour à chaque vente, modification ou annulation de ligne
+    (stock/services/rapports.py) et reconstruit par `reconstruire_rapports`.
+    """
+    jour = models.DateField()
+    produit = models.ForeignKey('Produit', on_delete=models.CASCADE, related_name='ventes_journalieres')
+    mode_paiement = models.ForeignKey('ModePaiement', on_delete=models.SET_NULL, null=True, blank=True)
+    vendeur = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+                                related_name='ventes_journalieres')
+    # Quantité en unité de base du produit
+    quantite = models.BigIntegerField(default=0)
+    chiffre_affaires = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    lignes = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['jour', 'produit'], name='ventejour_jour_produit_idx'),
+        ]
+        constraints = [
+            # Un seul fait par clé : deux ventes simultanées ne créent pas de doublon (appliquer_faits).
+            # Les NULL étant distincts dans un index unique, les clés sans mode de paiement et/ou
+            # sans vendeur ont leur propre contrainte partielle (nulls_distinct exige PostgreSQL 15).
+            models.UniqueConstraint(fields=['jour', 'produit', 'mode_paiement', 'vendeur'],
+                                    name='ventejour_cle_unique'),
+            models.UniqueConstraint(fields=['jour', 'produit', 'vendeur'],
+                                    condition=models.Q(mode_paiement__isnull=True, vendeur__isnull=False),
+                                    name='ventejour_cle_sans_mode_unique'),
+            models.UniqueConstraint(fields=['jour', 'produit', 'mode_paiement'],
+                                    condition=models.Q(mode_paiement__isnull=False, vendeur__isnull=True),
+                                    name='ventejour_cle_sans_vendeur_unique'),
+            models.UniqueConstraint(fields=['jour', 'produit'],
+                                    condition=models.Q(mode_paiement__isnull=True, vendeur__isnull=True),
+                                    name='ventejour_cle_anonyme_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.jour} - {self.produit_id} : {self.chiffre_affaires}"
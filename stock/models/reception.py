@@ -1,9 +1,13 @@
+from decimal import Decimal
+
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import models, transaction
 from django.utils import timezone
 
-from stock.models import Produit
+from stock.services.stock import ajuster_stock
+from .journal import JournalStock
+from .querysets import LigneQuerySet
 
 
 class Reception(models.Model):
@@ -11,10 +15,10 @@ class Reception(models.Model):
     date = models.DateTimeField(default=timezone.now)
     description = models.TextField(blank=True, null=True)
 
-    total = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
-    montant_paye = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
-    reliquat_fournisseur = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
-    reliquat_magasin = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    total = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    montant_paye = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    reliquat_fournisseur = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    reliquat_magasin = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
     remarque = models.TextField(blank=True, null=True)
     is_active = models.BooleanField(default=True)
 
@@ -34,11 +38,19 @@ class Reception(models.Model):
         related_name='receptions_modifiees'
     )
 
+    class Meta:
+        indexes = [
+            # Pagination par curseur (date, id), dans les deux sens
+            models.Index(fields=['date', 'id'], name='reception_date_id_idx'),
+            # Réceptions actives d'une période (rapports)
+            models.Index(fields=['date'], condition=models.Q(is_active=True), name='reception_active_date_idx'),
+        ]
+
     def __str__(self):
         return f"Réception #{self.id}"
 
-    def calculer_reliquat(self):
-        """Calcule le reliquat fournisseur/magasin en fonction du paiement."""
+    def repartir_reliquat(self):
+        """Renseigne le reliquat fournisseur/magasin, sans sauvegarder."""
         if self.montant_paye < self.total:
             self.reliquat_fournisseur = self.total - self.montant_paye
             self.reliquat_magasin = 0
@@ -49,40 +61,32 @@ class Reception(models.Model):
             self.reliquat_fournisseur = 0
             self.reliquat_magasin = 0
 
+    def calculer_reliquat(self):
+        """Calcule le reliquat fournisseur/magasin en fonction du paiement."""
+        self.repartir_reliquat()
         self.save(update_fields=['reliquat_fournisseur', 'reliquat_magasin'])
 
     def calculer_total(self):
-        """Recalcule le total de la réception en fonction des lignes actives."""
-        total = 0
-        for ligne in self.lignes_reception.filter(is_active=True):
-            total += ligne.quantite * ligne.produit.prix_unitaire
-        self.total = total
-        self.save(update_fields=['total'])
-        self.calculer_reliquat()
+        """
+        Recalcule en SQL le total (lignes actives, prix de la ligne) et les
+        reliquats de la réception, en une seule requête UPDATE.
+        """
+        from stock.services.totaux import recalculer_totaux
+
+        recalculer_totaux(Reception.objects.filter(pk=self.pk))
+        self.refresh_from_db(fields=['total', 'reliquat_fournisseur', 'reliquat_magasin'])
 
     def soft_delete(self):
         """
-        Annuler une réception complète :
-        - Restitue le stock de toutes les lignes actives
-        - Désactive les lignes
-        - Met les montants à zéro
+        Annuler une réception complète (voir stock/services/annulations.py) :
+        - Retire le stock de toutes les lignes actives
+        - Désactive les lignes et les entrées miroirs
+        - Met les montants à zéro et désactive la réception
         """
-        with transaction.atomic():
-            for ligne in self.lignes_reception.filter(is_active=True).select_for_update():
-                produit = Produit.objects.select_for_update().get(pk=ligne.produit_id)
-                qte = produit.convertir_en_unite_base(ligne.quantite, ligne.unite_utilisee)
-                produit.stock_actuel -= qte
-                produit.save(update_fields=['stock_actuel'])
+        from stock.services.annulations import annuler_receptions
 
-                ligne.is_active = False
-                ligne.save(update_fields=['is_active'])
-
-            self.total = 0
-            self.montant_paye = 0
-            self.reliquat_fournisseur = 0
-            self.reliquat_magasin = 0
-            self.is_active = False
-            self.save(update_fields=['total', 'montant_paye', 'reliquat_fournisseur', 'reliquat_magasin', 'is_active'])
+        annuler_receptions([self.pk])
+        self.refresh_from_db(fields=['total', 'montant_paye', 'reliquat_fournisseur', 'reliquat_magasin', 'is_active'])
 
 
 class LigneReception(models.Model):
@@ -93,8 +97,21 @@ class LigneReception(models.Model):
     prix_unitaire = models.DecimalField(max_digits=10, decimal_places=2, default=1000)
     is_active = models.BooleanField(default=True)
 
+    objects = LigneQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Total et annulation d'une réception : lignes actives de la réception
+            models.Index(fields=['reception'], condition=models.Q(is_active=True), name='lignerecep_recep_active_idx'),
+            # Agrégats par produit (réconciliation, rapports)
+            models.Index(fields=['produit'], condition=models.Q(is_active=True), name='lignerecep_prod_active_idx'),
+        ]
+
     @property
     def sous_total(self):
+        # Valeur déjà calculée en SQL si le queryset a été annoté (avec_sous_total)
+        if hasattr(self, 'sous_total_sql'):
+            return self.sous_total_sql
         return self.quantite * self.prix_unitaire
 
     def __str__(self):
@@ -106,40 +123,30 @@ class LigneReception(models.Model):
 
     def save(self, *args, **kwargs):
         self.clean()
-        qte_new = self.produit.convertir_en_unite_base(self.quantite, self.unite_utilisee)
+        qte_new = self.produit.convertir_en_unite_base(self.quantite, self.unite_utilisee_id)
 
         if not qte_new or qte_new <= 0:
             raise ValidationError("Quantité ou unité invalide.")
 
         with transaction.atomic():
             if self.pk:  # Modification
-                ancien = type(self).objects.select_for_update().get(pk=self.pk)
+                ancien = type(self).objects.select_for_update().select_related('produit').get(pk=self.pk)
                 if ancien.is_active:
-                    produit_old = Produit.objects.select_for_update().get(pk=ancien.produit_id)
-                    qte_old = produit_old.convertir_en_unite_base(ancien.quantite, ancien.unite_utilisee)
-                    produit_old.stock_actuel -= qte_old
-                    produit_old.save(update_fields=["stock_actuel"])
+                    qte_old = ancien.produit.convertir_en_unite_base(ancien.quantite, ancien.unite_utilisee_id)
+                    # Décrément conditionnel : impossible de retirer un stock déjà consommé
+                    ajuster_stock(ancien.produit_id, -qte_old, JournalStock.LIGNE_RECEPTION, self.pk)
 
             super().save(*args, **kwargs)
 
             if self.is_active:
-                produit_new = Produit.objects.select_for_update().get(pk=self.produit_id)
-                produit_new.stock_actuel += qte_new
-                produit_new.save(update_fields=["stock_actuel"])
+                ajuster_stock(self.produit_id, qte_new, JournalStock.LIGNE_RECEPTION, self.pk)
 
-                # Mise à jour du total de la réception
-                self.reception.calculer_total()
+            # Mise à jour du total de la réception
+            self.reception.calculer_total()
 
     def soft_delete(self):
         """Annuler la ligne et restituer le stock sans la supprimer physiquement"""
         if self.is_active:
-            with transaction.atomic():
-                produit = Produit.objects.select_for_update().get(pk=self.produit_id)
-                qte = produit.convertir_en_unite_base(self.quantite, self.unite_utilisee)
-                produit.stock_actuel -= qte
-                produit.save(update_fields=['stock_actuel'])
-
-                self.is_active = False
-                self.save(update_fields=['is_active'])
-
-                self.reception.calculer_total()
+            # save() retire le stock de l'ancienne ligne active et recalcule le total
+            self.is_active = False
+            self.save(update_fields=['is_active'])
@@ -2,7 +2,8 @@ from django.conf import settings
 from django.db import models, transaction
 from django.core.exceptions import ValidationError
 
-from stock.models import Produit
+from stock.services.stock import ajuster_stock
+from .journal import JournalStock
 
 
 class MouvementStock(models.Model):
@@ -29,30 +30,37 @@ class MouvementStock(models.Model):
 
     class Meta:
         abstract = True
+        indexes = [
+            # Pagination par curseur (date, id), dans les deux sens
+            models.Index(fields=['date', 'id'], name='%(class)s_date_id_idx'),
+            # Mouvements actifs d'une période / d'un produit (rapports, réconciliation)
+            models.Index(fields=['date'], condition=models.Q(is_active=True), name='%(class)s_active_date_idx'),
+            models.Index(fields=['produit'], condition=models.Q(is_active=True), name='%(class)s_prod_active_idx'),
+        ]
 
     def quantite_en_unite_base(self):
         return self.produit.convertir_en_unite_base(self.quantite, self.unite_utilisee)
 
+    @property
+    def est_miroir(self):
+        """Mouvement généré par un document (vente, réception) : le stock est porté par ses lignes."""
+        return False
+
     def delete(self, using=None, keep_parents=False):
-        """Soft delete = désactivation + restitution du stock"""
+        """Soft delete = désactivation + restitution du stock (sauf miroir d'un document)"""
         if not self.is_active:
             return  # déjà supprimé logiquement
 
-        qte = self.quantite_en_unite_base()
         with transaction.atomic():
-            prod = Produit.objects.select_for_update().get(pk=self.produit_id)
-
             # 🔹 Annuler l’impact de ce mouvement
-            if isinstance(self, EntreeStock):
-                prod.stock_actuel -= qte
-            elif isinstance(self, SortieStock):
-                prod.stock_actuel += qte
-
-            prod.save(update_fields=["stock_actuel"])
+            if isinstance(self, SortieStock) and not self.est_miroir:
+                ajuster_stock(self.produit_id, self.quantite_en_unite_base(), JournalStock.SORTIE, self.pk)
+            elif isinstance(self, EntreeStock) and not self.est_miroir:
+                ajuster_stock(self.produit_id, -self.quantite_en_unite_base(), JournalStock.ENTREE, self.pk)
 
-            # Marquer comme inactif
+            # Marquer comme inactif (sans repasser par save(), qui réappliquerait le stock)
+            type(self).objects.filter(pk=self.pk).update(is_active=False)
             self.is_active = False
-            self.save(update_fields=["is_active"])
 
 
 class EntreeStock(MouvementStock):
@@ -66,6 +74,13 @@ class EntreeStock(MouvementStock):
 
     type_entree = models.CharField(max_length=20, choices=ENTREE_CHOICES, default='autre')
     fournisseur = models.ForeignKey('Fournisseur', on_delete=models.SET_NULL, null=True, blank=True)
+    # Réception à l'origine de l'entrée (entrée automatique) : le stock est porté par les lignes de réception
+    reception = models.ForeignKey('Reception', on_delete=models.CASCADE, null=True, blank=True,
+                                  related_name='entrees')
+
+    @property
+    def est_miroir(self):
+        return self.reception_id is not None
 
     def clean(self):
         if self.type_entree == 'achat' and self.fournisseur is None:
@@ -74,25 +89,25 @@ class EntreeStock(MouvementStock):
     def save(self, *args, **kwargs):
         self.clean()
 
+        # Miroir d'une réception : le stock est porté par la ligne de réception
+        if self.est_miroir:
+            return super().save(*args, **kwargs)
+
         with transaction.atomic():
             if self.pk:
                 ancien = type(self).objects.select_for_update().get(pk=self.pk)
-                prod_old = Produit.objects.select_for_update().get(pk=ancien.produit_id)
-                qte_old = ancien.quantite_en_unite_base()
+                if ancien.is_active:
+                    ajuster_stock(ancien.produit_id, -ancien.quantite_en_unite_base(), JournalStock.ENTREE, self.pk)
 
-                prod_old.stock_actuel -= qte_old
-                prod_old.save(update_fields=['stock_actuel'])
-
-            prod_new = Produit.objects.select_for_update().get(pk=self.produit_id)
             qte_new = self.quantite_en_unite_base()
 
             if qte_new<=0:
                 raise ValidationError("La quantité doit être un nombre positif.")
 
-            super().save()
+            super().save(*args, **kwargs)
 
-            prod_new.stock_actuel += qte_new
-            prod_new.save(update_fields=['stock_actuel'])
+            if self.is_active:
+                ajuster_stock(self.produit_id, qte_new, JournalStock.ENTREE, self.pk)
 
 
 
@@ -101,11 +116,18 @@ class SortieStock(MouvementStock):
         ('don', 'Don'),
         ('perte', 'Perte'),
         ('usage_interne', 'Usage interne'),
+        ('vente', 'Vente'),
         ('autre', 'Autre'),
     ]
 
     type_sortie = models.CharField(max_length=20, choices=SORTIE_CHOICES, default='autre')
     client = models.ForeignKey('Client', on_delete=models.SET_NULL, null=True, blank=True)
+    # Vente à l'origine de la sortie (sortie automatique) : le stock est porté par les lignes de vente
+    vente = models.ForeignKey('Vente', on_delete=models.CASCADE, null=True, blank=True, related_name='sorties')
+
+    @property
+    def est_miroir(self):
+        return self.vente_id is not None
 
     def clean(self):
         if self.client and self.type_sortie == 'autre':
@@ -114,24 +136,23 @@ class SortieStock(MouvementStock):
     def save(self, *args, **kwargs):
         self.clean()
 
+        # Miroir d'une vente : le stock est porté par la ligne de vente
+        if self.est_miroir:
+            return super().save(*args, **kwargs)
+
         with transaction.atomic():
             if self.pk:
                 ancien = type(self).objects.select_for_update().get(pk=self.pk)
-                prod_old = Produit.objects.select_for_update().get(pk=ancien.produit_id)
-                qte_old = ancien.quantite_en_unite_base()
-
-                prod_old.stock_actuel += qte_old
-                prod_old.save(update_fields=['stock_actuel'])
+                if ancien.is_active:
+                    ajuster_stock(ancien.produit_id, ancien.quantite_en_unite_base(), JournalStock.SORTIE, self.pk)
 
-            prod_new = Produit.objects.select_for_update().get(pk=self.produit_id)
             qte_new = self.quantite_en_unite_base()
 
             if qte_new<=0:
                 raise ValidationError("Quantité invalide !")
-            if prod_new.stock_actuel<qte_new:
-                raise ValidationError("Stock insuffisant pour cette sortie !")
 
             super().save(*args, **kwargs)
 
-            prod_new.stock_actuel -= qte_new
-            prod_new.save(update_fields=['stock_actuel'])
+            # Décrément conditionnel : lève StockInsuffisant (et annule la sortie) si le stock manque
+            if self.is_active:
+                ajuster_stock(self.produit_id, -qte_new, JournalStock.SORTIE, self.pk)
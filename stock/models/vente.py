@@ -1,10 +1,14 @@
+from decimal import Decimal
+
 from django.conf import settings
 from django.utils import timezone
 from django.core.validators import MinValueValidator
 from django.db import models, transaction
 from django.core.exceptions import ValidationError
 
-from stock.models import Produit
+from stock.services.stock import ajuster_stock
+from .journal import JournalStock
+from .querysets import LigneQuerySet
 
 
 class Vente(models.Model):
@@ -12,10 +16,10 @@ class Vente(models.Model):
     date = models.DateTimeField(default=timezone.now)
     mode_paiement = models.ForeignKey('ModePaiement', on_delete=models.SET_NULL, null=True, blank=True)
 
-    total = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
-    montant_paye = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
-    reliquat_client = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
-    reliquat_magasin = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    total = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    montant_paye = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    reliquat_client = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    reliquat_magasin = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
 
     remarque = models.TextField(blank=True, null=True)
     is_active = models.BooleanField(default=True)
@@ -36,17 +40,30 @@ class Vente(models.Model):
         related_name='ventes_modifiees'
     )
 
+    class Meta:
+        indexes = [
+            # Pagination par curseur (date, id), dans les deux sens
+            models.Index(fields=['date', 'id'], name='vente_date_id_idx'),
+            # Ventes actives d'une période (rapports)
+            models.Index(fields=['date'], condition=models.Q(is_active=True), name='vente_active_date_idx'),
+        ]
+
     def __str__(self):
         client_name = str(self.client) if self.client else "Sans client"
         return f"Vente #{self.id} - {client_name} - {self.date.strftime('%Y-%m-%d %H:%M')}"
 
     def calculer_total(self):
-        """Recalcule le total de la vente à partir des lignes."""
-        self.total = sum(l.sous_total for l in self.lignes.all())
-        self.save(update_fields=['total'])
+        """
+        Recalcule en SQL le total (lignes actives) et les reliquats de la vente,
+        en une seule requête UPDATE (voir stock/services/totaux.py).
+        """
+        from stock.services.totaux import recalculer_totaux
 
-    def calculer_reliquat(self):
-        """Calcule le reliquat côté client et côté magasin."""
+        recalculer_totaux(Vente.objects.filter(pk=self.pk))
+        self.refresh_from_db(fields=['total', 'reliquat_client', 'reliquat_magasin'])
+
+    def repartir_reliquat(self):
+        """Renseigne le reliquat côté client et côté magasin, sans sauvegarder."""
         if self.montant_paye < self.total:
             self.reliquat_client = self.total - self.montant_paye
             self.reliquat_magasin = 0
@@ -56,32 +73,24 @@ class Vente(models.Model):
         else:
             self.reliquat_client = 0
             self.reliquat_magasin = 0
+
+    def calculer_reliquat(self):
+        """Calcule le reliquat côté client et côté magasin."""
+        self.repartir_reliquat()
         self.save(update_fields=['reliquat_client', 'reliquat_magasin'])
 
 
     def soft_delete(self):
         """
-        Annuler une vente complète :
+        Annuler une vente complète (voir stock/services/annulations.py) :
         - Restitue le stock de toutes les lignes actives
-        - Désactive les lignes
-        - Met les montants de la vente à zéro
+        - Désactive les lignes (et les retire des faits de vente journaliers) et les sorties miroirs
+        - Met les montants de la vente à zéro et la désactive
         """
-        with transaction.atomic():
-            for ligne in self.lignes.filter(is_active=True).select_for_update():
-                produit = Produit.objects.select_for_update().get(pk=ligne.produit_id)
-                qte = produit.convertir_en_unite_base(ligne.quantite, ligne.unite_utilisee)
-                produit.stock_actuel += qte
-                produit.save(update_fields=['stock_actuel'])
-
-                ligne.is_active = False
-                ligne.save(update_fields=['is_active'])
-
-            # Réinitialiser les montants
-            self.total = 0
-            self.montant_paye = 0
-            self.reliquat_client = 0
-            self.reliquat_magasin = 0
-            self.save(update_fields=['total', 'montant_paye', 'reliquat_client', 'reliquat_magasin'])
+        from stock.services.annulations import annuler_ventes
+
+        annuler_ventes([self.pk])
+        self.refresh_from_db(fields=['total', 'montant_paye', 'reliquat_client', 'reliquat_magasin', 'is_active'])
 
 
 class LigneVente(models.Model):
@@ -92,8 +101,21 @@ class LigneVente(models.Model):
     prix_unitaire = models.DecimalField(max_digits=10, decimal_places=2)
     is_active = models.BooleanField(default=True)
 
+    objects = LigneQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Total et annulation d'une vente : lignes actives de la vente
+            models.Index(fields=['vente'], condition=models.Q(is_active=True), name='lignevente_vente_active_idx'),
+            # Agrégats par produit (réconciliation, rapports)
+            models.Index(fields=['produit'], condition=models.Q(is_active=True), name='lignevente_prod_active_idx'),
+        ]
+
     @property
     def sous_total(self):
+        # Valeur déjà calculée en SQL si le queryset a été annoté (avec_sous_total)
+        if hasattr(self, 'sous_total_sql'):
+            return self.sous_total_sql
         return self.quantite * self.prix_unitaire
 
     def save(self, *args, **kwargs):
@@ -102,46 +124,43 @@ class LigneVente(models.Model):
         - Si modification : restituer le stock de l’ancienne ligne
         - Vérifier stock suffisant AVANT insertion
         - Décrémenter le stock seulement après validation
-        - Recalculer le total de la vente
+        - Recalculer le total de la vente et les faits de vente journaliers
         """
+        from stock.services.rapports import ajouter_fait, appliquer_faits
+
         with transaction.atomic():
+            faits = {}
 
-            # 1) Si modification → restituer l’ancien stock
+            # 1) Si modification → restituer l’ancien stock (si la ligne était active)
             if self.pk:
-                ancien = type(self).objects.select_for_update().get(pk=self.pk)
-                produit_old = Produit.objects.select_for_update().get(pk=ancien.produit_id)
-                qte_old = produit_old.convertir_en_unite_base(ancien.quantite, ancien.unite_utilisee)
-                produit_old.stock_actuel += qte_old
-                produit_old.save(update_fields=['stock_actuel'])
+                ancien = type(self).objects.select_for_update().select_related('produit', 'vente').get(pk=self.pk)
+                if ancien.is_active:
+                    qte_old = ancien.produit.convertir_en_unite_base(ancien.quantite, ancien.unite_utilisee_id)
+                    ajuster_stock(ancien.produit_id, qte_old, JournalStock.LIGNE_VENTE, self.pk)
+                    ajouter_fait(faits, ancien.vente, ancien.produit_id, -qte_old,
+                                 -ancien.quantite * ancien.prix_unitaire, lignes=-1)
 
             # 2) Vérifier la nouvelle quantité AVANT de sauver
-            produit_new = Produit.objects.select_for_update().get(pk=self.produit_id)
-            qte_new = produit_new.convertir_en_unite_base(self.quantite, self.unite_utilisee)
+            qte_new = self.produit.convertir_en_unite_base(self.quantite, self.unite_utilisee_id)
 
             if not qte_new or qte_new <= 0:
                 raise ValidationError("Quantité ou unité invalide")
-            if produit_new.stock_actuel < qte_new:
-                raise ValidationError("Stock insuffisant pour ce produit")
 
-            # 3) Sauvegarde de la ligne (si tout est OK)
+            # 3) Sauvegarde de la ligne
             super().save(*args, **kwargs)
 
-            # 4) Mise à jour du stock
-            produit_new.stock_actuel -= qte_new
-            produit_new.save(update_fields=["stock_actuel"])
+            # 4) Décrément conditionnel du stock : lève StockInsuffisant (et annule tout) si le stock manque
+            if self.is_active:
+                ajuster_stock(self.produit_id, -qte_new, JournalStock.LIGNE_VENTE, self.pk)
+                ajouter_fait(faits, self.vente, self.produit_id, qte_new, self.quantite * self.prix_unitaire)
 
-            # 5) Recalcul du total de la vente
+            # 5) Recalcul du total de la vente et des faits de vente journaliers
             self.vente.calculer_total()
+            appliquer_faits(faits)
 
     def soft_delete(self):
         """Annuler la ligne et restituer le stock sans la supprimer physiquement"""
         if self.is_active:
-            with transaction.atomic():
-                produit = Produit.objects.select_for_update().get(pk=self.produit_id)
-                qte = produit.convertir_en_unite_base(self.quantite, self.unite_utilisee)
-                produit.stock_actuel += qte
-                produit.save(update_fields=['stock_actuel'])
-
-                self.is_active = False
-                self.save(update_fields=['is_active'])
-                self.vente.calculer_total()
+            # save() restitue le stock de l'ancienne ligne active et recalcule le total
+            self.is_active = False
+            self.save(update_fields=['is_active'])
@@ -5,4 +5,8 @@ from .vente import *
 from .stock import *
 from .reception import *
 from .unite import *
-from .paiement import *
\ No newline at end of file
+from .paiement import *
+from .reconciliation import *
+from .rapport import *
+from .inventaire import *
+from .annulation import *
@@ -0,0 +1,12 @@
+from rest_framework import serializers
+
+
+class AnnulationDemandeSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=1000)
+
+
+class AnnulationSerializer(serializers.Serializer):
+    annules = serializers.ListField(child=serializers.IntegerField())
+    deja_annules = serializers.ListField(child=serializers.IntegerField())
+    introuvables = serializers.ListField(child=serializers.IntegerField())
+    lignes = serializers.IntegerField()
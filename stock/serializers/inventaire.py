@@ -0,0 +1,40 @@
+from rest_framework import serializers
+
+from stock.models import Inventaire, LigneInventaire
+
+
+class InventaireSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Inventaire
+        fields = ['id', 'description', 'categorie', 'statut', 'date_ouverture', 'date_cloture', 'ajustements',
+                  'created_by', 'cloture_par']
+        read_only_fields = ['statut', 'date_ouverture', 'date_cloture', 'ajustements', 'created_by', 'cloture_par']
+
+
+class ComptageSerializer(serializers.Serializer):
+    produit = serializers.IntegerField()
+    # En unité de base du produit
+    quantite = serializers.IntegerField(min_value=0)
+
+
+class ComptagesSerializer(serializers.Serializer):
+    zone = serializers.CharField(max_length=50, allow_blank=True, default='')
+    lignes = ComptageSerializer(many=True, allow_empty=False)
+
+    def validate_lignes(self, lignes):
+        produits = [ligne['produit'] for ligne in lignes]
+        if len(set(produits)) != len(produits):
+            raise serializers.ValidationError("Un produit ne peut être compté qu'une fois par zone et par envoi.")
+        return lignes
+
+
+class EcartInventaireSerializer(serializers.ModelSerializer):
+    """Ligne d'inventaire annotée par services.inventaires.ecarts."""
+    reference = serializers.CharField(source='produit.reference', read_only=True)
+    nom = serializers.CharField(source='produit.nom', read_only=True)
+    compte = serializers.IntegerField(read_only=True)
+    ecart = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = LigneInventaire
+        fields = ['produit', 'reference', 'nom', 'stock_gele', 'compte', 'ecart']
@@ -1,6 +1,6 @@
 from rest_framework import serializers
 
-from stock.models import Categorie, Produit
+from stock.models import AlerteStock, Categorie, Produit
 from .unite import UniteDeMesureSerializer
 
 class CategorieSerializer(serializers.ModelSerializer):
@@ -31,6 +31,34 @@ class ProduitReadSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['date_ajout']
 
+class ProduitCompactSerializer(serializers.ModelSerializer):
+    """Représentation réduite pour la recherche (lecteurs de codes-barres, autocomplétion)."""
+    class Meta:
+        model = Produit
+        fields = ['id', 'reference', 'nom', 'prix_unitaire', 'stock_actuel', 'unite']
+
+
+class ProduitAlerteSerializer(serializers.ModelSerializer):
+    """Produit sous son seuil d'alerte (annoté par services.alertes.produits_en_alerte)."""
+    alerte_depuis = serializers.DateTimeField(read_only=True, allow_null=True)
+
+    class Meta:
+        model = Produit
+        fields = ['id', 'reference', 'nom', 'stock_actuel', 'seuil_alerte', 'unite', 'alerte_depuis']
+
+
+class AlerteStockSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AlerteStock
+        fields = ['id', 'produit', 'debut', 'fin', 'stock', 'seuil']
+
+
+class RechercheProduitSerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=150, trim_whitespace=True)
+    mode = serializers.ChoiceField(choices=['auto', 'exact', 'prefixe', 'floue'], default='auto')
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+
 class ProduitWriteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Produit
@@ -44,4 +72,31 @@ class ProduitWriteSerializer(serializers.ModelSerializer):
             'prix_unitaire',
             'description',
             'seuil_alerte',
-        ]
\ No newline at end of file
+        ]
+
+class ImportCatalogueSerializer(serializers.Serializer):
+    fichier = serializers.FileField()
+    # Déduit de l'extension du fichier si absent
+    format = serializers.ChoiceField(choices=['csv', 'jsonl'], required=False)
+    simuler = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        if 'format' not in attrs:
+            extension = attrs['fichier'].name.rsplit('.', 1)[-1].lower()
+            if extension not in ('csv', 'jsonl'):
+                raise serializers.ValidationError({'format': "Format à préciser (csv ou jsonl)."})
+            attrs['format'] = extension
+        return attrs
+
+
+class ErreurImportSerializer(serializers.Serializer):
+    ligne = serializers.IntegerField()
+    reference = serializers.CharField()
+    erreurs = serializers.DictField(child=serializers.CharField())
+
+
+class RapportImportSerializer(serializers.Serializer):
+    lignes = serializers.IntegerField()
+    crees = serializers.IntegerField()
+    mis_a_jour = serializers.IntegerField()
+    erreurs = ErreurImportSerializer(many=True)
@@ -0,0 +1,54 @@
+from django.utils import timezone
+from rest_framework import serializers
+
+from stock.services.rapports import AXES
+from stock.services.reappro import CYCLE, DELAI, JOURS, TAUX_SERVICE
+
+
+class RapportVentesDemandeSerializer(serializers.Serializer):
+    # Par défaut : du premier jour du mois courant à aujourd'hui
+    debut = serializers.DateField(required=False)
+    fin = serializers.DateField(required=False)
+    par = serializers.ChoiceField(choices=list(AXES), default='jour')
+
+    def validate(self, attrs):
+        aujourd_hui = timezone.localdate()
+        attrs.setdefault('fin', aujourd_hui)
+        attrs.setdefault('debut', attrs['fin'].replace(day=1))
+        if attrs['debut'] > attrs['fin']:
+            raise serializers.ValidationError({'debut': "La date de début doit précéder la date de fin."})
+        return attrs
+
+
+class LigneRapportVentesSerializer(serializers.Serializer):
+    cle = serializers.CharField(allow_null=True)
+    libelle = serializers.CharField(allow_null=True)
+    quantite = serializers.IntegerField()
+    chiffre_affaires = serializers.DecimalField(max_digits=14, decimal_places=2)
+    lignes = serializers.IntegerField()
+
+
+class ReapprovisionnementDemandeSerializer(serializers.Serializer):
+    jours = serializers.IntegerField(min_value=7, max_value=730, default=JOURS)
+    delai = serializers.IntegerField(min_value=0, max_value=365, default=DELAI)
+    cycle = serializers.IntegerField(min_value=1, max_value=365, default=CYCLE)
+    taux_service = serializers.FloatField(min_value=0.5, max_value=0.999, default=TAUX_SERVICE)
+
+
+class SuggestionReapproSerializer(serializers.Serializer):
+    produit_id = serializers.IntegerField()
+    reference = serializers.CharField()
+    nom = serializers.CharField()
+    stock_actuel = serializers.IntegerField()
+    demande_journaliere = serializers.FloatField()
+    ecart_type = serializers.FloatField()
+    jours_de_couverture = serializers.FloatField(allow_null=True)
+    quantite = serializers.IntegerField()
+    prix_unitaire = serializers.FloatField(allow_null=True)
+
+
+class CommandeReapproSerializer(serializers.Serializer):
+    fournisseur_id = serializers.IntegerField(allow_null=True)
+    fournisseur = serializers.CharField(allow_null=True)
+    montant = serializers.FloatField()
+    lignes = SuggestionReapproSerializer(many=True)
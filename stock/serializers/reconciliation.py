@@ -0,0 +1,25 @@
+from rest_framework import serializers
+
+from stock.models import PointReconciliation
+
+
+class PointReconciliationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PointReconciliation
+        fields = ['id', 'date', 'dernier_journal_id', 'incremental', 'produits_verifies', 'ecarts', 'corrige']
+
+
+class ReconciliationDemandeSerializer(serializers.Serializer):
+    corriger = serializers.BooleanField(default=False)
+    incremental = serializers.BooleanField(default=False)
+
+
+class EcartStockSerializer(serializers.Serializer):
+    produit_id = serializers.IntegerField()
+    nom = serializers.CharField()
+    stock_actuel = serializers.IntegerField()
+    attendu = serializers.IntegerField()
+    ecart = serializers.SerializerMethodField()
+
+    def get_ecart(self, obj) -> int:
+        return obj.attendu - obj.stock_actuel
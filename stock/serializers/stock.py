@@ -1,6 +1,5 @@
-from django.db import transaction
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
-from rest_framework.exceptions import ValidationError
 
 from stock.models import EntreeStock, SortieStock
 from stock.serializers import ProduitReadSerializer, FournisseurSerializer, UniteDeMesureSerializer, ClientSerializer
@@ -25,20 +24,18 @@ class EntreeStockWriteSerializer(serializers.ModelSerializer):
         model = EntreeStock
         fields = ['produit', 'quantite', 'unite_utilisee', 'fournisseur', 'description', 'type_entree']
 
+    # La mise à jour du stock est faite par EntreeStock.save (UPDATE atomique)
     def create(self, validated_data):
-        produit = validated_data['produit']
-        quantite_convertie = produit.convertir_en_unite_base(
-            validated_data['quantite'],
-            validated_data['unite_utilisee']
-        )
+        try:
+            return super().create(validated_data)
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.messages)
 
-        #creation + mise a jour du stock
-        with transaction.atomic():
-            entree = super().create(validated_data)
-            produit.stock_actuel += quantite_convertie
-            produit.save()
-
-        return entree
+    def update(self, instance, validated_data):
+        try:
+            return super().update(instance, validated_data)
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.messages)
 
 class SortieStockReadSerializer(serializers.ModelSerializer):
     produit = ProduitReadSerializer(read_only=True)
@@ -77,21 +74,16 @@ class SortieStockWriteSerializer(serializers.ModelSerializer):
             'description',
     ]
 
+    # Le décrément conditionnel du stock est fait par SortieStock.save :
+    # une sortie sans stock suffisant n'est pas enregistrée
     def create(self, validated_data):
-        produit = validated_data['produit']
-        quantite_convertie = produit.convertir_en_unite_base(
-            validated_data['quantite'],
-            validated_data['unite_utilisee']
-        )
-        sortie = super().create(validated_data)
-
-        #verification de la disponibilité du stock
-        if produit.stock_actuel < quantite_convertie:
-            raise ValidationError("Stock insuffisant pour cette sortie.")
-
-        #création + mise a jour du stock
-        with transaction.atomic():
-            produit.stock_actuel -= quantite_convertie
-            produit.save()
-
-        return sortie
+        try:
+            return super().create(validated_data)
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.messages)
+
+    def update(self, instance, validated_data):
+        try:
+            return super().update(instance, validated_data)
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.messages)
@@ -1,27 +1,48 @@
-from django.db import transaction
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
 
 from users.serializers import UserReadSerializer
 from . import UniteDeMesureSerializer
 from .client import ClientSerializer
 from .paiement import ModePaiementSerializer
-from ..models import Vente, LigneVente, SortieStock
+from ..models import Vente, LigneVente
+from ..services.ventes import creer_vente, modifier_vente
 from .produit import ProduitReadSerializer
 
 
 class LigneVenteReadSerializer(serializers.ModelSerializer):
     produit = ProduitReadSerializer(read_only=True)
-    unite = UniteDeMesureSerializer(read_only=True)
+    unite = UniteDeMesureSerializer(source='unite_utilisee', read_only=True)
     class Meta:
         model = LigneVente
         fields = ['id', 'produit', 'unite', 'quantite', 'prix_unitaire', 'sous_total']
 
+    # Lecture rapide (gestion_stock/lecture_rapide.py) : colonne lue par la propriété sous_total
+    colonnes_lecture = {'sous_total': 'sous_total_sql'}
+
+    @classmethod
+    def preparer_queryset(cls, queryset):
+        return queryset.avec_sous_total()
+
 
 class LigneVenteWriteSerializer(serializers.ModelSerializer):
     class Meta:
         model = LigneVente
         fields = ['produit', 'unite_utilisee', 'quantite', 'prix_unitaire']
 
+    # Le stock est ajusté par LigneVente.save (UPDATE conditionnel) : stock insuffisant -> 400
+    def create(self, validated_data):
+        try:
+            return super().create(validated_data)
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.messages)
+
+    def update(self, instance, validated_data):
+        try:
+            return super().update(instance, validated_data)
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.messages)
+
 
 class VenteReadSerializer(serializers.ModelSerializer):
     client = ClientSerializer(read_only=True)
@@ -44,57 +65,22 @@ class VenteWriteSerializer(serializers.ModelSerializer):
         fields = ['client', 'mode_paiement', 'remarque', 'lignes']
 
     def create(self, validated_data):
+        """
+        Enregistre la vente via le moteur par lot (stock/services/ventes.py) :
+        verrouillage des produits, contrôle du stock et écritures groupées.
+        """
         lignes_data = validated_data.pop('lignes')
-
-        with transaction.atomic():
-            vente = Vente.objects.create(**validated_data)
-
-            total_vente = 0
-            for ligne_data in lignes_data:
-                produit = ligne_data['produit']
-                quantite = ligne_data['quantite']
-                prix_unitaire = ligne_data['prix_unitaire']
-                unite = ligne_data['unite_utilisee']
-
-                # Conversion en unité de base
-                quantite_en_unite_base = produit.convertir_en_unite_base(quantite, unite)
-
-                # Vérification du stock disponible
-                if produit.stock_actuel < quantite_en_unite_base:
-                    raise serializers.ValidationError(
-                        f"Le stock du produit {produit.nom} est insuffisant pour la quantité demandée."
-                    )
-
-                # Création de la ligne de vente
-                ligne = LigneVente.objects.create(
-                    vente=vente,
-                    produit=produit,
-                    quantite=quantite,
-                    prix_unitaire=prix_unitaire,
-                    unite_utilisee=unite
-                )
-
-                # Mise à jour du stock du produit
-                produit.stock_actuel -= quantite_en_unite_base
-                produit.save()
-
-                # Création de la sortie de stock liée à la vente
-                SortieStock.objects.create(
-                    produit=produit,
-                    quantite=quantite,
-                    unite_utilisee=unite,
-                    type_sortie='vente',
-                    client=vente.client,
-                    description=f"Sortie automatique liée à la vente n°{vente.id}"
-                )
-
-                # Calcul du total
-                total_vente += quantite * prix_unitaire
-
-        # Mise à jour du total de la vente
-        vente.total = total_vente
-        vente.save(update_fields=['total'])
-
-        return vente
-
-
+        try:
+            return creer_vente(lignes_data, **validated_data)
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.messages)
+
+    def update(self, instance, validated_data):
+        """
+        Modifie l'en-tête de la vente (stock/services/ventes.py) : un changement
+        de mode de paiement est reporté dans les faits de vente journaliers.
+        Les lignes se modifient par l'endpoint des lignes de vente.
+        """
+        if 'lignes' in validated_data:
+            raise serializers.ValidationError({'lignes': "Les lignes d'une vente existante se modifient une à une."})
+        return modifier_vente(instance, **validated_data)
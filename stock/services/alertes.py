@@ -0,0 +1,87 @@
+"""
+Alertes de stock bas (Produit.seuil_alerte).
+
+Un produit est en alerte quand stock_actuel <= seuil_alerte ; la liste des
+produits en alerte est servie par l'index partiel produit_sous_seuil_idx,
+qui ne contient que ces produits.
+
+Les passages sous le seuil et les remontées sont détectés par les
+primitives de stock (stock/services/stock.py), dans la transaction de la
+variation : une requête sur les seuls produits modifiés, qui ne renvoie que
+ceux dont la variation a franchi le seuil. Chaque passage ouvre une
+AlerteStock, chaque remontée la ferme ; la contrainte alerte_ouverte_unique
+empêche les doublons. `synchroniser_alertes()` aligne les alertes ouvertes
+sur l'état du stock lorsqu'il change hors des primitives (création de
+produit, changement de seuil, import, correction de réconciliation).
+"""
+from django.db.models import Exists, F, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from stock.models import AlerteStock, Produit
+
+
+def _ouvrir(produits):
+    """Ouvre une alerte pour chaque (produit_id, stock, seuil) sans alerte ouverte."""
+    AlerteStock.objects.bulk_create(
+        [AlerteStock(produit_id=produit_id, stock=stock, seuil=seuil) for produit_id, stock, seuil in produits],
+        ignore_conflicts=True,
+    )
+
+
+def _fermer(produit_ids):
+    AlerteStock.objects.filter(produit_id__in=produit_ids, fin__isnull=True).update(fin=timezone.now())
+
+
+def signaler_franchissements(deltas):
+    """
+    Ouvre ou ferme les alertes des produits dont la variation {produit_id: delta},
+    déjà appliquée, vient de franchir le seuil d'alerte.
+    """
+    condition = Q()
+    for produit_id, delta in deltas.items():
+        if delta < 0:
+            # Avant : stock - delta > seuil ; après : stock <= seuil
+            condition |= Q(pk=produit_id, stock_actuel__lte=F('seuil_alerte'),
+                           seuil_alerte__lt=F('stock_actuel') - delta)
+        elif delta > 0:
+            # Avant : stock - delta <= seuil ; après : stock > seuil
+            condition |= Q(pk=produit_id, stock_actuel__gt=F('seuil_alerte'),
+                           stock_actuel__lte=F('seuil_alerte') + delta)
+    if not condition:
+        return
+
+    franchissements = list(Produit.objects.filter(condition).values_list('id', 'stock_actuel', 'seuil_alerte'))
+    if franchissements:
+        _ouvrir([(produit_id, stock, seuil) for produit_id, stock, seuil in franchissements if stock <= seuil])
+        _fermer([produit_id for produit_id, stock, seuil in franchissements if stock > seuil])
+
+
+def synchroniser_alertes(produits=None):
+    """
+    Ouvre les alertes manquantes des produits sous le seuil et ferme celles
+    des produits remontés. `produits` : identifiants (liste ou queryset), None pour tous.
+    """
+    catalogue = Produit.objects.all() if produits is None else Produit.objects.filter(pk__in=produits)
+    # Une requête : produits sous le seuil ou ayant une alerte ouverte
+    etats = (
+        catalogue.annotate(ouverte=Exists(AlerteStock.objects.filter(produit_id=OuterRef('pk'), fin__isnull=True)))
+        .filter(Q(stock_actuel__lte=F('seuil_alerte')) | Q(ouverte=True))
+        .values_list('id', 'stock_actuel', 'seuil_alerte', 'ouverte')
+    )
+    a_ouvrir, a_fermer = [], []
+    for produit_id, stock, seuil, ouverte in etats:
+        if stock <= seuil and not ouverte:
+            a_ouvrir.append((produit_id, stock, seuil))
+        elif stock > seuil:
+            a_fermer.append(produit_id)
+    if a_ouvrir:
+        _ouvrir(a_ouvrir)
+    if a_fermer:
+        _fermer(a_fermer)
+
+
+def produits_en_alerte():
+    """Produits sous le seuil, avec la date de début de leur alerte ouverte (`alerte_depuis`)."""
+    return Produit.objects.sous_seuil().annotate(alerte_depuis=Subquery(
+        AlerteStock.objects.filter(produit_id=OuterRef('pk'), fin__isnull=True).values('debut')[:1]
+    ))
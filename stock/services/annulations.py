@@ -0,0 +1,88 @@
+"""
+Annulation par lot de ventes et de réceptions.
+
+Pour un lot de documents, dans une transaction et en un nombre constant de
+requêtes (hors lots de LOT_PRODUITS produits) :
+- documents actifs verrouillés (SELECT ... FOR UPDATE ORDER BY id) ;
+- écritures d'annulation des lignes actives lues en une requête, produits
+  concernés verrouillés une seule fois dans l'ordre des id ;
+- stock restitué (vente) ou retiré (réception) par variations groupées par
+  produit (appliquer_journal), une écriture au journal par ligne ;
+- faits de vente journaliers retirés (ventes) ;
+- lignes, entrées / sorties miroirs et en-têtes désactivés par des UPDATE
+  ensemblistes, montants des en-têtes remis à zéro.
+Les documents déjà annulés sont ignorés.
+"""
+from collections import namedtuple
+
+from django.db import transaction
+
+from stock.models import (
+    EntreeStock, JournalStock, LigneReception, LigneVente, Reception, SortieStock, Vente,
+)
+from .rapports import appliquer_faits, faits_lignes
+from .stock import appliquer_journal, ecritures_annulation, verrouiller_produits
+
+# signe : +1 pour restituer le stock retiré par les lignes, -1 pour retirer le stock apporté
+Document = namedtuple('Document', ['model', 'lignes', 'champ', 'source_type', 'signe', 'miroirs', 'montants'])
+
+VENTES = Document(
+    model=Vente,
+    lignes=LigneVente,
+    champ='vente',
+    source_type=JournalStock.LIGNE_VENTE,
+    signe=1,
+    miroirs=SortieStock,
+    montants=['total', 'montant_paye', 'reliquat_client', 'reliquat_magasin'],
+)
+RECEPTIONS = Document(
+    model=Reception,
+    lignes=LigneReception,
+    champ='reception',
+    source_type=JournalStock.LIGNE_RECEPTION,
+    signe=-1,
+    miroirs=EntreeStock,
+    montants=['total', 'montant_paye', 'reliquat_fournisseur', 'reliquat_magasin'],
+)
+
+Annulation = namedtuple('Annulation', ['annules', 'deja_annules', 'introuvables', 'lignes'])
+
+
+@transaction.atomic
+def annuler_documents(document, ids, utilisateur=None):
+    """
+    Annule les documents `ids` (voir VENTES, RECEPTIONS). Lève StockInsuffisant
+    (rien n'est annulé) si le stock d'un produit ne couvre pas le retrait
+    d'une réception. Retourne une Annulation (identifiants triés).
+    """
+    ids = set(ids)
+    etats = dict(
+        document.model.objects.select_for_update().filter(pk__in=ids).order_by('id').values_list('id', 'is_active')
+    )
+    annules = sorted(pk for pk, actif in etats.items() if actif)
+    if not annules:
+        return Annulation([], sorted(etats), sorted(ids - etats.keys()), 0)
+
+    lignes = document.lignes.objects.filter(**{f'{document.champ}_id__in': annules, 'is_active': True})
+    journal = ecritures_annulation(lignes, document.source_type, document.signe)
+    verrouiller_produits({ecriture.produit_id for ecriture in journal}, 'id')
+    appliquer_journal(journal)
+    if document is VENTES:
+        appliquer_faits(faits_lignes(lignes, signe=-1))
+
+    lignes.update(is_active=False)
+    champs = {'is_active': False}
+    if utilisateur is not None:
+        champs['updated_by'] = utilisateur
+    document.miroirs.objects.filter(**{f'{document.champ}_id__in': annules, 'is_active': True}).update(**champs)
+    document.model.objects.filter(pk__in=annules).update(**champs, **{montant: 0 for montant in document.montants})
+    return Annulation(annules, sorted(pk for pk, actif in etats.items() if not actif), sorted(ids - etats.keys()),
+                      len(journal))
+
+
+def annuler_ventes(ids, utilisateur=None):
+    return annuler_documents(VENTES, ids, utilisateur)
+
+
+def annuler_receptions(ids, utilisateur=None):
+    return annuler_documents(RECEPTIONS, ids, utilisateur)
@@ -0,0 +1,195 @@
+"""
+Import en masse du catalogue produits (CSV / JSON Lines), avec mise à jour
+par référence.
+
+- Catégories et unités sont résolues par nom (insensible à la casse) via
+  deux dictionnaires chargés une seule fois : aucune requête par ligne.
+- Les lignes sont validées en mémoire ; une ligne invalide est signalée
+  dans le rapport et n'empêche pas l'import des autres.
+- Les lignes valides sont écrites par lots avec
+  bulk_create(update_conflicts=True) sur la contrainte unique `reference` :
+  un produit existant est mis à jour, sans toucher à son stock ; les
+  alertes de stock bas sont ensuite alignées sur les nouveaux seuils.
+"""
+import csv
+import io
+import json
+from collections import namedtuple
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from gestion_stock.versions import invalider_collections
+from stock.models import Categorie, Produit, UniteDeMesure
+from .alertes import synchroniser_alertes
+from .recherche import invalider_catalogue
+
+TAILLE_LOT = 1000
+
+COLONNES = [
+    'reference', 'nom', 'categorie', 'unite', 'unite_conversion', 'facteur_conversion',
+    'prix_unitaire', 'description', 'seuil_alerte',
+]
+OBLIGATOIRES = ('reference', 'nom', 'categorie', 'unite', 'prix_unitaire')
+
+# Champs écrits lors de la mise à jour d'un produit existant (jamais stock_actuel)
+CHAMPS_MIS_A_JOUR = [
+    'nom', 'categorie', 'unite', 'unite_conversion', 'facteur_conversion', 'prix_unitaire', 'description',
+    'seuil_alerte',
+]
+
+ErreurImport = namedtuple('ErreurImport', ['ligne', 'reference', 'erreurs'])
+RapportImport = namedtuple('RapportImport', ['lignes', 'crees', 'mis_a_jour', 'erreurs'])
+
+
+class FormatInvalide(ValueError):
+    """Fichier illisible (format inconnu, JSON invalide, en-tête CSV incomplet)."""
+
+
+def lire_csv(texte):
+    lecteur = csv.DictReader(io.StringIO(texte))
+    manquantes = [colonne for colonne in OBLIGATOIRES if colonne not in (lecteur.fieldnames or [])]
+    if manquantes:
+        raise FormatInvalide(f"Colonne(s) manquante(s) : {', '.join(manquantes)}.")
+    return list(lecteur)
+
+
+def lire_jsonl(texte):
+    lignes = []
+    for numero, ligne in enumerate(texte.splitlines(), start=1):
+        if not ligne.strip():
+            continue
+        try:
+            objet = json.loads(ligne)
+        except ValueError:
+            raise FormatInvalide(f"Ligne {numero} : JSON invalide.")
+        if not isinstance(objet, dict):
+            raise FormatInvalide(f"Ligne {numero} : un objet JSON est attendu.")
+        lignes.append(objet)
+    return lignes
+
+
+LECTEURS = {'csv': lire_csv, 'jsonl': lire_jsonl}
+
+
+def lire_fichier(contenu, format):
+    """Lignes (dictionnaires) d'un fichier CSV ou JSONL, en octets ou en texte."""
+    if format not in LECTEURS:
+        raise FormatInvalide(f"Format inconnu : {format} (csv ou jsonl).")
+    if isinstance(contenu, bytes):
+        try:
+            contenu = contenu.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise FormatInvalide("Le fichier doit être encodé en UTF-8.")
+    return LECTEURS[format](contenu)
+
+
+def _texte(valeur):
+    return '' if valeur is None else str(valeur).strip()
+
+
+def _entier(valeur, nom, erreurs, defaut, minimum):
+    if _texte(valeur) == '':
+        return defaut
+    try:
+        nombre = int(_texte(valeur))
+    except ValueError:
+        erreurs[nom] = "Nombre entier attendu."
+        return None
+    if nombre < minimum:
+        erreurs[nom] = f"Doit être supérieur ou égal à {minimum}."
+    return nombre
+
+
+def _prix(valeur, erreurs):
+    try:
+        prix = Decimal(_texte(valeur))
+    except InvalidOperation:
+        erreurs['prix_unitaire'] = "Nombre décimal attendu."
+        return None
+    if not prix.is_finite() or prix < 0:
+        erreurs['prix_unitaire'] = "Doit être un nombre positif."
+    elif prix.as_tuple().exponent < -2 or prix >= Decimal('1E8'):
+        # DecimalField(max_digits=10, decimal_places=2)
+        erreurs['prix_unitaire'] = "Au plus 8 chiffres avant la virgule et 2 après."
+    return prix
+
+
+def _valider(ligne, categories, unites):
+    """Produit (non enregistré) construit depuis une ligne, et dictionnaire d'erreurs."""
+    erreurs = {}
+    valeurs = {colonne: _texte(ligne.get(colonne)) for colonne in COLONNES}
+
+    for colonne in OBLIGATOIRES:
+        if not valeurs[colonne]:
+            erreurs[colonne] = "Ce champ est obligatoire."
+    for colonne, longueur in (('reference', 100), ('nom', 150)):
+        if len(valeurs[colonne]) > longueur:
+            erreurs[colonne] = f"Au plus {longueur} caractères."
+
+    references = {}
+    for colonne, table in (('categorie', categories), ('unite', unites), ('unite_conversion', unites)):
+        if valeurs[colonne]:
+            references[colonne] = table.get(valeurs[colonne].lower())
+            if references[colonne] is None:
+                erreurs[colonne] = f"« {valeurs[colonne]} » n'existe pas."
+
+    facteur = _entier(ligne.get('facteur_conversion'), 'facteur_conversion', erreurs, defaut=1, minimum=1)
+    seuil = _entier(ligne.get('seuil_alerte'), 'seuil_alerte', erreurs, defaut=5, minimum=0)
+    prix = _prix(ligne.get('prix_unitaire'), erreurs) if valeurs['prix_unitaire'] else None
+
+    if erreurs:
+        return None, erreurs
+    return Produit(
+        reference=valeurs['reference'],
+        nom=valeurs['nom'],
+        categorie_id=references['categorie'],
+        unite_id=references['unite'],
+        unite_conversion_id=references.get('unite_conversion'),
+        facteur_conversion=facteur,
+        prix_unitaire=prix,
+        description=valeurs['description'] or None,
+        seuil_alerte=seuil,
+    ), {}
+
+
+def importer_catalogue(lignes, simuler=False):
+    """
+    Valide puis crée ou met à jour (par référence) les produits des `lignes`
+    (dictionnaires de COLONNES). Retourne un RapportImport ; avec `simuler`,
+    rien n'est écrit.
+    """
+    # Une requête par table de référence pour tout l'import
+    categories = {nom.lower(): pk for pk, nom in Categorie.objects.values_list('pk', 'nom')}
+    unites = {nom.lower(): pk for pk, nom in UniteDeMesure.objects.values_list('pk', 'nom')}
+
+    produits, erreurs, vues = [], [], {}
+    for numero, ligne in enumerate(lignes, start=1):
+        produit, erreurs_ligne = _valider(ligne, categories, unites)
+        reference = _texte(ligne.get('reference'))
+        if produit is not None and reference in vues:
+            erreurs_ligne = {'reference': f"Référence déjà présente ligne {vues[reference]}."}
+        if erreurs_ligne:
+            erreurs.append(ErreurImport(numero, reference, erreurs_ligne))
+            continue
+        vues[reference] = numero
+        produits.append(produit)
+
+    existantes = 0
+    with transaction.atomic():
+        for debut in range(0, len(produits), TAILLE_LOT):
+            lot = produits[debut:debut + TAILLE_LOT]
+            existantes += Produit.objects.filter(reference__in=[produit.reference for produit in lot]).count()
+            if not simuler:
+                Produit.objects.bulk_create(
+                    lot, update_conflicts=True, unique_fields=['reference'], update_fields=CHAMPS_MIS_A_JOUR,
+                )
+        if produits and not simuler:
+            # Nouveaux produits (stock nul) et seuils modifiés
+            synchroniser_alertes()
+    if produits and not simuler:
+        # bulk_create n'envoie pas post_save : invalidation explicite
+        invalider_catalogue()
+        invalider_collections(Produit)
+
+    return RapportImport(len(produits) + len(erreurs), len(produits) - existantes, existantes, erreurs)
@@ -0,0 +1,154 @@
+"""
+Exports en flux (CSV / JSON Lines) de l'historique : ventes, réceptions,
+entrées et sorties de stock.
+
+Les lignes sont lues par `values_list(...).iterator(chunk_size=...)` (curseur
+côté serveur sous PostgreSQL) et écrites au fur et à mesure, par paquets :
+la mémoire utilisée ne dépend pas de la période exportée.
+"""
+import csv
+import io
+from collections import namedtuple
+from datetime import datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from stock.models import EntreeStock, LigneReception, LigneVente, SortieStock
+
+TAILLE_CHUNK = 2000
+LIGNES_PAR_PAQUET = 500
+
+Export = namedtuple('Export', ['model', 'champ_date', 'permission', 'colonnes', 'tri'])
+
+EXPORTS = {
+    'ventes': Export(
+        model=LigneVente,
+        champ_date='vente__date',
+        permission='stock.view_vente',
+        colonnes=[
+            ('vente_id', 'vente_id'),
+            ('date', 'vente__date'),
+            ('client', 'vente__client__nom'),
+            ('mode_paiement', 'vente__mode_paiement__nom'),
+            ('vente_active', 'vente__is_active'),
+            ('ligne_id', 'id'),
+            ('produit_reference', 'produit__reference'),
+            ('produit_nom', 'produit__nom'),
+            ('quantite', 'quantite'),
+            ('unite', 'unite_utilisee__nom'),
+            ('prix_unitaire', 'prix_unitaire'),
+            ('ligne_active', 'is_active'),
+        ],
+        tri=('vente__date', 'vente_id', 'id'),
+    ),
+    'receptions': Export(
+        model=LigneReception,
+        champ_date='reception__date',
+        permission='stock.view_reception',
+        colonnes=[
+            ('reception_id', 'reception_id'),
+            ('date', 'reception__date'),
+            ('fournisseur', 'reception__fournisseur__nom'),
+            ('reception_active', 'reception__is_active'),
+            ('ligne_id', 'id'),
+            ('produit_reference', 'produit__reference'),
+            ('produit_nom', 'produit__nom'),
+            ('quantite', 'quantite'),
+            ('unite', 'unite_utilisee__nom'),
+            ('prix_unitaire', 'prix_unitaire'),
+            ('ligne_active', 'is_active'),
+        ],
+        tri=('reception__date', 'reception_id', 'id'),
+    ),
+    'entrees': Export(
+        model=EntreeStock,
+        champ_date='date',
+        permission='stock.view_entreestock',
+        colonnes=[
+            ('id', 'id'),
+            ('date', 'date'),
+            ('type_entree', 'type_entree'),
+            ('produit_reference', 'produit__reference'),
+            ('produit_nom', 'produit__nom'),
+            ('quantite', 'quantite'),
+            ('unite', 'unite_utilisee__nom'),
+            ('fournisseur', 'fournisseur__nom'),
+            ('reception_id', 'reception_id'),
+            ('description', 'description'),
+            ('active', 'is_active'),
+        ],
+        tri=('date', 'id'),
+    ),
+    'sorties': Export(
+        model=SortieStock,
+        champ_date='date',
+        permission='stock.view_sortiestock',
+        colonnes=[
+            ('id', 'id'),
+            ('date', 'date'),
+            ('type_sortie', 'type_sortie'),
+            ('produit_reference', 'produit__reference'),
+            ('produit_nom', 'produit__nom'),
+            ('quantite', 'quantite'),
+            ('unite', 'unite_utilisee__nom'),
+            ('client', 'client__nom'),
+            ('vente_id', 'vente_id'),
+            ('description', 'description'),
+            ('active', 'is_active'),
+        ],
+        tri=('date', 'id'),
+    ),
+}
+
+
+def lignes_export(export, debut=None, fin=None):
+    """Itérateur de tuples (values_list) de l'export, bornés par date (incluses)."""
+    queryset = export.model.objects.all()
+    if debut is not None:
+        queryset = queryset.filter(**{f'{export.champ_date}__gte': debut})
+    if fin is not None:
+        queryset = queryset.filter(**{f'{export.champ_date}__lte': fin})
+    champs = [champ for _, champ in export.colonnes]
+    return queryset.order_by(*export.tri).values_list(*champs).iterator(chunk_size=TAILLE_CHUNK)
+
+
+def _csv(valeur):
+    if valeur is None:
+        return ''
+    if isinstance(valeur, datetime):
+        return valeur.isoformat()
+    return valeur
+
+
+def flux_csv(export, lignes):
+    """Morceaux de texte CSV (en-tête puis lignes, par paquets)."""
+    tampon = io.StringIO()
+    ecrivain = csv.writer(tampon)
+    ecrivain.writerow([nom for nom, _ in export.colonnes])
+    for numero, ligne in enumerate(lignes, start=1):
+        ecrivain.writerow([_csv(valeur) for valeur in ligne])
+        if numero % LIGNES_PAR_PAQUET == 0:
+            yield tampon.getvalue()
+            tampon.seek(0)
+            tampon.truncate()
+    yield tampon.getvalue()
+
+
+def flux_jsonl(export, lignes):
+    """Morceaux de texte JSON Lines (un objet par ligne, par paquets)."""
+    noms = [nom for nom, _ in export.colonnes]
+    encodeur = DjangoJSONEncoder(ensure_ascii=False)
+    paquet = []
+    for ligne in lignes:
+        paquet.append(encodeur.encode(dict(zip(noms, ligne))))
+        if len(paquet) == LIGNES_PAR_PAQUET:
+            yield '\n'.join(paquet) + '\n'
+            paquet = []
+    if paquet:
+        yield '\n'.join(paquet) + '\n'
+
+
+FORMATS = {
+    'csv': (flux_csv, 'text/csv; charset=utf-8'),
+    'jsonl': (flux_jsonl, 'application/x-ndjson; charset=utf-8'),
+}
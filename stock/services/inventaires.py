@@ -0,0 +1,123 @@
+"""
+Inventaires physiques (sessions de comptage) avec ajustement du stock en masse.
+
+- Ouverture : le stock_actuel des produits du périmètre est figé dans une
+  ligne d'inventaire par produit (lecture en flux et bulk_create par lots).
+- Comptage : les quantités comptées sont saisies en masse par zone
+  (bulk_create update_conflicts sur (ligne, zone)) ; une ligne ne peut
+  viser qu'un produit du périmètre.
+- Clôture : l'écart de chaque produit compté (somme des zones - stock figé)
+  est calculé en une requête groupée puis appliqué comme une variation par
+  les primitives de stock (appliquer_journal, par lots de produits), avec
+  une écriture INVENTAIRE au journal par produit. Les ventes et réceptions
+  enregistrées pendant le comptage restent donc acquises. Les produits non
+  comptés ne sont pas modifiés.
+"""
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from stock.models import ComptageInventaire, Inventaire, JournalStock, LigneInventaire, Produit
+from .stock import appliquer_journal
+
+TAILLE_LOT = 1000
+
+
+def _verifier_ouvert(inventaire):
+    if inventaire.statut != Inventaire.OUVERT:
+        raise ValidationError(f"L'inventaire #{inventaire.pk} est {inventaire.get_statut_display().lower()}.")
+
+
+@transaction.atomic
+def ouvrir_inventaire(description='', categorie=None, utilisateur=None):
+    """Ouvre un inventaire et fige le stock des produits du périmètre (catégorie ou tout le catalogue)."""
+    inventaire = Inventaire.objects.create(description=description, categorie=categorie, created_by=utilisateur)
+    produits = Produit.objects.all() if categorie is None else Produit.objects.filter(categorie=categorie)
+
+    lot = []
+    for produit_id, stock in produits.order_by('id').values_list('id', 'stock_actuel').iterator(chunk_size=TAILLE_LOT):
+        lot.append(LigneInventaire(inventaire=inventaire, produit_id=produit_id, stock_gele=stock))
+        if len(lot) == TAILLE_LOT:
+            LigneInventaire.objects.bulk_create(lot)
+            lot = []
+    LigneInventaire.objects.bulk_create(lot)
+    return inventaire
+
+
+def enregistrer_comptages(inventaire, comptages, zone='', utilisateur=None):
+    """
+    Enregistre les quantités comptées {produit_id: quantite} (unité de base)
+    d'une zone, en remplaçant un comptage antérieur de la même zone.
+    Lève ValidationError si l'inventaire n'est plus ouvert ou si un produit
+    est hors du périmètre. Retourne le nombre de comptages enregistrés.
+    """
+    _verifier_ouvert(inventaire)
+    produit_ids = list(comptages)
+    lignes = {}
+    for debut in range(0, len(produit_ids), TAILLE_LOT):
+        lignes.update(
+            LigneInventaire.objects.filter(inventaire=inventaire, produit_id__in=produit_ids[debut:debut + TAILLE_LOT])
+            .values_list('produit_id', 'id')
+        )
+    inconnus = sorted(set(comptages) - lignes.keys())
+    if inconnus:
+        raise ValidationError(
+            f"Produit(s) hors du périmètre de l'inventaire : {', '.join(map(str, inconnus))}."
+        )
+
+    ComptageInventaire.objects.bulk_create(
+        [
+            ComptageInventaire(ligne_id=lignes[produit_id], zone=zone, quantite=quantite, compte_par=utilisateur)
+            for produit_id, quantite in comptages.items()
+        ],
+        batch_size=TAILLE_LOT,
+        update_conflicts=True,
+        unique_fields=['ligne', 'zone'],
+        update_fields=['quantite', 'date', 'compte_par'],
+    )
+    return len(comptages)
+
+
+def ecarts(inventaire):
+    """Lignes comptées de l'inventaire, annotées de `compte` (toutes zones) et `ecart` (compte - stock figé)."""
+    return (
+        LigneInventaire.objects.filter(inventaire=inventaire)
+        .annotate(compte=Sum('comptages__quantite'))
+        .filter(compte__isnull=False)
+        .annotate(ecart=F('compte') - F('stock_gele'))
+    )
+
+
+@transaction.atomic
+def cloturer_inventaire(inventaire, utilisateur=None):
+    """
+    Applique les écarts de l'inventaire au stock, dans une seule transaction :
+    stock_actuel += compte - stock figé pour chaque produit compté, ce qui
+    conserve les mouvements enregistrés depuis l'ouverture. Si le stock d'un
+    produit ne couvre pas son écart négatif, StockInsuffisant est levée et
+    rien n'est appliqué.
+    """
+    # Verrou sur la session : deux clôtures simultanées ne s'appliquent pas deux fois
+    _verifier_ouvert(Inventaire.objects.select_for_update().get(pk=inventaire.pk))
+
+    variations = list(ecarts(inventaire).exclude(ecart=0).order_by('produit_id').values_list('id', 'produit_id', 'ecart'))
+    appliquer_journal([
+        JournalStock(produit_id=produit_id, delta=ecart, source_type=JournalStock.INVENTAIRE, source_id=ligne_id)
+        for ligne_id, produit_id, ecart in variations
+    ])
+
+    inventaire.statut = Inventaire.CLOTURE
+    inventaire.date_cloture = timezone.now()
+    inventaire.cloture_par = utilisateur
+    inventaire.ajustements = len(variations)
+    inventaire.save(update_fields=['statut', 'date_cloture', 'cloture_par', 'ajustements'])
+    return inventaire
+
+
+def annuler_inventaire(inventaire):
+    """Abandonne un inventaire ouvert : aucun stock n'est modifié."""
+    _verifier_ouvert(inventaire)
+    Inventaire.objects.filter(pk=inventaire.pk).update(statut=Inventaire.ANNULE)
+    inventaire.statut = Inventaire.ANNULE
+    return inventaire
@@ -0,0 +1,251 @@
+"""
+Jeu de données d'essai cohérent et volumineux, pour les bancs de performance.
+
+`generer_jeu_essai(echelle)` crée par bulk_create, jour par jour :
+- un référentiel (catégories, unités avec conversion, fournisseurs, clients,
+  modes de paiement) et un catalogue de produits ;
+- des rôles (Vendeur, Magasinier, Gérant) et des utilisateurs ;
+- des années de ventes (dont une part annulée : lignes et sorties miroirs
+  inactives, montants à zéro) et de réceptions (lignes, entrées miroirs,
+  totaux), d'entrées et de sorties de stock manuelles.
+
+Le stock est tenu : chaque variation est inscrite au journal (stock d'ouverture puis une écriture par ligne ou
+mouvement) et stock_actuel vaut la somme du journal ; les faits de vente
+journaliers et les alertes sont reconstruits à la fin. La graine rend le
+jeu reproductible.
+"""
+import random
+from collections import defaultdict, namedtuple
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Permission
+from django.db import transaction
+from django.utils import timezone
+
+from gestion_stock.versions import invalider_collections
+from stock.models import (
+    Categorie, Client, EntreeStock, Fournisseur, JournalStock, LigneReception, LigneVente, ModePaiement, Produit,
+    Reception, SortieStock, UniteDeMesure, Vente,
+)
+from users.models import Role, User
+from .alertes import synchroniser_alertes
+from .rapports import reconstruire
+
+PREFIXE = 'ESSAI-'
+MOT_DE_PASSE = 'essai'
+STOCK_OUVERTURE = 100_000
+FACTEUR_CARTON = 12
+TAILLE_LOT = 2000
+# Part des ventes annulées (index partiels sur les lignes actives : voir plans.py)
+TAUX_ANNULATION = 0.05
+
+Echelle = namedtuple('Echelle', [
+    'produits', 'utilisateurs', 'clients', 'fournisseurs', 'jours',
+    'ventes_par_jour', 'receptions_par_jour', 'mouvements_par_jour', 'lignes_par_document',
+])
+
+ECHELLES = {
+    'test': Echelle(200, 6, 20, 5, 30, 10, 2, 2, 4),
+    'petite': Echelle(2_000, 20, 200, 20, 365, 100, 10, 10, 5),
+    'moyenne': Echelle(20_000, 50, 2_000, 100, 2 * 365, 500, 40, 40, 5),
+    'grande': Echelle(100_000, 200, 20_000, 300, 3 * 365, 2_000, 100, 100, 6),
+}
+
+# Rôle -> préfixes des codenames de permissions du module stock
+ROLES = {
+    'Vendeur': ('view_produit', 'view_client', 'add_client', 'view_modepaiement', 'view_vente', 'add_vente',
+                'view_lignevente'),
+    'Magasinier': ('view_produit', 'view_fournisseur', 'view_reception', 'add_reception', 'view_lignereception',
+                   'view_entreestock', 'add_entreestock', 'view_sortiestock', 'add_sortiestock', 'view_inventaire',
+                   'add_comptageinventaire'),
+    'Gérant': None,  # toutes les permissions du module stock
+}
+
+Resume = namedtuple('Resume', ['produits', 'utilisateurs', 'ventes', 'receptions', 'lignes', 'mouvements'])
+
+
+def _referentiel(echelle):
+    unite, _ = UniteDeMesure.objects.get_or_create(nom=f'{PREFIXE}pièce', defaults={'symbole': 'pc'})
+    carton, _ = UniteDeMesure.objects.get_or_create(nom=f'{PREFIXE}carton', defaults={'symbole': 'ct'})
+    categories = [Categorie.objects.get_or_create(nom=f'{PREFIXE}catégorie {i}')[0].pk for i in range(20)]
+    modes = [ModePaiement.objects.get_or_create(nom=f'{PREFIXE}{nom}')[0].pk
+             for nom in ('espèces', 'mobile money', 'carte')]
+    fournisseurs = [f.pk for f in Fournisseur.objects.bulk_create(
+        [Fournisseur(nom=f'{PREFIXE}fournisseur {i}') for i in range(echelle.fournisseurs)])]
+    clients = [c.pk for c in Client.objects.bulk_create(
+        [Client(nom=f'{PREFIXE}client {i}') for i in range(echelle.clients)], batch_size=TAILLE_LOT)]
+    return unite.pk, carton.pk, categories, modes, fournisseurs, clients
+
+
+def _utilisateurs(echelle):
+    permissions = Permission.objects.filter(content_type__app_label='stock')
+    roles = []
+    for nom, codenames in ROLES.items():
+        role, _ = Role.objects.get_or_create(nom=f'{PREFIXE}{nom}')
+        role.permissions.set(permissions if codenames is None else permissions.filter(codename__in=codenames))
+        roles.append(role)
+
+    existants = User.objects.filter(username__startswith=PREFIXE.lower()).count()
+    # Un seul hachage : le hachage du mot de passe domine sinon la génération
+    mot_de_passe = make_password(MOT_DE_PASSE)
+    utilisateurs = User.objects.bulk_create([
+        User(username=f'{PREFIXE.lower()}{existants + i}', password=mot_de_passe)
+        for i in range(echelle.utilisateurs)
+    ])
+    User.roles.through.objects.bulk_create([
+        User.roles.through(user_id=utilisateur.pk, role_id=roles[i % len(roles)].pk)
+        for i, utilisateur in enumerate(utilisateurs)
+    ])
+    return [utilisateur.pk for utilisateur in utilisateurs]
+
+
+def _catalogue(echelle, aleatoire, unite, carton, categories, debut):
+    existants = Produit.objects.filter(reference__startswith=PREFIXE).count()
+    produits = Produit.objects.bulk_create([
+        Produit(
+            reference=f'{PREFIXE}{existants + i}', nom=f'Produit essai {existants + i}',
+            categorie_id=aleatoire.choice(categories), unite_id=unite, unite_conversion_id=carton,
+            facteur_conversion=FACTEUR_CARTON, prix_unitaire=Decimal(aleatoire.randint(100, 5_000)),
+            seuil_alerte=aleatoire.randint(0, 50), stock_actuel=STOCK_OUVERTURE,
+        )
+        for i in range(echelle.produits)
+    ], batch_size=TAILLE_LOT)
+    JournalStock.objects.bulk_create([
+        JournalStock(produit_id=produit.pk, delta=STOCK_OUVERTURE, date=debut,
+                     source_type=JournalStock.OUVERTURE, source_id=produit.pk)
+        for produit in produits
+    ], batch_size=TAILLE_LOT)
+    return {produit.pk: produit.prix_unitaire for produit in produits}
+
+
+def generer_jeu_essai(echelle, graine=0):
+    """Génère le jeu de données de l'`echelle` (Echelle ou nom dans ECHELLES). Retourne un Resume."""
+    if isinstance(echelle, str):
+        echelle = ECHELLES[echelle]
+    aleatoire = random.Random(graine)
+    aujourd_hui = timezone.localdate()
+    premier_jour = aujourd_hui - timedelta(days=echelle.jours)
+
+    with transaction.atomic():
+        unite, carton, categories, modes, fournisseurs, clients = _referentiel(echelle)
+        utilisateurs = _utilisateurs(echelle)
+        prix = _catalogue(
+            echelle, aleatoire, unite, carton, categories,
+            timezone.make_aware(datetime.combine(premier_jour, time.min)),
+        )
+    produits = list(prix)
+    variations = defaultdict(int)
+    totaux = defaultdict(int)
+
+    def quantite_base(unite_id, quantite):
+        return quantite * FACTEUR_CARTON if unite_id == carton else quantite
+
+    for numero in range(echelle.jours):
+        jour = timezone.make_aware(datetime.combine(premier_jour + timedelta(days=numero), time(8)))
+
+        def heure():
+            return jour + timedelta(seconds=aleatoire.randrange(12 * 3600))
+
+        with transaction.atomic():
+            ventes = Vente.objects.bulk_create([
+                Vente(date=heure(), client_id=aleatoire.choice(clients) if aleatoire.random() < 0.3 else None,
+                      mode_paiement_id=aleatoire.choice(modes), created_by_id=aleatoire.choice(utilisateurs))
+                for _ in range(echelle.ventes_par_jour)
+            ])
+            receptions = Reception.objects.bulk_create([
+                Reception(date=heure(), fournisseur_id=aleatoire.choice(fournisseurs),
+                          created_by_id=aleatoire.choice(utilisateurs))
+                for _ in range(echelle.receptions_par_jour)
+            ])
+
+            lignes_vente, lignes_reception, sorties, entrees = [], [], [], []
+            for vente in ventes:
+                total = Decimal(0)
+                # Vente annulée : sans effet sur le stock ni sur les faits de vente
+                vente.is_active = aleatoire.random() >= TAUX_ANNULATION
+                for produit_id in aleatoire.sample(produits, min(echelle.lignes_par_document, len(produits))):
+                    unite_id = carton if aleatoire.random() < 0.1 else unite
+                    quantite = aleatoire.randint(1, 10)
+                    prix_ligne = prix[produit_id] * (FACTEUR_CARTON if unite_id == carton else 1)
+                    lignes_vente.append(LigneVente(vente_id=vente.pk, produit_id=produit_id, unite_utilisee_id=unite_id,
+                                                   quantite=quantite, prix_unitaire=prix_ligne,
+                                                   is_active=vente.is_active))
+                    sorties.append(SortieStock(vente_id=vente.pk, produit_id=produit_id, unite_utilisee_id=unite_id,
+                                               quantite=quantite, type_sortie='vente', client_id=vente.client_id,
+                                               is_active=vente.is_active))
+                    total += quantite * prix_ligne
+                vente.total = vente.montant_paye = total if vente.is_active else Decimal(0)
+            for reception in receptions:
+                total = Decimal(0)
+                for produit_id in aleatoire.sample(produits, min(echelle.lignes_par_document * 4, len(produits))):
+                    unite_id = carton if aleatoire.random() < 0.5 else unite
+                    quantite = aleatoire.randint(5, 50)
+                    prix_ligne = (prix[produit_id] * (FACTEUR_CARTON if unite_id == carton else 1) * 7 / 10).quantize(
+                        Decimal('0.01'))
+                    lignes_reception.append(LigneReception(
+                        reception_id=reception.pk, produit_id=produit_id, unite_utilisee_id=unite_id,
+                        quantite=quantite, prix_unitaire=prix_ligne,
+                    ))
+                    entrees.append(EntreeStock(reception_id=reception.pk, produit_id=produit_id,
+                                               unite_utilisee_id=unite_id, quantite=quantite, type_entree='achat',
+                                               fournisseur_id=reception.fournisseur_id))
+                    total += quantite * prix_ligne
+                reception.total = reception.montant_paye = total
+            Vente.objects.bulk_update(ventes, ['total', 'montant_paye', 'is_active'], batch_size=TAILLE_LOT)
+            Reception.objects.bulk_update(receptions, ['total', 'montant_paye'], batch_size=TAILLE_LOT)
+
+            manuelles_entrees = [
+                EntreeStock(produit_id=aleatoire.choice(produits), unite_utilisee_id=unite,
+                            quantite=aleatoire.randint(1, 20), type_entree='retour_client')
+                for _ in range(echelle.mouvements_par_jour)
+            ]
+            manuelles_sorties = [
+                SortieStock(produit_id=aleatoire.choice(produits), unite_utilisee_id=unite,
+                            quantite=aleatoire.randint(1, 20), type_sortie=aleatoire.choice(['perte', 'usage_interne']))
+                for _ in range(echelle.mouvements_par_jour)
+            ]
+            LigneVente.objects.bulk_create(lignes_vente, batch_size=TAILLE_LOT)
+            LigneReception.objects.bulk_create(lignes_reception, batch_size=TAILLE_LOT)
+            EntreeStock.objects.bulk_create(entrees + manuelles_entrees, batch_size=TAILLE_LOT)
+            SortieStock.objects.bulk_create(sorties + manuelles_sorties, batch_size=TAILLE_LOT)
+            # MouvementStock.date est en auto_now_add : datation après insertion
+            EntreeStock.objects.filter(pk__in=[e.pk for e in entrees + manuelles_entrees]).update(date=heure())
+            SortieStock.objects.filter(pk__in=[s.pk for s in sorties + manuelles_sorties]).update(date=heure())
+
+            dates_ventes = {vente.pk: vente.date for vente in ventes}
+            dates_receptions = {reception.pk: reception.date for reception in receptions}
+            journal = (
+                [JournalStock(produit_id=l.produit_id, delta=-quantite_base(l.unite_utilisee_id, l.quantite),
+                              date=dates_ventes[l.vente_id], source_type=JournalStock.LIGNE_VENTE, source_id=l.pk)
+                 for l in lignes_vente if l.is_active]
+                + [JournalStock(produit_id=l.produit_id, delta=quantite_base(l.unite_utilisee_id, l.quantite),
+                                date=dates_receptions[l.reception_id], source_type=JournalStock.LIGNE_RECEPTION,
+                                source_id=l.pk)
+                   for l in lignes_reception]
+                + [JournalStock(produit_id=m.produit_id, delta=m.quantite, date=jour,
+                                source_type=JournalStock.ENTREE, source_id=m.pk) for m in manuelles_entrees]
+                + [JournalStock(produit_id=m.produit_id, delta=-m.quantite, date=jour,
+                                source_type=JournalStock.SORTIE, source_id=m.pk) for m in manuelles_sorties]
+            )
+            JournalStock.objects.bulk_create(journal, batch_size=TAILLE_LOT)
+            for ecriture in journal:
+                variations[ecriture.produit_id] += ecriture.delta
+
+        totaux['ventes'] += len(ventes)
+        totaux['receptions'] += len(receptions)
+        totaux['lignes'] += len(lignes_vente) + len(lignes_reception)
+        totaux['mouvements'] += len(entrees) + len(sorties) + len(manuelles_entrees) + len(manuelles_sorties)
+
+    with transaction.atomic():
+        Produit.objects.bulk_update(
+            [Produit(pk=produit_id, stock_actuel=STOCK_OUVERTURE + variation) for produit_id, variation in variations.items()],
+            ['stock_actuel'], batch_size=TAILLE_LOT,
+        )
+        reconstruire(premier_jour, aujourd_hui)
+        synchroniser_alertes(produits)
+        invalider_collections(Produit, Fournisseur)
+
+    return Resume(len(produits), len(utilisateurs), totaux['ventes'], totaux['receptions'], totaux['lignes'],
+                  totaux['mouvements'])
@@ -0,0 +1,69 @@
+"""
+Stock à une date, à partir du journal (JournalStock) et des instantanés
+(InstantaneStock).
+
+Le stock d'un produit à la date D vaut :
+    stock de l'instantané le plus récent <= D
+    + somme des écritures du journal entre cet instantané et D.
+Les deux lectures passent par les index (produit, date) : le nombre
+d'écritures parcourues est borné par l'intervalle entre deux instantanés,
+quelle que soit la profondeur de l'historique.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Max, Sum
+from django.utils import timezone
+
+from stock.models import InstantaneStock, JournalStock
+
+# Les écritures plus récentes que cette marge peuvent appartenir à des
+# transactions encore en cours : elles ne sont pas figées dans un instantané.
+MARGE_INSTANTANE = timedelta(minutes=5)
+
+
+def stock_a_la_date(produit_id, date):
+    """Stock (en unité de base) d'un produit à la date donnée (incluse)."""
+    instantane = (
+        InstantaneStock.objects.filter(produit_id=produit_id, date__lte=date)
+        .order_by('-date').values_list('date', 'stock').first()
+    )
+    ecritures = JournalStock.objects.filter(produit_id=produit_id, date__lte=date)
+    stock = 0
+    if instantane is not None:
+        depuis, stock = instantane
+        ecritures = ecritures.filter(date__gt=depuis)
+    return stock + (ecritures.aggregate(total=Sum('delta'))['total'] or 0)
+
+
+@transaction.atomic
+def creer_instantanes(date=None):
+    """
+    Fige le stock de tous les produits à `date` (par défaut maintenant moins
+    MARGE_INSTANTANE) à partir de l'instantané précédent et des écritures
+    intermédiaires : deux requêtes de lecture groupées et un bulk_create.
+    Retourne le nombre d'instantanés réellement créés (ceux qui existaient
+    déjà pour un produit à cette date sont ignorés).
+    """
+    date = date or timezone.now() - MARGE_INSTANTANE
+    precedente = InstantaneStock.objects.filter(date__lt=date).aggregate(date=Max('date'))['date']
+
+    stocks = {}
+    ecritures = JournalStock.objects.filter(date__lte=date)
+    if precedente is not None:
+        stocks = dict(InstantaneStock.objects.filter(date=precedente).values_list('produit_id', 'stock'))
+        ecritures = ecritures.filter(date__gt=precedente)
+
+    variations = ecritures.order_by().values('produit_id').annotate(total=Sum('delta')).values_list('produit_id', 'total')
+    for produit_id, total in variations:
+        stocks[produit_id] = stocks.get(produit_id, 0) + total
+
+    # bulk_create(ignore_conflicts) rend aussi les lignes ignorées : comptage avant / après
+    with transaction.atomic():
+        existants = InstantaneStock.objects.filter(date=date).count()
+        InstantaneStock.objects.bulk_create(
+            [InstantaneStock(produit_id=produit_id, date=date, stock=stock) for produit_id, stock in stocks.items()],
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+        return InstantaneStock.objects.filter(date=date).count() - existants
@@ -0,0 +1,73 @@
+"""
+Plans d'exécution des requêtes critiques (liste paginée, recalcul des
+totaux, annulation).
+
+`analyser()` exécute EXPLAIN (EXPLAIN ANALYZE sous PostgreSQL) sur chaque
+requête et indique si un index est utilisé. Les plans se vérifient sur le
+jeu d'essai (jeu_essai.py), à l'échelle voulue.
+"""
+import re
+import time
+from collections import namedtuple
+from datetime import timedelta
+
+from django.db import connection
+from django.db.models import F, Max, Q, Sum
+from django.utils import timezone
+
+from stock.models import EntreeStock, LigneReception, LigneVente, Reception, SortieStock, Vente
+
+Mesure = namedtuple('Mesure', ['nom', 'index', 'duree_ms', 'plan'])
+
+# Mentions d'un accès par index dans les plans PostgreSQL et SQLite
+MOTIF_INDEX = re.compile(r'Index Scan|Index Only Scan|Bitmap Index Scan|USING (COVERING )?INDEX|USING INTEGER PRIMARY KEY')
+
+
+def _page(model):
+    """Deuxième page de la pagination par curseur (date, id) décroissants."""
+    repere = model.objects.order_by('-date', '-pk').values('date', 'pk')[50:51].first()
+    queryset = model.objects.order_by('-date', '-pk')
+    if repere is not None:
+        queryset = queryset.filter(
+            Q(date__lte=repere['date']), Q(date__lt=repere['date']) | Q(pk__lt=repere['pk']),
+        )
+    return queryset[:50]
+
+
+def _lignes_actives(model, document, document_id):
+    return model.objects.filter(**{document: document_id, 'is_active': True})
+
+
+def requetes_critiques():
+    """Requêtes mesurées : {nom: queryset}."""
+    vente_id = Vente.objects.aggregate(dernier=Max('pk'))['dernier'] or 0
+    reception_id = Reception.objects.aggregate(dernier=Max('pk'))['dernier'] or 0
+    depuis = timezone.now() - timedelta(days=30)
+    sous_total = F('quantite') * F('prix_unitaire')
+
+    return {
+        'liste_ventes': _page(Vente),
+        'liste_receptions': _page(Reception),
+        'liste_entrees': _page(EntreeStock),
+        'liste_sorties': _page(SortieStock),
+        'total_vente': _lignes_actives(LigneVente, 'vente_id', vente_id)
+        .values('vente_id').annotate(total=Sum(sous_total)),
+        'total_reception': _lignes_actives(LigneReception, 'reception_id', reception_id)
+        .values('reception_id').annotate(total=Sum(sous_total)),
+        'annulation_vente': _lignes_actives(LigneVente, 'vente_id', vente_id).values('id', 'produit_id', 'quantite'),
+        'annulation_reception': _lignes_actives(LigneReception, 'reception_id', reception_id)
+        .values('id', 'produit_id', 'quantite'),
+        'ventes_actives_30_jours': Vente.objects.filter(is_active=True, date__gte=depuis).values('id', 'total'),
+    }
+
+
+def analyser():
+    """EXPLAIN de chaque requête critique : liste de Mesure(nom, index, duree_ms, plan)."""
+    analyze = connection.vendor == 'postgresql'
+    mesures = []
+    for nom, queryset in requetes_critiques().items():
+        debut = time.perf_counter()
+        plan = queryset.explain(analyze=True) if analyze else queryset.explain()
+        duree = (time.perf_counter() - debut) * 1000
+        mesures.append(Mesure(nom, bool(MOTIF_INDEX.search(plan)), round(duree, 2), plan))
+    return mesures
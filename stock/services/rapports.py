@@ -0,0 +1,215 @@
+"""
+Rapports de ventes à partir de la table de faits journaliers (VenteJournaliere).
+
+Un fait agrège les lignes de vente actives d'un jour pour un produit, un
+mode de paiement et un vendeur. La table est tenue à jour à chaque écriture
+(création de vente, modification ou annulation de ligne, changement du
+mode de paiement, annulation de vente) par des deltas : lecture des faits
+concernés, création à zéro des faits absents (bulk_create sans effet sur une
+clé déjà présente, contrainte ventejour_cle_unique), puis un seul
+bulk_update (F() + delta). `reconstruire()` la recalcule depuis les lignes
+sur une période.
+
+Les rapports lisent les faits pour les journées closes et les lignes de
+vente brutes pour la journée en cours (et au-delà) uniquement : le volume
+lu ne dépend que du nombre de jours, produits et vendeurs de la période.
+
+Chaque écriture de faits incrémente la version des ventes, qui sert de clé
+aux calculs mis en cache sur l'historique des ventes (réapprovisionnement).
+"""
+from collections import defaultdict, namedtuple
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import models, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from gestion_stock.versions import incrementer, version
+from stock.models import LigneVente, VenteJournaliere
+from .stock import quantite_base_sql
+
+MONTANT = models.DecimalField(max_digits=14, decimal_places=2)
+ZERO = Decimal('0.00')
+
+CLE_VERSION = "stock:ventes:version"
+
+# cle : expression de regroupement ; libelle : champ affiché (None : la clé elle-même)
+# (*_brut : mêmes champs vus depuis LigneVente, pour la journée en cours)
+Axe = namedtuple('Axe', ['cle', 'libelle', 'cle_brute', 'libelle_brut'])
+
+AXES = {
+    'jour': Axe(F('jour'), None, TruncDate('vente__date'), None),
+    'produit': Axe(F('produit_id'), 'produit__nom', F('produit_id'), 'produit__nom'),
+    'categorie': Axe(F('produit__categorie_id'), 'produit__categorie__nom',
+                     F('produit__categorie_id'), 'produit__categorie__nom'),
+    'mode_paiement': Axe(F('mode_paiement_id'), 'mode_paiement__nom',
+                         F('vente__mode_paiement_id'), 'vente__mode_paiement__nom'),
+    'vendeur': Axe(F('vendeur_id'), 'vendeur__username', F('vente__created_by_id'), 'vente__created_by__username'),
+}
+
+
+def version_ventes():
+    """Version courante de l'historique des ventes."""
+    return version(CLE_VERSION)
+
+
+def invalider_ventes():
+    """Appelée à chaque lot de ventes (création, modification, annulation)."""
+    incrementer(CLE_VERSION)
+
+
+def _montant():
+    return Sum(F('quantite') * F('prix_unitaire'), output_field=MONTANT)
+
+
+def ajouter_fait(faits, vente, produit_id, quantite, montant, lignes=1):
+    """
+    Cumule un delta dans `faits` {(jour, produit_id, mode_paiement_id, vendeur_id): [quantite, montant, lignes]}.
+    Quantité (unité de base), montant et nombre de lignes sont signés.
+    """
+    cle = (timezone.localdate(vente.date), produit_id, vente.mode_paiement_id, vente.created_by_id)
+    fait = faits.setdefault(cle, [0, ZERO, 0])
+    fait[0] += quantite
+    fait[1] += montant
+    fait[2] += lignes
+    return faits
+
+
+def faits_lignes(queryset, signe=1):
+    """Faits (même forme que ajouter_fait) d'un queryset de lignes de vente, en une requête groupée."""
+    agregats = (
+        queryset.order_by()
+        .values_list(TruncDate('vente__date'), 'produit_id', 'vente__mode_paiement_id', 'vente__created_by_id')
+        .annotate(quantite_base=Sum(quantite_base_sql()), montant=_montant(), nombre=Count('id'))
+    )
+    return {
+        (jour, produit_id, mode_id, vendeur_id): [signe * (quantite or 0), signe * (montant or ZERO), signe * lignes]
+        for jour, produit_id, mode_id, vendeur_id, quantite, montant, lignes in agregats
+    }
+
+
+def _lire_faits(faits):
+    existants = {}
+    for fait in VenteJournaliere.objects.filter(
+        jour__in={cle[0] for cle in faits}, produit_id__in={cle[1] for cle in faits},
+    ).only('jour', 'produit_id', 'mode_paiement_id', 'vendeur_id'):
+        existants.setdefault((fait.jour, fait.produit_id, fait.mode_paiement_id, fait.vendeur_id), fait)
+    return existants
+
+
+def appliquer_faits(faits):
+    """Reporte les deltas `faits` dans VenteJournaliere."""
+    faits = {cle: fait for cle, fait in faits.items() if any(fait)}
+    if not faits:
+        return
+
+    with transaction.atomic():
+        existants = _lire_faits(faits)
+        # Faits absents créés à zéro, puis tous incrémentés de la même façon. Un fait créé
+        # entre-temps par une vente simultanée est ignoré (contraintes ventejour_cle_*_unique,
+        # clés sans mode de paiement ou sans vendeur comprises) et relu avec les nouveaux.
+        manquants = [
+            VenteJournaliere(jour=jour, produit_id=produit_id, mode_paiement_id=mode_paiement_id, vendeur_id=vendeur_id)
+            for jour, produit_id, mode_paiement_id, vendeur_id in faits.keys() - existants.keys()
+        ]
+        if manquants:
+            VenteJournaliere.objects.bulk_create(manquants, ignore_conflicts=True)
+            existants = _lire_faits(faits)
+
+        a_modifier = []
+        for cle, (quantite, montant, lignes) in faits.items():
+            fait = existants[cle]
+            # Incrément en SQL : deux ventes simultanées ne s'écrasent pas
+            fait.quantite = F('quantite') + quantite
+            fait.chiffre_affaires = F('chiffre_affaires') + montant
+            fait.lignes = F('lignes') + lignes
+            a_modifier.append(fait)
+        VenteJournaliere.objects.bulk_update(a_modifier, ['quantite', 'chiffre_affaires', 'lignes'])
+    invalider_ventes()
+
+
+def _debut_du_jour(jour):
+    return timezone.make_aware(datetime.combine(jour, time.min))
+
+
+@transaction.atomic
+def reconstruire(debut=None, fin=None):
+    """
+    Recalcule les faits des jours [debut, fin] (dates incluses, toute la
+    table par défaut) depuis les lignes de vente actives. Retourne le nombre de faits.
+    """
+    faits = VenteJournaliere.objects.all()
+    lignes = LigneVente.objects.filter(is_active=True)
+    if debut is not None:
+        faits = faits.filter(jour__gte=debut)
+        lignes = lignes.filter(vente__date__gte=_debut_du_jour(debut))
+    if fin is not None:
+        faits = faits.filter(jour__lte=fin)
+        lignes = lignes.filter(vente__date__lt=_debut_du_jour(fin + timedelta(days=1)))
+    faits.delete()
+
+    nouveaux = [
+        VenteJournaliere(
+            jour=jour, produit_id=produit_id, mode_paiement_id=mode_id, vendeur_id=vendeur_id,
+            quantite=quantite, chiffre_affaires=montant, lignes=nombre,
+        )
+        for (jour, produit_id, mode_id, vendeur_id), (quantite, montant, nombre) in faits_lignes(lignes).items()
+    ]
+    VenteJournaliere.objects.bulk_create(nouveaux, batch_size=1000)
+    invalider_ventes()
+    return len(nouveaux)
+
+
+def rapport_ventes(debut, fin, par='jour'):
+    """
+    Quantités, chiffre d'affaires et nombre de lignes de vente des jours
+    [debut, fin] (dates incluses), regroupés selon l'axe `par` (voir AXES).
+    Liste de dicts {cle, libelle, quantite, chiffre_affaires, lignes}.
+    """
+    axe = AXES[par]
+    aujourd_hui = timezone.localdate()
+    resultats = defaultdict(lambda: {'libelle': None, 'quantite': 0, 'chiffre_affaires': ZERO, 'lignes': 0})
+
+    def cumuler(agregats):
+        for agregat in agregats:
+            resultat = resultats[agregat['cle']]
+            resultat['libelle'] = agregat.get('libelle', agregat['cle'])
+            resultat['quantite'] += agregat['quantite_base'] or 0
+            resultat['chiffre_affaires'] += agregat['montant'] or ZERO
+            resultat['lignes'] += agregat['nombre'] or 0
+
+    # Journées closes : table de faits
+    fin_close = min(fin, aujourd_hui - timedelta(days=1))
+    if debut <= fin_close:
+        colonnes = {'cle': axe.cle}
+        if axe.libelle:
+            colonnes['libelle'] = F(axe.libelle)
+        cumuler(
+            VenteJournaliere.objects.filter(jour__gte=debut, jour__lte=fin_close)
+            .order_by().values(**colonnes)
+            .annotate(quantite_base=Sum('quantite'), montant=Sum('chiffre_affaires'), nombre=Sum('lignes'))
+        )
+
+    # Journée en cours (et dates postérieures) : lignes brutes
+    if fin >= aujourd_hui:
+        colonnes = {'cle': axe.cle_brute}
+        if axe.libelle_brut:
+            colonnes['libelle'] = F(axe.libelle_brut)
+        cumuler(
+            LigneVente.objects.filter(
+                is_active=True,
+                vente__date__gte=_debut_du_jour(max(debut, aujourd_hui)),
+                vente__date__lt=_debut_du_jour(fin + timedelta(days=1)),
+            )
+            .order_by().values(**colonnes)
+            .annotate(quantite_base=Sum(quantite_base_sql()), montant=_montant(), nombre=Count('id'))
+        )
+
+    lignes = [{'cle': cle, **resultat} for cle, resultat in resultats.items() if resultat['lignes']]
+    if par == 'jour':
+        lignes.sort(key=lambda ligne: ligne['cle'])
+    else:
+        lignes.sort(key=lambda ligne: (-ligne['chiffre_affaires'], str(ligne['cle'])))
+    return lignes
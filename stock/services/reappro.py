@@ -0,0 +1,207 @@
+"""
+Suggestions de réapprovisionnement, calculées pour tout le catalogue à la fois.
+
+L'historique est chargé en colonnes (values_list -> tableaux NumPy) puis
+traité par opérations vectorisées, sans boucle ORM par produit :
+
+- demande : quantités vendues par produit et par jour sur les `jours`
+  dernières journées closes (faits VenteJournaliere, agrégés depuis les
+  lignes de vente) ; moyenne journalière et écart-type, les jours sans
+  vente comptant pour zéro ;
+- fournisseur, prix d'achat (par unité de base) et cycle de commande : d'après
+  les lignes de réception actives de l'`historique` (dernier fournisseur,
+  dernier prix, intervalle moyen entre deux réceptions) ;
+- couverture = stock_actuel / demande journalière ;
+- niveau cible = demande x (délai + cycle) + z x écart-type x racine(délai + cycle),
+  z étant le quantile du taux de service ; quantité suggérée = cible - stock.
+
+Les statistiques d'historique sont mises en cache jusqu'au prochain lot de
+ventes (version des ventes, voir stock/services/rapports.py), si le cache est
+partagé par les workers (CACHE_PARTAGE) ; le stock courant est relu à chaque appel.
+"""
+from collections import namedtuple
+from datetime import timedelta
+from statistics import NormalDist
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Sum
+from django.utils import timezone
+
+from gestion_stock.versions import cache_partage
+from stock.models import Fournisseur, LigneReception, Produit, VenteJournaliere
+from .rapports import version_ventes
+from .stock import quantite_base_sql
+
+JOURS = 90
+HISTORIQUE_RECEPTIONS = 365
+DELAI = 7
+CYCLE = 14
+TAUX_SERVICE = 0.95
+DUREE_CACHE = 60 * 60
+
+Statistiques = namedtuple('Statistiques', ['produit_ids', 'demande', 'ecart_type', 'fournisseur', 'prix', 'cycle'])
+Suggestion = namedtuple('Suggestion', [
+    'produit_id', 'reference', 'nom', 'stock_actuel', 'demande_journaliere', 'ecart_type',
+    'jours_de_couverture', 'quantite', 'prix_unitaire', 'fournisseur_id',
+])
+Commande = namedtuple('Commande', ['fournisseur_id', 'fournisseur', 'montant', 'lignes'])
+
+
+def _colonnes(lignes, *types):
+    """Tableaux NumPy des colonnes d'une liste de tuples (values_list)."""
+    lignes = list(lignes)
+    if not lignes:
+        return [np.empty(0, dtype=type_) for type_ in types]
+    return [np.fromiter(colonne, dtype=type_, count=len(lignes)) for colonne, type_ in zip(zip(*lignes), types)]
+
+
+def _positions(produit_ids, ids):
+    """Position de chaque id dans `produit_ids` (trié), -1 si absent."""
+    positions = np.searchsorted(produit_ids, ids)
+    positions[positions == len(produit_ids)] = 0
+    return np.where(produit_ids[positions] == ids, positions, -1) if len(produit_ids) else positions - 1
+
+
+def _aligner(valeurs, positions, defaut):
+    """valeurs[positions], `defaut` là où la position vaut -1."""
+    resultat = np.full(len(positions), defaut, dtype=valeurs.dtype)
+    connus = positions >= 0
+    resultat[connus] = valeurs[positions[connus]]
+    return resultat
+
+
+def _demande(produit_ids, jours):
+    """Moyenne et écart-type des ventes journalières des `jours` dernières journées closes."""
+    hier = timezone.localdate() - timedelta(days=1)
+    ventes = (
+        VenteJournaliere.objects.filter(jour__gt=hier - timedelta(days=jours), jour__lte=hier)
+        .order_by().values('produit_id', 'jour').annotate(total=Sum('quantite'))
+        .values_list('produit_id', 'total')
+    )
+    ids, quantites = _colonnes(ventes, np.int64, np.float64)
+    positions = _positions(produit_ids, ids)
+    connus = positions >= 0
+    somme = np.bincount(positions[connus], weights=quantites[connus], minlength=len(produit_ids))
+    carres = np.bincount(positions[connus], weights=quantites[connus] ** 2, minlength=len(produit_ids))
+
+    demande = somme / jours
+    variance = np.maximum(carres / jours - demande ** 2, 0) * jours / max(jours - 1, 1)
+    return demande, np.sqrt(variance)
+
+
+def _receptions(produit_ids, historique):
+    """Dernier fournisseur, dernier prix par unité de base et cycle moyen (jours) entre réceptions."""
+    nombre = len(produit_ids)
+    fournisseur = np.full(nombre, -1, dtype=np.int64)
+    prix = np.full(nombre, np.nan)
+    cycle = np.full(nombre, np.nan)
+
+    lignes = (
+        LigneReception.objects.filter(
+            is_active=True, reception__is_active=True,
+            reception__date__gte=timezone.now() - timedelta(days=historique),
+        )
+        .annotate(quantite_base=quantite_base_sql())
+        .values_list('produit_id', 'reception__fournisseur_id', 'reception__date', 'quantite', 'quantite_base',
+                     'prix_unitaire')
+    )
+    ids, fournisseurs, dates, quantites, bases, prix_lignes = _colonnes(
+        ((produit_id, fournisseur_id, date.timestamp() / 86400, quantite, base, prix_ligne)
+         for produit_id, fournisseur_id, date, quantite, base, prix_ligne in lignes),
+        np.int64, np.int64, np.float64, np.float64, np.float64, np.float64,
+    )
+    positions = _positions(produit_ids, ids)
+    connus = (positions >= 0) & (bases > 0)
+    positions, fournisseurs, dates = positions[connus], fournisseurs[connus], dates[connus]
+    prix_base = prix_lignes[connus] * quantites[connus] / bases[connus]
+    if not len(positions):
+        return fournisseur, prix, cycle
+
+    # Tri par (produit, date) : la dernière ligne de chaque groupe est la plus récente
+    ordre = np.lexsort((dates, positions))
+    positions, fournisseurs, dates, prix_base = positions[ordre], fournisseurs[ordre], dates[ordre], prix_base[ordre]
+    fins = np.r_[positions[1:] != positions[:-1], True]
+    debuts = np.r_[True, positions[1:] != positions[:-1]]
+    fournisseur[positions[fins]] = fournisseurs[fins]
+    prix[positions[fins]] = prix_base[fins]
+
+    receptions = np.bincount(positions, minlength=nombre)
+    etendue = np.zeros(nombre)
+    etendue[positions[fins]] = dates[fins]
+    etendue[positions[debuts]] -= dates[debuts]
+    plusieurs = receptions > 1
+    cycle[plusieurs] = np.round(etendue[plusieurs] / (receptions[plusieurs] - 1), 2)
+    return fournisseur, prix, cycle
+
+
+def statistiques(jours=JOURS, historique=HISTORIQUE_RECEPTIONS):
+    """Statistiques de demande et d'approvisionnement de tout le catalogue (mises en cache)."""
+    # Sans cache partagé, les ventes enregistrées par un autre worker n'invalideraient pas l'entrée
+    partage = cache_partage()
+    cle = f"stock:reappro:{version_ventes()}:{timezone.localdate()}:{jours}:{historique}"
+    resultat = cache.get(cle) if partage else None
+    if resultat is None:
+        produit_ids = np.sort(_colonnes(Produit.objects.values_list('id'), np.int64)[0])
+        demande, ecart_type = _demande(produit_ids, jours)
+        resultat = Statistiques(produit_ids, demande, ecart_type, *_receptions(produit_ids, historique))
+        if partage:
+            cache.set(cle, resultat, DUREE_CACHE)
+    return resultat
+
+
+def suggestions(delai=DELAI, cycle=CYCLE, taux_service=TAUX_SERVICE, jours=JOURS, historique=HISTORIQUE_RECEPTIONS):
+    """Suggestion (namedtuple) pour chaque produit à commander, par fournisseur puis produit."""
+    stats = statistiques(jours, historique)
+    catalogue = list(Produit.objects.order_by('id').values_list('id', 'stock_actuel', 'reference', 'nom'))
+    ids, stocks = _colonnes(((pk, stock) for pk, stock, _, _ in catalogue), np.int64, np.float64)
+    positions = _positions(stats.produit_ids, ids)
+    # Produits créés depuis le calcul des statistiques : sans historique
+    demande = _aligner(stats.demande, positions, 0.0)
+    ecart_type = _aligner(stats.ecart_type, positions, 0.0)
+    fournisseur = _aligner(stats.fournisseur, positions, -1)
+    prix = _aligner(stats.prix, positions, np.nan)
+    cycles = _aligner(stats.cycle, positions, np.nan)
+    periode = delai + np.where(np.isnan(cycles), cycle, cycles)
+
+    z = NormalDist().inv_cdf(taux_service)
+    cible = demande * periode + z * ecart_type * np.sqrt(periode)
+    # Arrondi avant ceil : pas d'unité supplémentaire due aux erreurs de flottant
+    quantites = np.ceil(np.maximum(np.round(cible - stocks, 6), 0)).astype(np.int64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        couverture = np.where(demande > 0, stocks / demande, np.inf)
+
+    retenus = np.flatnonzero(quantites > 0)
+    retenus = retenus[np.lexsort((ids[retenus], fournisseur[retenus]))]
+    return [
+        Suggestion(
+            produit_id=int(ids[i]),
+            reference=catalogue[i][2],
+            nom=catalogue[i][3],
+            stock_actuel=int(stocks[i]),
+            demande_journaliere=round(float(demande[i]), 3),
+            ecart_type=round(float(ecart_type[i]), 3),
+            jours_de_couverture=None if np.isinf(couverture[i]) else round(float(couverture[i]), 1),
+            quantite=int(quantites[i]),
+            prix_unitaire=None if np.isnan(prix[i]) else round(float(prix[i]), 2),
+            fournisseur_id=None if fournisseur[i] < 0 else int(fournisseur[i]),
+        )
+        for i in retenus
+    ]
+
+
+def commandes(**parametres):
+    """Suggestions regroupées par fournisseur (None : produit jamais reçu) avec le montant estimé."""
+    groupes = {}
+    for suggestion in suggestions(**parametres):
+        groupes.setdefault(suggestion.fournisseur_id, []).append(suggestion)
+    noms = dict(Fournisseur.objects.filter(pk__in=[pk for pk in groupes if pk]).values_list('id', 'nom'))
+    return [
+        Commande(
+            fournisseur_id=fournisseur_id,
+            fournisseur=noms.get(fournisseur_id),
+            montant=round(sum(s.quantite * s.prix_unitaire for s in lignes if s.prix_unitaire is not None), 2),
+            lignes=lignes,
+        )
+        for fournisseur_id, lignes in groupes.items()
+    ]
@@ -0,0 +1,92 @@
+"""
+Moteur d'intégration des réceptions fournisseur par lot.
+
+Une livraison de plusieurs centaines de lignes est enregistrée en un nombre
+constant de requêtes :
+- verrouillage des produits en une requête (ordre des id) ;
+- bulk_create des lignes de réception et des entrées de stock ;
+- une seule mise à jour du stock (UPDATE ... CASE, stock/services/stock.py)
+  et une écriture de journal par ligne (bulk_create) ;
+- total et reliquats calculés une seule fois en SQL (stock/services/totaux.py).
+"""
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from stock.models import JournalStock, Reception, LigneReception, EntreeStock
+from .stock import ajuster_stocks, verrouiller_produits
+
+
+def _pk(valeur):
+    return getattr(valeur, 'pk', valeur)
+
+
+def creer_reception(lignes, **donnees_reception):
+    """
+    Crée une réception et ses lignes.
+
+    `lignes` : itérable de dicts {produit, unite_utilisee, quantite, prix_unitaire}
+    (produit et unité peuvent être des instances ou des identifiants).
+    Lève ValidationError (rien n'est écrit) si une ligne est invalide.
+    """
+    lignes = list(lignes)
+    prix_defaut = LigneReception._meta.get_field('prix_unitaire').default
+
+    with transaction.atomic():
+        produits = verrouiller_produits(_pk(ligne['produit']) for ligne in lignes)
+
+        erreurs = []
+        apports = defaultdict(int)
+        quantites = []
+        for ligne in lignes:
+            produit = produits.get(_pk(ligne['produit']))
+            if produit is None:
+                erreurs.append(f"Produit introuvable : {_pk(ligne['produit'])}")
+                continue
+            qte = produit.convertir_en_unite_base(ligne['quantite'], ligne['unite_utilisee'])
+            if not qte or qte <= 0:
+                erreurs.append(f"Quantité ou unité invalide pour le produit {produit.nom}")
+            else:
+                apports[produit.pk] += qte
+                quantites.append(qte)
+        if erreurs:
+            raise ValidationError(erreurs)
+
+        reception = Reception.objects.create(**donnees_reception)
+
+        objets = LigneReception.objects.bulk_create([
+            LigneReception(
+                reception=reception,
+                produit_id=_pk(ligne['produit']),
+                unite_utilisee_id=_pk(ligne['unite_utilisee']),
+                quantite=ligne['quantite'],
+                prix_unitaire=ligne.get('prix_unitaire', prix_defaut),
+            )
+            for ligne in lignes
+        ])
+
+        # Entrées de stock "miroir" : traçabilité uniquement, le stock est porté par les lignes
+        EntreeStock.objects.bulk_create([
+            EntreeStock(
+                reception=reception,
+                produit_id=_pk(ligne['produit']),
+                unite_utilisee_id=_pk(ligne['unite_utilisee']),
+                quantite=ligne['quantite'],
+                type_entree='achat',
+                fournisseur_id=reception.fournisseur_id,
+                created_by_id=reception.created_by_id,
+                updated_by_id=reception.updated_by_id,
+                description=f"Entrée automatique liée à la réception n°{reception.id}",
+            )
+            for ligne in lignes
+        ])
+
+        ajuster_stocks(apports, journal=[
+            JournalStock(produit_id=objet.produit_id, delta=qte,
+                         source_type=JournalStock.LIGNE_RECEPTION, source_id=objet.pk)
+            for objet, qte in zip(objets, quantites)
+        ])
+        reception.calculer_total()
+
+    return reception
@@ -0,0 +1,161 @@
+"""
+Recherche de produits pour les lecteurs de codes-barres et l'autocomplétion.
+
+Trois comportements, du plus sélectif au plus large :
+- exact   : référence identique (index unique sur reference) ;
+- prefixe : référence ou nom commençant par le texte saisi ;
+- floue   : similarité par trigrammes sur le nom et la référence.
+
+Sous PostgreSQL, les recherches par préfixe et floue utilisent les index GIN
+trigrammes (pg_trgm) sur UPPER(nom) et UPPER(reference) (migration 0011) :
+LIKE 'q%' et l'opérateur `%>` (word_similarity) y sont servis par index.
+Sur les autres bases (SQLite des tests), la recherche floue passe par un
+index de trigrammes en mémoire (IndexTrigrammes), reconstruit lorsque le
+catalogue change (voir stock/signals.py).
+"""
+import re
+from collections import defaultdict
+
+from django.db import connection
+from django.db.models import F, Q, Value
+from django.db.models.functions import Greatest, Upper
+
+from gestion_stock.versions import incrementer, version
+from stock.models import Produit
+
+EXACT = 'exact'
+PREFIXE = 'prefixe'
+FLOUE = 'floue'
+AUTO = 'auto'
+MODES = (AUTO, EXACT, PREFIXE, FLOUE)
+
+# Seuil de pg_trgm.word_similarity_threshold (valeur par défaut de PostgreSQL)
+SEUIL_SIMILARITE = 0.6
+LONGUEUR_MIN_FLOUE = 3
+
+CLE_VERSION = "stock:produits:version"
+
+
+def version_catalogue():
+    """Version courante du catalogue (nom et référence des produits)."""
+    return version(CLE_VERSION)
+
+
+def invalider_catalogue():
+    """À appeler après toute modification du nom ou de la référence de produits."""
+    incrementer(CLE_VERSION)
+
+
+def trigrammes(texte):
+    """Trigrammes d'un texte, à la manière de pg_trgm (mots en minuscules, bordés d'espaces)."""
+    resultat = set()
+    for mot in re.findall(r'\w+', texte.lower()):
+        mot = f"  {mot} "
+        resultat.update(mot[i:i + 3] for i in range(len(mot) - 2))
+    return frozenset(resultat)
+
+
+class IndexTrigrammes:
+    """Index inversé trigramme -> produits, pour la recherche floue hors PostgreSQL."""
+
+    def __init__(self, documents):
+        self.inverse = defaultdict(set)
+        for produit_id, texte in documents:
+            for trigramme in trigrammes(texte):
+                self.inverse[trigramme].add(produit_id)
+
+    def rechercher(self, texte, limite, seuil=SEUIL_SIMILARITE):
+        """
+        Produits dont le texte contient au moins `seuil` des trigrammes
+        recherchés (approximation de word_similarity), du plus proche au moins proche.
+        """
+        recherches = trigrammes(texte)
+        if not recherches:
+            return []
+        scores = defaultdict(int)
+        for trigramme in recherches:
+            for produit_id in self.inverse.get(trigramme, ()):
+                scores[produit_id] += 1
+        retenus = [
+            (nombre / len(recherches), produit_id)
+            for produit_id, nombre in scores.items() if nombre / len(recherches) >= seuil
+        ]
+        retenus.sort(key=lambda score: (-score[0], score[1]))
+        return [produit_id for _, produit_id in retenus[:limite]]
+
+
+_index_memoire = {'version': None, 'index': None}
+
+
+def index_memoire():
+    """Index de trigrammes du catalogue, reconstruit si le catalogue a changé."""
+    version = version_catalogue()
+    if _index_memoire['version'] != version:
+        documents = (
+            (produit_id, f"{nom} {reference}")
+            for produit_id, nom, reference in Produit.objects.values_list('id', 'nom', 'reference').iterator()
+        )
+        _index_memoire['index'] = IndexTrigrammes(documents)
+        _index_memoire['version'] = version
+    return _index_memoire['index']
+
+
+def _recherche_exacte(queryset, texte, limite):
+    return list(queryset.filter(reference=texte)[:1])
+
+
+def _recherche_prefixe(queryset, texte, limite):
+    correspondances = queryset.filter(Q(reference__istartswith=texte) | Q(nom__istartswith=texte))
+    return list(correspondances.order_by('nom', 'id')[:limite])
+
+
+def _recherche_floue(queryset, texte, limite):
+    if len(texte) < LONGUEUR_MIN_FLOUE:
+        return []
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.lookups import TrigramWordSimilar
+        from django.contrib.postgres.search import TrigramWordSimilarity
+
+        recherche = Upper(Value(texte))
+        return list(
+            queryset.filter(
+                Q(TrigramWordSimilar(Upper(F('nom')), recherche))
+                | Q(TrigramWordSimilar(Upper(F('reference')), recherche))
+            )
+            .annotate(score=Greatest(
+                TrigramWordSimilarity(recherche, Upper(F('nom'))),
+                TrigramWordSimilarity(recherche, Upper(F('reference'))),
+            ))
+            .order_by('-score', 'id')[:limite]
+        )
+
+    produit_ids = index_memoire().rechercher(texte, limite)
+    produits = queryset.in_bulk(produit_ids)
+    return [produits[produit_id] for produit_id in produit_ids if produit_id in produits]
+
+
+RECHERCHES = {
+    EXACT: _recherche_exacte,
+    PREFIXE: _recherche_prefixe,
+    FLOUE: _recherche_floue,
+}
+
+
+def rechercher_produits(texte, mode=AUTO, limite=20, queryset=None):
+    """
+    Recherche des produits ; retourne (mode appliqué, liste de produits).
+    En mode `auto`, le premier comportement qui trouve un résultat l'emporte
+    (exact, puis préfixe, puis floue).
+    """
+    texte = texte.strip()
+    queryset = Produit.objects.all() if queryset is None else queryset
+    if not texte:
+        return mode, []
+    if mode != AUTO:
+        return mode, RECHERCHES[mode](queryset, texte, limite)
+
+    for mode_applique in (EXACT, PREFIXE, FLOUE):
+        produits = RECHERCHES[mode_applique](queryset, texte, limite)
+        if produits:
+            return mode_applique, produits
+    return FLOUE, []
@@ -0,0 +1,142 @@
+"""
+Réconciliation du stock : recalcule le stock attendu de chaque produit à
+partir des mouvements actifs, le compare à Produit.stock_actuel et corrige
+éventuellement les écarts.
+
+Stock attendu d'un produit =
+    + lignes de réception actives        - lignes de vente actives
+    + entrées actives hors réception      - sorties actives hors vente
+    + écritures du journal sans mouvement (stock d'ouverture, ajustements,
+      écarts d'inventaire)
+Les entrées / sorties rattachées à une réception / vente sont des miroirs
+sans effet propre sur le stock.
+
+Chaque terme est une seule requête agrégée groupée par produit, la
+conversion d'unité (convertir_en_unite_base) étant faite en SQL par la
+jointure sur le produit (quantite_base_sql). Toutes les lectures sont
+faites dans une même transaction (REPEATABLE READ sous PostgreSQL) : une
+vente concurrente ne peut pas produire de faux écart.
+
+Une exécution incrémentale ne vérifie que les produits ayant une écriture
+au journal depuis le dernier point de réconciliation sans écart restant.
+"""
+from collections import defaultdict, namedtuple
+
+from django.db import connection, transaction
+from django.db.models import Max, Q, Sum
+
+from gestion_stock.versions import invalider_collections
+from stock.models import (
+    EntreeStock, SortieStock, LigneVente, LigneReception, JournalStock, PointReconciliation, Produit,
+)
+from .alertes import synchroniser_alertes
+from .stock import LOT_PRODUITS, cumuler_par_produit
+
+# Écritures du journal qui ne correspondent à aucun mouvement
+SOURCES_HORS_MOUVEMENT = (JournalStock.OUVERTURE, JournalStock.AJUSTEMENT, JournalStock.INVENTAIRE)
+
+Ecart = namedtuple('Ecart', ['produit_id', 'nom', 'stock_actuel', 'attendu'])
+Rapport = namedtuple('Rapport', ['point', 'ecarts'])
+
+
+def stocks_attendus(produits=None):
+    """
+    Stock attendu {produit_id: quantite} calculé depuis les mouvements actifs.
+    `produits` : queryset (ou liste) d'identifiants limitant le calcul, None pour tous.
+    """
+    def restreindre(queryset):
+        return queryset if produits is None else queryset.filter(produit_id__in=produits)
+
+    termes = [
+        (LigneReception.objects.filter(is_active=True), 1),
+        (LigneVente.objects.filter(is_active=True), -1),
+        (EntreeStock.objects.filter(is_active=True, reception__isnull=True), 1),
+        (SortieStock.objects.filter(is_active=True, vente__isnull=True), -1),
+    ]
+    attendus = defaultdict(int)
+    for queryset, signe in termes:
+        for produit_id, quantite in cumuler_par_produit(restreindre(queryset)).items():
+            attendus[produit_id] += signe * (quantite or 0)
+
+    hors_mouvement = (
+        restreindre(JournalStock.objects.filter(source_type__in=SOURCES_HORS_MOUVEMENT))
+        .order_by().values('produit_id').annotate(total=Sum('delta')).values_list('produit_id', 'total')
+    )
+    for produit_id, total in hors_mouvement:
+        attendus[produit_id] += total
+    return attendus
+
+
+def dernier_point_sans_ecart():
+    """Dernier point de réconciliation n'ayant laissé aucun écart (point de reprise incrémental)."""
+    return PointReconciliation.objects.filter(Q(ecarts=0) | Q(corrige=True)).order_by('-id').first()
+
+
+def reconcilier(corriger=False, incremental=False):
+    """
+    Compare stock_actuel au stock attendu et enregistre un PointReconciliation.
+    Avec `corriger`, les écarts sont corrigés par un bulk update et tracés au
+    journal (écritures de réconciliation alignant sa somme sur le stock attendu).
+    """
+    isoler = connection.vendor == 'postgresql' and not connection.in_atomic_block
+
+    with transaction.atomic():
+        if isoler:
+            # Instantané unique pour toutes les lectures de la transaction
+            with connection.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+
+        dernier_journal_id = JournalStock.objects.aggregate(dernier=Max('id'))['dernier'] or 0
+        produits = Produit.objects.all()
+        perimetre = None
+        depart = dernier_point_sans_ecart() if incremental else None
+        if depart is not None:
+            perimetre = JournalStock.objects.filter(
+                id__gt=depart.dernier_journal_id, id__lte=dernier_journal_id,
+            ).values('produit_id')
+            produits = produits.filter(pk__in=perimetre)
+
+        attendus = stocks_attendus(perimetre)
+        verifies = 0
+        ecarts = []
+        for produit_id, nom, stock_actuel in produits.order_by('id').values_list('id', 'nom', 'stock_actuel').iterator():
+            verifies += 1
+            attendu = attendus.get(produit_id, 0)
+            if attendu != stock_actuel:
+                ecarts.append(Ecart(produit_id, nom, stock_actuel, attendu))
+
+        if corriger and ecarts:
+            _corriger(ecarts)
+
+        point = PointReconciliation.objects.create(
+            dernier_journal_id=dernier_journal_id,
+            incremental=depart is not None,
+            produits_verifies=verifies,
+            ecarts=len(ecarts),
+            corrige=corriger,
+        )
+    return Rapport(point, ecarts)
+
+
+def _corriger(ecarts):
+    Produit.objects.bulk_update(
+        [Produit(pk=ecart.produit_id, stock_actuel=ecart.attendu) for ecart in ecarts],
+        ['stock_actuel'], batch_size=LOT_PRODUITS,
+    )
+    # La correction ramène aussi la somme du journal au stock attendu
+    # (la dérive peut venir d'une écriture faite hors du journal)
+    journal = dict(
+        JournalStock.objects.filter(produit_id__in=[ecart.produit_id for ecart in ecarts])
+        .order_by().values('produit_id').annotate(total=Sum('delta')).values_list('produit_id', 'total')
+    )
+    JournalStock.objects.bulk_create([
+        JournalStock(
+            produit_id=ecart.produit_id,
+            delta=ecart.attendu - journal.get(ecart.produit_id, 0),
+            source_type=JournalStock.RECONCILIATION,
+        )
+        for ecart in ecarts
+        if ecart.attendu != journal.get(ecart.produit_id, 0)
+    ], batch_size=1000)
+    synchroniser_alertes([ecart.produit_id for ecart in ecarts])
+    invalider_collections(Produit)
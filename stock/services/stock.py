@@ -0,0 +1,177 @@
+"""
+Primitives de mise à jour du stock (Produit.stock_actuel).
+
+Le stock n'est jamais lu puis réécrit en Python : chaque variation est une
+requête `UPDATE ... SET stock_actuel = stock_actuel + delta` conditionnelle
+(`WHERE stock_actuel >= -delta` pour un décrément). Une insuffisance est
+détectée par le nombre de lignes modifiées, et seule la colonne stock_actuel
+est écrite. Le verrou sur la ligne produit ne dure que le temps de la requête.
+
+Chaque variation est inscrite dans la même transaction au journal du stock
+(JournalStock, en ajout seul) : la somme du journal d'un produit est égale à
+son stock_actuel. Les franchissements du seuil d'alerte y sont aussi
+détectés (stock/services/alertes.py), et la version de la collection des
+produits est incrémentée à la validation (gestion_stock/versions.py).
+"""
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Q, Sum, Value, When
+
+from gestion_stock.versions import invalider_collections
+from stock.models import JournalStock, Produit
+from .alertes import signaler_franchissements
+
+# Produits par UPDATE ... CASE (taille de la requête bornée)
+LOT_PRODUITS = 500
+
+
+class StockInsuffisant(ValidationError):
+    """Le stock d'un ou plusieurs produits ne couvre pas le décrément demandé."""
+
+
+class _Annulation(Exception):
+    pass
+
+
+def ajuster_stock(produit_id, delta, source_type=JournalStock.AJUSTEMENT, source_id=None):
+    """
+    Applique une variation de stock à un produit en une requête :
+    UPDATE ... SET stock_actuel = stock_actuel + %s WHERE id = %s AND stock_actuel >= %s
+    puis l'inscrit au journal et signale un éventuel franchissement du seuil d'alerte.
+    """
+    if not delta:
+        return
+    with transaction.atomic():
+        queryset = Produit.objects.filter(pk=produit_id)
+        if delta < 0:
+            queryset = queryset.filter(stock_actuel__gte=-delta)
+        if not queryset.update(stock_actuel=F('stock_actuel') + delta):
+            raise StockInsuffisant(_message_insuffisance([produit_id]))
+        JournalStock.objects.create(produit_id=produit_id, delta=delta, source_type=source_type, source_id=source_id)
+        signaler_franchissements({produit_id: delta})
+        invalider_collections(Produit)
+
+
+def ajuster_stocks(deltas, journal=None):
+    """
+    Applique des variations de stock {produit_id: delta} en une seule requête
+    `UPDATE ... CASE`, chaque décrément étant conditionné au stock disponible.
+    Si un produit ne peut pas être servi, rien n'est appliqué.
+
+    `journal` : écritures JournalStock (non enregistrées) détaillant les
+    variations ; à défaut, une écriture d'ajustement par produit.
+    """
+    deltas = {produit_id: delta for produit_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    if journal is None:
+        journal = [
+            JournalStock(produit_id=produit_id, delta=delta, source_type=JournalStock.AJUSTEMENT)
+            for produit_id, delta in deltas.items()
+        ]
+
+    condition = Q()
+    for produit_id, delta in deltas.items():
+        condition |= Q(pk=produit_id, stock_actuel__gte=-delta) if delta < 0 else Q(pk=produit_id)
+
+    try:
+        with transaction.atomic():
+            modifies = Produit.objects.filter(condition).update(
+                stock_actuel=F('stock_actuel') + Case(
+                    *[When(pk=produit_id, then=Value(delta)) for produit_id, delta in deltas.items()],
+                    default=Value(0),
+                    output_field=IntegerField(),
+                )
+            )
+            if modifies != len(deltas):
+                raise _Annulation
+            JournalStock.objects.bulk_create(journal)
+            signaler_franchissements(deltas)
+            invalider_collections(Produit)
+    except _Annulation:
+        # Le point de sauvegarde a été annulé : aucune variation n'est conservée
+        raise StockInsuffisant(_message_insuffisance(deltas, deltas))
+
+
+def appliquer_journal(journal):
+    """
+    Applique des écritures JournalStock (non enregistrées) : stock et journal
+    en deux requêtes par lot de LOT_PRODUITS produits, dans une transaction.
+    """
+    par_produit = defaultdict(list)
+    for ecriture in journal:
+        if ecriture.delta:
+            par_produit[ecriture.produit_id].append(ecriture)
+    produit_ids = sorted(par_produit)
+
+    with transaction.atomic():
+        for debut in range(0, len(produit_ids), LOT_PRODUITS):
+            lot = produit_ids[debut:debut + LOT_PRODUITS]
+            ajuster_stocks(
+                {produit_id: sum(ecriture.delta for ecriture in par_produit[produit_id]) for produit_id in lot},
+                [ecriture for produit_id in lot for ecriture in par_produit[produit_id]],
+            )
+
+
+def ecritures_annulation(queryset, source_type, signe):
+    """
+    Écritures de journal annulant les lignes ou mouvements d'un queryset
+    (une requête) : `signe` vaut +1 pour restituer un stock retiré, -1 pour
+    retirer un stock apporté.
+    """
+    return [
+        JournalStock(produit_id=produit_id, delta=signe * quantite, source_type=source_type, source_id=pk)
+        for pk, produit_id, quantite in queryset.order_by('pk').annotate(
+            quantite_base=quantite_base_sql()
+        ).values_list('pk', 'produit_id', 'quantite_base')
+    ]
+
+
+def _message_insuffisance(produit_ids, deltas=None):
+    produits = Produit.objects.filter(pk__in=produit_ids).values_list('id', 'nom', 'stock_actuel')
+    noms = [
+        nom for produit_id, nom, stock in produits
+        if deltas is None or stock + deltas[produit_id] < 0
+    ]
+    if not noms:
+        return "Produit introuvable."
+    return f"Stock insuffisant pour : {', '.join(noms)}."
+
+
+def quantite_base_sql():
+    """
+    Expression SQL de la quantité d'une ligne ou d'un mouvement convertie en
+    unité de base du produit (équivalent de Produit.convertir_en_unite_base).
+    """
+    return Case(
+        When(unite_utilisee_id=F('produit__unite_id'), then=F('quantite')),
+        When(unite_utilisee_id=F('produit__unite_conversion_id'),
+             then=F('quantite') * F('produit__facteur_conversion')),
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def cumuler_par_produit(queryset):
+    """
+    Quantités en unité de base cumulées par produit, {produit_id: quantite},
+    pour un queryset de lignes ou de mouvements (une requête groupée).
+    """
+    return dict(
+        queryset.order_by()
+        .values('produit_id')
+        .annotate(quantite_base=Sum(quantite_base_sql()))
+        .values_list('produit_id', 'quantite_base')
+    )
+
+
+def verrouiller_produits(produit_ids, *champs):
+    """
+    Verrouille les produits (SELECT ... FOR UPDATE) dans l'ordre des id,
+    pour que deux transactions concurrentes ne puissent pas s'interbloquer.
+    """
+    champs = champs or ('id', 'nom', 'stock_actuel', 'unite_id', 'unite_conversion_id', 'facteur_conversion')
+    queryset = Produit.objects.select_for_update().filter(pk__in=set(produit_ids)).order_by('id').only(*champs)
+    return {produit.pk: produit for produit in queryset}
@@ -0,0 +1,51 @@
+"""
+Recalcul des totaux et reliquats des ventes et réceptions en SQL.
+
+Le total est `Sum(quantite * prix_unitaire)` sur les lignes actives, calculé
+par sous-requête corrélée ; total et reliquats sont écrits par une seule
+requête UPDATE, pour un document comme pour une table entière.
+"""
+from decimal import Decimal
+
+from django.db import models
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from stock.models import Vente, LigneVente, Reception, LigneReception
+
+MONTANT = models.DecimalField(max_digits=14, decimal_places=2)
+ZERO = Value(Decimal('0.00'), output_field=MONTANT)
+
+# modèle document -> (modèle ligne, champ FK vers le document, champ reliquat dû)
+DOCUMENTS = {
+    Vente: (LigneVente, 'vente', 'reliquat_client'),
+    Reception: (LigneReception, 'reception', 'reliquat_fournisseur'),
+}
+
+
+def expression_total(model_document):
+    """Expression SQL du total des lignes actives d'un document (à utiliser dans update/annotate)."""
+    model_ligne, champ_document, _ = DOCUMENTS[model_document]
+    somme = (
+        model_ligne.objects
+        .filter(**{champ_document: OuterRef('pk')}, is_active=True)
+        .order_by()
+        .values(champ_document)
+        .annotate(somme=Sum(F('quantite') * F('prix_unitaire'), output_field=MONTANT))
+        .values('somme')
+    )
+    return Coalesce(Subquery(somme, output_field=MONTANT), ZERO, output_field=MONTANT)
+
+
+def recalculer_totaux(queryset):
+    """
+    Recalcule total et reliquats de tous les documents du queryset (Vente ou
+    Reception) en une seule requête UPDATE. Retourne le nombre de documents.
+    """
+    _, _, champ_reliquat_du = DOCUMENTS[queryset.model]
+    total = expression_total(queryset.model)
+    return queryset.update(**{
+        'total': total,
+        champ_reliquat_du: Greatest(total - F('montant_paye'), ZERO, output_field=MONTANT),
+        'reliquat_magasin': Greatest(F('montant_paye') - total, ZERO, output_field=MONTANT),
+    })
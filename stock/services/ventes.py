@@ -0,0 +1,147 @@
+"""
+Moteur de création des ventes par lot.
+
+Un panier est enregistré en un nombre constant de requêtes, quel que soit
+son nombre de lignes :
+- un seul SELECT ... FOR UPDATE ORDER BY id sur les produits concernés ;
+- contrôle du stock de toutes les lignes en mémoire ;
+- insertion de la vente, puis bulk_create des lignes et des sorties de stock ;
+- une seule mise à jour du stock (décrément appliqué une seule fois) et une
+  écriture de journal par ligne (bulk_create) ;
+- total et reliquats calculés une seule fois ;
+- faits de vente journaliers (rapports) mis à jour en un seul lot.
+
+`modifier_vente` modifie l'en-tête d'une vente existante et déplace ses
+faits de vente journaliers si leur clé (mode de paiement) change.
+"""
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from stock.models import JournalStock, Vente, LigneVente, SortieStock
+from .rapports import ZERO, ajouter_fait, appliquer_faits, faits_lignes
+from .stock import ajuster_stocks, verrouiller_produits
+
+
+# Champs de l'en-tête faisant partie de la clé des faits de vente journaliers
+CHAMPS_FAITS = ('mode_paiement',)
+
+
+def _pk(valeur):
+    return getattr(valeur, 'pk', valeur)
+
+
+def creer_vente(lignes, **donnees_vente):
+    """
+    Crée une vente et ses lignes.
+
+    `lignes` : itérable de dicts {produit, unite_utilisee, quantite, prix_unitaire}
+    (produit et unité peuvent être des instances ou des identifiants).
+    Lève ValidationError (rien n'est écrit) si une ligne est invalide ou si le
+    stock d'un produit est insuffisant.
+    """
+    lignes = list(lignes)
+
+    with transaction.atomic():
+        produits = verrouiller_produits(_pk(ligne['produit']) for ligne in lignes)
+
+        erreurs = []
+        besoins = defaultdict(int)
+        quantites = []
+        for ligne in lignes:
+            produit = produits.get(_pk(ligne['produit']))
+            if produit is None:
+                erreurs.append(f"Produit introuvable : {_pk(ligne['produit'])}")
+                continue
+            qte = produit.convertir_en_unite_base(ligne['quantite'], ligne['unite_utilisee'])
+            if not qte or qte <= 0:
+                erreurs.append(f"Quantité ou unité invalide pour le produit {produit.nom}")
+            else:
+                besoins[produit.pk] += qte
+                quantites.append(qte)
+
+        for produit_id, besoin in besoins.items():
+            produit = produits[produit_id]
+            if produit.stock_actuel < besoin:
+                erreurs.append(
+                    f"Le stock du produit {produit.nom} est insuffisant pour la quantité demandée."
+                )
+        if erreurs:
+            raise ValidationError(erreurs)
+
+        vente = Vente(**donnees_vente)
+        vente.total = sum(ligne['quantite'] * ligne['prix_unitaire'] for ligne in lignes)
+        vente.repartir_reliquat()
+        vente.save()
+
+        objets = LigneVente.objects.bulk_create([
+            LigneVente(
+                vente=vente,
+                produit_id=_pk(ligne['produit']),
+                unite_utilisee_id=_pk(ligne['unite_utilisee']),
+                quantite=ligne['quantite'],
+                prix_unitaire=ligne['prix_unitaire'],
+            )
+            for ligne in lignes
+        ])
+
+        # Sorties de stock "miroir" : traçabilité uniquement, le stock est porté par les lignes
+        SortieStock.objects.bulk_create([
+            SortieStock(
+                vente=vente,
+                produit_id=_pk(ligne['produit']),
+                unite_utilisee_id=_pk(ligne['unite_utilisee']),
+                quantite=ligne['quantite'],
+                type_sortie='vente',
+                client_id=vente.client_id,
+                created_by_id=vente.created_by_id,
+                updated_by_id=vente.updated_by_id,
+                description=f"Sortie automatique liée à la vente n°{vente.id}",
+            )
+            for ligne in lignes
+        ])
+
+        ajuster_stocks(
+            {produit_id: -besoin for produit_id, besoin in besoins.items()},
+            journal=[
+                JournalStock(produit_id=objet.produit_id, delta=-qte,
+                             source_type=JournalStock.LIGNE_VENTE, source_id=objet.pk)
+                for objet, qte in zip(objets, quantites)
+            ],
+        )
+
+        faits = {}
+        for ligne, qte in zip(lignes, quantites):
+            ajouter_fait(faits, vente, _pk(ligne['produit']), qte, ligne['quantite'] * ligne['prix_unitaire'])
+        appliquer_faits(faits)
+
+    return vente
+
+
+def modifier_vente(vente, **donnees):
+    """
+    Modifie les champs `donnees` de l'en-tête de la vente (pas ses lignes).
+    Si la clé des faits change, les lignes actives sont retirées des faits de
+    l'ancienne clé et ajoutées à ceux de la nouvelle, dans la même transaction.
+    """
+    with transaction.atomic():
+        lignes = LigneVente.objects.filter(vente=vente, is_active=True)
+        deplacer = any(
+            _pk(donnees[champ]) != getattr(vente, f'{champ}_id') for champ in CHAMPS_FAITS if champ in donnees
+        )
+        faits = faits_lignes(lignes, signe=-1) if deplacer else {}
+
+        for champ, valeur in donnees.items():
+            setattr(vente, champ, valeur)
+        vente.save()
+
+        if deplacer:
+            for cle, (quantite, montant, nombre) in faits_lignes(lignes).items():
+                fait = faits.setdefault(cle, [0, ZERO, 0])
+                fait[0] += quantite
+                fait[1] += montant
+                fait[2] += nombre
+            appliquer_faits(faits)
+
+    return vente
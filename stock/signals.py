@@ -0,0 +1,28 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from gestion_stock.versions import invalider_collections
+from .models import Categorie, Fournisseur, ModePaiement, Produit, UniteDeMesure
+from .services.recherche import invalider_catalogue
+
+
+@receiver(post_save, sender=Produit)
+@receiver(post_delete, sender=Produit)
+def produit_modifie(sender, **kwargs):
+    """Le catalogue a changé : l'index de recherche en mémoire sera reconstruit."""
+    invalider_catalogue()
+
+
+@receiver(post_save, sender=Produit)
+@receiver(post_delete, sender=Produit)
+@receiver(post_save, sender=Categorie)
+@receiver(post_delete, sender=Categorie)
+@receiver(post_save, sender=UniteDeMesure)
+@receiver(post_delete, sender=UniteDeMesure)
+@receiver(post_save, sender=ModePaiement)
+@receiver(post_delete, sender=ModePaiement)
+@receiver(post_save, sender=Fournisseur)
+@receiver(post_delete, sender=Fournisseur)
+def referentiel_modifie(sender, **kwargs):
+    """Nouvelle version de la collection : ETag et réponses en cache de ses listes et détails changent."""
+    invalider_collections(sender)
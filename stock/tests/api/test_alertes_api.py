@@ -0,0 +1,44 @@
+import pytest
+
+from stock.models import Produit
+from stock.services.stock import ajuster_stock
+
+
+@pytest.mark.django_db
+def test_api_produits_en_alerte(api_client, produit, categorie, unite_base):
+    """[API] /produits/alertes/ ne renvoie que les produits au niveau ou sous leur seuil"""
+    suffisant = Produit.objects.create(nom="Suffisant", reference="REF-OK", categorie=categorie, unite=unite_base,
+                                       prix_unitaire=1, stock_actuel=50)
+
+    response = api_client.get("/api/v1/produits/alertes/")
+    assert response.status_code == 200
+    assert response.data["count"] == 1
+    [resultat] = response.data["results"]
+    assert (resultat["id"], resultat["stock_actuel"], resultat["seuil_alerte"]) == (produit.pk, 0, 5)
+    assert resultat["alerte_depuis"] is not None
+
+    ajuster_stock(suffisant.pk, -46)
+    assert api_client.get("/api/v1/produits/alertes/").data["count"] == 2
+
+
+@pytest.mark.django_db
+def test_api_historique_des_alertes(api_client, produit):
+    """[API] /alertes-stock/ : historique filtrable par produit et alertes ouvertes"""
+    ajuster_stock(produit.pk, 10)
+    ajuster_stock(produit.pk, -8)
+
+    response = api_client.get("/api/v1/alertes-stock/", {"produit": produit.pk})
+    assert response.status_code == 200
+    assert [alerte["fin"] is None for alerte in response.data["results"]] == [True, False]
+
+    response = api_client.get("/api/v1/alertes-stock/", {"ouvertes": 1})
+    assert [alerte["stock"] for alerte in response.data["results"]] == [2]
+
+
+@pytest.mark.django_db
+def test_api_alertes_permission(api_client, utilisateur):
+    """[API] Sans la permission de consultation des alertes : 403"""
+    utilisateur.roles.first().permissions.remove(
+        *utilisateur.roles.first().permissions.filter(codename="view_alertestock")
+    )
+    assert api_client.get("/api/v1/alertes-stock/").status_code == 403
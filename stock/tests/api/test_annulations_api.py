@@ -0,0 +1,39 @@
+from decimal import Decimal
+
+import pytest
+
+from stock.models import Produit
+from stock.services.receptions import creer_reception
+from stock.services.ventes import creer_vente
+
+
+@pytest.mark.django_db
+def test_api_annuler_ventes(api_client, produit, unite_base, utilisateur):
+    """[API] POST /ventes/annuler/ : lot annulé, ids inconnus signalés"""
+    Produit.objects.filter(pk=produit.pk).update(stock_actuel=10)
+    ventes = [
+        creer_vente([{"produit": produit, "unite_utilisee": unite_base, "quantite": 2, "prix_unitaire": Decimal("1")}])
+        for _ in range(2)
+    ]
+
+    response = api_client.post("/api/v1/ventes/annuler/", {"ids": [v.pk for v in ventes] + [999999]}, format="json")
+    assert response.status_code == 200
+    assert response.data == {
+        "annules": sorted(v.pk for v in ventes), "deja_annules": [], "introuvables": [999999], "lignes": 2,
+    }
+    produit.refresh_from_db()
+    assert produit.stock_actuel == 10
+    assert ventes[0].sorties.get().updated_by == utilisateur
+
+
+@pytest.mark.django_db
+def test_api_annuler_receptions(api_client, produit, unite_base, fournisseur):
+    """[API] POST /receptions/annuler/ : stock insuffisant -> 400 ; liste vide -> 400"""
+    reception = creer_reception([{"produit": produit, "unite_utilisee": unite_base, "quantite": 5, "prix_unitaire": 1}],
+                                fournisseur=fournisseur)
+    creer_vente([{"produit": produit, "unite_utilisee": unite_base, "quantite": 3, "prix_unitaire": Decimal("1")}])
+
+    response = api_client.post("/api/v1/receptions/annuler/", {"ids": [reception.pk]}, format="json")
+    assert response.status_code == 400
+    response = api_client.post("/api/v1/receptions/annuler/", {"ids": []}, format="json")
+    assert response.status_code == 400
@@ -0,0 +1,141 @@
+import pytest
+from django.contrib.auth.models import Permission
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from gestion_stock.metriques import registre
+from stock.models import Categorie, Fournisseur, ModePaiement, UniteDeMesure
+from users.models import Role, User
+
+URLS = [
+    "/api/v1/categories/",
+    "/api/v1/unites/",
+    "/api/v1/modes-paiement/",
+    "/api/v1/fournisseurs/",
+]
+
+
+@pytest.fixture
+def compteurs():
+    registre.reinitialiser()
+    yield registre.cache_reponses.series
+    registre.reinitialiser()
+
+
+@pytest.fixture
+def referentiel(categorie, unite_base, fournisseur):
+    ModePaiement.objects.create(nom="Espèces")
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("url", URLS)
+def test_perf_cache_reponses_sans_requete(api_client, referentiel, utilisateur, compteurs, url):
+    """[PERF] Deuxième lecture servie par le cache : mêmes octets, aucune requête SQL"""
+    premiere = api_client.get(url)
+    assert premiere.status_code == 200
+    utilisateur.has_perm("stock.view_categorie")  # permissions en cache
+    with CaptureQueriesContext(connection) as requetes:
+        seconde = api_client.get(url)
+    assert len(requetes) == 0
+    assert seconde.status_code == 200
+    assert seconde.content == premiere.content
+    assert seconde["Content-Type"] == premiere["Content-Type"]
+
+    endpoint = f"{premiere.renderer_context['view'].__class__.__name__}.list"
+    assert compteurs[(endpoint, "echec")] == 1
+    assert compteurs[(endpoint, "succes")] == 1
+
+
+@pytest.mark.django_db
+def test_happy_cache_reponses_detail_et_parametres(api_client, referentiel, categorie, compteurs):
+    """[HAPPY] Détail et variantes de paramètres ont leurs propres entrées"""
+    for url in [f"/api/v1/categories/{categorie.pk}/", "/api/v1/categories/?search=Test",
+                "/api/v1/categories/?ordering=-nom"]:
+        assert api_client.get(url).status_code == 200
+        assert api_client.get(url).status_code == 200
+    assert compteurs[("CategorieViewSet.retrieve", "echec")] == 1
+    assert compteurs[("CategorieViewSet.retrieve", "succes")] == 1
+    assert compteurs[("CategorieViewSet.list", "echec")] == 2
+    assert compteurs[("CategorieViewSet.list", "succes")] == 2
+
+
+@pytest.mark.django_db
+def test_happy_cache_reponses_invalide_par_ecriture(api_client, referentiel, fournisseur,
+                                                   django_capture_on_commit_callbacks):
+    """[HAPPY] Une écriture sur le modèle rend les réponses en cache obsolètes"""
+    assert api_client.get("/api/v1/fournisseurs/").json()["results"][0]["nom"] == "Fournisseur Test"
+    with django_capture_on_commit_callbacks(execute=True):
+        assert api_client.patch(f"/api/v1/fournisseurs/{fournisseur.pk}/", {"nom": "Grossiste"}).status_code == 200
+    assert api_client.get("/api/v1/fournisseurs/").json()["results"][0]["nom"] == "Grossiste"
+    assert api_client.get(f"/api/v1/fournisseurs/{fournisseur.pk}/").json()["nom"] == "Grossiste"
+
+    # Suppression hors API (signal post_delete)
+    with django_capture_on_commit_callbacks(execute=True):
+        Fournisseur.objects.all().delete()
+    assert api_client.get("/api/v1/fournisseurs/").json()["results"] == []
+
+
+@pytest.mark.django_db
+def test_edge_cache_reponses_autres_collections_conservees(api_client, referentiel, compteurs,
+                                                          django_capture_on_commit_callbacks):
+    """[EDGE] Une écriture n'invalide que les réponses des collections concernées"""
+    api_client.get("/api/v1/unites/")
+    with django_capture_on_commit_callbacks(execute=True):
+        Categorie.objects.create(nom="Boissons")
+    api_client.get("/api/v1/unites/")
+    assert compteurs[("UniteDeMesureViewSet.list", "succes")] == 1
+    with django_capture_on_commit_callbacks(execute=True):
+        UniteDeMesure.objects.create(nom="Litre", symbole="l")
+    assert len(api_client.get("/api/v1/unites/").json()["results"]) == 2
+    assert compteurs[("UniteDeMesureViewSet.list", "echec")] == 2
+
+
+@pytest.mark.django_db
+def test_edge_cache_reponses_permissions_verifiees(api_client, referentiel):
+    """[EDGE] Une réponse en cache n'est pas servie sans la permission de lecture"""
+    assert api_client.get("/api/v1/categories/").status_code == 200
+    role = Role.objects.create(nom="Caissier")
+    role.permissions.set(Permission.objects.filter(codename="view_produit"))
+    caissier = User.objects.create_user(username="caissier", password="secret")
+    caissier.roles.add(role)
+    client = APIClient(HTTP_X_FORWARDED_PROTO="https")
+    client.force_authenticate(user=caissier)
+    assert client.get("/api/v1/categories/").status_code == 403
+
+
+@pytest.mark.django_db
+def test_edge_cache_reponses_desactive(api_client, referentiel, settings, compteurs):
+    """[EDGE] REPONSES_CACHE = False : ni lecture ni écriture du cache"""
+    settings.REPONSES_CACHE = False
+    api_client.get("/api/v1/categories/")
+    api_client.get("/api/v1/categories/")
+    assert not compteurs
+
+
+@pytest.mark.django_db
+def test_edge_cache_reponses_sans_cache_partage(api_client, referentiel, settings, compteurs):
+    """[EDGE] Cache propre au processus : réponses jamais mises en cache"""
+    settings.CACHE_PARTAGE = False
+    api_client.get("/api/v1/categories/")
+    api_client.get("/api/v1/categories/")
+    assert not compteurs
+
+
+@pytest.mark.django_db
+def test_api_cache_reponses_get_conditionnel(api_client, referentiel):
+    """[API] Une réponse servie par le cache garde ETag et 304"""
+    premiere = api_client.get("/api/v1/modes-paiement/")
+    seconde = api_client.get("/api/v1/modes-paiement/")
+    assert seconde["ETag"] == premiere["ETag"]
+    assert api_client.get("/api/v1/modes-paiement/", HTTP_IF_NONE_MATCH=seconde["ETag"]).status_code == 304
+
+
+@pytest.mark.django_db
+def test_api_cache_reponses_metriques(api_client, referentiel, compteurs):
+    """[API] Succès et échecs exposés au format Prometheus"""
+    api_client.get("/api/v1/categories/")
+    api_client.get("/api/v1/categories/")
+    texte = registre.exposer()
+    assert 'gestock_cache_reponses_total{endpoint="CategorieViewSet.list",resultat="echec"} 1' in texte
+    assert 'gestock_cache_reponses_total{endpoint="CategorieViewSet.list",resultat="succes"} 1' in texte
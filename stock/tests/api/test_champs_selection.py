@@ -0,0 +1,100 @@
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from stock.models import Produit
+from stock.services.ventes import creer_vente
+
+
+@pytest.fixture
+def vente(produit, unite_base, utilisateur):
+    Produit.objects.filter(pk=produit.pk).update(stock_actuel=100)
+    return creer_vente(
+        [{"produit": produit, "unite_utilisee": unite_base, "quantite": 2, "prix_unitaire": 10}],
+        created_by=utilisateur, updated_by=utilisateur,
+    )
+
+
+@pytest.mark.django_db
+def test_api_liste_compacte_par_defaut(api_client, vente, produit, utilisateur):
+    """[API] Les listes rendent les relations sous forme compacte (identifiant et libellés)"""
+    resultat = api_client.get("/api/v1/ventes/").data["results"][0]
+    assert resultat["created_by"] == {"id": utilisateur.pk, "username": "gerant"}
+    ligne = resultat["lignes"][0]
+    assert ligne["produit"] == {"id": produit.pk, "reference": "REF123", "nom": "Produit Test"}
+    assert ligne["unite"] == {"id": vente.lignes.get().unite_utilisee_id, "nom": "Gramme"}
+    assert ligne["quantite"] == 2
+
+
+@pytest.mark.django_db
+def test_api_detail_complet(api_client, vente):
+    """[API] Le détail garde la représentation complète"""
+    resultat = api_client.get(f"/api/v1/ventes/{vente.pk}/").data
+    assert resultat["created_by"]["roles"][0]["nom"] == "Gérant"
+    assert resultat["lignes"][0]["produit"]["categorie"]["nom"] == "Catégorie Test"
+
+
+@pytest.mark.django_db
+def test_api_expand(api_client, vente):
+    """[API] ?expand= développe les seules relations demandées, y compris imbriquées"""
+    resultat = api_client.get("/api/v1/ventes/?expand=lignes.produit").data["results"][0]
+    assert resultat["lignes"][0]["produit"]["categorie"]["nom"] == "Catégorie Test"
+    assert set(resultat["lignes"][0]["unite"]) == {"id", "nom"}
+    assert set(resultat["created_by"]) == {"id", "username"}
+
+
+@pytest.mark.django_db
+def test_api_fields(api_client, vente):
+    """[API] ?fields= restreint les champs rendus, par chemin pointé"""
+    resultat = api_client.get("/api/v1/ventes/?fields=id,total,lignes.quantite").data["results"][0]
+    assert resultat == {"id": vente.pk, "total": "20.00", "lignes": [{"quantite": 2}]}
+
+    detail = api_client.get(f"/api/v1/ventes/{vente.pk}/?fields=id,created_by.username").data
+    assert detail == {"id": vente.pk, "created_by": {"username": "gerant"}}
+
+
+@pytest.mark.django_db
+def test_perf_fields_elague_le_plan(api_client, vente, utilisateur):
+    """[PERF] Une relation non demandée n'est ni jointe ni préchargée"""
+    utilisateur.has_perm("stock.view_vente")  # permissions en cache
+    with CaptureQueriesContext(connection) as requetes:
+        reponse = api_client.get("/api/v1/ventes/?fields=id,total")
+    assert reponse.status_code == 200
+    assert len(requetes) == 1
+    assert "JOIN" not in requetes[0]["sql"]
+
+
+@pytest.mark.django_db
+def test_perf_liste_compacte_plus_legere(api_client, vente):
+    """[PERF] La liste compacte est au moins dix fois plus légère que la liste développée"""
+    compacte = api_client.get("/api/v1/ventes/").content
+    developpee = api_client.get("/api/v1/ventes/?expand=client,mode_paiement,lignes.produit,lignes.unite,"
+                                "created_by,updated_by").content
+    assert json.loads(compacte)["results"][0]["id"] == json.loads(developpee)["results"][0]["id"]
+    assert len(developpee) >= 10 * len(compacte)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("parametres, cle", [
+    ("fields=id,inconnu", "fields"),
+    ("fields=lignes.inconnu", "fields"),
+    ("expand=inconnu", "expand"),
+    ("expand=total", "expand"),
+])
+def test_edge_selection_invalide(api_client, vente, parametres, cle):
+    """[EDGE] Un champ inconnu ou une expansion hors relation est refusé (400)"""
+    reponse = api_client.get(f"/api/v1/ventes/?{parametres}")
+    assert reponse.status_code == 400
+    assert cle in reponse.data
+
+
+@pytest.mark.django_db
+def test_edge_ecriture_non_affectee(api_client, produit, unite_base):
+    """[EDGE] Les paramètres de sélection n'affectent pas les écritures"""
+    Produit.objects.filter(pk=produit.pk).update(stock_actuel=100)
+    reponse = api_client.post("/api/v1/ventes/?fields=id", {
+        "lignes": [{"produit": produit.pk, "unite_utilisee": unite_base.pk, "quantite": 1, "prix_unitaire": 10}],
+    }, format="json")
+    assert reponse.status_code == 201, reponse.data
@@ -0,0 +1,102 @@
+import csv
+import io
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from stock.models import LigneVente, Vente
+
+
+def _ventes(produit, unite_base, dates):
+    # bulk_create : pas d'effet sur le stock, seules les lignes exportées comptent
+    ventes = Vente.objects.bulk_create([Vente(date=date) for date in dates])
+    LigneVente.objects.bulk_create([
+        LigneVente(vente=vente, produit=produit, unite_utilisee=unite_base, quantite=2, prix_unitaire=Decimal("5.00"))
+        for vente in ventes
+    ])
+    return ventes
+
+
+def _contenu(response):
+    return b"".join(response.streaming_content).decode("utf-8")
+
+
+@pytest.mark.django_db
+def test_api_export_ventes_csv(api_client, produit, unite_base):
+    """[API] /exports/ventes.csv : en-tête puis une ligne par ligne de vente, en flux"""
+    ventes = _ventes(produit, unite_base, [timezone.now() - timedelta(days=2), timezone.now()])
+
+    response = api_client.get("/api/v1/exports/ventes.csv")
+    assert response.status_code == 200
+    assert response.streaming
+    assert response["Content-Type"].startswith("text/csv")
+    assert 'filename="ventes.csv"' in response["Content-Disposition"]
+
+    lignes = list(csv.DictReader(io.StringIO(_contenu(response))))
+    assert [int(ligne["vente_id"]) for ligne in lignes] == [vente.pk for vente in ventes]
+    assert lignes[0]["produit_reference"] == produit.reference
+    assert lignes[0]["quantite"] == "2"
+    assert lignes[0]["prix_unitaire"] == "5.00"
+    assert lignes[0]["client"] == ""
+
+
+@pytest.mark.django_db
+def test_api_export_jsonl_filtre_par_date(api_client, produit, unite_base):
+    """[API] /exports/ventes.jsonl?debut=&fin= : un objet JSON par ligne, bornes incluses"""
+    aujourd_hui = timezone.localtime().replace(hour=12)
+    _ventes(produit, unite_base, [aujourd_hui - timedelta(days=10), aujourd_hui - timedelta(days=1), aujourd_hui])
+
+    veille = (aujourd_hui - timedelta(days=1)).date().isoformat()
+    response = api_client.get("/api/v1/exports/ventes.jsonl", {"debut": veille, "fin": veille})
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("application/x-ndjson")
+
+    objets = [json.loads(ligne) for ligne in _contenu(response).splitlines()]
+    assert len(objets) == 1
+    assert objets[0]["produit_nom"] == produit.nom
+    assert objets[0]["quantite"] == 2
+
+
+@pytest.mark.django_db
+def test_api_export_nombre_de_requetes_constant(api_client, produit, unite_base):
+    """[API] Le nombre de requêtes ne dépend pas du nombre de lignes exportées"""
+    _ventes(produit, unite_base, [timezone.now()] * 3)
+    _contenu(api_client.get("/api/v1/exports/ventes.csv"))  # permissions mises en cache
+    with CaptureQueriesContext(connection) as petit:
+        _contenu(api_client.get("/api/v1/exports/ventes.csv"))
+
+    _ventes(produit, unite_base, [timezone.now()] * 30)
+    with CaptureQueriesContext(connection) as grand:
+        _contenu(api_client.get("/api/v1/exports/ventes.csv"))
+
+    assert len(grand) == len(petit)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("url", ["/api/v1/exports/inconnu.csv", "/api/v1/exports/ventes.xml"])
+def test_api_export_inconnu(api_client, url):
+    """[API] Export ou format inconnu : 404"""
+    assert api_client.get(url).status_code == 404
+
+
+@pytest.mark.django_db
+def test_api_export_date_invalide(api_client):
+    """[API] Date invalide : 400"""
+    response = api_client.get("/api/v1/exports/entrees.csv", {"debut": "pas-une-date"})
+    assert response.status_code == 400
+    assert "debut" in response.data
+
+
+@pytest.mark.django_db
+def test_api_export_permission(api_client, utilisateur):
+    """[API] Sans la permission de consultation du document exporté : 403"""
+    utilisateur.roles.first().permissions.remove(
+        *utilisateur.roles.first().permissions.filter(codename="view_reception")
+    )
+    assert api_client.get("/api/v1/exports/receptions.csv").status_code == 403
+    assert api_client.get("/api/v1/exports/sorties.csv").status_code == 200
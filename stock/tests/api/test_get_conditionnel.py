@@ -0,0 +1,128 @@
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from gestion_stock.versions import modeles_rendus
+from stock.models import Categorie, ModePaiement, Produit, UniteDeMesure
+from stock.serializers import ProduitReadSerializer
+from stock.services.ventes import creer_vente
+
+URLS = [
+    "/api/v1/produits/",
+    "/api/v1/categories/",
+    "/api/v1/unites/",
+    "/api/v1/modes-paiement/",
+]
+
+
+@pytest.fixture
+def referentiel(produit):
+    ModePaiement.objects.create(nom="Espèces")
+    return produit
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("url", URLS)
+def test_api_get_conditionnel_304(api_client, referentiel, url):
+    """[API] If-None-Match correspondant : 304 sans corps, mêmes validateurs"""
+    reponse = api_client.get(url)
+    assert reponse.status_code == 200
+    assert reponse["ETag"].startswith('"') and reponse.has_header("Last-Modified")
+    assert "no-cache" in reponse["Cache-Control"] and "private" in reponse["Cache-Control"]
+
+    revalidation = api_client.get(url, HTTP_IF_NONE_MATCH=reponse["ETag"])
+    assert revalidation.status_code == 304
+    assert revalidation.content == b""
+    assert revalidation["ETag"] == reponse["ETag"]
+
+    assert api_client.get(url, HTTP_IF_MODIFIED_SINCE=reponse["Last-Modified"]).status_code == 304
+
+
+@pytest.mark.django_db
+def test_api_get_conditionnel_detail(api_client, referentiel):
+    """[API] Le détail a son propre ETag et répond 304"""
+    detail = api_client.get(f"/api/v1/produits/{referentiel.pk}/")
+    liste = api_client.get("/api/v1/produits/")
+    assert detail["ETag"] != liste["ETag"]
+    assert api_client.get(
+        f"/api/v1/produits/{referentiel.pk}/", HTTP_IF_NONE_MATCH=detail["ETag"]
+    ).status_code == 304
+
+
+@pytest.mark.django_db
+def test_perf_get_conditionnel_sans_requete(api_client, referentiel, utilisateur):
+    """[PERF] Un 304 ne lit pas la base (versions en cache)"""
+    etag = api_client.get("/api/v1/produits/")["ETag"]
+    utilisateur.has_perm("stock.view_produit")  # permissions en cache
+    with CaptureQueriesContext(connection) as requetes:
+        assert api_client.get("/api/v1/produits/", HTTP_IF_NONE_MATCH=etag).status_code == 304
+    assert len(requetes) == 0
+
+
+@pytest.mark.django_db
+def test_edge_get_conditionnel_sans_cache_partage(api_client, referentiel, settings):
+    """[EDGE] Cache propre au processus : ni ETag ni 304, les versions d'un autre worker seraient ignorées"""
+    etag = api_client.get("/api/v1/produits/")["ETag"]
+    settings.CACHE_PARTAGE = False
+    reponse = api_client.get("/api/v1/produits/", HTTP_IF_NONE_MATCH=etag)
+    assert reponse.status_code == 200
+    assert not reponse.has_header("ETag")
+
+
+@pytest.mark.django_db
+def test_edge_etag_par_parametres(api_client, referentiel):
+    """[EDGE] L'ETag dépend des paramètres de la requête"""
+    etags = {api_client.get(url)["ETag"] for url in [
+        "/api/v1/produits/", "/api/v1/produits/?fields=id,nom", "/api/v1/produits/?search=REF",
+    ]}
+    assert len(etags) == 3
+
+
+@pytest.mark.django_db
+def test_happy_ecriture_change_etag(api_client, referentiel, categorie, django_capture_on_commit_callbacks):
+    """[HAPPY] Une modification par l'API change l'ETag de la collection et des collections qui l'imbriquent"""
+    avant = {url: api_client.get(url)["ETag"] for url in ["/api/v1/categories/", "/api/v1/produits/"]}
+    with django_capture_on_commit_callbacks(execute=True):
+        assert api_client.patch(f"/api/v1/categories/{categorie.pk}/", {"nom": "Épicerie"}).status_code == 200
+    for url, etag in avant.items():
+        reponse = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert reponse.status_code == 200
+        assert reponse["ETag"] != etag
+    # Collection non concernée : ETag inchangé
+    etag = api_client.get("/api/v1/modes-paiement/")["ETag"]
+    with django_capture_on_commit_callbacks(execute=True):
+        Categorie.objects.create(nom="Boissons")
+    assert api_client.get("/api/v1/modes-paiement/", HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+
+@pytest.mark.django_db
+def test_happy_mouvement_de_stock_change_etag(api_client, referentiel, unite_base, django_capture_on_commit_callbacks):
+    """[HAPPY] Les variations de stock (UPDATE sans post_save) changent l'ETag des produits"""
+    Produit.objects.filter(pk=referentiel.pk).update(stock_actuel=10)
+    etag = api_client.get("/api/v1/produits/")["ETag"]
+    with django_capture_on_commit_callbacks(execute=True):
+        creer_vente([{"produit": referentiel, "unite_utilisee": unite_base, "quantite": 2,
+                      "prix_unitaire": Decimal(10)}])
+    reponse = api_client.get("/api/v1/produits/", HTTP_IF_NONE_MATCH=etag)
+    assert reponse.status_code == 200
+    assert reponse.json()["results"][0]["stock_actuel"] == 8
+
+
+@pytest.mark.django_db
+def test_edge_version_incrementee_a_la_validation(api_client, referentiel, django_capture_on_commit_callbacks):
+    """[EDGE] La version n'est incrémentée qu'à la validation de la transaction"""
+    etag = api_client.get("/api/v1/unites/")["ETag"]
+    with django_capture_on_commit_callbacks(execute=False) as rappels:
+        UniteDeMesure.objects.create(nom="Litre", symbole="l")
+        assert api_client.get("/api/v1/unites/", HTTP_IF_NONE_MATCH=etag).status_code == 304
+    assert rappels
+    for rappel in rappels:
+        rappel()
+    assert api_client.get("/api/v1/unites/", HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+def test_happy_modeles_rendus():
+    """[HAPPY] Les modèles suivis d'une représentation comprennent les serializers imbriqués"""
+    assert set(modeles_rendus(ProduitReadSerializer)) == {Produit, Categorie, UniteDeMesure}
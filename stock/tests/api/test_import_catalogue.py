@@ -0,0 +1,67 @@
+import json
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from stock.models import Produit
+
+
+@pytest.mark.django_db
+def test_api_import_catalogue_csv(api_client, produit):
+    """[API] POST /produits/import/ : upsert par référence et rapport d'erreurs"""
+    contenu = (
+        "reference,nom,categorie,unite,prix_unitaire\n"
+        "REF123,Produit renommé,Catégorie Test,Gramme,11.00\n"
+        "NOUV-1,Nouveau,Catégorie Test,Kilogramme,3\n"
+        "NOUV-2,Sans unité,Catégorie Test,,3\n"
+    )
+    fichier = SimpleUploadedFile("catalogue.csv", contenu.encode("utf-8"), content_type="text/csv")
+
+    response = api_client.post("/api/v1/produits/import/", {"fichier": fichier}, format="multipart")
+    assert response.status_code == 200
+    assert response.data["lignes"] == 3
+    assert (response.data["crees"], response.data["mis_a_jour"]) == (1, 1)
+    assert response.data["erreurs"] == [{"ligne": 3, "reference": "NOUV-2", "erreurs": {"unite": "Ce champ est obligatoire."}}]
+    assert Produit.objects.get(reference="REF123").nom == "Produit renommé"
+
+
+@pytest.mark.django_db
+def test_api_import_catalogue_jsonl_simulation(api_client, categorie, unite_base):
+    """[API] Fichier JSONL, format explicite, simulation sans écriture"""
+    contenu = json.dumps({"reference": "J-1", "nom": "Json", "categorie": categorie.nom, "unite": "gramme",
+                          "prix_unitaire": 4})
+    fichier = SimpleUploadedFile("export.txt", contenu.encode("utf-8"))
+
+    response = api_client.post(
+        "/api/v1/produits/import/", {"fichier": fichier, "format": "jsonl", "simuler": True}, format="multipart",
+    )
+    assert response.status_code == 200
+    assert response.data["crees"] == 1
+    assert not Produit.objects.exists()
+
+
+@pytest.mark.django_db
+def test_api_import_catalogue_fichier_invalide(api_client):
+    """[API] Format indéterminé ou fichier illisible : 400"""
+    response = api_client.post(
+        "/api/v1/produits/import/", {"fichier": SimpleUploadedFile("catalogue.xlsx", b"x")}, format="multipart",
+    )
+    assert response.status_code == 400
+    assert "format" in response.data
+
+    response = api_client.post(
+        "/api/v1/produits/import/", {"fichier": SimpleUploadedFile("c.csv", b"nom\nA\n")}, format="multipart",
+    )
+    assert response.status_code == 400
+    assert "fichier" in response.data
+
+
+@pytest.mark.django_db
+def test_api_import_catalogue_permission(api_client, utilisateur):
+    """[API] L'import demande les permissions d'ajout et de modification des produits"""
+    utilisateur.roles.first().permissions.remove(
+        *utilisateur.roles.first().permissions.filter(codename="change_produit")
+    )
+    fichier = SimpleUploadedFile("catalogue.csv", b"reference,nom,categorie,unite,prix_unitaire\n")
+    response = api_client.post("/api/v1/produits/import/", {"fichier": fichier}, format="multipart")
+    assert response.status_code == 403
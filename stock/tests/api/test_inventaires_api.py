@@ -0,0 +1,47 @@
+import pytest
+
+from stock.models import Produit
+
+
+@pytest.mark.django_db
+def test_api_inventaire_complet(api_client, produit):
+    """[API] Ouverture, comptage en masse, écarts puis clôture"""
+    Produit.objects.filter(pk=produit.pk).update(stock_actuel=20)
+
+    response = api_client.post("/api/v1/inventaires/", {"description": "Trimestriel"}, format="json")
+    assert response.status_code == 201
+    inventaire = response.data["id"]
+    assert response.data["statut"] == "ouvert"
+
+    response = api_client.post(f"/api/v1/inventaires/{inventaire}/comptages/",
+                               {"zone": "A", "lignes": [{"produit": produit.pk, "quantite": 17}]}, format="json")
+    assert response.status_code == 201
+    assert response.data == {"zone": "A", "comptages": 1}
+
+    response = api_client.get(f"/api/v1/inventaires/{inventaire}/ecarts/")
+    assert response.status_code == 200
+    assert response.data["results"] == [{
+        "produit": produit.pk, "reference": "REF123", "nom": produit.nom, "stock_gele": 20, "compte": 17, "ecart": -3,
+    }]
+
+    response = api_client.post(f"/api/v1/inventaires/{inventaire}/cloturer/")
+    assert response.status_code == 200
+    assert (response.data["statut"], response.data["ajustements"]) == ("cloture", 1)
+    produit.refresh_from_db()
+    assert produit.stock_actuel == 17
+
+    response = api_client.post(f"/api/v1/inventaires/{inventaire}/cloturer/")
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_api_comptages_invalides(api_client, produit):
+    """[API] Produit hors périmètre ou en double dans un envoi : 400"""
+    inventaire = api_client.post("/api/v1/inventaires/", {}, format="json").data["id"]
+    url = f"/api/v1/inventaires/{inventaire}/comptages/"
+
+    response = api_client.post(url, {"lignes": [{"produit": 999999, "quantite": 1}]}, format="json")
+    assert response.status_code == 400
+    response = api_client.post(url, {"lignes": [{"produit": produit.pk, "quantite": 1}] * 2}, format="json")
+    assert response.status_code == 400
+    assert "lignes" in response.data
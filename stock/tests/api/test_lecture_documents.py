@@ -0,0 +1,84 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from stock.models import Reception, LigneReception, Vente, LigneVente, Produit, ModePaiement, Client
+
+
+@pytest.fixture
+def creer_reception(produit, unite_base, unite_conversion, fournisseur):
+    def _creer(nb_lignes):
+        reception = Reception.objects.create(fournisseur=fournisseur)
+        LigneReception.objects.bulk_create(
+            LigneReception(
+                reception=reception, produit=produit, quantite=i + 1,
+                unite_utilisee=unite_conversion if i % 2 else unite_base, prix_unitaire=250,
+            )
+            for i in range(nb_lignes)
+        )
+        return reception
+    return _creer
+
+
+@pytest.fixture
+def creer_vente(produit, unite_base):
+    Produit.objects.filter(pk=produit.pk).update(stock_actuel=10_000)
+    client = Client.objects.create(nom="Client Test")
+    mode = ModePaiement.objects.create(nom="Espèces")
+
+    def _creer(nb_lignes):
+        vente = Vente.objects.create(client=client, mode_paiement=mode)
+        for i in range(nb_lignes):
+            LigneVente.objects.create(
+                vente=vente, produit=produit, quantite=i + 1, unite_utilisee=unite_base, prix_unitaire=15,
+            )
+        return vente
+    return _creer
+
+
+def _compter(api_client, url):
+    with CaptureQueriesContext(connection) as requetes:
+        reponse = api_client.get(url)
+    assert reponse.status_code == 200, reponse.data
+    return reponse, len(requetes)
+
+
+@pytest.mark.django_db
+def test_happy_detail_reception_lignes_et_unites(api_client, utilisateur, creer_reception, unite_conversion):
+    """[HAPPY] Le détail d'une réception expose ses lignes, leur unité et leur sous-total"""
+    reception = creer_reception(2)
+    reponse, _ = _compter(api_client, f"/api/v1/receptions/{reception.id}/")
+    lignes = reponse.data["lignes"]
+    assert len(lignes) == 2
+    assert lignes[1]["unite"]["id"] == unite_conversion.id
+    assert [ligne["sous_total"] for ligne in lignes] == [250, 500]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("suffixe", ["", "{id}/"])
+def test_perf_reception_requetes_independantes_du_panier(api_client, utilisateur, creer_reception, suffixe):
+    """[PERF] Liste et détail des réceptions : nombre de requêtes fixe (en-tête, lignes)"""
+    utilisateur.has_perm("stock.view_reception")
+    petite, grande = creer_reception(1), creer_reception(15)
+    _, peu = _compter(api_client, "/api/v1/receptions/" + suffixe.format(id=petite.id))
+    _, beaucoup = _compter(api_client, "/api/v1/receptions/" + suffixe.format(id=grande.id))
+    assert peu == beaucoup == 2
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("suffixe", ["", "{id}/"])
+def test_perf_vente_requetes_independantes_du_panier(api_client, utilisateur, creer_vente, suffixe):
+    """[PERF] Liste et détail des ventes : nombre de requêtes fixe (en-tête, lignes)"""
+    utilisateur.has_perm("stock.view_vente")
+    petite, grande = creer_vente(1), creer_vente(15)
+    reponse, peu = _compter(api_client, "/api/v1/ventes/" + suffixe.format(id=petite.id))
+    _, beaucoup = _compter(api_client, "/api/v1/ventes/" + suffixe.format(id=grande.id))
+    assert peu == beaucoup == 2
+
+
+@pytest.mark.django_db
+def test_happy_sous_total_calcule_en_sql(creer_vente):
+    """[HAPPY] Le sous-total annoté en SQL est identique au calcul Python"""
+    vente = creer_vente(3)
+    annotees = LigneVente.objects.filter(vente=vente).avec_sous_total().order_by("id")
+    assert [l.sous_total for l in annotees] == [l.quantite * l.prix_unitaire for l in vente.lignes.order_by("id")]
@@ -0,0 +1,131 @@
+import uuid
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from gestion_stock.champs import Selection
+from gestion_stock.lecture_rapide import spec_pour
+from gestion_stock.renderers import JSONRapideRenderer
+from stock.models import Client, EntreeStock, ModePaiement, Produit, Reception, SortieStock, Vente
+from stock.serializers import (
+    EntreeStockReadSerializer, ProduitReadSerializer, ReceptionReadSerializer, SortieStockReadSerializer,
+    VenteReadSerializer,
+)
+from stock.services.receptions import creer_reception
+from stock.services.ventes import creer_vente
+
+URLS = [
+    "/api/v1/ventes/",
+    "/api/v1/ventes/?expand=client,mode_paiement,lignes,created_by,updated_by",
+    "/api/v1/ventes/?fields=id,date,lignes.sous_total,lignes.produit.nom",
+    "/api/v1/ventes/?page_size=2",
+    "/api/v1/receptions/",
+    "/api/v1/receptions/?expand=fournisseur,lignes",
+    "/api/v1/entrees/",
+    "/api/v1/entrees/?expand=produit,created_by",
+    "/api/v1/sorties/",
+    "/api/v1/sorties/?expand=produit,client,unite_utilisee",
+    "/api/v1/produits/",
+    "/api/v1/produits/?expand=categorie,unite,unite_conversion&ordering=-nom",
+    "/api/v1/produits/?search=Autre",
+]
+
+
+@pytest.fixture
+def historique(produit, unite_base, unite_conversion, categorie, fournisseur, utilisateur):
+    """Documents et mouvements variés : relations nulles, choix, texte Unicode"""
+    autre = Produit.objects.create(
+        nom="Autre produit   été", reference="REF-B", categorie=categorie, unite=unite_base,
+        facteur_conversion=1, prix_unitaire=Decimal("3.50"), stock_actuel=0,
+    )
+    creer_reception(
+        [{"produit": produit, "unite_utilisee": unite_conversion, "quantite": 5, "prix_unitaire": Decimal(12)},
+         {"produit": autre, "unite_utilisee": unite_base, "quantite": 40, "prix_unitaire": Decimal("1.25")}],
+        fournisseur=fournisseur, remarque="Livraison", created_by=utilisateur,
+    )
+    client = Client.objects.create(nom="Client Test")
+    mode = ModePaiement.objects.create(nom="Espèces")
+    creer_vente(
+        [{"produit": produit, "unite_utilisee": unite_base, "quantite": 3, "prix_unitaire": Decimal(10)},
+         {"produit": autre, "unite_utilisee": unite_base, "quantite": 2, "prix_unitaire": Decimal("3.50")}],
+        client=client, mode_paiement=mode, created_by=utilisateur, updated_by=utilisateur,
+    )
+    creer_vente([{"produit": autre, "unite_utilisee": unite_base, "quantite": 1, "prix_unitaire": Decimal(4)}])
+    creer_vente([{"produit": produit, "unite_utilisee": unite_base, "quantite": 1, "prix_unitaire": Decimal(10)}],
+                remarque="Remise   spéciale")
+    EntreeStock.objects.create(produit=autre, quantite=1, unite_utilisee=unite_base, type_entree="don_recu",
+                               description="Don", created_by=utilisateur)
+    SortieStock.objects.create(produit=produit, quantite=1, unite_utilisee=unite_base, type_sortie="perte",
+                               client=client)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("url", URLS)
+def test_api_lecture_rapide_identique(api_client, historique, settings, url):
+    """[API] La lecture rapide rend exactement les mêmes octets que les serializers"""
+    rapide = api_client.get(url)
+    settings.LECTURE_RAPIDE = False
+    standard = api_client.get(url)
+    assert rapide.status_code == standard.status_code == 200
+    assert rapide.content == standard.content
+    assert rapide.json()["results"]
+
+
+@pytest.mark.django_db
+def test_api_lecture_rapide_pages_suivantes(api_client, historique, settings):
+    """[API] Les curseurs de la lecture rapide parcourent les mêmes pages"""
+    url, pages = "/api/v1/ventes/?page_size=1", []
+    while url:
+        pages.append(api_client.get(url).content)
+        url = api_client.get(url).json()["next"]
+    settings.LECTURE_RAPIDE = False
+    url, standard = "/api/v1/ventes/?page_size=1", []
+    while url:
+        standard.append(api_client.get(url).content)
+        url = api_client.get(url).json()["next"]
+    assert len(pages) == 3
+    assert pages == standard
+
+
+@pytest.mark.django_db
+def test_perf_lecture_rapide_requetes(api_client, historique, utilisateur):
+    """[PERF] Liste développée : une requête pour la page et une par relation multiple"""
+    utilisateur.has_perm("stock.view_vente")  # permissions en cache
+    with CaptureQueriesContext(connection) as requetes:
+        api_client.get("/api/v1/ventes/?expand=lignes")
+    # page + lignes (produits, catégories et unités jointes)
+    assert len(requetes) == 2
+
+
+@pytest.mark.django_db
+def test_edge_lecture_rapide_selection_invalide(api_client, historique):
+    """[EDGE] Une sélection invalide reste refusée (400)"""
+    assert api_client.get("/api/v1/ventes/?fields=inconnu").status_code == 400
+
+
+@pytest.mark.parametrize("serializer_class, model", [
+    (VenteReadSerializer, Vente), (ReceptionReadSerializer, Reception), (EntreeStockReadSerializer, EntreeStock),
+    (SortieStockReadSerializer, SortieStock), (ProduitReadSerializer, Produit),
+])
+@pytest.mark.parametrize("compact", [True, False])
+def test_happy_serializers_de_liste_pris_en_charge(serializer_class, model, compact):
+    """[HAPPY] Les serializers des listes rapides sont compilés (pas de repli silencieux)"""
+    selection = Selection(frozenset(), frozenset(), compact)
+    assert spec_pour(serializer_class, model, (), selection) is not None
+
+
+def test_edge_rendu_orjson_identique():
+    """[EDGE] JSONRapideRenderer rend les mêmes octets que JSONRenderer"""
+    donnees = {
+        "date": datetime(2024, 3, 1, 12, 30, tzinfo=dt_timezone.utc),
+        "jour": date(2024, 3, 1), "montant": Decimal("12.50"), "uuid": uuid.UUID(int=7),
+        "texte": "été     \"guillemets\"", 1: [None, True, 1.5, ()], "libelle": gettext_lazy("Vente"),
+    }
+    assert JSONRapideRenderer().render(donnees) == JSONRenderer().render(donnees)
+    assert JSONRapideRenderer().render(donnees, "application/json; indent=2") == \
+        JSONRenderer().render(donnees, "application/json; indent=2")
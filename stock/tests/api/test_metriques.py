@@ -0,0 +1,79 @@
+import logging
+
+import pytest
+from django.test import Client
+from rest_framework import serializers
+
+from gestion_stock.metriques import registre
+
+
+@pytest.fixture
+def metriques(settings):
+    settings.METRIQUES_ACTIVES = True
+    settings.METRIQUES_JETON = "jeton-test"
+    registre.reinitialiser()
+    yield registre
+    registre.reinitialiser()
+
+
+def _exposition():
+    response = Client().get("/metrics", HTTP_AUTHORIZATION="Bearer jeton-test", HTTP_X_FORWARDED_PROTO="https")
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+    return response.content.decode()
+
+
+@pytest.mark.django_db
+def test_api_metriques_par_endpoint(metriques, api_client, produit):
+    """[API] Durée, requêtes SQL, sérialisation et taille agrégées par viewset.action"""
+    assert api_client.get("/api/v1/produits/").status_code == 200
+    assert api_client.get(f"/api/v1/produits/{produit.pk}/").status_code == 200
+
+    texte = _exposition()
+    assert 'gestock_requete_duree_secondes_count{endpoint="ProduitViewSet.list",methode="GET"} 1' in texte
+    assert 'gestock_requete_sql_nombre_count{endpoint="ProduitViewSet.retrieve",methode="GET"} 1' in texte
+    assert 'gestock_requetes_total{endpoint="ProduitViewSet.list",methode="GET",statut="200"} 1' in texte
+    assert 'gestock_reponse_taille_octets_bucket{endpoint="ProduitViewSet.list",methode="GET",le="+Inf"} 1' in texte
+
+    [serie] = [serie for etiquettes, serie in metriques.sql_nombre.series.items() if etiquettes[0] == "ProduitViewSet.list"]
+    assert serie[1] >= 1
+    for endpoint in ("ProduitViewSet.list", "ProduitViewSet.retrieve"):
+        [serie] = [serie for etiquettes, serie in metriques.serialisation.series.items() if etiquettes[0] == endpoint]
+        assert serie[1] > 0
+
+
+@pytest.mark.django_db
+def test_api_metriques_serialisation_par_la_vue(metriques, api_client, produit):
+    """[API] Sérialisation chronométrée par la vue, sans modifier les classes de DRF"""
+    data = serializers.BaseSerializer.__dict__["data"]
+    response = api_client.get(f"/api/v1/produits/{produit.pk}/")
+    assert response.data["reference"] == "REF123"
+    assert serializers.BaseSerializer.__dict__["data"] is data
+    assert type(response.data.serializer).__name__ == "ProduitReadSerializer"
+
+
+@pytest.mark.django_db
+def test_api_requete_lente_journalise_les_doublons(metriques, settings, api_client, produit, caplog):
+    """[API] Requête lente : requêtes SQL répétées (N+1) dans le journal"""
+    settings.METRIQUES_SEUIL_LENTE = 0
+    with caplog.at_level(logging.WARNING, logger="gestion_stock.metriques"):
+        api_client.get("/api/v1/produits/")
+    [message] = [record.getMessage() for record in caplog.records if record.name == "gestion_stock.metriques"]
+    assert "ProduitViewSet.list" in message and "requête(s) SQL" in message
+    assert 'gestock_requetes_lentes_total{endpoint="ProduitViewSet.list",methode="GET"} 1' in _exposition()
+
+
+@pytest.mark.django_db
+def test_api_metriques_acces(metriques, settings, api_client):
+    """[API] Jeton invalide : 403 ; métriques désactivées : 404 et aucune mesure"""
+    client = Client(HTTP_X_FORWARDED_PROTO="https")
+    assert client.get("/metrics", HTTP_AUTHORIZATION="Bearer autre").status_code == 403
+
+    settings.METRIQUES_ACTIVES = False
+    registre.reinitialiser()
+    api_client.get("/api/v1/produits/")
+    # Nouveau client : middlewares rechargés avec le réglage désactivé
+    assert Client(HTTP_X_FORWARDED_PROTO="https").get(
+        "/metrics", HTTP_AUTHORIZATION="Bearer jeton-test",
+    ).status_code == 404
+    assert not registre.duree.series
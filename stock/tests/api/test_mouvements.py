@@ -0,0 +1,131 @@
+from decimal import Decimal
+
+import pytest
+
+from stock.models import EntreeStock, Produit, SortieStock
+from stock.services.receptions import creer_reception
+from stock.services.ventes import creer_vente
+
+
+@pytest.mark.django_db
+def test_api_entree_incremente_une_seule_fois(api_client, produit, unite_base, fournisseur):
+    """[API] La création d'une entrée via l'API n'incrémente le stock qu'une fois"""
+    response = api_client.post("/api/v1/entrees/", {
+        "produit": produit.pk, "quantite": 4, "unite_utilisee": unite_base.pk,
+        "fournisseur": fournisseur.pk, "type_entree": "achat",
+    }, format="json")
+    assert response.status_code == 201, response.data
+    produit.refresh_from_db()
+    assert produit.stock_actuel == 4
+
+
+@pytest.mark.django_db
+def test_api_sortie_stock_insuffisant(api_client, produit, unite_base):
+    """[API] Une sortie sans stock renvoie 400 et n'est pas enregistrée"""
+    response = api_client.post("/api/v1/sorties/", {
+        "produit": produit.pk, "quantite": 1, "unite_utilisee": unite_base.pk, "type_sortie": "perte",
+    }, format="json")
+    assert response.status_code == 400
+    assert not SortieStock.objects.exists()
+
+
+@pytest.fixture
+def vendu(produit, unite_base):
+    """Stock de 100, puis une vente de 10 (sortie miroir)"""
+    Produit.objects.filter(pk=produit.pk).update(stock_actuel=100)
+    vente = creer_vente([{"produit": produit, "unite_utilisee": unite_base, "quantite": 10,
+                          "prix_unitaire": Decimal(10)}])
+    return SortieStock.objects.get(vente=vente)
+
+
+@pytest.mark.django_db
+def test_edge_sortie_miroir_lecture_seule(api_client, produit, vendu):
+    """[EDGE] La sortie miroir d'une vente ne peut être ni supprimée ni modifiée par l'API"""
+    assert api_client.delete(f"/api/v1/sorties/{vendu.pk}/").status_code == 400
+    assert api_client.patch(f"/api/v1/sorties/{vendu.pk}/", {"quantite": 1}, format="json").status_code == 400
+    vendu.refresh_from_db()
+    assert vendu.is_active and vendu.quantite == 10
+    produit.refresh_from_db()
+    assert produit.stock_actuel == 90
+
+
+@pytest.mark.django_db
+def test_edge_sortie_miroir_sans_effet_sur_le_stock(produit, vendu):
+    """[EDGE] save() et delete() d'une sortie miroir ne touchent pas au stock"""
+    vendu.description = "Corrigée"
+    vendu.save()
+    vendu.delete()
+    produit.refresh_from_db()
+    assert produit.stock_actuel == 90
+
+
+@pytest.fixture
+def recu(produit, unite_base, fournisseur):
+    """Stock de 100, puis une réception de 5 (entrée miroir)"""
+    Produit.objects.filter(pk=produit.pk).update(stock_actuel=100)
+    reception = creer_reception([{"produit": produit, "unite_utilisee": unite_base, "quantite": 5,
+                                  "prix_unitaire": Decimal(10)}], fournisseur=fournisseur)
+    return EntreeStock.objects.get(reception=reception)
+
+
+@pytest.mark.django_db
+def test_edge_entree_miroir_lecture_seule(api_client, produit, recu):
+    """[EDGE] L'entrée miroir d'une réception ne peut être ni modifiée ni supprimée par l'API"""
+    assert api_client.patch(f"/api/v1/entrees/{recu.pk}/", {"quantite": 50}, format="json").status_code == 400
+    assert api_client.delete(f"/api/v1/entrees/{recu.pk}/").status_code == 400
+    recu.refresh_from_db()
+    assert recu.is_active and recu.quantite == 5
+    produit.refresh_from_db()
+    assert produit.stock_actuel == 105
+
+
+@pytest.mark.django_db
+def test_edge_entree_miroir_sans_effet_sur_le_stock(produit, recu):
+    """[EDGE] save() et delete() d'une entrée miroir ne touchent pas au stock"""
+    recu.quantite = 50
+    recu.save()
+    recu.delete()
+    produit.refresh_from_db()
+    assert produit.stock_actuel == 105
+
+
+@pytest.mark.django_db
+def test_api_suppression_entree_deja_consommee(api_client, produit, unite_base, fournisseur):
+    """[API] Supprimer une entrée dont le stock a été vendu renvoie 400 sans toucher au stock"""
+    entree = EntreeStock.objects.create(produit=produit, quantite=10, unite_utilisee=unite_base,
+                                        fournisseur=fournisseur, type_entree="achat")
+    creer_vente([{"produit": produit, "unite_utilisee": unite_base, "quantite": 8,
+                  "prix_unitaire": Decimal(10)}])
+    assert api_client.delete(f"/api/v1/entrees/{entree.pk}/").status_code == 400
+    entree.refresh_from_db()
+    assert entree.is_active
+    produit.refresh_from_db()
+    assert produit.stock_actuel == 2
+
+
+@pytest.mark.django_db
+def test_api_ligne_reception_reduite_sous_le_stock_vendu(api_client, produit, unite_base, fournisseur):
+    """[API] Réduire une ligne de réception déjà vendue renvoie 400 sans toucher au stock"""
+    reception = creer_reception([{"produit": produit, "unite_utilisee": unite_base, "quantite": 10,
+                                  "prix_unitaire": Decimal(10)}], fournisseur=fournisseur)
+    creer_vente([{"produit": produit, "unite_utilisee": unite_base, "quantite": 8,
+                  "prix_unitaire": Decimal(10)}])
+    ligne = reception.lignes_reception.get()
+    response = api_client.patch(f"/api/v1/ligne-receptions/{ligne.pk}/", {"quantite": 1}, format="json")
+    assert response.status_code == 400
+    ligne.refresh_from_db()
+    assert ligne.quantite == 10
+    produit.refresh_from_db()
+    assert produit.stock_actuel == 2
+
+
+@pytest.mark.django_db
+def test_api_ligne_vente_augmentee_au_dela_du_stock(api_client, produit, vendu):
+    """[API] Augmenter une ligne de vente au-delà du stock renvoie 400 sans toucher au stock"""
+    ligne = vendu.vente.lignes.get()
+    response = api_client.patch(f"/api/v1/ligne-ventes/{ligne.pk}/", {"quantite": 500}, format="json")
+    assert response.status_code == 400
+    ligne.refresh_from_db()
+    assert ligne.quantite == 10
+    produit.refresh_from_db()
+    assert produit.stock_actuel == 90
@@ -0,0 +1,65 @@
+import pytest
+from django.contrib.auth.models import Permission
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from stock.models import EntreeStock, SortieStock, Vente, LigneVente, Produit
+
+
+def _compter(api_client, url):
+    with CaptureQueriesContext(connection) as requetes:
+        reponse = api_client.get(url)
+    assert reponse.status_code == 200, reponse.data
+    return len(requetes)
+
+
+@pytest.fixture
+def peupler(produit, unite_base, fournisseur, utilisateur):
+    """Crée `n` lignes de chaque type, tracées par l'utilisateur de test."""
+    Produit.objects.filter(pk=produit.pk).update(stock_actuel=10_000)
+
+    def _peupler(n):
+        for _ in range(n):
+            EntreeStock.objects.create(
+                produit=produit, quantite=1, unite_utilisee=unite_base, type_entree="achat",
+                fournisseur=fournisseur, created_by=utilisateur, updated_by=utilisateur,
+            )
+            SortieStock.objects.create(
+                produit=produit, quantite=1, unite_utilisee=unite_base, type_sortie="perte",
+                created_by=utilisateur, updated_by=utilisateur,
+            )
+            vente = Vente.objects.create(created_by=utilisateur, updated_by=utilisateur)
+            LigneVente.objects.create(
+                vente=vente, produit=produit, quantite=1, unite_utilisee=unite_base, prix_unitaire=10,
+            )
+    return _peupler
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("url, attendu", [
+    # Listes compactes : page (relations jointes)
+    ("/api/v1/entrees/", 1),
+    ("/api/v1/sorties/", 1),
+    # page + lignes
+    ("/api/v1/ventes/", 2),
+    # count + page
+    ("/api/v1/produits/", 2),
+    # count + page + rôles
+    ("/api/v1/accounts/users/", 3),
+    # Relations développées : page + created_by/updated_by -> rôles -> permissions, interfaces
+    ("/api/v1/entrees/?expand=produit,created_by,updated_by", 7),
+    ("/api/v1/sorties/?expand=produit,created_by,updated_by", 7),
+    # page + lignes + created_by/updated_by -> rôles -> permissions, interfaces
+    ("/api/v1/ventes/?expand=lignes,created_by,updated_by", 8),
+    # count + page + rôles -> permissions, interfaces
+    ("/api/v1/accounts/users/?expand=roles", 5),
+])
+def test_perf_nombre_requetes_independant_du_volume(api_client, utilisateur, peupler, url, attendu):
+    """[PERF] Le nombre de requêtes d'une liste ne dépend pas du nombre de lignes"""
+    utilisateur.user_permissions.add(Permission.objects.get(codename="view_user"))
+    utilisateur.has_perm("stock.view_produit")  # permissions en cache
+    peupler(1)
+    peu = _compter(api_client, url)
+    peupler(6)
+    beaucoup = _compter(api_client, url)
+    assert peu == beaucoup == attendu
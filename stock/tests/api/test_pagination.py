@@ -0,0 +1,109 @@
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from stock.models import EntreeStock, Categorie, LigneReception, LigneVente, Produit, Vente
+from stock.services.receptions import creer_reception
+from stock.services.ventes import creer_vente
+
+
+def _parcourir(api_client, url):
+    """Suit les liens `next` et retourne les ids dans l'ordre des pages."""
+    ids, pages = [], 0
+    while url:
+        reponse = api_client.get(url)
+        assert reponse.status_code == 200
+        ids += [ligne["id"] for ligne in reponse.data["results"]]
+        url = reponse.data["next"]
+        pages += 1
+    return ids, pages
+
+
+@pytest.fixture
+def entrees(produit, unite_base):
+    return [
+        EntreeStock.objects.create(produit=produit, quantite=1, unite_utilisee=unite_base, type_entree="don_recu")
+        for _ in range(5)
+    ]
+
+
+@pytest.mark.django_db
+def test_happy_pagination_curseur_entrees(api_client, entrees):
+    """[HAPPY] Les entrées sont paginées par (date, id) décroissants sans doublon"""
+    ids, pages = _parcourir(api_client, "/api/v1/entrees/?page_size=2")
+    attendus = list(EntreeStock.objects.order_by("-date", "-id").values_list("id", flat=True))
+    assert ids == attendus
+    assert pages == 3
+
+
+@pytest.mark.django_db
+def test_edge_pagination_curseur_dates_identiques(api_client, entrees):
+    """[EDGE] Des dates égales sont départagées par l'id"""
+    EntreeStock.objects.update(date=timezone.now())
+    ids, _ = _parcourir(api_client, "/api/v1/entrees/?page_size=2")
+    assert ids == sorted((e.id for e in entrees), reverse=True)
+
+
+@pytest.mark.django_db
+def test_happy_pagination_curseur_page_precedente(api_client, entrees):
+    """[HAPPY] Le lien `previous` ramène exactement à la page précédente"""
+    premiere = api_client.get("/api/v1/entrees/?page_size=2").data
+    assert premiere["previous"] is None
+    seconde = api_client.get(premiere["next"]).data
+    retour = api_client.get(seconde["previous"]).data
+    assert [l["id"] for l in retour["results"]] == [l["id"] for l in premiere["results"]]
+    assert retour["previous"] is None
+
+
+@pytest.mark.django_db
+def test_edge_pagination_curseur_invalide(api_client, entrees):
+    """[EDGE] Un curseur illisible renvoie une 404"""
+    assert api_client.get("/api/v1/entrees/?cursor=nimportequoi").status_code == 404
+
+
+@pytest.mark.django_db
+def test_edge_pagination_taille_plafonnee(api_client, entrees, settings):
+    """[EDGE] page_size est plafonné par PAGINATION_MAX_PAGE_SIZE"""
+    from gestion_stock.pagination import DateCursorPagination
+    ancien = DateCursorPagination.max_page_size
+    DateCursorPagination.max_page_size = 3
+    try:
+        reponse = api_client.get("/api/v1/entrees/?page_size=1000")
+    finally:
+        DateCursorPagination.max_page_size = ancien
+    assert len(reponse.data["results"]) == 3
+
+
+@pytest.mark.django_db
+def test_happy_pagination_numero_page_references(api_client):
+    """[HAPPY] Les tables de référence utilisent une pagination par numéro de page"""
+    Categorie.objects.bulk_create(Categorie(nom=f"Cat {i}") for i in range(3))
+    reponse = api_client.get("/api/v1/categories/?page_size=2")
+    assert reponse.data["count"] == 3
+    assert len(reponse.data["results"]) == 2
+    assert reponse.data["next"] is not None
+
+
+@pytest.mark.django_db
+def test_perf_pagination_curseur_lignes(api_client, produit, unite_base, fournisseur, utilisateur):
+    """[PERF] Lignes de vente et de réception paginées par date du document, sans COUNT(*)"""
+    Produit.objects.filter(pk=produit.pk).update(stock_actuel=100)
+    ligne = {"produit": produit, "unite_utilisee": unite_base, "quantite": 1, "prix_unitaire": Decimal(10)}
+    for _ in range(3):
+        creer_vente([ligne, dict(ligne)])
+        creer_reception([ligne], fournisseur=fournisseur)
+    Vente.objects.filter(pk=Vente.objects.order_by("id").first().pk).update(date=timezone.now())
+
+    ids, pages = _parcourir(api_client, "/api/v1/ligne-ventes/?page_size=4")
+    assert ids == list(LigneVente.objects.order_by("-vente__date", "-id").values_list("id", flat=True))
+    assert pages == 2
+    ids, _ = _parcourir(api_client, "/api/v1/ligne-receptions/?page_size=2")
+    assert ids == list(LigneReception.objects.order_by("-reception__date", "-id").values_list("id", flat=True))
+
+    utilisateur.has_perm("stock.view_lignevente")  # permissions en cache
+    with CaptureQueriesContext(connection) as requetes:
+        api_client.get("/api/v1/ligne-ventes/?page_size=4")
+    assert not any("COUNT(" in requete["sql"].upper() for requete in requetes.captured_queries)
@@ -0,0 +1,79 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.utils import timezone
+
+from stock.models import ModePaiement, Produit
+from stock.services.ventes import creer_vente
+
+
+@pytest.mark.django_db
+def test_api_rapport_ventes(api_client, produit, unite_base, utilisateur):
+    """[API] /rapports/ventes/ : chiffre d'affaires par vendeur sur une période"""
+    Produit.objects.filter(pk=produit.pk).update(stock_actuel=100)
+    for jours in (0, 2):
+        creer_vente(
+            [{"produit": produit, "unite_utilisee": unite_base, "quantite": 2, "prix_unitaire": Decimal("7.50")}],
+            date=timezone.now() - timedelta(days=jours), created_by=utilisateur,
+        )
+
+    aujourd_hui = timezone.localdate()
+    response = api_client.get("/api/v1/rapports/ventes/", {
+        "debut": (aujourd_hui - timedelta(days=7)).isoformat(), "fin": aujourd_hui.isoformat(), "par": "vendeur",
+    })
+    assert response.status_code == 200
+    assert response.data["chiffre_affaires"] == "30.00"
+    assert response.data["results"] == [{
+        "cle": str(utilisateur.pk), "libelle": utilisateur.username, "quantite": 4,
+        "chiffre_affaires": "30.00", "lignes": 2,
+    }]
+
+
+@pytest.mark.django_db
+def test_api_rapport_ventes_periode_par_defaut(api_client):
+    """[API] Sans paramètre : du début du mois à aujourd'hui, par jour"""
+    response = api_client.get("/api/v1/rapports/ventes/")
+    assert response.status_code == 200
+    assert response.json()["debut"] == timezone.localdate().replace(day=1).isoformat()
+    assert response.data["par"] == "jour"
+    assert response.data["results"] == []
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("parametres", [{"par": "client"}, {"debut": "2024-03-01", "fin": "2024-02-01"}])
+def test_api_rapport_ventes_parametres_invalides(api_client, parametres):
+    """[API] Axe inconnu ou période inversée : 400"""
+    assert api_client.get("/api/v1/rapports/ventes/", parametres).status_code == 400
+
+
+@pytest.mark.django_db
+def test_api_rapport_ventes_permission(api_client, utilisateur):
+    """[API] Sans la permission de consultation des rapports : 403"""
+    utilisateur.roles.first().permissions.remove(
+        *utilisateur.roles.first().permissions.filter(codename="view_ventejournaliere")
+    )
+    assert api_client.get("/api/v1/rapports/ventes/").status_code == 403
+
+
+@pytest.mark.django_db
+def test_api_modification_mode_paiement_reportee(api_client, produit, unite_base, utilisateur):
+    """[API] PATCH du mode de paiement d'une vente : le rapport par mode suit, les lignes restent en lecture seule"""
+    Produit.objects.filter(pk=produit.pk).update(stock_actuel=100)
+    especes, mobile = ModePaiement.objects.create(nom="Espèces"), ModePaiement.objects.create(nom="Mobile")
+    hier = timezone.localdate() - timedelta(days=1)
+    vente = creer_vente(
+        [{"produit": produit, "unite_utilisee": unite_base, "quantite": 2, "prix_unitaire": Decimal("7.50")}],
+        date=timezone.now() - timedelta(days=1), mode_paiement=especes, created_by=utilisateur,
+    )
+
+    assert api_client.patch(f"/api/v1/ventes/{vente.pk}/", {"mode_paiement": mobile.pk}).status_code == 200
+    response = api_client.get("/api/v1/rapports/ventes/", {
+        "debut": hier.isoformat(), "fin": hier.isoformat(), "par": "mode_paiement",
+    })
+    assert [(ligne["libelle"], ligne["chiffre_affaires"]) for ligne in response.data["results"]] == [("Mobile", "15.00")]
+
+    lignes = [{"produit": produit.pk, "unite_utilisee": unite_base.pk, "quantite": 1, "prix_unitaire": "1.00"}]
+    response = api_client.patch(f"/api/v1/ventes/{vente.pk}/", {"lignes": lignes}, format="json")
+    assert response.status_code == 400
+    assert "lignes" in response.data
@@ -0,0 +1,32 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.utils import timezone
+
+from stock.models import Produit
+from stock.services.ventes import creer_vente
+
+
+@pytest.mark.django_db
+def test_api_reapprovisionnement(api_client, produit, unite_base):
+    """[API] /reapprovisionnement/ : suggestions regroupées par fournisseur"""
+    Produit.objects.filter(pk=produit.pk).update(stock_actuel=10)
+    creer_vente([{"produit": produit, "unite_utilisee": unite_base, "quantite": 10, "prix_unitaire": Decimal("1")}],
+                date=timezone.now() - timedelta(days=1))
+
+    response = api_client.get("/api/v1/reapprovisionnement/", {"jours": 10, "delai": 0, "cycle": 10})
+    assert response.status_code == 200
+    [commande] = response.data["results"]
+    assert (commande["fournisseur_id"], commande["montant"]) == (None, 0)
+    [ligne] = commande["lignes"]
+    assert (ligne["reference"], ligne["demande_journaliere"], ligne["jours_de_couverture"]) == ("REF123", 1.0, 0.0)
+    assert ligne["quantite"] > 10
+
+
+@pytest.mark.django_db
+def test_api_reapprovisionnement_parametres_invalides(api_client):
+    """[API] Taux de service hors bornes : 400"""
+    response = api_client.get("/api/v1/reapprovisionnement/", {"taux_service": 1.5})
+    assert response.status_code == 400
+    assert "taux_service" in response.data
@@ -0,0 +1,40 @@
+import pytest
+
+
+@pytest.mark.django_db
+def test_api_recherche_produit_compacte(api_client, produit):
+    """[API] Charge utile réduite et mode appliqué"""
+    response = api_client.get("/api/v1/produits/recherche/", {"q": "REF123"})
+    assert response.status_code == 200
+    assert response.data["mode"] == "exact"
+    assert response.data["results"] == [{
+        "id": produit.pk, "reference": "REF123", "nom": "Produit Test",
+        "prix_unitaire": "10.00", "stock_actuel": 0, "unite": produit.unite_id,
+    }]
+
+
+@pytest.mark.django_db
+def test_api_recherche_produit_parametres(api_client, produit):
+    """[API] q obligatoire, mode et limite contrôlés"""
+    assert api_client.get("/api/v1/produits/recherche/").status_code == 400
+    assert api_client.get("/api/v1/produits/recherche/", {"q": "x", "mode": "autre"}).status_code == 400
+    assert api_client.get("/api/v1/produits/recherche/", {"q": "x", "limit": 1000}).status_code == 400
+
+    response = api_client.get("/api/v1/produits/recherche/", {"q": "produit", "mode": "prefixe", "limit": 1})
+    assert [p["id"] for p in response.data["results"]] == [produit.pk]
+
+
+@pytest.mark.django_db
+def test_api_liste_produits_recherche_par_sous_chaine(api_client, produit):
+    """[API] ?search= de la liste : sous-chaîne de la référence ou du nom, sans tenir compte de la casse"""
+    assert api_client.get("/api/v1/produits/", {"search": "REF1"}).data["count"] == 1
+    assert api_client.get("/api/v1/produits/", {"search": "ef12"}).data["count"] == 1
+    assert api_client.get("/api/v1/produits/", {"search": "uit tes"}).data["count"] == 1
+    assert api_client.get("/api/v1/produits/", {"search": "REF9"}).data["count"] == 0
+
+
+@pytest.mark.django_db
+def test_api_liste_produits_recherche_par_categorie(api_client, produit):
+    """[API] ?search= de la liste : nom de la catégorie (sous-chaîne)"""
+    assert api_client.get("/api/v1/produits/", {"search": "gorie te"}).data["count"] == 1
+    assert api_client.get("/api/v1/produits/", {"search": "Boissons"}).data["count"] == 0
@@ -0,0 +1,30 @@
+import pytest
+
+from stock.models import Produit
+
+
+@pytest.mark.django_db
+def test_api_reconciliation(api_client, produit):
+    """[API] POST lance la réconciliation, GET liste les points"""
+    Produit.objects.filter(pk=produit.pk).update(stock_actuel=12)
+
+    response = api_client.post("/api/v1/reconciliations/", {"corriger": True}, format="json")
+    assert response.status_code == 201
+    assert response.data["point"]["ecarts"] == 1
+    assert response.data["ecarts"][0]["ecart"] == -12
+    produit.refresh_from_db()
+    assert produit.stock_actuel == 0
+
+    response = api_client.get("/api/v1/reconciliations/")
+    assert response.status_code == 200
+    assert response.data["count"] == 1
+
+
+@pytest.mark.django_db
+def test_api_reconciliation_permission(api_client, utilisateur):
+    """[API] Sans la permission d'ajout, la réconciliation est refusée"""
+    utilisateur.roles.first().permissions.remove(
+        *utilisateur.roles.first().permissions.filter(codename="add_pointreconciliation")
+    )
+    response = api_client.post("/api/v1/reconciliations/", {}, format="json")
+    assert response.status_code == 403
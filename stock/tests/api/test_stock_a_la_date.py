@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from stock.models import JournalStock
+
+
+@pytest.mark.django_db
+def test_api_stock_a_la_date(api_client, produit):
+    """[API] /produits/{id}/stock-at/?date= renvoie le stock d'après le journal"""
+    hier = timezone.now() - timedelta(days=1)
+    JournalStock.objects.create(produit=produit, delta=12, date=hier - timedelta(days=1), source_type="ajustement")
+    JournalStock.objects.create(produit=produit, delta=-5, date=hier + timedelta(hours=2), source_type="ajustement")
+
+    response = api_client.get(f"/api/v1/produits/{produit.pk}/stock-at/", {"date": hier.isoformat()})
+    assert response.status_code == 200
+    assert response.data["stock"] == 12
+    assert response.data["produit"] == produit.pk
+
+    response = api_client.get(f"/api/v1/produits/{produit.pk}/stock-at/", {"date": timezone.now().date().isoformat()})
+    assert response.data["stock"] == 7
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("parametres", [{}, {"date": "pas-une-date"}, {"date": "2024-02-30"}])
+def test_api_stock_a_la_date_invalide(api_client, produit, parametres):
+    """[API] Date absente ou invalide : 400"""
+    response = api_client.get(f"/api/v1/produits/{produit.pk}/stock-at/", parametres)
+    assert response.status_code == 400
+    assert "date" in response.data
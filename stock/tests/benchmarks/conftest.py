@@ -0,0 +1,135 @@
+"""
+Bancs de performance (marqueur `benchmark`, exclus de la suite par défaut) :
+
+    pytest -m benchmark
+
+Chaque banc mesure un parcours sur le jeu d'essai de l'échelle `test`
+(stock/services/jeu_essai.py, graine fixe) : durée médiane, nombre de
+requêtes SQL et pic mémoire (tracemalloc), comparés à reference.json.
+Le banc échoue si le nombre de requêtes dépasse la référence : cette mesure
+ne dépend pas de la machine. Durée et mémoire ne font échouer qu'au-delà de
+BENCHMARK_TOLERANCE (0.5 = +50 %) ET d'une marge absolue (BENCHMARK_MARGE_MS,
+10 ms par défaut ; BENCHMARK_MARGE_KO, 256 Ko) : d'une machine à l'autre,
+une durée de quelques millisecondes peut doubler sans régression du code.
+BENCHMARK_ENREGISTRER=1 réécrit la référence avec les mesures (à faire sur
+la machine de référence, après une amélioration ou un changement voulu).
+"""
+import json
+import os
+import statistics
+import time
+import tracemalloc
+from collections import namedtuple
+from pathlib import Path
+
+import pytest
+from django.db import connection, transaction
+
+from stock.services.jeu_essai import generer_jeu_essai
+
+REFERENCE = Path(__file__).with_name('reference.json')
+TOLERANCE = float(os.environ.get('BENCHMARK_TOLERANCE', '0.5'))
+ENREGISTRER = os.environ.get('BENCHMARK_ENREGISTRER') == '1'
+# Marges absolues : les mesures courtes dépendent surtout de la machine et du bruit
+MARGE_MS = float(os.environ.get('BENCHMARK_MARGE_MS', '10'))
+MARGE_KO = int(os.environ.get('BENCHMARK_MARGE_KO', '256'))
+
+Mesure = namedtuple('Mesure', ['nom', 'duree_ms', 'requetes', 'memoire_ko'])
+
+_mesures = {}
+
+
+def _reference():
+    return json.loads(REFERENCE.read_text()) if REFERENCE.exists() else {}
+
+
+def _regressions(mesure, reference):
+    if reference is None:
+        return ["pas de référence (relancer avec BENCHMARK_ENREGISTRER=1)"]
+    regressions = []
+    if mesure.requetes > reference['requetes']:
+        regressions.append(f"requêtes SQL : {mesure.requetes} > {reference['requetes']}")
+    # Tolérance relative et marge absolue dépassées toutes les deux
+    limite = max(reference['duree_ms'] * (1 + TOLERANCE), reference['duree_ms'] + MARGE_MS)
+    if mesure.duree_ms > limite:
+        regressions.append(f"durée : {mesure.duree_ms:.2f} ms > {limite:.2f} ms (référence {reference['duree_ms']} ms)")
+    limite = max(reference['memoire_ko'] * (1 + TOLERANCE), reference['memoire_ko'] + MARGE_KO)
+    if mesure.memoire_ko > limite:
+        regressions.append(f"mémoire : {mesure.memoire_ko} Ko > {limite:.0f} Ko (référence {reference['memoire_ko']} Ko)")
+    return regressions
+
+
+@pytest.fixture(scope='session')
+def jeu_essai(django_db_setup, django_db_blocker):
+    """Jeu d'essai de l'échelle `test`, généré une fois et annulé en fin de session."""
+    with django_db_blocker.unblock():
+        with transaction.atomic():
+            resume = generer_jeu_essai('test', graine=0)
+            yield resume
+            transaction.set_rollback(True)
+
+
+@pytest.fixture
+def mesurer(db, jeu_essai):
+    """
+    mesurer(nom, fonction, repetitions=5, preparer=None) : un tour d'échauffement,
+    puis `repetitions` tours chronométrés (médiane), un tour compté (requêtes SQL)
+    et un tour sous tracemalloc (pic mémoire). `preparer()`, hors mesure, fournit
+    l'argument de `fonction` à chaque tour. Échoue en cas de régression.
+    """
+    def _mesurer(nom, fonction, repetitions=5, preparer=None):
+        def tour():
+            argument = preparer() if preparer else None
+            debut = time.perf_counter()
+            fonction(argument) if preparer else fonction()
+            return time.perf_counter() - debut
+
+        tour()
+        durees = [tour() for _ in range(repetitions)]
+
+        # Compteur par execute_wrapper : le client de test vide connection.queries à chaque requête HTTP
+        requetes = []
+        argument = preparer() if preparer else None
+        with connection.execute_wrapper(lambda execute, sql, *args: requetes.append(sql) or execute(sql, *args)):
+            fonction(argument) if preparer else fonction()
+
+        argument = preparer() if preparer else None
+        tracemalloc.start()
+        try:
+            fonction(argument) if preparer else fonction()
+            _, pic = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        mesure = Mesure(nom, round(statistics.median(durees) * 1000, 2), len(requetes), round(pic / 1024))
+        _mesures[nom] = mesure
+        if not ENREGISTRER:
+            regressions = _regressions(mesure, _reference().get(nom))
+            if regressions:
+                pytest.fail(f"Régression de performance [{nom}] : " + ' ; '.join(regressions), pytrace=False)
+        return mesure
+
+    return _mesurer
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if ENREGISTRER and _mesures:
+        reference = _reference()
+        reference.update({nom: mesure._asdict() for nom, mesure in _mesures.items()})
+        for valeurs in reference.values():
+            valeurs.pop('nom', None)
+        REFERENCE.write_text(json.dumps(reference, indent=2, sort_keys=True, ensure_ascii=False) + '\n')
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _mesures:
+        return
+    reference = _reference()
+    terminalreporter.section('bancs de performance')
+    terminalreporter.write_line(f"{'banc':<32} {'durée (ms)':>12} {'requêtes':>9} {'mémoire (Ko)':>13}   référence")
+    for nom, mesure in sorted(_mesures.items()):
+        ref = reference.get(nom)
+        rappel = f"{ref['duree_ms']} ms, {ref['requetes']} req., {ref['memoire_ko']} Ko" if ref else '-'
+        terminalreporter.write_line(
+            f"{nom:<32} {mesure.duree_ms:>12.2f} {mesure.requetes:>9} {mesure.memoire_ko:>13}   {rappel}"
+        )
@@ -0,0 +1,114 @@
+import pytest
+from django.core.cache import cache
+
+from stock.models import Client, Fournisseur, ModePaiement, Produit, UniteDeMesure, Vente
+from stock.serializers.reception import ReceptionWriteSerializer
+from stock.serializers.vente import VenteWriteSerializer
+from stock.services.jeu_essai import PREFIXE
+from stock.services.totaux import recalculer_totaux
+from stock.services.ventes import creer_vente
+from users.models import User
+
+pytestmark = pytest.mark.benchmark
+
+LIGNES = 10
+
+
+@pytest.fixture
+def lignes(jeu_essai):
+    unite = UniteDeMesure.objects.get(nom=f'{PREFIXE}pièce')
+    produits = Produit.objects.filter(reference__startswith=PREFIXE).order_by('id')[:LIGNES]
+    return [
+        {'produit': produit.pk, 'unite_utilisee': unite.pk, 'quantite': 1, 'prix_unitaire': produit.prix_unitaire}
+        for produit in produits
+    ]
+
+
+def test_bench_creation_vente(mesurer, lignes):
+    """[PERF] Vente de 10 lignes par VenteWriteSerializer"""
+    donnees = {
+        'client': Client.objects.filter(nom__startswith=PREFIXE).first().pk,
+        'mode_paiement': ModePaiement.objects.filter(nom__startswith=PREFIXE).first().pk,
+        'lignes': lignes,
+    }
+
+    def creer():
+        serializer = VenteWriteSerializer(data=donnees)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+    mesurer('creation_vente', creer)
+
+
+def test_bench_creation_reception(mesurer, lignes):
+    """[PERF] Réception de 10 lignes par ReceptionWriteSerializer"""
+    donnees = {'fournisseur': Fournisseur.objects.filter(nom__startswith=PREFIXE).first().pk, 'lignes': lignes}
+
+    def creer():
+        serializer = ReceptionWriteSerializer(data=donnees)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+    mesurer('creation_reception', creer)
+
+
+@pytest.mark.parametrize('liste', ['ventes', 'receptions', 'produits', 'sorties'])
+def test_bench_liste(mesurer, api_client, liste):
+    """[PERF] Première page d'une liste"""
+    def lister():
+        reponse = api_client.get(f'/api/v1/{liste}/')
+        assert reponse.status_code == 200
+
+    mesurer(f'liste_{liste}', lister)
+
+
+def test_bench_revalidation_produits(mesurer, api_client):
+    """[PERF] Liste des produits revalidée par If-None-Match (304)"""
+    etag = api_client.get('/api/v1/produits/')['ETag']
+
+    def revalider():
+        reponse = api_client.get('/api/v1/produits/', HTTP_IF_NONE_MATCH=etag)
+        assert reponse.status_code == 304
+
+    mesurer('revalidation_produits', revalider)
+
+
+def test_bench_cache_reponses_categories(mesurer, api_client):
+    """[PERF] Liste des catégories servie par le cache des réponses"""
+    def lister():
+        reponse = api_client.get('/api/v1/categories/')
+        assert reponse.status_code == 200
+
+    mesurer('cache_reponses_categories', lister)
+
+
+def test_bench_has_perm_cache_vide(mesurer, jeu_essai):
+    """[PERF] has_perm sans permissions en cache (une requête jointe)"""
+    pk = User.objects.get(username=f'{PREFIXE.lower()}2').pk
+
+    def preparer():
+        cache.clear()
+        return User.objects.get(pk=pk)
+
+    mesurer('has_perm_cache_vide', lambda utilisateur: utilisateur.has_perm('stock.view_produit'), preparer=preparer)
+
+
+def test_bench_has_perm_cache(mesurer, jeu_essai):
+    """[PERF] has_perm avec les permissions en cache, sur un nouvel objet utilisateur"""
+    pk = User.objects.get(username=f'{PREFIXE.lower()}2').pk
+    User.objects.get(pk=pk).has_perm('stock.view_produit')
+
+    mesurer(
+        'has_perm_cache', lambda utilisateur: utilisateur.has_perm('stock.view_produit'),
+        repetitions=50, preparer=lambda: User.objects.get(pk=pk),
+    )
+
+
+def test_bench_annulation_vente(mesurer, lignes):
+    """[PERF] soft_delete d'une vente de 10 lignes"""
+    mesurer('annulation_vente', lambda vente: vente.soft_delete(), preparer=lambda: creer_vente(lignes))
+
+
+def test_bench_recalcul_totaux(mesurer, jeu_essai):
+    """[PERF] Recalcul des totaux de toutes les ventes"""
+    mesurer('recalcul_totaux_ventes', lambda: recalculer_totaux(Vente.objects.all()))
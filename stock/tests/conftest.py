@@ -1,8 +1,20 @@
 import pytest
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from rest_framework.test import APIClient
 
 from stock.models import Categorie, UniteDeMesure, Produit, Fournisseur
+from users.models import Role, User
 
 
+@pytest.fixture(autouse=True)
+def vider_cache(settings):
+    # Un seul processus : le cache mémoire est vu de toutes les requêtes des tests
+    settings.CACHE_PARTAGE = True
+    cache.clear()
+    yield
+    cache.clear()
+
 @pytest.fixture
 def categorie(db):
     return Categorie.objects.create(nom="Catégorie Test")
@@ -30,4 +42,19 @@ def produit(db, categorie, unite_base, unite_conversion):
 
 @pytest.fixture
 def fournisseur(db):
-    return Fournisseur.objects.create(nom="Fournisseur Test")
\ No newline at end of file
+    return Fournisseur.objects.create(nom="Fournisseur Test")
+
+@pytest.fixture
+def utilisateur(db):
+    role = Role.objects.create(nom="Gérant")
+    role.permissions.set(Permission.objects.filter(content_type__app_label="stock"))
+    user = User.objects.create_user(username="gerant", password="secret")
+    user.roles.add(role)
+    return user
+
+@pytest.fixture
+def api_client(utilisateur):
+    # SECURE_SSL_REDIRECT est actif hors DEBUG : on simule un proxy HTTPS
+    client = APIClient(HTTP_X_FORWARDED_PROTO="https")
+    client.force_authenticate(user=utilisateur)
+    return client
@@ -0,0 +1,81 @@
+import pytest
+from django.db import IntegrityError, transaction
+
+from stock.models import AlerteStock, Produit
+from stock.services.alertes import produits_en_alerte, synchroniser_alertes
+from stock.services.stock import ajuster_stock, ajuster_stocks
+
+
+@pytest.fixture
+def approvisionne(produit):
+    ajuster_stock(produit.pk, 10)
+    # Historique vierge (l'alerte ouverte à la création, stock nul, vient d'être fermée)
+    AlerteStock.objects.all().delete()
+    return produit
+
+
+def _alertes(produit):
+    return list(AlerteStock.objects.filter(produit=produit).order_by("id").values_list("stock", "seuil", "fin"))
+
+
+@pytest.mark.django_db
+def test_alerte_ouverte_au_passage_sous_le_seuil_puis_fermee(approvisionne):
+    """[HAPPY] Un passage sous le seuil ouvre une alerte, une seule ; la remontée la ferme"""
+    assert AlerteStock.objects.filter(produit=approvisionne, fin__isnull=True).count() == 0
+
+    ajuster_stock(approvisionne.pk, -6)
+    ajuster_stock(approvisionne.pk, -1)
+    [(stock, seuil, fin)] = _alertes(approvisionne)
+    assert (stock, seuil, fin) == (4, 5, None)
+
+    ajuster_stock(approvisionne.pk, 2)
+    assert _alertes(approvisionne)[0][2] is None  # stock 5 : toujours au niveau du seuil
+    ajuster_stock(approvisionne.pk, 1)
+    assert _alertes(approvisionne)[0][2] is not None
+    ajuster_stock(approvisionne.pk, -2)
+    assert AlerteStock.objects.filter(produit=approvisionne).count() == 2
+    assert AlerteStock.objects.filter(produit=approvisionne, fin__isnull=True).count() == 1
+
+
+@pytest.mark.django_db
+def test_franchissements_par_lot(approvisionne, categorie, unite_base):
+    """[HAPPY] ajuster_stocks détecte les franchissements de chaque produit du lot"""
+    autre = Produit.objects.create(nom="Autre", reference="REF-A", categorie=categorie, unite=unite_base,
+                                   prix_unitaire=1, seuil_alerte=2, stock_actuel=1)
+    ajuster_stocks({approvisionne.pk: -5, autre.pk: 4})
+
+    assert [alerte[2] is None for alerte in _alertes(approvisionne)] == [True]
+    assert [alerte[2] is None for alerte in _alertes(autre)] == [False]
+
+
+@pytest.mark.django_db
+def test_une_seule_alerte_ouverte_par_produit(produit):
+    """[EDGE] La base refuse une deuxième alerte ouverte pour un même produit"""
+    assert AlerteStock.objects.filter(produit=produit, fin__isnull=True).count() == 1
+    with pytest.raises(IntegrityError), transaction.atomic():
+        AlerteStock.objects.create(produit=produit, stock=0, seuil=5)
+
+
+@pytest.mark.django_db
+def test_changement_de_seuil_et_synchronisation(approvisionne):
+    """[HAPPY] Un changement de seuil ouvre ou ferme l'alerte ; la synchronisation répare une dérive"""
+    approvisionne.seuil_alerte = 12
+    approvisionne.save()
+    assert AlerteStock.objects.filter(produit=approvisionne, fin__isnull=True).exists()
+
+    approvisionne.seuil_alerte = 3
+    approvisionne.save()
+    assert not AlerteStock.objects.filter(produit=approvisionne, fin__isnull=True).exists()
+
+    # Écriture hors des primitives : la synchronisation rattrape l'alerte
+    Produit.objects.filter(pk=approvisionne.pk).update(stock_actuel=0)
+    synchroniser_alertes()
+    assert AlerteStock.objects.filter(produit=approvisionne, fin__isnull=True).exists()
+    assert [p.pk for p in produits_en_alerte()] == [approvisionne.pk]
+
+
+@pytest.mark.django_db
+def test_produits_en_alerte_par_index_partiel(produit):
+    """[PERF] La liste des produits en alerte est servie par l'index partiel"""
+    plan = Produit.objects.sous_seuil().order_by("id").explain()
+    assert "produit_sous_seuil_idx" in plan
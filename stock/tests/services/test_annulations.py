@@ -0,0 +1,113 @@
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from stock.models import EntreeStock, LigneReception, LigneVente, Produit, Reception, SortieStock, Vente, VenteJournaliere
+from stock.services.annulations import annuler_receptions, annuler_ventes
+from stock.services.receptions import creer_reception
+from stock.services.reconciliation import reconcilier
+from stock.services.stock import StockInsuffisant
+from stock.services.ventes import creer_vente
+
+
+@pytest.fixture
+def produits(categorie, unite_base, unite_conversion):
+    return [
+        Produit.objects.create(reference=f"ANN{i}", nom=f"Produit {i}", categorie=categorie, unite=unite_base,
+                               unite_conversion=unite_conversion, facteur_conversion=10, prix_unitaire=1,
+                               stock_actuel=1000)
+        for i in range(3)
+    ]
+
+
+def _vente(produits, unite, quantite=2):
+    return creer_vente([
+        {"produit": produit, "unite_utilisee": unite, "quantite": quantite, "prix_unitaire": Decimal("3")}
+        for produit in produits
+    ])
+
+
+def _stocks(produits):
+    return list(Produit.objects.filter(pk__in=[p.pk for p in produits]).order_by('id').values_list('stock_actuel', flat=True))
+
+
+@pytest.mark.django_db
+def test_happy_annulation_de_ventes(produits, unite_base, utilisateur):
+    """[HAPPY] Stock restitué, lignes, sorties miroirs et ventes désactivées, faits retirés"""
+    ventes = [_vente(produits, unite_base), _vente(produits[:2], unite_base, 5), _vente(produits[2:], unite_base)]
+
+    annulation = annuler_ventes([ventes[0].pk, ventes[1].pk, 999999], utilisateur=utilisateur)
+
+    assert annulation.annules == sorted([ventes[0].pk, ventes[1].pk])
+    assert (annulation.introuvables, annulation.lignes) == ([999999], 5)
+    assert _stocks(produits) == [1000, 1000, 998]
+    assert not LigneVente.objects.filter(vente__in=ventes[:2], is_active=True).exists()
+    assert not SortieStock.objects.filter(vente__in=ventes[:2], is_active=True).exists()
+    assert list(Vente.objects.filter(pk__in=annulation.annules).values_list('is_active', 'total').distinct()) == [
+        (False, Decimal("0.00")),
+    ]
+    assert sum(VenteJournaliere.objects.values_list('lignes', flat=True)) == 1
+    assert reconcilier().ecarts == []
+
+    # Deuxième passage : rien n'est restitué deux fois
+    again = annuler_ventes([ventes[0].pk])
+    assert (again.annules, again.deja_annules) == ([], [ventes[0].pk])
+    assert _stocks(produits) == [1000, 1000, 998]
+
+
+@pytest.mark.django_db
+def test_happy_annulation_de_receptions(produits, unite_conversion, fournisseur):
+    """[HAPPY] Stock retiré (conversion d'unité), entrées miroirs et réceptions désactivées"""
+    reception = creer_reception(
+        [{"produit": p, "unite_utilisee": unite_conversion, "quantite": 1, "prix_unitaire": 5} for p in produits],
+        fournisseur=fournisseur,
+    )
+    assert _stocks(produits) == [1010] * 3
+
+    annulation = annuler_receptions([reception.pk])
+
+    assert (annulation.annules, annulation.lignes) == ([reception.pk], 3)
+    assert _stocks(produits) == [1000] * 3
+    assert not EntreeStock.objects.filter(reception=reception, is_active=True).exists()
+    assert not LigneReception.objects.filter(reception=reception, is_active=True).exists()
+    reception.refresh_from_db()
+    assert (reception.is_active, reception.total) == (False, Decimal("0.00"))
+
+
+@pytest.mark.django_db
+def test_edge_stock_insuffisant_rien_annule(produits, unite_base, fournisseur):
+    """[EDGE] Réception déjà vendue : le retrait échoue et aucun document n'est annulé"""
+    premiere = creer_reception([{"produit": produits[0], "unite_utilisee": unite_base, "quantite": 10, "prix_unitaire": 1}],
+                               fournisseur=fournisseur)
+    seconde = creer_reception([{"produit": produits[1], "unite_utilisee": unite_base, "quantite": 10, "prix_unitaire": 1}],
+                              fournisseur=fournisseur)
+    _vente(produits[1:2], unite_base, 1005)
+
+    with pytest.raises(StockInsuffisant):
+        annuler_receptions([premiere.pk, seconde.pk])
+    assert _stocks(produits) == [1010, 5, 1000]
+    assert Reception.objects.filter(is_active=True).count() == 2
+
+
+@pytest.mark.django_db
+def test_edge_soft_delete_passe_par_le_lot(produits, unite_base):
+    """[EDGE] Vente.soft_delete : même chemin que l'annulation par lot"""
+    vente = _vente(produits, unite_base)
+    vente.soft_delete()
+    assert (vente.is_active, vente.total) == (False, Decimal("0.00"))
+    assert _stocks(produits) == [1000] * 3
+    assert not vente.sorties.filter(is_active=True).exists()
+
+
+@pytest.mark.django_db
+def test_perf_requetes_constantes(produits, unite_base):
+    """[PERF] Nombre de requêtes indépendant du nombre de documents et de lignes"""
+    def compter(nombre):
+        ventes = [_vente(produits, unite_base, 1) for _ in range(nombre)]
+        with CaptureQueriesContext(connection) as requetes:
+            annuler_ventes([vente.pk for vente in ventes])
+        return len(requetes)
+
+    assert compter(2) == compter(10)
@@ -0,0 +1,95 @@
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from stock.models import JournalStock, Produit
+from stock.services.catalogue import FormatInvalide, importer_catalogue, lire_fichier
+from stock.services.recherche import version_catalogue
+
+
+def _ligne(reference, **valeurs):
+    ligne = {"reference": reference, "nom": f"Produit {reference}", "categorie": "Catégorie Test",
+             "unite": "Gramme", "prix_unitaire": "2.50"}
+    ligne.update(valeurs)
+    return ligne
+
+
+@pytest.mark.django_db
+def test_import_cree_et_met_a_jour_par_reference(produit):
+    """[HAPPY] Upsert par référence : les existants sont mis à jour sans toucher au stock"""
+    Produit.objects.filter(pk=produit.pk).update(stock_actuel=40)
+
+    rapport = importer_catalogue([
+        _ligne("REF123", nom="Renommé", prix_unitaire="12.00", categorie="catégorie test"),
+        _ligne("NOUV-1", unite_conversion="Kilogramme", facteur_conversion="1000", seuil_alerte="3"),
+    ])
+
+    assert (rapport.lignes, rapport.crees, rapport.mis_a_jour, rapport.erreurs) == (2, 1, 1, [])
+    produit.refresh_from_db()
+    assert produit.nom == "Renommé"
+    assert produit.prix_unitaire == Decimal("12.00")
+    assert produit.stock_actuel == 40
+    nouveau = Produit.objects.get(reference="NOUV-1")
+    assert nouveau.unite_conversion.nom == "Kilogramme"
+    assert (nouveau.facteur_conversion, nouveau.seuil_alerte, nouveau.stock_actuel) == (1000, 3, 0)
+    assert not JournalStock.objects.filter(produit=nouveau).exists()
+
+
+@pytest.mark.django_db
+def test_import_rapport_d_erreurs_par_ligne(categorie, unite_base):
+    """[EDGE] Les lignes invalides sont signalées, les autres importées"""
+    rapport = importer_catalogue([
+        _ligne("OK-1"),
+        _ligne("KO-1", categorie="Inconnue", prix_unitaire="abc"),
+        _ligne("KO-2", facteur_conversion="0", prix_unitaire="1.234"),
+        _ligne("", nom=""),
+        _ligne("OK-1"),
+    ])
+
+    assert rapport.crees == 1
+    erreurs = {erreur.ligne: erreur.erreurs for erreur in rapport.erreurs}
+    assert set(erreurs) == {2, 3, 4, 5}
+    assert set(erreurs[2]) == {"categorie", "prix_unitaire"}
+    assert set(erreurs[3]) == {"facteur_conversion", "prix_unitaire"}
+    assert set(erreurs[4]) == {"reference", "nom"}
+    assert "ligne 1" in erreurs[5]["reference"]
+    assert list(Produit.objects.values_list("reference", flat=True)) == ["OK-1"]
+
+
+@pytest.mark.django_db
+def test_import_nombre_de_requetes_constant(categorie, unite_base):
+    """[PERF] Aucune requête par ligne : résolution des références par dictionnaire, écriture par lots"""
+    with CaptureQueriesContext(connection) as requetes:
+        importer_catalogue([_ligne(f"P-{i}") for i in range(300)])
+    assert Produit.objects.count() == 300
+    # SQLite découpe les INSERT selon sa limite de paramètres : quelques lots, pas 300 requêtes
+    assert len(requetes) < 20
+
+
+@pytest.mark.django_db
+def test_import_simulation_et_invalidation(categorie, unite_base):
+    """[HAPPY] La simulation n'écrit rien ; un import réel invalide le catalogue de recherche"""
+    version = version_catalogue()
+    rapport = importer_catalogue([_ligne("SIM-1")], simuler=True)
+    assert rapport.crees == 1
+    assert not Produit.objects.exists()
+    assert version_catalogue() == version
+
+    importer_catalogue([_ligne("SIM-1")])
+    assert version_catalogue() != version
+
+
+def test_lire_fichier_csv_et_jsonl():
+    """[HAPPY] Lecture CSV (BOM toléré) et JSON Lines ; erreurs de format"""
+    csv = "﻿reference,nom,categorie,unite,prix_unitaire\nA,Article,Cat,g,1\n".encode("utf-8")
+    assert lire_fichier(csv, "csv")[0]["reference"] == "A"
+    assert lire_fichier('{"reference": "A"}\n\n{"reference": "B"}\n', "jsonl")[1] == {"reference": "B"}
+
+    with pytest.raises(FormatInvalide):
+        lire_fichier("reference,nom\nA,B\n", "csv")
+    with pytest.raises(FormatInvalide):
+        lire_fichier("[1, 2]\n", "jsonl")
+    with pytest.raises(FormatInvalide):
+        lire_fichier("", "xlsx")
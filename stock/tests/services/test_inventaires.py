@@ -0,0 +1,119 @@
+from decimal import Decimal
+
+import pytest
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from stock.models import Categorie, Inventaire, JournalStock, Produit
+from stock.services.inventaires import (
+    annuler_inventaire, cloturer_inventaire, ecarts, enregistrer_comptages, ouvrir_inventaire,
+)
+from stock.services.reconciliation import reconcilier
+from stock.services.stock import StockInsuffisant, ajuster_stock
+from stock.services.ventes import creer_vente
+
+
+@pytest.fixture
+def produits(categorie, unite_base):
+    produits = [
+        Produit.objects.create(reference=f"INV{i}", nom=f"Produit {i}", categorie=categorie, unite=unite_base,
+                               prix_unitaire=1)
+        for i in range(3)
+    ]
+    for produit in produits:
+        ajuster_stock(produit.pk, 100, JournalStock.OUVERTURE, produit.pk)
+    return produits
+
+
+def _stocks(produits):
+    return list(Produit.objects.filter(pk__in=[p.pk for p in produits]).order_by('id').values_list('stock_actuel', flat=True))
+
+
+@pytest.mark.django_db
+def test_happy_cloture_conserve_les_ventes_du_comptage(produits, unite_base):
+    """[HAPPY] Comptage sur deux zones, vente pendant le comptage : écart appliqué comme une variation"""
+    inventaire = ouvrir_inventaire(description="Annuel")
+    assert inventaire.lignes.count() == 3
+
+    enregistrer_comptages(inventaire, {produits[0].pk: 60, produits[1].pk: 100}, zone="Réserve")
+    enregistrer_comptages(inventaire, {produits[0].pk: 30}, zone="Rayon")
+    creer_vente([{"produit": produits[0], "unite_utilisee": unite_base, "quantite": 5, "prix_unitaire": Decimal("1")}])
+
+    assert sorted(ecarts(inventaire).values_list('produit_id', 'compte', 'ecart')) == [
+        (produits[0].pk, 90, -10), (produits[1].pk, 100, 0),
+    ]
+    cloturer_inventaire(inventaire)
+
+    # 100 figés, 90 comptés, 5 vendus depuis l'ouverture ; produit non compté inchangé
+    assert _stocks(produits) == [85, 100, 100]
+    inventaire.refresh_from_db()
+    assert (inventaire.statut, inventaire.ajustements) == (Inventaire.CLOTURE, 1)
+    assert list(JournalStock.objects.filter(source_type=JournalStock.INVENTAIRE).values_list('produit_id', 'delta')) == [
+        (produits[0].pk, -10),
+    ]
+    assert reconcilier().ecarts == []
+
+
+@pytest.mark.django_db
+def test_edge_nouveau_comptage_remplace_la_zone(produits):
+    """[EDGE] Un second envoi pour la même zone remplace le premier"""
+    inventaire = ouvrir_inventaire()
+    enregistrer_comptages(inventaire, {produits[0].pk: 40}, zone="A")
+    enregistrer_comptages(inventaire, {produits[0].pk: 45}, zone="A")
+    assert list(ecarts(inventaire).values_list('compte', flat=True)) == [45]
+
+
+@pytest.mark.django_db
+def test_edge_perimetre_et_statut(produits, unite_base):
+    """[EDGE] Produit hors catégorie refusé ; inventaire clôturé ou annulé figé"""
+    autre = Categorie.objects.create(nom="Autre")
+    hors_perimetre = Produit.objects.create(reference="HORS", nom="Hors", categorie=autre, unite=unite_base,
+                                            prix_unitaire=1)
+    inventaire = ouvrir_inventaire(categorie=produits[0].categorie)
+    with pytest.raises(ValidationError):
+        enregistrer_comptages(inventaire, {hors_perimetre.pk: 1})
+
+    cloturer_inventaire(inventaire)
+    with pytest.raises(ValidationError):
+        enregistrer_comptages(inventaire, {produits[0].pk: 1})
+    with pytest.raises(ValidationError):
+        cloturer_inventaire(inventaire)
+
+    annule = annuler_inventaire(ouvrir_inventaire())
+    with pytest.raises(ValidationError):
+        cloturer_inventaire(annule)
+
+
+@pytest.mark.django_db
+def test_edge_stock_insuffisant_rien_applique(produits, unite_base):
+    """[EDGE] Un écart négatif non couvert par le stock annule toute la clôture"""
+    inventaire = ouvrir_inventaire()
+    enregistrer_comptages(inventaire, {produits[0].pk: 150, produits[1].pk: 0})
+    creer_vente([{"produit": produits[1], "unite_utilisee": unite_base, "quantite": 50, "prix_unitaire": Decimal("1")}])
+
+    with pytest.raises(StockInsuffisant):
+        cloturer_inventaire(inventaire)
+    assert _stocks(produits) == [100, 50, 100]
+    inventaire.refresh_from_db()
+    assert inventaire.statut == Inventaire.OUVERT
+
+
+@pytest.mark.django_db
+def test_perf_cloture_requetes_independantes_du_nombre_de_produits(categorie, unite_base):
+    """[PERF] Ouverture, comptage et clôture : requêtes en nombre constant (un lot)"""
+    def executer(nombre):
+        produits = Produit.objects.bulk_create([
+            Produit(reference=f"P{nombre}-{i}", nom=f"P{i}", categorie=categorie, unite=unite_base, prix_unitaire=1,
+                    stock_actuel=10, seuil_alerte=0)
+            for i in range(nombre)
+        ])
+        with CaptureQueriesContext(connection) as requetes:
+            inventaire = ouvrir_inventaire(categorie=categorie)
+            enregistrer_comptages(inventaire, {produit.pk: 12 for produit in produits})
+            cloturer_inventaire(inventaire)
+        Produit.objects.filter(pk__in=[p.pk for p in produits]).update(categorie=Categorie.objects.create(nom=str(nombre)))
+        return len(requetes)
+
+    assert executer(10) == executer(60)
+    assert set(Produit.objects.values_list('stock_actuel', flat=True)) == {12}
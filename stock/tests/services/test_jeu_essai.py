@@ -0,0 +1,70 @@
+import pytest
+from django.db.models import Sum
+
+from stock.models import EntreeStock, JournalStock, LigneVente, Produit, SortieStock, Vente, VenteJournaliere
+from stock.services.jeu_essai import Echelle, generer_jeu_essai
+from stock.services.reconciliation import reconcilier
+from stock.services.totaux import recalculer_totaux
+from users.models import User
+
+PETITE = Echelle(produits=30, utilisateurs=3, clients=4, fournisseurs=2, jours=5, ventes_par_jour=4,
+                 receptions_par_jour=1, mouvements_par_jour=2, lignes_par_document=3)
+
+
+@pytest.mark.django_db
+def test_happy_jeu_essai_volumes():
+    """[HAPPY] Les volumes générés suivent l'échelle"""
+    resume = generer_jeu_essai(PETITE)
+    assert resume.produits == Produit.objects.count() == 30
+    assert resume.ventes == Vente.objects.count() == 20
+    assert resume.receptions == 5
+    assert User.objects.filter(roles__isnull=False).count() == 3
+    assert resume.mouvements == EntreeStock.objects.count() + SortieStock.objects.count()
+
+
+@pytest.mark.django_db
+def test_happy_jeu_essai_coherent():
+    """[HAPPY] Stock, journal, totaux et faits de vente sont cohérents"""
+    generer_jeu_essai(PETITE)
+    assert reconcilier().ecarts == []
+
+    totaux = list(Vente.objects.order_by('id').values_list('total', flat=True))
+    recalculer_totaux(Vente.objects.all())
+    assert list(Vente.objects.order_by('id').values_list('total', flat=True)) == totaux
+
+    vendu = -JournalStock.objects.filter(source_type=JournalStock.LIGNE_VENTE).aggregate(s=Sum('delta'))['s']
+    assert VenteJournaliere.objects.aggregate(s=Sum('quantite'))['s'] == vendu
+
+
+@pytest.mark.django_db
+def test_edge_jeu_essai_ventes_annulees():
+    """[EDGE] Une part des ventes est annulée : lignes et sorties miroirs inactives, sans effet sur le stock"""
+    generer_jeu_essai(PETITE._replace(jours=30))
+    annulees = Vente.objects.filter(is_active=False)
+    assert annulees.exists() and Vente.objects.filter(is_active=True).exists()
+    assert set(annulees.values_list('total', flat=True)) == {0}
+    assert not LigneVente.objects.filter(vente__is_active=False, is_active=True).exists()
+    assert not SortieStock.objects.filter(vente__is_active=False, is_active=True).exists()
+    assert not JournalStock.objects.filter(
+        source_type=JournalStock.LIGNE_VENTE, source_id__in=LigneVente.objects.filter(is_active=False).values('id'),
+    ).exists()
+    assert reconcilier().ecarts == []
+
+
+@pytest.mark.django_db
+def test_edge_jeu_essai_dates_dans_la_periode():
+    """[EDGE] Documents et mouvements sont datés sur la période, pas au moment de la génération"""
+    generer_jeu_essai(PETITE)
+    dates = Vente.objects.dates('date', 'day')
+    assert len(dates) == PETITE.jours
+    assert EntreeStock.objects.dates('date', 'day').count() == PETITE.jours
+
+
+@pytest.mark.django_db
+def test_edge_jeu_essai_reproductible():
+    """[EDGE] Même graine, même jeu de données"""
+    generer_jeu_essai(PETITE, graine=3)
+    premier = list(Vente.objects.order_by('id').values_list('total', flat=True))
+    Vente.objects.all().delete()
+    generer_jeu_essai(PETITE, graine=3)
+    assert list(Vente.objects.order_by('id').values_list('total', flat=True)) == premier
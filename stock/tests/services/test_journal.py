@@ -0,0 +1,117 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db.models import Sum
+from django.utils import timezone
+
+from stock.models import EntreeStock, SortieStock, JournalStock, InstantaneStock, Produit
+from stock.services.journal import creer_instantanes, stock_a_la_date
+from stock.services.receptions import creer_reception
+from stock.services.ventes import creer_vente
+
+
+@pytest.fixture
+def autre_produit(categorie, unite_base):
+    return Produit.objects.create(
+        nom="Autre produit", reference="REF-AUTRE", categorie=categorie, unite=unite_base, prix_unitaire=5,
+    )
+
+
+def _somme_journal(produit):
+    return JournalStock.objects.filter(produit=produit).aggregate(total=Sum('delta'))['total'] or 0
+
+
+def _ecrire(produit, delta, date):
+    JournalStock.objects.create(produit=produit, delta=delta, date=date, source_type=JournalStock.AJUSTEMENT)
+
+
+@pytest.mark.django_db
+def test_happy_journal_egal_au_stock_actuel(produit, unite_base, unite_conversion, fournisseur):
+    """[HAPPY] Toutes les écritures du stock passent par le journal : sa somme vaut stock_actuel"""
+    reception = creer_reception(
+        [{"produit": produit, "unite_utilisee": unite_conversion, "quantite": 3, "prix_unitaire": 10}],
+        fournisseur=fournisseur,
+    )
+    vente = creer_vente([{"produit": produit, "unite_utilisee": unite_base, "quantite": 400, "prix_unitaire": 1}])
+    entree = EntreeStock.objects.create(produit=produit, quantite=50, unite_utilisee=unite_base)
+    SortieStock.objects.create(produit=produit, quantite=20, unite_utilisee=unite_base, type_sortie="perte")
+    ligne = vente.lignes.get()
+    ligne.quantite = 100
+    ligne.save()
+    entree.delete()
+    vente.soft_delete()
+
+    produit.refresh_from_db()
+    assert produit.stock_actuel == 3000 - 20
+    assert _somme_journal(produit) == produit.stock_actuel
+    assert JournalStock.objects.filter(source_type=JournalStock.LIGNE_RECEPTION,
+                                       source_id=reception.lignes_reception.get().pk).exists()
+
+
+@pytest.mark.django_db
+def test_happy_stock_initial_inscrit_au_journal(categorie, unite_base):
+    """[HAPPY] Le stock initial d'un nouveau produit est une écriture d'ouverture"""
+    produit = Produit.objects.create(
+        nom="Initial", reference="REF-INIT", categorie=categorie, unite=unite_base, prix_unitaire=1, stock_actuel=40,
+    )
+    assert list(produit.journal.values_list('source_type', 'delta')) == [(JournalStock.OUVERTURE, 40)]
+
+
+@pytest.mark.django_db
+def test_edge_journal_en_ajout_seul(produit):
+    """[EDGE] Une écriture du journal ne peut être ni modifiée ni supprimée"""
+    ecriture = JournalStock.objects.create(produit=produit, delta=5, source_type=JournalStock.AJUSTEMENT)
+    ecriture.delta = 6
+    with pytest.raises(ValueError):
+        ecriture.save()
+    with pytest.raises(ValueError):
+        ecriture.delete()
+
+
+@pytest.mark.django_db
+def test_happy_stock_a_la_date_avec_et_sans_instantane(produit):
+    """[HAPPY] Même résultat depuis le journal seul ou depuis un instantané"""
+    debut = timezone.now() - timedelta(days=30)
+    for jour in range(30):
+        _ecrire(produit, 10, debut + timedelta(days=jour))
+    _ecrire(produit, -25, debut + timedelta(days=10, hours=12))
+
+    date = debut + timedelta(days=20, hours=1)
+    sans_instantane = stock_a_la_date(produit.pk, date)
+    assert sans_instantane == 21 * 10 - 25
+
+    assert creer_instantanes(debut + timedelta(days=15)) == 1
+    # Instantané déjà présent à cette date : ignoré, non compté
+    assert creer_instantanes(debut + timedelta(days=15)) == 0
+    assert stock_a_la_date(produit.pk, date) == sans_instantane
+    assert stock_a_la_date(produit.pk, debut + timedelta(days=15)) == 16 * 10 - 25
+    assert stock_a_la_date(produit.pk, debut - timedelta(days=1)) == 0
+
+
+@pytest.mark.django_db
+def test_perf_stock_a_la_date_deux_requetes_bornees(produit, django_assert_num_queries):
+    """[PERF] Deux requêtes ; seules les écritures postérieures à l'instantané sont sommées"""
+    debut = timezone.now() - timedelta(days=10)
+    _ecrire(produit, 100, debut)
+    InstantaneStock.objects.create(produit=produit, date=debut + timedelta(days=1), stock=1000)
+    _ecrire(produit, 7, debut + timedelta(days=2))
+
+    with django_assert_num_queries(2):
+        assert stock_a_la_date(produit.pk, debut + timedelta(days=3)) == 1007
+
+
+@pytest.mark.django_db
+def test_happy_instantanes_successifs(produit, autre_produit):
+    """[HAPPY] Un instantané part du précédent et des seules écritures intermédiaires"""
+    debut = timezone.now() - timedelta(days=3)
+    _ecrire(produit, 5, debut)
+    creer_instantanes(debut + timedelta(hours=1))
+    _ecrire(autre_produit, 8, debut + timedelta(hours=2))
+    _ecrire(produit, -2, debut + timedelta(hours=3))
+
+    call_command("instantaner_stock", date=(debut + timedelta(hours=4)).isoformat())
+    derniers = dict(
+        InstantaneStock.objects.filter(date=debut + timedelta(hours=4)).values_list('produit_id', 'stock')
+    )
+    assert derniers == {produit.pk: 3, autre_produit.pk: 8}
@@ -0,0 +1,30 @@
+import pytest
+from django.core.management import call_command
+
+from stock.services.jeu_essai import Echelle, generer_jeu_essai
+from stock.services.plans import analyser
+
+ECHELLE = Echelle(produits=20, utilisateurs=2, clients=5, fournisseurs=2, jours=30, ventes_par_jour=10,
+                  receptions_par_jour=2, mouvements_par_jour=2, lignes_par_document=3)
+
+
+@pytest.mark.django_db
+def test_happy_requetes_critiques_utilisent_un_index():
+    """[PERF] Listes, totaux et annulations passent par un index (plans EXPLAIN)"""
+    generer_jeu_essai(ECHELLE)
+    mesures = {mesure.nom: mesure for mesure in analyser()}
+
+    assert set(mesures) >= {'liste_ventes', 'total_vente', 'annulation_vente', 'annulation_reception'}
+    assert [nom for nom, mesure in mesures.items() if not mesure.index] == []
+    assert "lignevente_vente_active_idx" in mesures['total_vente'].plan
+    assert "vente_date_id_idx" in mesures['liste_ventes'].plan
+
+
+@pytest.mark.django_db
+def test_happy_commande_analyser_index(capsys):
+    """[HAPPY] La commande génère le jeu d'essai puis affiche les plans, en mode strict"""
+    call_command("analyser_index", "--jeu-essai", "test", "--strict")
+    sortie = capsys.readouterr().out
+    assert "200 produits" in sortie
+    assert "liste_ventes" in sortie
+    assert "sans index" not in sortie
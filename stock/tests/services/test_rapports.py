@@ -0,0 +1,160 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from stock.models import LigneVente, ModePaiement, Produit, VenteJournaliere
+from stock.services import rapports
+from stock.services.rapports import rapport_ventes, reconstruire
+from stock.services.ventes import creer_vente, modifier_vente
+
+
+@pytest.fixture
+def stock(produit):
+    Produit.objects.filter(pk=produit.pk).update(stock_actuel=100000)
+    return produit
+
+
+def _faits():
+    return sorted(
+        VenteJournaliere.objects.exclude(lignes=0)
+        .values_list("jour", "produit_id", "mode_paiement_id", "vendeur_id", "quantite", "chiffre_affaires", "lignes")
+    )
+
+
+def _vente(produit, unite, quantite, prix, **donnees):
+    return creer_vente([{"produit": produit, "unite_utilisee": unite, "quantite": quantite, "prix_unitaire": prix}],
+                       **donnees)
+
+
+@pytest.mark.django_db
+def test_faits_tenus_a_jour_par_les_ventes(stock, unite_base, unite_conversion, utilisateur):
+    """[HAPPY] Vente, modification et annulation de ligne, annulation de vente : faits égaux à une reconstruction"""
+    especes = ModePaiement.objects.create(nom="Espèces")
+    hier = timezone.now() - timedelta(days=1)
+    vente = _vente(stock, unite_conversion, 2, Decimal("900"), date=hier, mode_paiement=especes, created_by=utilisateur)
+    _vente(stock, unite_base, 300, Decimal("1"), date=hier, mode_paiement=especes, created_by=utilisateur)
+    autre = _vente(stock, unite_base, 10, Decimal("2"))
+
+    fait = VenteJournaliere.objects.get(jour=timezone.localdate(hier))
+    assert (fait.quantite, fait.chiffre_affaires, fait.lignes) == (2300, Decimal("2100.00"), 2)
+
+    ligne = LigneVente.objects.get(vente=autre)
+    ligne.quantite = 4
+    ligne.save()
+    LigneVente.objects.create(vente=autre, produit=stock, unite_utilisee=unite_base, quantite=1,
+                              prix_unitaire=Decimal("5")).soft_delete()
+    vente.soft_delete()
+
+    incremental = _faits()
+    reconstruire()
+    assert _faits() == incremental
+    assert [(quantite, montant, lignes) for *_, quantite, montant, lignes in incremental] == [
+        (300, Decimal("300.00"), 1), (4, Decimal("8.00"), 1),
+    ]
+
+
+@pytest.mark.django_db
+def test_faits_deplaces_par_changement_de_mode(stock, unite_base, utilisateur):
+    """[EDGE] Changement du mode de paiement puis annulation : aucun fait ne reste sur l'ancien mode"""
+    especes, mobile = ModePaiement.objects.create(nom="Espèces"), ModePaiement.objects.create(nom="Mobile")
+    hier = timezone.now() - timedelta(days=1)
+    vente = _vente(stock, unite_base, 3, Decimal("10"), date=hier, mode_paiement=especes, created_by=utilisateur)
+    _vente(stock, unite_base, 1, Decimal("10"), date=hier, mode_paiement=especes, created_by=utilisateur)
+
+    modifier_vente(vente, mode_paiement=mobile, remarque="Payée par mobile")
+    incremental = _faits()
+    reconstruire()
+    assert _faits() == incremental
+    assert [(mode, quantite) for _, _, mode, _, quantite, _, _ in incremental] == [(especes.pk, 1), (mobile.pk, 3)]
+
+    vente.soft_delete()
+    assert [(mode, quantite) for _, _, mode, _, quantite, _, _ in _faits()] == [(especes.pk, 1)]
+
+
+@pytest.mark.django_db
+def test_faits_sans_doublon_si_cle_creee_entre_temps(stock, unite_base, utilisateur, monkeypatch):
+    """[EDGE] Fait créé par une vente simultanée après la lecture : incrémenté, pas dupliqué"""
+    especes = ModePaiement.objects.create(nom="Espèces")
+    hier = timezone.now() - timedelta(days=1)
+    _vente(stock, unite_base, 2, Decimal("10"), date=hier, mode_paiement=especes, created_by=utilisateur)
+
+    lire = rapports._lire_faits
+    lectures = []
+
+    def lire_avant_creation(faits):
+        # Première lecture faite avant que la vente simultanée ne crée le fait
+        lectures.append(faits)
+        return {} if len(lectures) == 1 else lire(faits)
+
+    monkeypatch.setattr(rapports, "_lire_faits", lire_avant_creation)
+    _vente(stock, unite_base, 1, Decimal("10"), date=hier, mode_paiement=especes, created_by=utilisateur)
+    fait = VenteJournaliere.objects.get()
+    assert (fait.quantite, fait.lignes) == (3, 2)
+
+
+@pytest.mark.django_db
+def test_rapport_journees_closes_et_journee_en_cours(stock, unite_base, categorie):
+    """[HAPPY] Journées closes lues dans les faits, journée en cours dans les lignes"""
+    aujourd_hui = timezone.localtime()
+    for jours, quantite in ((40, 1), (3, 2), (0, 5)):
+        _vente(stock, unite_base, quantite, Decimal("10"), date=aujourd_hui - timedelta(days=jours))
+    # Les faits du jour ne sont pas lus : le rapport reste exact sans eux
+    VenteJournaliere.objects.filter(jour=aujourd_hui.date()).delete()
+
+    lignes = rapport_ventes(aujourd_hui.date() - timedelta(days=5), aujourd_hui.date())
+    assert [(ligne["cle"], ligne["quantite"], ligne["chiffre_affaires"]) for ligne in lignes] == [
+        ((aujourd_hui - timedelta(days=3)).date(), 2, Decimal("20.00")),
+        (aujourd_hui.date(), 5, Decimal("50.00")),
+    ]
+
+    [par_categorie] = rapport_ventes(aujourd_hui.date() - timedelta(days=60), aujourd_hui.date(), par="categorie")
+    assert (par_categorie["cle"], par_categorie["libelle"]) == (categorie.pk, categorie.nom)
+    assert (par_categorie["lignes"], par_categorie["chiffre_affaires"]) == (3, Decimal("80.00"))
+
+
+@pytest.mark.django_db
+def test_rapport_nombre_de_requetes_independant_de_la_periode(stock, unite_base):
+    """[PERF] Deux requêtes groupées au plus, quelle que soit la période"""
+    for jours in range(0, 90, 7):
+        _vente(stock, unite_base, 1, Decimal("10"), date=timezone.now() - timedelta(days=jours))
+    aujourd_hui = timezone.localdate()
+    with CaptureQueriesContext(connection) as requetes:
+        lignes = rapport_ventes(aujourd_hui - timedelta(days=365), aujourd_hui, par="produit")
+    assert len(requetes) == 2
+    assert lignes[0]["lignes"] == 13
+
+
+@pytest.mark.django_db
+def test_commande_reconstruire_rapports(stock, unite_base):
+    """[HAPPY] La commande recalcule les faits d'une période"""
+    hier = timezone.localdate() - timedelta(days=1)
+    _vente(stock, unite_base, 3, Decimal("10"), date=timezone.now() - timedelta(days=1))
+    VenteJournaliere.objects.update(quantite=0, lignes=0)
+
+    call_command("reconstruire_rapports", "--debut", hier.isoformat(), "--fin", hier.isoformat())
+    assert VenteJournaliere.objects.get().quantite == 3
+
+
+@pytest.mark.django_db
+def test_faits_sans_doublon_pour_une_cle_sans_mode_ni_vendeur(stock, unite_base, monkeypatch):
+    """[EDGE] Clé sans mode de paiement ni vendeur (NULL) : fait simultané incrémenté, pas dupliqué"""
+    hier = timezone.now() - timedelta(days=1)
+    _vente(stock, unite_base, 2, Decimal("10"), date=hier)
+
+    lire = rapports._lire_faits
+    lectures = []
+
+    def lire_avant_creation(faits):
+        lectures.append(faits)
+        return {} if len(lectures) == 1 else lire(faits)
+
+    monkeypatch.setattr(rapports, "_lire_faits", lire_avant_creation)
+    _vente(stock, unite_base, 1, Decimal("10"), date=hier)
+    fait = VenteJournaliere.objects.get()
+    assert (fait.mode_paiement_id, fait.vendeur_id) == (None, None)
+    assert (fait.quantite, fait.lignes) == (3, 2)
@@ -0,0 +1,98 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.utils import timezone
+
+from stock.models import Produit
+from stock.services.reappro import commandes, suggestions
+from stock.services.receptions import creer_reception
+from stock.services.ventes import creer_vente
+
+
+def _vente(produit, unite, quantite, jours):
+    creer_vente([{"produit": produit, "unite_utilisee": unite, "quantite": quantite, "prix_unitaire": Decimal("10")}],
+                date=timezone.now() - timedelta(days=jours))
+
+
+@pytest.fixture
+def historique(produit, unite_base, unite_conversion, fournisseur):
+    """Deux réceptions de 1 kg à 10 jours d'intervalle, puis 100 g vendus chacun des 10 derniers jours"""
+    for jours in (30, 20):
+        creer_reception(
+            [{"produit": produit, "unite_utilisee": unite_conversion, "quantite": 1, "prix_unitaire": 5000}],
+            fournisseur=fournisseur, date=timezone.now() - timedelta(days=jours),
+        )
+    for jours in range(1, 11):
+        _vente(produit, unite_base, 100, jours)
+    return produit
+
+
+@pytest.mark.django_db
+def test_happy_suggestion_par_fournisseur(historique, fournisseur):
+    """[HAPPY] Demande, couverture, cycle observé et prix par unité de base issus de l'historique"""
+    [commande] = commandes(jours=10, delai=7)
+    assert (commande.fournisseur_id, commande.fournisseur) == (fournisseur.pk, fournisseur.nom)
+
+    [suggestion] = commande.lignes
+    assert suggestion.produit_id == historique.pk
+    assert (suggestion.stock_actuel, suggestion.demande_journaliere, suggestion.ecart_type) == (1000, 100.0, 0.0)
+    assert suggestion.jours_de_couverture == 10.0
+    # Cible : 100 g/jour x (7 jours de délai + 10 jours de cycle) ; écart-type nul
+    assert suggestion.quantite == 700
+    assert suggestion.prix_unitaire == 5.0
+    assert commande.montant == 3500.0
+
+
+@pytest.mark.django_db
+def test_happy_variabilite_et_stock_de_securite(produit, unite_base):
+    """[HAPPY] Écart-type de l'échantillon (jours sans vente inclus) et stock de sécurité au taux de service"""
+    Produit.objects.filter(pk=produit.pk).update(stock_actuel=100)
+    for jours, quantite in ((1, 10), (2, 20), (3, 30), (4, 40)):
+        _vente(produit, unite_base, quantite, jours)
+
+    [suggestion] = suggestions(jours=4, delai=2, cycle=2, taux_service=0.95)
+    assert suggestion.demande_journaliere == 25.0
+    assert suggestion.ecart_type == pytest.approx(12.910, abs=1e-3)
+    assert suggestion.fournisseur_id is None and suggestion.prix_unitaire is None
+    # 25 x 4 + 1.645 x 12.91 x 2 = 142.47 ; stock 0 après les ventes
+    assert suggestion.quantite == 143
+
+
+@pytest.mark.django_db
+def test_edge_sans_historique(produit):
+    """[EDGE] Produit jamais vendu : demande nulle, aucune suggestion"""
+    assert suggestions() == []
+    assert commandes() == []
+
+
+@pytest.mark.django_db
+def test_edge_cache_invalide_par_une_vente(historique, unite_base, django_assert_num_queries):
+    """[EDGE] Statistiques en cache jusqu'à la vente suivante ; le stock est relu à chaque appel"""
+    suggestions(jours=10)
+    with django_assert_num_queries(1):
+        [suggestion] = suggestions(jours=10)
+    assert suggestion.quantite == 700
+
+    _vente(historique, unite_base, 1000, 1)
+    [suggestion] = suggestions(jours=10)
+    assert (suggestion.stock_actuel, suggestion.demande_journaliere) == (0, 200.0)
+
+
+@pytest.mark.django_db
+def test_perf_requetes_constantes(categorie, unite_base, fournisseur, django_assert_num_queries):
+    """[PERF] Nombre de requêtes indépendant de la taille du catalogue"""
+    produits = [
+        Produit.objects.create(reference=f"R{i}", nom=f"Produit {i}", categorie=categorie, unite=unite_base,
+                               prix_unitaire=1, stock_actuel=60)
+        for i in range(20)
+    ]
+    creer_reception([{"produit": p, "unite_utilisee": unite_base, "quantite": 10, "prix_unitaire": 2} for p in produits],
+                    fournisseur=fournisseur, date=timezone.now() - timedelta(days=5))
+    for i, produit in enumerate(produits):
+        _vente(produit, unite_base, 50 + i, 1 + i % 5)
+
+    # Catalogue, ventes journalières, réceptions, stock courant, noms des fournisseurs
+    with django_assert_num_queries(5):
+        resultats = commandes(jours=7)
+    assert len(resultats) == 1 and len(resultats[0].lignes) == 20
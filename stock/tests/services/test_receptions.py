@@ -0,0 +1,83 @@
+import pytest
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from stock.models import Produit, Reception, LigneReception, EntreeStock, UniteDeMesure
+from stock.services.receptions import creer_reception
+
+
+@pytest.fixture
+def produits(categorie, unite_base, unite_conversion):
+    return Produit.objects.bulk_create(
+        Produit(
+            nom=f"Produit {i}", reference=f"REF-R{i}", categorie=categorie, unite=unite_base,
+            unite_conversion=unite_conversion, facteur_conversion=12, prix_unitaire=10,
+        )
+        for i in range(80)
+    )
+
+
+def _livraison(produits, unite, quantite=1, prix=100):
+    return [
+        {"produit": p, "unite_utilisee": unite, "quantite": quantite, "prix_unitaire": prix}
+        for p in produits
+    ]
+
+
+@pytest.mark.django_db
+def test_happy_reception_incremente_stock_et_total(produit, unite_base, unite_conversion, fournisseur):
+    """[HAPPY] Stock, total, reliquat et entrées miroir d'une réception"""
+    reception = creer_reception([
+        {"produit": produit, "unite_utilisee": unite_base, "quantite": 500, "prix_unitaire": 2},
+        {"produit": produit, "unite_utilisee": unite_conversion, "quantite": 3, "prix_unitaire": 1500},
+    ], fournisseur=fournisseur)
+
+    produit.refresh_from_db()
+    assert produit.stock_actuel == 500 + 3000
+    reception.refresh_from_db()
+    assert reception.total == 5500
+    assert reception.reliquat_fournisseur == 5500
+    assert reception.reliquat_magasin == 0
+    assert LigneReception.objects.filter(reception=reception).count() == 2
+    entrees = EntreeStock.objects.filter(reception=reception)
+    assert entrees.count() == 2
+    assert {e.fournisseur_id for e in entrees} == {fournisseur.id}
+
+
+@pytest.mark.django_db
+def test_edge_reception_unite_invalide_rien_n_est_ecrit(produit, unite_base, fournisseur):
+    """[EDGE] Une ligne invalide annule toute la réception"""
+    litre = UniteDeMesure.objects.create(nom="Litre", symbole="L")
+    with pytest.raises(ValidationError):
+        creer_reception(_livraison([produit], unite_base) + _livraison([produit], litre), fournisseur=fournisseur)
+    assert not Reception.objects.exists()
+    produit.refresh_from_db()
+    assert produit.stock_actuel == 0
+
+
+@pytest.mark.django_db
+def test_perf_reception_nombre_de_requetes_constant(produits, unite_conversion, fournisseur):
+    """[PERF] 80 lignes coûtent autant de requêtes qu'une seule"""
+    # Au-delà, SQLite (999 paramètres par requête) découpe les bulk_create en plusieurs lots
+    with CaptureQueriesContext(connection) as une_ligne:
+        creer_reception(_livraison(produits[:1], unite_conversion), fournisseur=fournisseur)
+    with CaptureQueriesContext(connection) as quatre_vingts:
+        creer_reception(_livraison(produits, unite_conversion), fournisseur=fournisseur)
+    assert len(une_ligne) == len(quatre_vingts)
+    assert Produit.objects.filter(stock_actuel=12).count() == 79
+
+
+@pytest.mark.django_db
+def test_happy_reception_via_api(api_client, utilisateur, produit, unite_base, fournisseur):
+    """[HAPPY] POST /receptions/ passe par le moteur et trace l'utilisateur"""
+    reponse = api_client.post("/api/v1/receptions/", {
+        "fournisseur": fournisseur.id,
+        "lignes": [{"produit": produit.id, "unite_utilisee": unite_base.id, "quantite": 7, "prix_unitaire": "3"}],
+    }, format="json")
+    assert reponse.status_code == 201, reponse.data
+    reception = Reception.objects.get()
+    assert reception.created_by == utilisateur
+    assert reception.total == 21
+    produit.refresh_from_db()
+    assert produit.stock_actuel == 7
@@ -0,0 +1,80 @@
+import pytest
+
+from stock.models import Produit
+from stock.services.recherche import IndexTrigrammes, rechercher_produits, trigrammes
+
+
+@pytest.fixture
+def catalogue(categorie, unite_base):
+    noms = {
+        "3017620422003": "Pâte à tartiner noisette",
+        "3017620425035": "Pâte à tartiner cacao 1kg",
+        "5449000000996": "Coca-Cola 33cl",
+        "7613035974685": "Café moulu arabica",
+        "CAF-0002": "Café en grains",
+    }
+    return {
+        reference: Produit.objects.create(
+            nom=nom, reference=reference, categorie=categorie, unite=unite_base, prix_unitaire=1,
+        )
+        for reference, nom in noms.items()
+    }
+
+
+def test_trigrammes_a_la_maniere_de_pg_trgm():
+    """[HAPPY] Mots en minuscules bordés de deux espaces avant, un après"""
+    assert trigrammes("Cat") == {"  c", " ca", "cat", "at "}
+    assert trigrammes("a-b") == {"  a", " a ", "  b", " b "}
+
+
+def test_index_trigrammes_tolere_les_fautes():
+    """[HAPPY] L'index en mémoire retrouve un mot mal orthographié"""
+    index = IndexTrigrammes([(1, "arabica moulu"), (2, "robusta en grains")])
+    assert index.rechercher("arabicca", limite=5) == [1]
+    assert index.rechercher("zzz", limite=5) == []
+
+
+@pytest.mark.django_db
+def test_happy_recherche_exacte_par_reference(catalogue, django_assert_num_queries):
+    """[HAPPY] Un code-barres connu renvoie le seul produit correspondant, en une requête"""
+    with django_assert_num_queries(1):
+        mode, produits = rechercher_produits("5449000000996")
+    assert mode == "exact"
+    assert [p.nom for p in produits] == ["Coca-Cola 33cl"]
+
+
+@pytest.mark.django_db
+def test_happy_recherche_prefixe(catalogue):
+    """[HAPPY] Préfixe de référence ou de nom, insensible à la casse"""
+    mode, produits = rechercher_produits("301762")
+    assert mode == "prefixe"
+    assert len(produits) == 2
+
+    mode, produits = rechercher_produits("coca")
+    assert (mode, [p.reference for p in produits]) == ("prefixe", ["5449000000996"])
+
+
+@pytest.mark.django_db
+def test_happy_recherche_floue(catalogue):
+    """[HAPPY] Faute de frappe : la recherche floue prend le relais"""
+    mode, produits = rechercher_produits("tartinner")
+    assert mode == "floue"
+    assert {p.reference for p in produits} == {"3017620422003", "3017620425035"}
+
+
+@pytest.mark.django_db
+def test_edge_index_recharge_apres_modification(catalogue):
+    """[EDGE] Renommer un produit invalide l'index de recherche floue"""
+    assert rechercher_produits("arabicca", mode="floue")[1]
+    produit = catalogue["7613035974685"]
+    produit.nom = "Café moulu robusta"
+    produit.save()
+    assert rechercher_produits("arabicca", mode="floue")[1] == []
+    assert [p.pk for p in rechercher_produits("robustta", mode="floue")[1]] == [produit.pk]
+
+
+@pytest.mark.django_db
+def test_edge_recherche_trop_courte_ou_vide(catalogue):
+    """[EDGE] Texte vide ou trop court pour la recherche floue"""
+    assert rechercher_produits("   ")[1] == []
+    assert rechercher_produits("zz", mode="floue")[1] == []
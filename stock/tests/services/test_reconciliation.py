@@ -0,0 +1,124 @@
+import pytest
+from django.core.management import call_command
+from django.db.models import Sum
+
+from stock.models import EntreeStock, SortieStock, JournalStock, PointReconciliation, Produit
+from stock.services.reconciliation import reconcilier, stocks_attendus
+from stock.services.receptions import creer_reception
+from stock.services.ventes import creer_vente
+
+
+@pytest.fixture
+def produits(categorie, unite_base, unite_conversion):
+    return [
+        Produit.objects.create(
+            nom=f"Produit {i}", reference=f"REF-C{i}", categorie=categorie, unite=unite_base,
+            unite_conversion=unite_conversion, facteur_conversion=10, prix_unitaire=1, stock_actuel=i,
+        )
+        for i in range(5)
+    ]
+
+
+@pytest.fixture
+def historique(produits, unite_base, unite_conversion, fournisseur):
+    """Réception, vente, entrée et sortie manuelles, annulation d'une vente"""
+    creer_reception(
+        [{"produit": p, "unite_utilisee": unite_conversion, "quantite": 3, "prix_unitaire": 5} for p in produits],
+        fournisseur=fournisseur,
+    )
+    creer_vente([{"produit": produits[0], "unite_utilisee": unite_base, "quantite": 4, "prix_unitaire": 1}])
+    creer_vente([{"produit": produits[1], "unite_utilisee": unite_base, "quantite": 2, "prix_unitaire": 1}]).soft_delete()
+    EntreeStock.objects.create(produit=produits[2], quantite=1, unite_utilisee=unite_conversion)
+    SortieStock.objects.create(produit=produits[3], quantite=7, unite_utilisee=unite_base, type_sortie="perte")
+    return produits
+
+
+@pytest.mark.django_db
+def test_happy_aucun_ecart_apres_operations(historique):
+    """[HAPPY] Stock attendu (conversion d'unité en SQL, miroirs ignorés) égal à stock_actuel"""
+    attendus = stocks_attendus()
+    assert attendus[historique[0].pk] == 0 + 30 - 4
+    assert attendus[historique[1].pk] == 1 + 30
+    assert attendus[historique[2].pk] == 2 + 30 + 10
+    assert attendus[historique[3].pk] == 3 + 30 - 7
+
+    point, ecarts = reconcilier()
+    assert ecarts == []
+    assert (point.produits_verifies, point.ecarts, point.incremental) == (5, 0, False)
+
+
+@pytest.mark.django_db
+def test_edge_ecart_detecte_puis_corrige(historique):
+    """[EDGE] Une dérive de stock_actuel est signalée, puis corrigée"""
+    produit = historique[4]
+    Produit.objects.filter(pk=produit.pk).update(stock_actuel=999)
+
+    point, ecarts = reconcilier()
+    assert [(e.produit_id, e.stock_actuel, e.attendu) for e in ecarts] == [(produit.pk, 999, 34)]
+    produit.refresh_from_db()
+    assert produit.stock_actuel == 999
+
+    point, ecarts = reconcilier(corriger=True)
+    assert point.corrige and point.ecarts == 1
+    produit.refresh_from_db()
+    assert produit.stock_actuel == 34
+    # La dérive venait d'une écriture hors journal : le journal était déjà juste
+    assert JournalStock.objects.filter(produit=produit).aggregate(total=Sum('delta'))['total'] == 34
+    assert not JournalStock.objects.filter(source_type=JournalStock.RECONCILIATION).exists()
+    assert reconcilier().ecarts == []
+
+
+@pytest.mark.django_db
+def test_perf_nombre_de_requetes_independant_du_volume(historique, categorie, unite_base, django_assert_max_num_queries):
+    """[PERF] Requêtes agrégées : leur nombre ne dépend pas du nombre de produits"""
+    Produit.objects.bulk_create(
+        Produit(nom=f"Vrac {i}", reference=f"REF-VRAC{i}", categorie=categorie, unite=unite_base, prix_unitaire=1)
+        for i in range(200)
+    )
+    Produit.objects.filter(reference__startswith="REF-VRAC").update(stock_actuel=1)
+    with django_assert_max_num_queries(15):
+        point, ecarts = reconcilier(corriger=True)
+    assert point.produits_verifies == 205
+    assert len(ecarts) == 200
+
+
+@pytest.mark.django_db
+def test_happy_incremental_depuis_le_dernier_point(historique, unite_base):
+    """[HAPPY] Une exécution incrémentale ne vérifie que les produits modifiés depuis le point"""
+    reconcilier()
+    EntreeStock.objects.create(produit=historique[0], quantite=5, unite_utilisee=unite_base)
+
+    point, ecarts = reconcilier(incremental=True)
+    assert point.incremental
+    assert point.produits_verifies == 1
+    assert ecarts == []
+
+
+@pytest.mark.django_db
+def test_edge_incremental_repart_du_dernier_point_sans_ecart(historique, unite_base):
+    """[EDGE] Un point laissant des écarts non corrigés n'est pas un point de reprise"""
+    reconcilier()
+    Produit.objects.filter(pk=historique[1].pk).update(stock_actuel=0)
+    EntreeStock.objects.create(produit=historique[1], quantite=5, unite_utilisee=unite_base)
+    assert reconcilier(incremental=True).point.ecarts == 1
+
+    EntreeStock.objects.create(produit=historique[2], quantite=5, unite_utilisee=unite_base)
+    point, ecarts = reconcilier(incremental=True, corriger=True)
+    assert point.produits_verifies == 2
+    assert [e.produit_id for e in ecarts] == [historique[1].pk]
+    total_journal = JournalStock.objects.filter(produit=historique[1]).aggregate(total=Sum('delta'))['total']
+    historique[1].refresh_from_db()
+    assert total_journal == historique[1].stock_actuel
+
+
+@pytest.mark.django_db
+def test_happy_commande_reconcilier_stock(historique, capsys):
+    """[HAPPY] La commande signale et corrige les écarts"""
+    Produit.objects.filter(pk=historique[0].pk).update(stock_actuel=0)
+    call_command("reconcilier_stock")
+    assert "1 écart(s)" in capsys.readouterr().out
+
+    call_command("reconcilier_stock", "--corriger")
+    assert "corrigé" in capsys.readouterr().out
+    assert PointReconciliation.objects.count() == 2
+    assert reconcilier().ecarts == []
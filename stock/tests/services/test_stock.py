@@ -0,0 +1,106 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from stock.models import Produit, EntreeStock, SortieStock
+from stock.services.stock import StockInsuffisant, ajuster_stock, ajuster_stocks
+
+
+@pytest.fixture
+def autre_produit(categorie, unite_base):
+    return Produit.objects.create(
+        nom="Autre produit", reference="REF-AUTRE", categorie=categorie, unite=unite_base,
+        prix_unitaire=5, stock_actuel=3,
+    )
+
+
+@pytest.mark.django_db
+def test_perf_ajuster_stock_une_requete_sur_stock_actuel(produit):
+    """[PERF] Une requête UPDATE qui n'écrit que stock_actuel, puis le journal et la détection du seuil d'alerte"""
+    with CaptureQueriesContext(connection) as requetes:
+        ajuster_stock(produit.pk, 7)
+    requetes = [r for r in requetes if not r["sql"].startswith(("SAVEPOINT", "RELEASE"))]
+    # Le stock repasse au-dessus du seuil (5) : l'alerte ouverte à la création est fermée
+    assert len(requetes) == 4
+    sql = requetes[0]["sql"]
+    assert sql.startswith("UPDATE")
+    assert sql.split(" SET ")[1].split(" WHERE ")[0].count("=") == 1
+
+    with CaptureQueriesContext(connection) as sans_franchissement:
+        ajuster_stock(produit.pk, 1)
+    assert len([r for r in sans_franchissement if not r["sql"].startswith(("SAVEPOINT", "RELEASE"))]) == 3
+    produit.refresh_from_db()
+    assert produit.stock_actuel == 8
+
+
+@pytest.mark.django_db
+def test_edge_ajuster_stock_decrement_conditionnel(produit):
+    """[EDGE] Un décrément supérieur au stock est refusé sans rien modifier"""
+    ajuster_stock(produit.pk, 5)
+    with pytest.raises(StockInsuffisant) as excinfo:
+        ajuster_stock(produit.pk, -6)
+    assert "Produit Test" in str(excinfo.value)
+    ajuster_stock(produit.pk, -5)
+    produit.refresh_from_db()
+    assert produit.stock_actuel == 0
+
+
+@pytest.mark.django_db
+def test_edge_ajuster_stocks_tout_ou_rien(produit, autre_produit):
+    """[EDGE] Si un produit manque de stock, aucune variation n'est appliquée"""
+    ajuster_stock(produit.pk, 10)
+    with pytest.raises(StockInsuffisant) as excinfo:
+        ajuster_stocks({produit.pk: -4, autre_produit.pk: -4})
+    assert "Autre produit" in str(excinfo.value)
+    assert "Produit Test" not in str(excinfo.value)
+
+    produit.refresh_from_db()
+    autre_produit.refresh_from_db()
+    assert (produit.stock_actuel, autre_produit.stock_actuel) == (10, 3)
+
+    ajuster_stocks({produit.pk: -4, autre_produit.pk: 2})
+    produit.refresh_from_db()
+    autre_produit.refresh_from_db()
+    assert (produit.stock_actuel, autre_produit.stock_actuel) == (6, 5)
+
+
+@pytest.mark.django_db
+def test_edge_instance_perimee_n_ecrase_pas_le_stock(produit):
+    """[EDGE] Sauvegarder une instance périmée ne réécrit pas stock_actuel"""
+    perimee = Produit.objects.get(pk=produit.pk)
+    ajuster_stock(produit.pk, 12)
+    perimee.nom = "Nouveau nom"
+    perimee.save()
+    produit.refresh_from_db()
+    assert produit.nom == "Nouveau nom"
+    assert produit.stock_actuel == 12
+
+
+@pytest.mark.django_db
+def test_happy_mouvements_appliques_une_seule_fois(produit, unite_base, unite_conversion, fournisseur):
+    """[HAPPY] Entrée, modification, sortie et annulation : stock appliqué une seule fois"""
+    entree = EntreeStock.objects.create(
+        produit=produit, quantite=2, unite_utilisee=unite_conversion, fournisseur=fournisseur, type_entree="achat",
+    )
+    produit.refresh_from_db()
+    assert produit.stock_actuel == 2000
+
+    entree.quantite = 3
+    entree.save()
+    produit.refresh_from_db()
+    assert produit.stock_actuel == 3000
+
+    sortie = SortieStock.objects.create(produit=produit, quantite=500, unite_utilisee=unite_base, type_sortie="perte")
+    sortie.delete()
+    entree.delete()
+    produit.refresh_from_db()
+    assert produit.stock_actuel == 0
+
+
+@pytest.mark.django_db
+def test_edge_sortie_stock_insuffisant_non_enregistree(produit, unite_base):
+    """[EDGE] Une sortie sans stock suffisant n'est pas enregistrée"""
+    with pytest.raises(StockInsuffisant):
+        SortieStock.objects.create(produit=produit, quantite=1, unite_utilisee=unite_base, type_sortie="perte")
+    assert not SortieStock.objects.exists()
+
@@ -0,0 +1,70 @@
+import pytest
+from django.core.management import call_command
+
+from stock.models import Vente, LigneVente, Reception, LigneReception
+from stock.services.totaux import recalculer_totaux
+
+
+@pytest.fixture
+def ventes(produit, unite_base):
+    resultat = []
+    for montant_paye in (0, 100, 1000):
+        vente = Vente.objects.create(montant_paye=montant_paye, total=999)
+        LigneVente.objects.bulk_create([
+            LigneVente(vente=vente, produit=produit, unite_utilisee=unite_base, quantite=3, prix_unitaire=50),
+            LigneVente(vente=vente, produit=produit, unite_utilisee=unite_base, quantite=1, prix_unitaire=25),
+            LigneVente(vente=vente, produit=produit, unite_utilisee=unite_base, quantite=9, prix_unitaire=99,
+                       is_active=False),
+        ])
+        resultat.append(vente)
+    return resultat
+
+
+@pytest.mark.django_db
+def test_happy_totaux_ventes_lignes_actives(ventes):
+    """[HAPPY] Le total ignore les lignes inactives ; reliquats client et magasin"""
+    assert recalculer_totaux(Vente.objects.all()) == 3
+    attendus = [(175, 175, 0), (175, 75, 0), (175, 0, 825)]
+    obtenus = [
+        (v.total, v.reliquat_client, v.reliquat_magasin)
+        for v in Vente.objects.order_by("id")
+    ]
+    assert obtenus == attendus
+
+
+@pytest.mark.django_db
+def test_perf_totaux_une_seule_requete(ventes, django_assert_num_queries):
+    """[PERF] Recalculer toute la table coûte une seule requête"""
+    with django_assert_num_queries(1):
+        recalculer_totaux(Vente.objects.all())
+
+
+@pytest.mark.django_db
+def test_edge_totaux_document_sans_ligne(fournisseur):
+    """[EDGE] Un document sans ligne active a un total nul"""
+    reception = Reception.objects.create(fournisseur=fournisseur, total=500, montant_paye=20)
+    reception.calculer_total()
+    assert reception.total == 0
+    assert reception.reliquat_fournisseur == 0
+    assert reception.reliquat_magasin == 20
+
+
+@pytest.mark.django_db
+def test_happy_totaux_reception_prix_de_la_ligne(produit, unite_base, fournisseur):
+    """[HAPPY] Le total d'une réception utilise le prix de la ligne, pas celui du produit"""
+    reception = Reception.objects.create(fournisseur=fournisseur)
+    LigneReception.objects.bulk_create([
+        LigneReception(reception=reception, produit=produit, unite_utilisee=unite_base, quantite=4, prix_unitaire=7),
+    ])
+    reception.calculer_total()
+    assert reception.total == 28
+    assert reception.reliquat_fournisseur == 28
+
+
+@pytest.mark.django_db
+def test_happy_commande_recalculer_totaux(ventes, fournisseur):
+    """[HAPPY] La commande recalcule ventes et réceptions par lots"""
+    Reception.objects.create(fournisseur=fournisseur, total=12)
+    call_command("recalculer_totaux", "--taille-lot", "2")
+    assert set(Vente.objects.values_list("total", flat=True)) == {175}
+    assert Reception.objects.get().total == 0
@@ -0,0 +1,100 @@
+import pytest
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from stock.models import Produit, Vente, LigneVente, SortieStock
+from stock.services.ventes import creer_vente
+
+
+@pytest.fixture
+def produits(categorie, unite_base, unite_conversion):
+    return [
+        Produit.objects.create(
+            nom=f"Produit {i}", reference=f"REF-V{i}", categorie=categorie, unite=unite_base,
+            unite_conversion=unite_conversion, facteur_conversion=1000, prix_unitaire=10, stock_actuel=5000,
+        )
+        for i in range(50)
+    ]
+
+
+def _panier(produits, unite, quantite=1, prix=10):
+    return [
+        {"produit": p, "unite_utilisee": unite, "quantite": quantite, "prix_unitaire": prix}
+        for p in produits
+    ]
+
+
+@pytest.mark.django_db
+def test_happy_vente_decremente_le_stock_une_seule_fois(produit, unite_base, unite_conversion):
+    """[HAPPY] Le stock est décrémenté une seule fois, total et sorties cohérents"""
+    Produit.objects.filter(pk=produit.pk).update(stock_actuel=5000)
+    vente = creer_vente([
+        {"produit": produit, "unite_utilisee": unite_base, "quantite": 300, "prix_unitaire": 1},
+        {"produit": produit, "unite_utilisee": unite_conversion, "quantite": 2, "prix_unitaire": 900},
+    ])
+
+    produit.refresh_from_db()
+    assert produit.stock_actuel == 5000 - 300 - 2000
+    vente.refresh_from_db()
+    assert vente.total == 2100
+    assert vente.reliquat_client == 2100
+    assert LigneVente.objects.filter(vente=vente).count() == 2
+    assert SortieStock.objects.filter(vente=vente, type_sortie="vente").count() == 2
+
+
+@pytest.mark.django_db
+def test_edge_vente_stock_insuffisant_rien_n_est_ecrit(produit, unite_base):
+    """[EDGE] Un stock insuffisant (cumulé sur plusieurs lignes) annule toute la vente"""
+    Produit.objects.filter(pk=produit.pk).update(stock_actuel=10)
+    with pytest.raises(ValidationError) as excinfo:
+        creer_vente(_panier([produit, produit], unite_base, quantite=6))
+    assert "insuffisant" in str(excinfo.value)
+    assert not Vente.objects.exists()
+    produit.refresh_from_db()
+    assert produit.stock_actuel == 10
+
+
+@pytest.mark.django_db
+def test_edge_vente_unite_invalide(produit):
+    """[EDGE] Une unité étrangère au produit est refusée"""
+    from stock.models import UniteDeMesure
+    litre = UniteDeMesure.objects.create(nom="Litre", symbole="L")
+    Produit.objects.filter(pk=produit.pk).update(stock_actuel=10)
+    with pytest.raises(ValidationError):
+        creer_vente(_panier([produit], litre))
+
+
+@pytest.mark.django_db
+def test_perf_vente_nombre_de_requetes_constant(produits, unite_base):
+    """[PERF] Un panier de 50 lignes coûte autant de requêtes qu'un panier d'une ligne"""
+    with CaptureQueriesContext(connection) as une_ligne:
+        creer_vente(_panier(produits[:1], unite_base))
+    with CaptureQueriesContext(connection) as cinquante_lignes:
+        creer_vente(_panier(produits, unite_base))
+    assert len(une_ligne) == len(cinquante_lignes)
+    assert Produit.objects.filter(stock_actuel=4998).count() == 1
+
+
+@pytest.mark.django_db
+def test_happy_vente_via_api(api_client, utilisateur, produit, unite_base):
+    """[HAPPY] POST /ventes/ passe par le moteur et trace l'utilisateur"""
+    Produit.objects.filter(pk=produit.pk).update(stock_actuel=100)
+    reponse = api_client.post("/api/v1/ventes/", {
+        "lignes": [{"produit": produit.id, "unite_utilisee": unite_base.id, "quantite": 4, "prix_unitaire": "12.50"}],
+    }, format="json")
+    assert reponse.status_code == 201, reponse.data
+    vente = Vente.objects.get()
+    assert vente.created_by == utilisateur
+    assert vente.total == 50
+    produit.refresh_from_db()
+    assert produit.stock_actuel == 96
+
+
+@pytest.mark.django_db
+def test_edge_vente_via_api_stock_insuffisant(api_client, produit, unite_base):
+    """[EDGE] Le stock insuffisant est renvoyé en 400"""
+    reponse = api_client.post("/api/v1/ventes/", {
+        "lignes": [{"produit": produit.id, "unite_utilisee": unite_base.id, "quantite": 4, "prix_unitaire": "1"}],
+    }, format="json")
+    assert reponse.status_code == 400
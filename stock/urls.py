@@ -1,8 +1,10 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 
 from .views import FournisseurViewSet, UniteDeMesureViewSet, CategorieViewSet, ProduitViewSet, ClientViewSet, \
     VenteViewSet, LigneVenteViewSet, EntreeStockViewSet, SortieStockViewSet, ReceptionViewSet, LigneReceptionViewSet, \
-    ModePaiementViewSet
+    ModePaiementViewSet, ReconciliationViewSet, ExportView, RapportVentesView, \
+    AlerteStockViewSet, ReapprovisionnementView, InventaireViewSet
 
 app_name = "stock"
 
@@ -20,5 +22,12 @@ router.register(r"entrees", EntreeStockViewSet, basename="entree-stock")
 router.register(r"sorties", SortieStockViewSet, basename="sortie-stock")
 router.register(r"receptions", ReceptionViewSet, basename="reception")
 router.register(r"ligne-receptions", LigneReceptionViewSet, basename="ligne-reception")
+router.register(r"reconciliations", ReconciliationViewSet, basename="reconciliation")
+router.register(r"alertes-stock", AlerteStockViewSet, basename="alerte-stock")
+router.register(r"inventaires", InventaireViewSet, basename="inventaire")
 
-urlpatterns = router.urls
+urlpatterns = [
+    path("exports/<slug:nom>.<slug:extension>", ExportView.as_view(), name="export"),
+    path("rapports/ventes/", RapportVentesView.as_view(), name="rapport-ventes"),
+    path("reapprovisionnement/", ReapprovisionnementView.as_view(), name="reapprovisionnement"),
+] + router.urls
@@ -5,4 +5,9 @@ from .unite import UniteDeMesureViewSet
 from .paiement import ModePaiementViewSet
 from .stock import SortieStockViewSet, EntreeStockViewSet
 from .vente import VenteViewSet, LigneVenteViewSet
-from .reception import ReceptionViewSet, LigneReceptionViewSet
\ No newline at end of file
+from .reception import ReceptionViewSet, LigneReceptionViewSet
+from .reconciliation import ReconciliationViewSet
+from .exports import ExportView
+from .rapports import RapportVentesView, ReapprovisionnementView
+from .alerte import AlerteStockViewSet
+from .inventaire import InventaireViewSet
@@ -0,0 +1,35 @@
+from drf_spectacular.utils import extend_schema
+from rest_framework import viewsets
+from rest_framework.permissions import IsAuthenticated
+
+from gestion_stock.metriques import SerialisationMesureeMixin
+from gestion_stock.pagination import DateCursorPagination
+from users.permissions import HasPermissionFromRole
+from ..models import AlerteStock
+from ..serializers import AlerteStockSerializer
+
+
+class AlertePagination(DateCursorPagination):
+    champ_date = 'debut'
+
+
+@extend_schema(tags=['Alertes'])
+class AlerteStockViewSet(SerialisationMesureeMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Historique des alertes de stock bas : passage sous le seuil (`debut`) et
+    remontée (`fin`). Filtres : `?produit=<id>`, `?ouvertes=1`.
+    """
+    queryset = AlerteStock.objects.all()
+    serializer_class = AlerteStockSerializer
+    pagination_class = AlertePagination
+    permission_classes = [IsAuthenticated, HasPermissionFromRole]
+    required_permission = "stock.view_alertestock"
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        produit = self.request.query_params.get('produit')
+        if produit and produit.isdigit():
+            queryset = queryset.filter(produit_id=produit)
+        if self.request.query_params.get('ouvertes') in ('1', 'true'):
+            queryset = queryset.filter(fin__isnull=True)
+        return queryset
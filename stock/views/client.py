@@ -1,6 +1,8 @@
 from drf_spectacular.utils import extend_schema
 from rest_framework import viewsets, filters
 from rest_framework.permissions import IsAuthenticated
+from gestion_stock.eager_loading import EagerLoadingMixin
+from gestion_stock.metriques import SerialisationMesureeMixin
 from users.permissions import HasPermissionFromRole
 
 from ..models import Client
@@ -8,13 +10,13 @@ from ..serializers import ClientSerializer
 
 
 @extend_schema(tags=['Clients'])
-class ClientViewSet(viewsets.ModelViewSet):
+class ClientViewSet(EagerLoadingMixin, SerialisationMesureeMixin, viewsets.ModelViewSet):
     """
     ViewSet pour gérer les clients :
     - Lecture, création, modification, suppression
     - Avec permissions dynamiques basées sur les rôles
     """
-    queryset = Client.objects.all()
+    queryset = Client.objects.all().order_by('id')
     serializer_class = ClientSerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['nom', 'email', 'telephone']
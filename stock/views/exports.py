@@ -0,0 +1,47 @@
+from django.http import Http404, StreamingHttpResponse
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
+
+from users.permissions import HasPermissionFromRole
+from ..services.exports import EXPORTS, FORMATS, lignes_export
+from .parametres import lire_date
+
+
+@extend_schema(tags=['Exports'])
+class ExportView(APIView):
+    """
+    Export en flux de l'historique : /exports/<ventes|receptions|entrees|sorties>.<csv|jsonl>
+    Paramètres optionnels `debut` et `fin` (dates incluses).
+    """
+    permission_classes = [IsAuthenticated, HasPermissionFromRole]
+
+    def initial(self, request, *args, **kwargs):
+        # Export inconnu : 404 avant le contrôle des permissions
+        self.export = EXPORTS.get(kwargs['nom'])
+        if self.export is None or kwargs['extension'] not in FORMATS:
+            raise Http404
+        self.required_permission = self.export.permission
+        super().initial(request, *args, **kwargs)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter('debut', OpenApiTypes.STR, description="Date (AAAA-MM-JJ) ou date-heure de début, incluse."),
+            OpenApiParameter('fin', OpenApiTypes.STR, description="Date (AAAA-MM-JJ) ou date-heure de fin, incluse."),
+        ],
+        responses={(200, 'text/csv'): OpenApiTypes.STR, (200, 'application/x-ndjson'): OpenApiTypes.STR},
+    )
+    def get(self, request, nom, extension):
+        debut = lire_date(request.query_params.get('debut'), 'debut')
+        fin = lire_date(request.query_params.get('fin'), 'fin', fin_de_journee=True)
+        ecrire, content_type = FORMATS[extension]
+
+        response = StreamingHttpResponse(
+            ecrire(self.export, lignes_export(self.export, debut, fin)),
+            content_type=content_type,
+        )
+        periode = '_'.join(date.date().isoformat() for date in (debut, fin) if date)
+        fichier = f"{nom}_{periode}" if periode else nom
+        response['Content-Disposition'] = f'attachment; filename="{fichier}.{extension}"'
+        return response
@@ -2,14 +2,17 @@ from drf_spectacular.utils import extend_schema
 from rest_framework import viewsets, filters
 from rest_framework.permissions import IsAuthenticated
 
+from gestion_stock.cache_reponses import CacheReponsesMixin
+from gestion_stock.eager_loading import EagerLoadingMixin
+from gestion_stock.metriques import SerialisationMesureeMixin
 from users.permissions import HasPermissionFromRole
 from ..models import Fournisseur
 from ..serializers import FournisseurSerializer
 
 
 @extend_schema(tags=['Fournisseurs'])
-class FournisseurViewSet(viewsets.ModelViewSet):
-    queryset = Fournisseur.objects.all()
+class FournisseurViewSet(CacheReponsesMixin, EagerLoadingMixin, SerialisationMesureeMixin, viewsets.ModelViewSet):
+    queryset = Fournisseur.objects.all().order_by('id')
     serializer_class = FournisseurSerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['nom', 'email', 'telephone']
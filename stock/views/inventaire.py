@@ -0,0 +1,109 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from drf_spectacular.utils import extend_schema, inline_serializer
+from rest_framework import mixins, serializers, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from gestion_stock.metriques import SerialisationMesureeMixin
+from gestion_stock.pagination import DateCursorPagination, ReferencePagination
+from users.permissions import HasPermissionFromRole
+from ..models import Inventaire
+from ..serializers import ComptagesSerializer, EcartInventaireSerializer, InventaireSerializer
+from ..services.inventaires import (
+    annuler_inventaire, cloturer_inventaire, ecarts, enregistrer_comptages, ouvrir_inventaire,
+)
+
+
+class InventairePagination(DateCursorPagination):
+    champ_date = 'date_ouverture'
+
+
+@extend_schema(tags=['Inventaires'])
+class InventaireViewSet(SerialisationMesureeMixin, mixins.CreateModelMixin, mixins.ListModelMixin,
+                        mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Inventaires physiques :
+    - POST : ouvre une session et fige le stock du périmètre (catégorie ou tout le catalogue) ;
+    - POST {id}/comptages/ {zone, lignes: [{produit, quantite}]} : quantités comptées d'une zone, en masse ;
+    - GET {id}/ecarts/ : écarts comptage - stock figé des produits comptés ;
+    - POST {id}/cloturer/ : applique tous les écarts au stock en une transaction ;
+    - POST {id}/annuler/ : abandonne la session sans toucher au stock.
+    """
+    queryset = Inventaire.objects.all()
+    serializer_class = InventaireSerializer
+    pagination_class = InventairePagination
+    permission_classes = [IsAuthenticated, HasPermissionFromRole]
+    required_permission = "stock.view_inventaire"
+
+    def get_permissions(self):
+        """Définit dynamiquement la permission requise selon l’action."""
+        if self.action == 'create':
+            self.required_permission = "stock.add_inventaire"
+        elif self.action == 'comptages':
+            self.required_permission = "stock.add_comptageinventaire"
+        elif self.action in ['cloturer', 'annuler']:
+            self.required_permission = "stock.change_inventaire"
+        else:
+            self.required_permission = "stock.view_inventaire"
+        return super().get_permissions()
+
+    def perform_create(self, serializer):
+        serializer.instance = ouvrir_inventaire(
+            description=serializer.validated_data.get('description', ''),
+            categorie=serializer.validated_data.get('categorie'),
+            utilisateur=self.request.user,
+        )
+
+    @extend_schema(request=ComptagesSerializer, responses=inline_serializer('ComptagesEnregistres', {
+        'zone': serializers.CharField(),
+        'comptages': serializers.IntegerField(),
+    }))
+    @action(detail=True, methods=['post'])
+    def comptages(self, request, pk=None):
+        """Enregistre (ou remplace) les quantités comptées d'une zone."""
+        inventaire = self.get_object()
+        demande = ComptagesSerializer(data=request.data)
+        demande.is_valid(raise_exception=True)
+        zone = demande.validated_data['zone']
+        try:
+            nombre = enregistrer_comptages(
+                inventaire,
+                {ligne['produit']: ligne['quantite'] for ligne in demande.validated_data['lignes']},
+                zone=zone,
+                utilisateur=request.user,
+            )
+        except DjangoValidationError as e:
+            raise ValidationError(e.messages)
+        return Response({'zone': zone, 'comptages': nombre}, status=status.HTTP_201_CREATED)
+
+    @extend_schema(responses=EcartInventaireSerializer(many=True))
+    @action(detail=True, methods=['get'], pagination_class=ReferencePagination)
+    def ecarts(self, request, pk=None):
+        """Écarts des produits comptés, par produit (`?non_nuls=1` : écarts non nuls seulement)."""
+        queryset = ecarts(self.get_object()).select_related('produit').order_by('produit_id')
+        if request.query_params.get('non_nuls') in ('1', 'true'):
+            queryset = queryset.exclude(ecart=0)
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(EcartInventaireSerializer(page, many=True).data)
+
+    @extend_schema(request=None, responses=InventaireSerializer)
+    @action(detail=True, methods=['post'])
+    def cloturer(self, request, pk=None):
+        """Clôture l'inventaire : écarts appliqués au stock et inscrits au journal."""
+        try:
+            inventaire = cloturer_inventaire(self.get_object(), utilisateur=request.user)
+        except DjangoValidationError as e:
+            raise ValidationError(e.messages)
+        return Response(InventaireSerializer(inventaire).data)
+
+    @extend_schema(request=None, responses=InventaireSerializer)
+    @action(detail=True, methods=['post'])
+    def annuler(self, request, pk=None):
+        """Abandonne l'inventaire."""
+        try:
+            inventaire = annuler_inventaire(self.get_object())
+        except DjangoValidationError as e:
+            raise ValidationError(e.messages)
+        return Response(InventaireSerializer(inventaire).data)
@@ -2,14 +2,19 @@ from drf_spectacular.utils import extend_schema
 from rest_framework import viewsets, filters
 from rest_framework.permissions import IsAuthenticated
 
+from gestion_stock.cache_reponses import CacheReponsesMixin
+from gestion_stock.eager_loading import EagerLoadingMixin
+from gestion_stock.metriques import SerialisationMesureeMixin
+from gestion_stock.versions import GetConditionnelMixin
 from users.permissions import HasPermissionFromRole
 from ..models import ModePaiement
 from ..serializers import ModePaiementSerializer
 
 
 @extend_schema(tags=['Mode_paiement'])
-class ModePaiementViewSet(viewsets.ModelViewSet):
-    queryset = ModePaiement.objects.all()
+class ModePaiementViewSet(GetConditionnelMixin, CacheReponsesMixin, EagerLoadingMixin,
+                          SerialisationMesureeMixin, viewsets.ModelViewSet):
+    queryset = ModePaiement.objects.all().order_by('id')
     serializer_class = ModePaiementSerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['nom', 'description']
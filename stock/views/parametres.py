@@ -0,0 +1,32 @@
+"""Lecture des paramètres de requête communs aux vues (dates)."""
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+
+def lire_date(valeur, nom, fin_de_journee=False, obligatoire=False):
+    """
+    Convertit un paramètre date (AAAA-MM-JJ) ou date-heure ISO 8601 en
+    datetime conscient du fuseau. Une date seule désigne le début de la
+    journée, ou sa fin avec `fin_de_journee`. Lève ValidationError (400).
+    """
+    if not valeur:
+        if obligatoire:
+            raise ValidationError({nom: "Ce paramètre est obligatoire."})
+        return None
+    try:
+        # La date seule d'abord : parse_datetime accepte aussi AAAA-MM-JJ (minuit)
+        jour = parse_date(valeur)
+        if jour is not None:
+            date = datetime.combine(jour, time.max if fin_de_journee else time.min)
+        else:
+            date = parse_datetime(valeur)
+    except ValueError:
+        date = None
+    if date is None:
+        raise ValidationError({nom: "Date invalide."})
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date)
+    return date
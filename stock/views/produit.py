@@ -1,18 +1,37 @@
-from drf_spectacular.utils import extend_schema
-from rest_framework import viewsets, filters
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema, inline_serializer
+from rest_framework import viewsets, filters, serializers
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
+from gestion_stock.cache_reponses import CacheReponsesMixin
+from gestion_stock.eager_loading import EagerLoadingMixin
+from gestion_stock.lecture_rapide import ListeRapideMixin
+from gestion_stock.metriques import SerialisationMesureeMixin
+from gestion_stock.versions import GetConditionnelMixin
 from users.permissions import HasPermissionFromRole
 from ..models import Categorie, Produit
-from ..serializers import CategorieSerializer, ProduitReadSerializer, ProduitWriteSerializer
+from ..serializers import (
+    CategorieSerializer, ImportCatalogueSerializer, ProduitAlerteSerializer, ProduitCompactSerializer,
+    ProduitReadSerializer, ProduitWriteSerializer, RapportImportSerializer, RechercheProduitSerializer,
+)
+from ..services.alertes import produits_en_alerte
+from ..services.catalogue import FormatInvalide, importer_catalogue, lire_fichier
+from ..services.journal import stock_a_la_date
+from ..services.recherche import rechercher_produits
+from .parametres import lire_date
 
 
 @extend_schema(tags=['Categories'])
-class CategorieViewSet(viewsets.ModelViewSet):
+class CategorieViewSet(GetConditionnelMixin, CacheReponsesMixin, EagerLoadingMixin,
+                       SerialisationMesureeMixin, viewsets.ModelViewSet):
     """
     ViewSet pour gérer les catégories de produits.
     """
-    queryset = Categorie.objects.all()
+    queryset = Categorie.objects.all().order_by('id')
     serializer_class = CategorieSerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['nom']
@@ -38,12 +57,16 @@ class CategorieViewSet(viewsets.ModelViewSet):
 
 
 @extend_schema(tags=['Produits'])
-class ProduitViewSet(viewsets.ModelViewSet):
+class ProduitViewSet(GetConditionnelMixin, ListeRapideMixin, EagerLoadingMixin,
+                     SerialisationMesureeMixin, viewsets.ModelViewSet):
     """
     ViewSet pour gérer les produits.
     """
-    queryset = Produit.objects.all()
+    queryset = Produit.objects.all().order_by('id')
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    # Sous-chaîne (icontains) du nom, de la référence ou de la catégorie ; sur
+    # PostgreSQL, UPPER(col) LIKE est servi par les index trigrammes (0011).
+    # Préfixe et recherche floue : action `recherche`
     search_fields = ['nom', 'reference', 'categorie__nom']
     ordering_fields = ['nom', 'quantite_stock', 'date_ajout']
 
@@ -54,7 +77,7 @@ class ProduitViewSet(viewsets.ModelViewSet):
         """
         Définit dynamiquement la permission Django requise selon l’action.
         """
-        if self.action == 'create':
+        if self.action in ['create', 'importer']:
             self.required_permission = "stock.add_produit"
         elif self.action in ['update', 'partial_update']:
             self.required_permission = "stock.change_produit"
@@ -72,4 +95,89 @@ class ProduitViewSet(viewsets.ModelViewSet):
         """
         if self.action in ['list', 'retrieve']:
             return ProduitReadSerializer
+        if self.action == 'recherche':
+            return ProduitCompactSerializer
+        if self.action == 'importer':
+            return ImportCatalogueSerializer
+        if self.action == 'alertes':
+            return ProduitAlerteSerializer
         return ProduitWriteSerializer
+
+    @extend_schema(
+        parameters=[RechercheProduitSerializer],
+        responses=inline_serializer('ResultatRechercheProduit', {
+            'mode': serializers.CharField(),
+            'results': ProduitCompactSerializer(many=True),
+        }),
+    )
+    @action(detail=False, methods=['get'])
+    def recherche(self, request):
+        """
+        Recherche de produits : référence exacte, puis préfixe (référence ou nom),
+        puis recherche floue par trigrammes (`mode=auto`, par défaut).
+        """
+        parametres = RechercheProduitSerializer(data=request.query_params)
+        parametres.is_valid(raise_exception=True)
+        mode, produits = rechercher_produits(
+            parametres.validated_data['q'],
+            mode=parametres.validated_data['mode'],
+            limite=parametres.validated_data['limit'],
+            queryset=Produit.objects.only(*ProduitCompactSerializer.Meta.fields),
+        )
+        return Response({'mode': mode, 'results': ProduitCompactSerializer(produits, many=True).data})
+
+    @action(detail=False, methods=['get'])
+    def alertes(self, request):
+        """
+        Produits dont le stock est au niveau ou sous le seuil d'alerte (index
+        partiel), avec la date de passage sous le seuil.
+        """
+        # Colonnes du modèle lues par le serializer (hors annotation alerte_depuis)
+        colonnes = {champ.name for champ in Produit._meta.concrete_fields}
+        queryset = produits_en_alerte().only(
+            *(champ for champ in ProduitAlerteSerializer.Meta.fields if champ in colonnes)
+        ).order_by('id')
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(ProduitAlerteSerializer(page, many=True).data)
+
+    @extend_schema(
+        parameters=[OpenApiParameter(
+            'date', OpenApiTypes.STR, required=True,
+            description="Date (AAAA-MM-JJ, fin de journée) ou date-heure ISO 8601.",
+        )],
+        responses=inline_serializer('StockALaDate', {
+            'produit': serializers.IntegerField(),
+            'date': serializers.DateTimeField(),
+            'stock': serializers.IntegerField(),
+        }),
+    )
+    @action(detail=True, methods=['get'], url_path='stock-at')
+    def stock_at(self, request, pk=None):
+        """Stock du produit (en unité de base) à une date donnée, d'après le journal du stock."""
+        produit = self.get_object()
+        date = lire_date(request.query_params.get('date'), 'date', fin_de_journee=True, obligatoire=True)
+        return Response({
+            'produit': produit.pk,
+            'date': date,
+            'stock': stock_a_la_date(produit.pk, date),
+        })
+
+    @extend_schema(request={'multipart/form-data': ImportCatalogueSerializer}, responses=RapportImportSerializer)
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def importer(self, request):
+        """
+        Import en masse du catalogue (fichier CSV ou JSONL) : crée ou met à
+        jour les produits par référence et renvoie les erreurs ligne par ligne.
+        """
+        # L'import crée et modifie des produits : les deux permissions sont requises
+        if not request.user.has_perm("stock.change_produit"):
+            raise PermissionDenied()
+        parametres = ImportCatalogueSerializer(data=request.data)
+        parametres.is_valid(raise_exception=True)
+        try:
+            lignes = lire_fichier(parametres.validated_data['fichier'].read(), parametres.validated_data['format'])
+        except FormatInvalide as erreur:
+            raise ValidationError({'fichier': str(erreur)})
+
+        rapport = importer_catalogue(lignes, simuler=parametres.validated_data['simuler'])
+        return Response(RapportImportSerializer(rapport._asdict()).data)
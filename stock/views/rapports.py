@@ -0,0 +1,76 @@
+from decimal import Decimal
+
+from drf_spectacular.utils import extend_schema, inline_serializer
+from rest_framework import serializers
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from users.permissions import HasPermissionFromRole
+from ..serializers import CommandeReapproSerializer, LigneRapportVentesSerializer, RapportVentesDemandeSerializer, \
+    ReapprovisionnementDemandeSerializer
+from ..services.rapports import rapport_ventes
+from ..services.reappro import commandes
+
+
+@extend_schema(tags=['Rapports'])
+class RapportVentesView(APIView):
+    """
+    Chiffre d'affaires et quantités vendues sur une période, par jour,
+    produit, catégorie, mode de paiement ou vendeur. Les journées closes sont
+    lues dans les faits de vente journaliers, la journée en cours dans les lignes.
+    """
+    permission_classes = [IsAuthenticated, HasPermissionFromRole]
+    required_permission = "stock.view_ventejournaliere"
+
+    @extend_schema(
+        parameters=[RapportVentesDemandeSerializer],
+        responses=inline_serializer('RapportVentes', {
+            'debut': serializers.DateField(),
+            'fin': serializers.DateField(),
+            'par': serializers.CharField(),
+            'chiffre_affaires': serializers.DecimalField(max_digits=14, decimal_places=2),
+            'results': LigneRapportVentesSerializer(many=True),
+        }),
+    )
+    def get(self, request):
+        parametres = RapportVentesDemandeSerializer(data=request.query_params)
+        parametres.is_valid(raise_exception=True)
+        debut, fin, par = (parametres.validated_data[nom] for nom in ('debut', 'fin', 'par'))
+
+        lignes = rapport_ventes(debut, fin, par)
+        return Response({
+            'debut': debut,
+            'fin': fin,
+            'par': par,
+            'chiffre_affaires': str(sum((ligne['chiffre_affaires'] for ligne in lignes), Decimal('0.00'))),
+            'results': LigneRapportVentesSerializer(lignes, many=True).data,
+        })
+
+
+@extend_schema(tags=['Rapports'])
+class ReapprovisionnementView(APIView):
+    """
+    Quantités à commander par fournisseur, d'après la demande journalière
+    (moyenne et écart-type sur `jours` journées closes), le stock actuel, le
+    délai de livraison et le cycle observé entre deux réceptions.
+    """
+    permission_classes = [IsAuthenticated, HasPermissionFromRole]
+    required_permission = "stock.view_ventejournaliere"
+
+    @extend_schema(
+        parameters=[ReapprovisionnementDemandeSerializer],
+        responses=inline_serializer('Reapprovisionnement', {
+            'montant': serializers.FloatField(),
+            'results': CommandeReapproSerializer(many=True),
+        }),
+    )
+    def get(self, request):
+        parametres = ReapprovisionnementDemandeSerializer(data=request.query_params)
+        parametres.is_valid(raise_exception=True)
+
+        resultats = commandes(**parametres.validated_data)
+        return Response({
+            'montant': round(sum(commande.montant for commande in resultats), 2),
+            'results': CommandeReapproSerializer(resultats, many=True).data,
+        })
@@ -1,10 +1,20 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
 from drf_spectacular.utils import extend_schema
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
+from gestion_stock.eager_loading import EagerLoadingMixin
+from gestion_stock.lecture_rapide import ListeRapideMixin
+from gestion_stock.metriques import SerialisationMesureeMixin
+from gestion_stock.pagination import DateCursorPagination
 from users.permissions import HasPermissionFromRole
 from ..mixins import UserTrackMixin
+from ..services.annulations import annuler_receptions
 from ..models import Reception, LigneReception
+from ..serializers.annulation import AnnulationDemandeSerializer, AnnulationSerializer
 from ..serializers.reception import (
     ReceptionReadSerializer,
     ReceptionWriteSerializer,
@@ -14,8 +24,11 @@ from ..serializers.reception import (
 
 
 @extend_schema(tags=['Receptions'])
-class ReceptionViewSet(UserTrackMixin,viewsets.ModelViewSet):
-    queryset = Reception.objects.all().prefetch_related("lignes", "fournisseur")
+class ReceptionViewSet(UserTrackMixin, ListeRapideMixin, EagerLoadingMixin,
+                       SerialisationMesureeMixin, viewsets.ModelViewSet):
+    # Lignes, produits, unités et fournisseur : préchargés par EagerLoadingMixin
+    queryset = Reception.objects.all()
+    pagination_class = DateCursorPagination
     permission_classes = [IsAuthenticated, HasPermissionFromRole]
     required_permission = "stock.view_reception"
 
@@ -29,7 +42,7 @@ class ReceptionViewSet(UserTrackMixin,viewsets.ModelViewSet):
             self.required_permission = "stock.add_reception"
         elif self.action in ['update', 'partial_update']:
             self.required_permission = "stock.change_reception"
-        elif self.action == 'destroy':
+        elif self.action in ['destroy', 'annuler']:
             self.required_permission = "stock.delete_reception"
         else:
             self.required_permission = "stock.view_reception"
@@ -43,10 +56,31 @@ class ReceptionViewSet(UserTrackMixin,viewsets.ModelViewSet):
             return ReceptionWriteSerializer
         return ReceptionReadSerializer
 
+    @extend_schema(request=AnnulationDemandeSerializer, responses=AnnulationSerializer)
+    @action(detail=False, methods=['post'])
+    def annuler(self, request):
+        """
+        Annule un lot de réceptions {ids} : stock retiré par produit, lignes,
+        entrées miroirs et réceptions désactivées en quelques requêtes.
+        """
+        demande = AnnulationDemandeSerializer(data=request.data)
+        demande.is_valid(raise_exception=True)
+        try:
+            annulation = annuler_receptions(demande.validated_data['ids'], utilisateur=request.user)
+        except DjangoValidationError as e:
+            raise ValidationError(e.messages)
+        return Response(AnnulationSerializer(annulation._asdict()).data)
+
+
+class LigneReceptionPagination(DateCursorPagination):
+    # Lignes parcourues par date de la réception, sans COUNT(*) par page
+    champ_date = 'reception__date'
+
 
 @extend_schema(tags=['Lignes-reception'])
-class LigneReceptionViewSet(viewsets.ModelViewSet):
+class LigneReceptionViewSet(EagerLoadingMixin, SerialisationMesureeMixin, viewsets.ModelViewSet):
     queryset = LigneReception.objects.all().select_related("produit", "reception")
+    pagination_class = LigneReceptionPagination
     permission_classes = [IsAuthenticated, HasPermissionFromRole]
     required_permission = "stock.view_lignereception"
 
@@ -0,0 +1,53 @@
+from drf_spectacular.utils import extend_schema, inline_serializer
+from rest_framework import mixins, status, viewsets
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from gestion_stock.metriques import SerialisationMesureeMixin
+from users.permissions import HasPermissionFromRole
+from ..models import PointReconciliation
+from ..serializers import EcartStockSerializer, PointReconciliationSerializer, ReconciliationDemandeSerializer
+from ..services.reconciliation import reconcilier
+
+
+@extend_schema(tags=['Reconciliation'])
+class ReconciliationViewSet(SerialisationMesureeMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    Réconciliation du stock :
+    - GET : historique des exécutions (points de réconciliation) ;
+    - POST {corriger, incremental} : recalcule le stock attendu depuis les
+      mouvements, renvoie les écarts et les corrige si demandé.
+    """
+    queryset = PointReconciliation.objects.all().order_by('-id')
+    serializer_class = PointReconciliationSerializer
+    permission_classes = [IsAuthenticated, HasPermissionFromRole]
+    required_permission = "stock.view_pointreconciliation"
+
+    # Nombre maximal d'écarts détaillés dans la réponse (le total est dans `point`)
+    limite_ecarts = 500
+
+    def get_permissions(self):
+        """
+        Définit dynamiquement la permission requise selon l’action.
+        """
+        if self.action == 'create':
+            self.required_permission = "stock.add_pointreconciliation"
+        else:
+            self.required_permission = "stock.view_pointreconciliation"
+        return super().get_permissions()
+
+    @extend_schema(
+        request=ReconciliationDemandeSerializer,
+        responses={201: inline_serializer('RapportReconciliation', {
+            'point': PointReconciliationSerializer(),
+            'ecarts': EcartStockSerializer(many=True),
+        })},
+    )
+    def create(self, request, *args, **kwargs):
+        demande = ReconciliationDemandeSerializer(data=request.data)
+        demande.is_valid(raise_exception=True)
+        rapport = reconcilier(**demande.validated_data)
+        return Response({
+            'point': PointReconciliationSerializer(rapport.point).data,
+            'ecarts': EcartStockSerializer(rapport.ecarts[:self.limite_ecarts], many=True).data,
+        }, status=status.HTTP_201_CREATED)
@@ -1,7 +1,13 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
 from drf_spectacular.utils import extend_schema
 from rest_framework import viewsets, filters
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 
+from gestion_stock.eager_loading import EagerLoadingMixin
+from gestion_stock.lecture_rapide import ListeRapideMixin
+from gestion_stock.metriques import SerialisationMesureeMixin
+from gestion_stock.pagination import DateCursorPagination
 from users.permissions import HasPermissionFromRole
 from ..mixins import UserTrackMixin
 from ..models import EntreeStock, SortieStock
@@ -12,15 +18,44 @@ from ..serializers import (
     SortieStockWriteSerializer,
 )
 
+class MiroirLectureSeuleMixin:
+    """
+    Mouvements miroirs d'un document (sortie d'une vente, entrée d'une
+    réception) : ni modification ni suppression par l'API, le stock étant
+    porté par les lignes du document (annulation : action `annuler`). La
+    suppression d'un autre mouvement est refusée (400) si le stock ne permet
+    pas de l'annuler.
+    """
+
+    def perform_update(self, serializer):
+        self.refuser_miroir(serializer.instance)
+        super().perform_update(serializer)
+
+    def perform_destroy(self, instance):
+        self.refuser_miroir(instance)
+        # Restitution refusée si le stock du mouvement a déjà été consommé (StockInsuffisant)
+        try:
+            super().perform_destroy(instance)
+        except DjangoValidationError as e:
+            raise ValidationError(e.messages)
+
+    def refuser_miroir(self, mouvement):
+        if mouvement.est_miroir:
+            raise ValidationError(
+                "Mouvement généré par un document : modifiez ou annulez la vente ou la réception d'origine."
+            )
+
+
 @extend_schema(tags=['Entree_stock'])
-class EntreeStockViewSet(UserTrackMixin,viewsets.ModelViewSet):
+class EntreeStockViewSet(MiroirLectureSeuleMixin, UserTrackMixin, ListeRapideMixin, EagerLoadingMixin,
+                         SerialisationMesureeMixin, viewsets.ModelViewSet):
     """
     ViewSet pour gérer les entrées de stock.
     """
     queryset = EntreeStock.objects.all()
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [filters.SearchFilter]
     search_fields = ['produit__nom', 'fournisseur__nom']
-    ordering_fields = ['date_entree', 'produit__nom']
+    pagination_class = DateCursorPagination
     permission_classes = [IsAuthenticated, HasPermissionFromRole]
 
     def get_permissions(self):
@@ -49,14 +84,15 @@ class EntreeStockViewSet(UserTrackMixin,viewsets.ModelViewSet):
 
 
 @extend_schema(tags=['Sortie_stock'])
-class SortieStockViewSet(UserTrackMixin,viewsets.ModelViewSet):
+class SortieStockViewSet(MiroirLectureSeuleMixin, UserTrackMixin, ListeRapideMixin, EagerLoadingMixin,
+                         SerialisationMesureeMixin, viewsets.ModelViewSet):
     """
     ViewSet pour gérer les sorties de stock.
     """
     queryset = SortieStock.objects.all()
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [filters.SearchFilter]
     search_fields = ['produit__nom', 'client__nom']
-    ordering_fields = ['date_sortie', 'produit__nom']
+    pagination_class = DateCursorPagination
     permission_classes = [IsAuthenticated, HasPermissionFromRole]
 
     def get_permissions(self):
@@ -2,16 +2,21 @@ from drf_spectacular.utils import extend_schema
 from rest_framework import filters, viewsets
 from rest_framework.permissions import IsAuthenticated
 
+from gestion_stock.cache_reponses import CacheReponsesMixin
+from gestion_stock.eager_loading import EagerLoadingMixin
+from gestion_stock.metriques import SerialisationMesureeMixin
+from gestion_stock.versions import GetConditionnelMixin
 from users.permissions import HasPermissionFromRole
 from ..models import UniteDeMesure
 from ..serializers import UniteDeMesureSerializer
 
 @extend_schema(tags=['Unites'])
-class UniteDeMesureViewSet(viewsets.ModelViewSet):
+class UniteDeMesureViewSet(GetConditionnelMixin, CacheReponsesMixin, EagerLoadingMixin,
+                           SerialisationMesureeMixin, viewsets.ModelViewSet):
     """
     ViewSet pour gérer les unités de mesure.
     """
-    queryset = UniteDeMesure.objects.all()
+    queryset = UniteDeMesure.objects.all().order_by('id')
     serializer_class = UniteDeMesureSerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['nom', 'abreviation']
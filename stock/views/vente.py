@@ -1,11 +1,22 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
 from drf_spectacular.utils import extend_schema
 from rest_framework import viewsets, filters
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
+from gestion_stock.eager_loading import EagerLoadingMixin
+from gestion_stock.lecture_rapide import ListeRapideMixin
+from gestion_stock.metriques import SerialisationMesureeMixin
+from gestion_stock.pagination import DateCursorPagination
 from users.permissions import HasPermissionFromRole
 from ..mixins import UserTrackMixin
+from ..services.annulations import annuler_ventes
 from ..models import Vente, LigneVente
 from ..serializers import (
+    AnnulationDemandeSerializer,
+    AnnulationSerializer,
     VenteReadSerializer,
     VenteWriteSerializer,
     LigneVenteReadSerializer,
@@ -13,14 +24,15 @@ from ..serializers import (
 )
 
 @extend_schema(tags=['Ventes'])
-class VenteViewSet(UserTrackMixin,viewsets.ModelViewSet):
+class VenteViewSet(UserTrackMixin, ListeRapideMixin, EagerLoadingMixin,
+                   SerialisationMesureeMixin, viewsets.ModelViewSet):
     """
     ViewSet pour gérer les ventes avec permissions dynamiques et code propre.
     """
     queryset = Vente.objects.all().order_by('-date')
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [filters.SearchFilter]
     search_fields = ['client__nom', 'mode_paiement__nom']
-    ordering_fields = ['date', 'total', 'montant_paye']
+    pagination_class = DateCursorPagination
 
     permission_classes = [IsAuthenticated, HasPermissionFromRole]
     required_permission = "stock.view_vente"  # par défaut
@@ -37,22 +49,42 @@ class VenteViewSet(UserTrackMixin,viewsets.ModelViewSet):
             self.required_permission = "stock.add_vente"
         elif self.action in ['update', 'partial_update']:
             self.required_permission = "stock.change_vente"
-        elif self.action == 'destroy':
+        elif self.action in ['destroy', 'annuler']:
             self.required_permission = "stock.delete_vente"
         else:
             self.required_permission = "stock.view_vente"
         return super().get_permissions()
 
+    @extend_schema(request=AnnulationDemandeSerializer, responses=AnnulationSerializer)
+    @action(detail=False, methods=['post'])
+    def annuler(self, request):
+        """
+        Annule un lot de ventes {ids} : stock restitué par produit, lignes,
+        sorties miroirs et ventes désactivées en quelques requêtes.
+        """
+        demande = AnnulationDemandeSerializer(data=request.data)
+        demande.is_valid(raise_exception=True)
+        try:
+            annulation = annuler_ventes(demande.validated_data['ids'], utilisateur=request.user)
+        except DjangoValidationError as e:
+            raise ValidationError(e.messages)
+        return Response(AnnulationSerializer(annulation._asdict()).data)
+
+
+class LigneVentePagination(DateCursorPagination):
+    # Lignes parcourues par date de la vente, sans COUNT(*) par page
+    champ_date = 'vente__date'
+
 
 @extend_schema(tags=['Lignes-vente'])
-class LigneVenteViewSet(viewsets.ModelViewSet):
+class LigneVenteViewSet(EagerLoadingMixin, SerialisationMesureeMixin, viewsets.ModelViewSet):
     """
     ViewSet pour gérer les lignes de vente avec permissions dynamiques et code propre.
     """
     queryset = LigneVente.objects.all().select_related('vente', 'produit')
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [filters.SearchFilter]
     search_fields = ['vente__id', 'produit__nom']
-    ordering_fields = ['vente__date', 'produit__nom', 'quantite']
+    pagination_class = LigneVentePagination
 
     permission_classes = [IsAuthenticated, HasPermissionFromRole]
     required_permission = "stock.view_lignevente"  # par défaut
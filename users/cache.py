@@ -0,0 +1,71 @@
+"""
+Résolution et mise en cache des permissions utilisateur.
+
+L'ensemble des permissions "app_label.codename" d'un utilisateur (directes +
+héritées via ses rôles) est calculé en une seule requête jointe, puis :
+- mémorisé sur l'objet utilisateur pour la durée de la requête HTTP ;
+- conservé dans le cache Django, sous une clé qui contient un numéro de version
+  (gestion_stock/versions.py), si ce cache est partagé par tous les workers
+  (CACHE_PARTAGE).
+
+Toute modification de Role.permissions, User.roles ou User.user_permissions
+incrémente la version (voir users/signals.py) : les anciennes entrées ne sont
+alors plus jamais lues et expirent d'elles-mêmes.
+"""
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.db.models import Q
+
+from gestion_stock.versions import cache_partage, incrementer, version
+
+CLE_VERSION = "users:permissions:version"
+ATTRIBUT_MEMO = "_permissions_resolues"
+DUREE_CACHE = 60 * 60  # 1 heure
+
+
+def version_permissions():
+    """Retourne la version courante du cache de permissions."""
+    return version(CLE_VERSION)
+
+
+def invalider_permissions():
+    """Invalide les permissions mises en cache pour tous les utilisateurs."""
+    incrementer(CLE_VERSION)
+
+
+def charger_permissions(user):
+    """Calcule l'ensemble des permissions d'un utilisateur en une requête."""
+    lignes = (
+        Permission.objects
+        .filter(Q(user=user) | Q(roles__users=user))
+        .values_list('content_type__app_label', 'codename')
+        .distinct()
+    )
+    return frozenset(f"{app_label}.{codename}" for app_label, codename in lignes)
+
+
+def permissions_utilisateur(user):
+    """
+    Retourne l'ensemble des permissions "app_label.codename" de l'utilisateur.
+    Avec un cache partagé, aucune requête SQL n'est émise tant que la version
+    n'a pas changé ; sinon, une requête par objet utilisateur.
+    """
+    if not user.is_authenticated or user.pk is None:
+        return frozenset()
+
+    version = version_permissions()
+    memo = getattr(user, ATTRIBUT_MEMO, None)
+    if memo is not None and memo[0] == version:
+        return memo[1]
+
+    # Cache propre au processus : une révocation faite par un autre worker n'y serait pas vue
+    partage = cache_partage()
+    cle = f"users:permissions:{version}:{user.pk}"
+    permissions = cache.get(cle) if partage else None
+    if permissions is None:
+        permissions = charger_permissions(user)
+        if partage:
+            cache.set(cle, permissions, DUREE_CACHE)
+
+    setattr(user, ATTRIBUT_MEMO, (version, permissions))
+    return permissions
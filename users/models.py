@@ -34,11 +34,15 @@ class User(AbstractUser):
         role_permissions = Permission.objects.filter(roles__users=self)
         return user_permissions.union(role_permissions)
 
+    def get_permissions_resolues(self):
+        """Ensemble "app_label.codename" des permissions, mis en cache (voir users/cache.py)."""
+        from .cache import permissions_utilisateur
+        return permissions_utilisateur(self)
+
     def has_perm(self, perm, obj=None):
         """Vérifie si l’utilisateur possède une permission donnée."""
-        all_perms = {f"{p.content_type.app_label}.{p.codename}" for p in self.get_all_permissions()}
-        return perm in all_perms
+        return perm in self.get_permissions_resolues()
 
     def has_module_perms(self, app_label):
         """Vérifie si l’utilisateur a accès à un module (app)."""
-        return any(p.content_type.app_label == app_label for p in self.get_all_permissions())
\ No newline at end of file
+        return any(p.split('.', 1)[0] == app_label for p in self.get_permissions_resolues())
\ No newline at end of file
@@ -31,4 +31,5 @@ class HasPermissionFromRole(BasePermission):
         # Vérifier si l'utilisateur possède la permission requise
         # La méthode has_perm() est héritée du modèle User
         # Elle prend en compte les permissions directes et celles héritées via les rôles
+        # Le résultat est mis en cache (users/cache.py) : aucune requête SQL à chaud
         return request.user.has_perm(required_permission)
@@ -0,0 +1,28 @@
+from django.contrib.auth.models import Permission
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalider_permissions, ATTRIBUT_MEMO
+from .models import Role, User
+
+ACTIONS_M2M = {'post_add', 'post_remove', 'post_clear'}
+
+
+@receiver(m2m_changed, sender=Role.permissions.through)
+@receiver(m2m_changed, sender=User.roles.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def permissions_modifiees(sender, instance, action, **kwargs):
+    """Invalide le cache dès qu'une relation porteuse de permissions change."""
+    if action not in ACTIONS_M2M:
+        return
+    if isinstance(instance, User) and hasattr(instance, ATTRIBUT_MEMO):
+        delattr(instance, ATTRIBUT_MEMO)
+    invalider_permissions()
+
+
+@receiver(post_delete, sender=Role)
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+def role_ou_permission_modifie(sender, **kwargs):
+    """La suppression d'un rôle ne déclenche pas m2m_changed : on invalide ici."""
+    invalider_permissions()
@@ -1,3 +1,106 @@
-from django.test import TestCase
+import pytest
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
 
-# Create your tests here.
+from users.models import Role, User
+
+
+@pytest.fixture(autouse=True)
+def vider_cache(settings):
+    # Un seul processus : le cache mémoire est vu de toutes les requêtes des tests
+    settings.CACHE_PARTAGE = True
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def permission_vue_produit(db):
+    return Permission.objects.get(content_type__app_label="stock", codename="view_produit")
+
+
+@pytest.fixture
+def role_magasinier(db, permission_vue_produit):
+    role = Role.objects.create(nom="Magasinier")
+    role.permissions.add(permission_vue_produit)
+    return role
+
+
+@pytest.fixture
+def utilisateur(db, role_magasinier):
+    user = User.objects.create_user(username="caissier", password="secret")
+    user.roles.add(role_magasinier)
+    return user
+
+
+@pytest.mark.django_db
+def test_has_perm_via_role(utilisateur):
+    """[HAPPY] Une permission héritée d'un rôle est reconnue"""
+    assert utilisateur.has_perm("stock.view_produit")
+    assert not utilisateur.has_perm("stock.delete_produit")
+    assert utilisateur.has_module_perms("stock")
+    assert not utilisateur.has_module_perms("users")
+
+
+@pytest.mark.django_db
+def test_has_perm_permission_directe(utilisateur):
+    """[HAPPY] Une permission directe s'ajoute à celles des rôles"""
+    utilisateur.user_permissions.add(
+        Permission.objects.get(content_type__app_label="users", codename="view_user")
+    )
+    assert utilisateur.has_perm("users.view_user")
+    assert utilisateur.has_perm("stock.view_produit")
+
+
+@pytest.mark.django_db
+def test_has_perm_une_seule_requete_puis_aucune(utilisateur, django_assert_num_queries):
+    """[PERF] Une requête jointe au premier appel, aucune ensuite (même sur un nouvel objet)"""
+    user = User.objects.get(pk=utilisateur.pk)
+    with django_assert_num_queries(1):
+        assert user.has_perm("stock.view_produit")
+        assert user.has_perm("stock.view_produit")
+
+    autre_instance = User.objects.get(pk=utilisateur.pk)
+    with django_assert_num_queries(0):
+        assert autre_instance.has_perm("stock.view_produit")
+
+
+@pytest.mark.django_db
+def test_has_perm_sans_cache_partage(utilisateur, settings, django_assert_num_queries):
+    """[EDGE] Cache propre au processus : permissions relues pour chaque objet utilisateur"""
+    settings.CACHE_PARTAGE = False
+    user = User.objects.get(pk=utilisateur.pk)
+    with django_assert_num_queries(1):
+        assert user.has_perm("stock.view_produit")
+        assert user.has_perm("stock.view_produit")
+
+    autre_instance = User.objects.get(pk=utilisateur.pk)
+    with django_assert_num_queries(1):
+        assert autre_instance.has_perm("stock.view_produit")
+
+
+@pytest.mark.django_db
+def test_invalidation_role_permissions(utilisateur, role_magasinier):
+    """[EDGE] Modifier les permissions d'un rôle invalide le cache"""
+    assert not utilisateur.has_perm("stock.add_vente")
+    role_magasinier.permissions.add(
+        Permission.objects.get(content_type__app_label="stock", codename="add_vente")
+    )
+    assert User.objects.get(pk=utilisateur.pk).has_perm("stock.add_vente")
+    assert utilisateur.has_perm("stock.add_vente")
+
+
+@pytest.mark.django_db
+def test_invalidation_user_roles(utilisateur, role_magasinier):
+    """[EDGE] Retirer un rôle à l'utilisateur invalide le cache"""
+    assert utilisateur.has_perm("stock.view_produit")
+    utilisateur.roles.remove(role_magasinier)
+    assert not utilisateur.has_perm("stock.view_produit")
+
+
+@pytest.mark.django_db
+def test_invalidation_suppression_role(utilisateur, role_magasinier):
+    """[EDGE] Supprimer un rôle invalide le cache"""
+    assert utilisateur.has_perm("stock.view_produit")
+    role_magasinier.delete()
+    assert not User.objects.get(pk=utilisateur.pk).has_perm("stock.view_produit")
@@ -1,6 +1,8 @@
 from drf_spectacular.utils import extend_schema
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
+from gestion_stock.eager_loading import EagerLoadingMixin
+from gestion_stock.metriques import SerialisationMesureeMixin
 from users.permissions import HasPermissionFromRole
 
 from .models import Interface, Role, User
@@ -14,7 +16,7 @@ from .serializers import (
 # 🔹 INTERFACE VIEWSET
 # ============================================================
 @extend_schema(tags=['Interfaces'])
-class InterfaceViewSet(viewsets.ModelViewSet):
+class InterfaceViewSet(EagerLoadingMixin, SerialisationMesureeMixin, viewsets.ModelViewSet):
     """
     ViewSet pour gérer les interfaces :
     - Lecture (GET)
@@ -22,7 +24,7 @@ class InterfaceViewSet(viewsets.ModelViewSet):
     - Modification (PUT/PATCH)
     - Suppression (DELETE)
     """
-    queryset = Interface.objects.all()
+    queryset = Interface.objects.all().order_by('id')
 
     # 🔒 Permissions de sécurité
     permission_classes = [IsAuthenticated, HasPermissionFromRole]
@@ -51,12 +53,12 @@ class InterfaceViewSet(viewsets.ModelViewSet):
 # 🔹 ROLE VIEWSET
 # ============================================================
 @extend_schema(tags=['Roles'])
-class RoleViewSet(viewsets.ModelViewSet):
+class RoleViewSet(EagerLoadingMixin, SerialisationMesureeMixin, viewsets.ModelViewSet):
     """
     ViewSet pour gérer les rôles :
     - Chaque rôle peut avoir plusieurs permissions et interfaces associées.
     """
-    queryset = Role.objects.prefetch_related('interfaces', 'permissions').all()
+    queryset = Role.objects.order_by('id')
 
     permission_classes = [IsAuthenticated, HasPermissionFromRole]
     required_permission = "users.view_role"
@@ -83,13 +85,14 @@ class RoleViewSet(viewsets.ModelViewSet):
 # 🔹 USER VIEWSET
 # ============================================================
 @extend_schema(tags=['Users'])
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(EagerLoadingMixin, SerialisationMesureeMixin, viewsets.ModelViewSet):
     """
     ViewSet pour gérer les utilisateurs :
     - Gère aussi l’association des rôles
     - Précharge les rôles et leurs permissions pour optimiser les requêtes
+      (plan déduit du serializer par EagerLoadingMixin)
     """
-    queryset = User.objects.prefetch_related('roles__interfaces', 'roles__permissions')
+    queryset = User.objects.order_by('id')
 
     permission_classes = [IsAuthenticated, HasPermissionFromRole]
     required_permission = "users.view_user"